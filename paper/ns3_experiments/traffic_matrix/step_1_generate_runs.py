@@ -93,24 +93,35 @@ for traffic_mode in ["specific", "general"]:
             conflicting_pairs = []
             non_conflicting_pairs = [(1174, 1229), (1229, 1174)]
             local_shell.make_full_dir("extra_satgenpy_analysis_data")
-            for p in initial_list_from_to[2:]:  # Of course excluding the starting (1174, 1229) and (1229, 1174) pairs
 
-                # Resulting path filename
-                resulting_path_filename = (
+            # Resulting path filename of each pair
+            resulting_path_filenames = {}
+            for p in initial_list_from_to[2:]:
+                resulting_path_filenames[p] = (
                         "extra_satgenpy_analysis_data/"
                         "kuiper_630_isls_plus_grid_ground_stations_top_100_algorithm_free_one_only_over_isls/"
                         "100ms_for_200s/manual/data/networkx_path_" + str(p[0]) + "_to_" + str(p[1]) + ".txt"
                 )
 
-                # Generate the path file if it does not exist yet (expensive)
-                if not local_shell.file_exists(resulting_path_filename):
-                    local_shell.perfect_exec(
-                        "cd ../../../satgenpy; python -m satgen.post_analysis.main_print_routes_and_rtt "
-                        "../paper/ns3_experiments/traffic_matrix/extra_satgenpy_analysis_data "
-                        "../paper/satellite_networks_state/gen_data/"
-                        "kuiper_630_isls_plus_grid_ground_stations_top_100_algorithm_free_one_only_over_isls "
-                        "100 200 " + str(p[0]) + " " + str(p[1])
-                    )
+            # Generate the path files which do not exist yet (expensive), all in one go
+            missing_pairs = list(filter(
+                lambda x: not local_shell.file_exists(resulting_path_filenames[x]), initial_list_from_to[2:]
+            ))
+            if len(missing_pairs) > 0:
+                local_shell.write_file(
+                    "extra_satgenpy_analysis_data/pairs.txt",
+                    "".join(map(lambda x: "%d,%d\n" % (x[0], x[1]), missing_pairs))
+                )
+                local_shell.perfect_exec(
+                    "cd ../../../satgenpy; python -m satgen.post_analysis.main_print_routes_and_rtt "
+                    "../paper/ns3_experiments/traffic_matrix/extra_satgenpy_analysis_data "
+                    "../paper/satellite_networks_state/gen_data/"
+                    "kuiper_630_isls_plus_grid_ground_stations_top_100_algorithm_free_one_only_over_isls "
+                    "100 200 ../paper/ns3_experiments/traffic_matrix/extra_satgenpy_analysis_data/pairs.txt no_plot"
+                )
+
+            for p in initial_list_from_to[2:]:  # Of course excluding the starting (1174, 1229) and (1229, 1174) pairs
+                resulting_path_filename = resulting_path_filenames[p]
 
                 # Open the path file
                 with open(resulting_path_filename, "r") as f_in:
@@ -21,35 +21,28 @@
 # SOFTWARE.
 
 import exputil
+import sys
+sys.path.append("../../../satgenpy")
+import satgen
 
 
 def plot_pair_path_max_utilization(path_networkx_data, run_name, src_node_id, dst_node_id, is_static):
 
     # Read in the paths (list of: (time, path as a node list))
-    paths = []
-    with open(path_networkx_data + "/networkx_path_%d_to_%d.txt" % (src_node_id, dst_node_id), "r") as f_path:
-        for line in f_path:
-            spl = line.split(",")
-            if spl[1].strip() == "Unreachable":
-                paths.append((int(spl[0]), []))
-            else:
-                paths.append((int(spl[0]), list(map(lambda x: int(x), spl[1].split("-")))))
-            if is_static:
-                break
+    paths = list(map(
+        lambda x: (x[0], x[1] if x[1] is not None else []),
+        satgen.read_path_file(path_networkx_data + "/networkx_path_%d_to_%d.txt" % (src_node_id, dst_node_id))
+    ))
+    if is_static:
+        paths = paths[:1]
 
     # Read in the utilization file
     link_to_utilization = {}
-    with open("runs/" + run_name + "/logs_ns3/isl_utilization.csv", "r") as f_utilization_in:
-        for line in f_utilization_in:
-            spl = line.split(",")
-            from_id = int(spl[0])
-            to_id = int(spl[1])
-            from_time_ns = int(spl[2])
-            till_time_ns = int(spl[3])
-            utilization = float(spl[4])
-            if from_time_ns == 0:
-                link_to_utilization[(from_id, to_id)] = []
-            link_to_utilization[(from_id, to_id)].append((from_time_ns, till_time_ns, utilization))
+    intervals, utilizations = satgen.read_isl_utilization_csv("runs/" + run_name + "/logs_ns3/isl_utilization.csv")
+    for (from_id, to_id, from_time_ns, till_time_ns), utilization in zip(intervals.tolist(), utilizations.tolist()):
+        if from_time_ns == 0:
+            link_to_utilization[(from_id, to_id)] = []
+        link_to_utilization[(from_id, to_id)].append((from_time_ns, till_time_ns, utilization))
 
     # Create data and pdf filenames
     exputil.LocalShell().make_full_dir("data/" + run_name)
@@ -64,7 +64,9 @@ class MainHelper:
             isl_selection,            # isls_{none, plus_grid}
             gs_selection,             # ground_stations_{top_100, paris_moscow_grid}
             dynamic_state_algorithm,  # algorithm_{free_one_only_{gs_relays,_over_isls}, paired_many_only_over_isls}
-            num_threads
+            num_threads,
+            shortest_path_backend="floyd_warshall",  # {floyd_warshall, dijkstra, dijkstra_incremental}
+            parallelism="processes"                  # {threads, processes}
     ):
 
         # Add base name to setting
@@ -158,14 +160,16 @@ class MainHelper:
         print("Generating forwarding state...")
         satgen.help_dynamic_state(
             output_generated_data_dir,
-            num_threads,  # Number of threads
+            num_threads,  # Number of threads (or processes)
             name,
             time_step_ms,
             duration_s,
             self.MAX_GSL_LENGTH_M,
             self.MAX_ISL_LENGTH_M,
             dynamic_state_algorithm,
-            True
+            True,
+            shortest_path_backend,
+            parallelism
         )
 
     def calculate_failure(
@@ -176,7 +180,8 @@ class MainHelper:
             isl_selection,            # isls_{none, plus_grid}
             gs_selection,             # ground_stations_{top_100, paris_moscow_grid}
             dynamic_state_algorithm,  # algorithm_{free_one_only_{gs_relays,_over_isls}, paired_many_only_over_isls}
-            num_threads
+            num_threads,
+            shortest_path_backend="floyd_warshall"  # {floyd_warshall, dijkstra, dijkstra_incremental}
     ):
 
         # Add base name to setting
@@ -287,5 +292,6 @@ class MainHelper:
             self.MAX_ISL_LENGTH_M,
             dynamic_state_algorithm,
             failure_table,
-            True
+            True,
+            shortest_path_backend
         )
\ No newline at end of file
@@ -78,13 +78,15 @@ main_helper = MainHelper(
 
 def main():
     args = sys.argv[1:]
-    if len(args) != 6:
-        print("Must supply exactly six arguments")
+    if len(args) != 6 and len(args) != 7:
+        print("Must supply exactly six or seven arguments")
         print("Usage: python main_kuiper_630.py [duration (s)] [time step (ms)] "
               "[isls_plus_grid / isls_none] "
               "[ground_stations_{top_100, paris_moscow_grid}] "
               "[algorithm_{free_one_only_over_isls, free_one_only_gs_relays, paired_many_only_over_isls}] "
-              "[num threads]")
+              "[num threads] "
+              "[optional: shortest path backend {floyd_warshall, dijkstra, dijkstra_incremental} "
+              "(default: floyd_warshall)]")
         exit(1)
     else:
         main_helper.calculate(
@@ -95,6 +97,7 @@ def main():
             args[3],
             args[4],
             int(args[5]),
+            args[6] if len(args) == 7 else "floyd_warshall"
         )
 
 
@@ -122,35 +122,24 @@ commands_to_run.append("cd ../../satgenpy; python -m satgen.post_analysis.main_p
 
 # Constellation comparison
 print("Generating commands for constellation comparison...")
-for satgenpy_generated_constellation in [
+list_satgenpy_generated_constellations = [
     "kuiper_630_isls_none_ground_stations_paris_moscow_grid_algorithm_free_one_only_gs_relays",
     "kuiper_630_isls_plus_grid_ground_stations_top_100_algorithm_free_one_only_over_isls",
     "starlink_550_isls_plus_grid_ground_stations_top_100_algorithm_free_one_only_over_isls",
     "telesat_1015_isls_plus_grid_ground_stations_top_100_algorithm_free_one_only_over_isls"
-]:
-    for duration_s in [200]:
-        list_update_interval_ms = [50, 100, 1000]
+]
+list_duration_s = [200]
+list_update_interval_ms = [50, 100, 1000]
+for satgenpy_generated_constellation in list_satgenpy_generated_constellations:
+    for duration_s in list_duration_s:
 
-        # Path
+        # Path and RTT (in a single pass over the time steps)
         for update_interval_ms in list_update_interval_ms:
             commands_to_run.append(
                 "cd ../../satgenpy; "
-                "python -m satgen.post_analysis.main_analyze_path "
+                "python -m satgen.post_analysis.main_analyze_all_pairs "
                 "../paper/satgenpy_analysis/data ../paper/satellite_networks_state/gen_data/%s %d %d "
-                "> ../paper/satgenpy_analysis/data/command_logs/constellation_comp_path_%s_%dms_for_%ds.log "
-                "2>&1" % (
-                    satgenpy_generated_constellation, update_interval_ms, duration_s,
-                    satgenpy_generated_constellation, update_interval_ms, duration_s
-                )
-            )
-
-        # RTT
-        for update_interval_ms in list_update_interval_ms:
-            commands_to_run.append(
-                "cd ../../satgenpy; "
-                "python -m satgen.post_analysis.main_analyze_rtt "
-                "../paper/satgenpy_analysis/data ../paper/satellite_networks_state/gen_data/%s %d %d "
-                "> ../paper/satgenpy_analysis/data/command_logs/constellation_comp_rtt_%s_%dms_for_%ds.log "
+                "> ../paper/satgenpy_analysis/data/command_logs/constellation_comp_all_pairs_%s_%dms_for_%ds.log "
                 "2>&1" % (
                     satgenpy_generated_constellation, update_interval_ms, duration_s,
                     satgenpy_generated_constellation, update_interval_ms, duration_s
@@ -172,6 +161,22 @@ for satgenpy_generated_constellation in [
             )
         )
 
+# Propagate each constellation once for each time grid, such that all commands share the satellite positions
+print("Generating ephemeris for each constellation and time grid...")
+for satgenpy_generated_constellation in list_satgenpy_generated_constellations:
+    for duration_s in list_duration_s:
+        for update_interval_ms in list_update_interval_ms:
+            local_shell.perfect_exec(
+                "cd ../../satgenpy; "
+                "python -m satgen.ephemeris.main_generate_ephemeris "
+                "../paper/satellite_networks_state/gen_data/%s %d %d "
+                "> ../paper/satgenpy_analysis/data/command_logs/ephemeris_%s_%dms_for_%ds.log "
+                "2>&1" % (
+                    satgenpy_generated_constellation, update_interval_ms, duration_s,
+                    satgenpy_generated_constellation, update_interval_ms, duration_s
+                )
+            )
+
 # Run the commands
 print("Running commands (at most %d in parallel)..." % max_num_processes)
 for i in range(len(commands_to_run)):
@@ -6,4 +6,7 @@ from .dynamic_state import *
 from .description import *
 from .post_analysis import *
 from .distance_tools import *
+from .ephemeris import *
+from .fstate import *
 from .simulate_failures import *
+from .text_io import *
@@ -6,3 +6,18 @@ from .distance_tools import (
     create_basic_ground_station_for_satellite_shadow,
     geodetic2cartesian
 )
+from .position_tools import (
+    satellite_positions_m,
+    ground_station_positions_m,
+    distances_m_between_satellites,
+    distances_m_ground_stations_to_satellites
+)
+from .visibility_tools import (
+    ground_station_satellites_in_range_m,
+    ground_station_candidates_in_range_m
+)
+from .pass_prediction_tools import (
+    maximum_range_rate_m_per_s,
+    calculate_visibility_windows,
+    get_visibility_window_candidates
+)
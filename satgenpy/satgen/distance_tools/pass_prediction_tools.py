@@ -0,0 +1,300 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from .position_tools import satellite_positions_m, distances_m_ground_stations_to_satellites
+from astropy import units as u
+import math
+import numpy as np
+
+#
+# Pass prediction determines once for the entire run during which time windows a satellite can be
+# in range of a ground station, such that at each time step only the distances of those pairs have
+# to be evaluated.
+#
+# The windows are conservative: they contain every time instant at which the satellite is in range
+# (and possibly a bit more). This follows from a bound on how fast the distance between a ground
+# station and a satellite can change: over a sampling interval [t_a, t_b], the distance cannot drop
+# below (d(t_a) + d(t_b) - v_max * (t_b - t_a)) / 2. Intervals for which this lower bound exceeds the
+# maximum GSL length are certainly out of range. The windows are first found on a coarse sampling,
+# after which the rise and set of each window is refined by bisection using the same bound.
+#
+
+# Standard gravitational parameter of the Earth (m^3/s^2) and its rotation rate (rad/s)
+EARTH_MU_M3_PER_S2 = 3.986004418e14
+EARTH_ROTATION_RAD_PER_S = 7.2921159e-5
+
+# Safety factor on the maximum range rate (to cover the perturbations of SGP4 with respect
+# to a Kepler orbit) and margin on the maximum GSL length (to cover rounding)
+PASS_PREDICTION_RANGE_RATE_FACTOR = 1.1
+PASS_PREDICTION_MARGIN_M = 1000.0
+
+# Default coarse sampling interval
+PASS_PREDICTION_COARSE_STEP_NS = 10 * 1000 * 1000 * 1000
+
+
+def maximum_range_rate_m_per_s(satellites, ground_station_positions):
+    """
+    Upper bound on how fast the distance between any of the ground stations and any of the
+    satellites can change, which is the maximum Earth-fixed speed of a satellite (its speed at
+    perigee plus the rotation of the Earth at apogee) plus the maximum speed of a ground station.
+
+    :param satellites:                  List of satellites (as returned by read_tles()["satellites"])
+    :param ground_station_positions:    Ground station positions (as returned by ground_station_positions_m())
+
+    :return: Maximum range rate (m/s)
+    """
+    max_satellite_speed_m_per_s = 0.0
+    for satellite in satellites:
+        mean_motion_rad_per_s = satellite._n * 2.0 * math.pi / 86400.0
+        eccentricity = satellite._e
+        semi_major_axis_m = (EARTH_MU_M3_PER_S2 / mean_motion_rad_per_s ** 2) ** (1.0 / 3.0)
+        perigee_speed_m_per_s = math.sqrt(
+            EARTH_MU_M3_PER_S2 * (1.0 + eccentricity) / (semi_major_axis_m * (1.0 - eccentricity))
+        )
+        max_satellite_speed_m_per_s = max(
+            max_satellite_speed_m_per_s,
+            perigee_speed_m_per_s + EARTH_ROTATION_RAD_PER_S * semi_major_axis_m * (1.0 + eccentricity)
+        )
+    max_ground_station_radius_m = 0.0
+    if len(ground_station_positions) > 0:
+        max_ground_station_radius_m = float(np.max(np.linalg.norm(ground_station_positions, axis=1)))
+    return PASS_PREDICTION_RANGE_RATE_FACTOR * (
+        max_satellite_speed_m_per_s + EARTH_ROTATION_RAD_PER_S * max_ground_station_radius_m
+    )
+
+
+def _distance_lower_bound_m(distance_a_m, distance_b_m, duration_ns, max_range_rate_m_per_s):
+    """
+    Lower bound on the distance between two samples.
+
+    :param distance_a_m:            Distance at the start of the interval (m)
+    :param distance_b_m:            Distance at the end of the interval (m)
+    :param duration_ns:             Duration of the interval (ns)
+    :param max_range_rate_m_per_s:  Maximum range rate (m/s)
+
+    :return: Lower bound on the distance within the interval (m)
+    """
+    return (distance_a_m + distance_b_m - max_range_rate_m_per_s * (duration_ns / 1e9)) / 2.0
+
+
+def _pair_distances_m_at(epoch, satellites, ground_station_positions, gids, sids, times_ns):
+    """
+    Distance of each (ground station, satellite) pair at its own time instant.
+    The satellites are propagated once per distinct time instant.
+
+    :param epoch:                       Epoch (astropy Time)
+    :param satellites:                  List of satellites
+    :param ground_station_positions:    Ground station positions
+    :param gids:                        Ground station identifier of each pair
+    :param sids:                        Satellite identifier of each pair
+    :param times_ns:                    Time since epoch of each pair (ns)
+
+    :return: NumPy array with the distance of each pair (m)
+    """
+    distances_m = np.empty(len(gids))
+    unique_times_ns, inverse = np.unique(times_ns, return_inverse=True)
+    for i, time_ns in enumerate(unique_times_ns.tolist()):
+        idxs = np.flatnonzero(inverse == i)
+        positions = satellite_positions_m(
+            [satellites[sid] for sid in sids[idxs].tolist()], str(epoch), str(epoch + time_ns * u.ns)
+        )
+        distances_m[idxs] = np.linalg.norm(ground_station_positions[gids[idxs]] - positions, axis=1)
+    return distances_m
+
+
+def calculate_visibility_windows(
+        epoch,
+        satellites,
+        ground_station_positions,
+        max_gsl_length_m,
+        start_time_ns,
+        end_time_ns,
+        resolution_ns,
+        coarse_step_ns=PASS_PREDICTION_COARSE_STEP_NS
+):
+    """
+    Calculates for every (ground station, satellite) pair the time windows [rise, set] within
+    [start_time_ns, end_time_ns] during which the satellite can be in range of the ground station.
+    Every time instant at which it is in range falls within one of its windows.
+
+    :param epoch:                       Epoch (astropy Time)
+    :param satellites:                  List of satellites (as returned by read_tles()["satellites"])
+    :param ground_station_positions:    Ground station positions (as returned by ground_station_positions_m())
+    :param max_gsl_length_m:            Maximum length of a ground-to-satellite link (m)
+    :param start_time_ns:               Start of the time range (ns since epoch)
+    :param end_time_ns:                 End of the time range (ns since epoch)
+    :param resolution_ns:               Resolution to which the rise and set are refined (ns)
+    :param coarse_step_ns:              Coarse sampling interval (ns)
+
+    :return: Interval index dictionary: {
+                    "start_time_ns":    Start of the time range
+                    "end_time_ns":      End of the time range
+                    "rise_ns":          NumPy array with the rise of each window, sorted
+                    "set_ns":           NumPy array with the set of each window
+                    "gid":              NumPy array with the ground station of each window
+                    "sid":              NumPy array with the satellite of each window
+                    "max_window_ns":    Duration of the longest window
+              }
+    """
+    if end_time_ns < start_time_ns:
+        raise ValueError("End time must be at or after the start time")
+    if resolution_ns <= 0 or coarse_step_ns <= 0:
+        raise ValueError("Resolution and coarse step must be positive")
+    num_ground_stations = len(ground_station_positions)
+    num_satellites = len(satellites)
+    max_range_rate_m_per_s = maximum_range_rate_m_per_s(satellites, ground_station_positions)
+    threshold_m = max_gsl_length_m + PASS_PREDICTION_MARGIN_M
+
+    # Coarse sampling (the last sample is at the end of the time range)
+    num_intervals = max(1, int(math.ceil((end_time_ns - start_time_ns) / coarse_step_ns)))
+    sample_times_ns = [min(start_time_ns + k * coarse_step_ns, end_time_ns) for k in range(num_intervals + 1)]
+
+    # Rise and set interval of each run of coarse intervals during which a pair can be in range
+    rises = []  # (gid, sid, t_a, t_b, d_a, d_b) of the first interval of a run
+    sets = []   # (gid, sid, t_a, t_b, d_a, d_b) of the last interval of a run
+    prev_possible = np.zeros((num_ground_stations, num_satellites), dtype=bool)
+    prev_distances_m = None
+    distances_m = distances_m_ground_stations_to_satellites(
+        ground_station_positions,
+        satellite_positions_m(satellites, str(epoch), str(epoch + sample_times_ns[0] * u.ns))
+    )
+    for k in range(num_intervals + 1):
+        if k < num_intervals:
+            next_distances_m = distances_m_ground_stations_to_satellites(
+                ground_station_positions,
+                satellite_positions_m(satellites, str(epoch), str(epoch + sample_times_ns[k + 1] * u.ns))
+            )
+            possible = _distance_lower_bound_m(
+                distances_m, next_distances_m, sample_times_ns[k + 1] - sample_times_ns[k], max_range_rate_m_per_s
+            ) <= threshold_m
+        else:
+            next_distances_m = None
+            possible = np.zeros((num_ground_stations, num_satellites), dtype=bool)
+
+        # A run starts in this interval
+        gids, sids = np.nonzero(possible & ~prev_possible)
+        rises.append((
+            gids, sids, sample_times_ns[k], sample_times_ns[min(k + 1, num_intervals)],
+            distances_m[gids, sids], None if next_distances_m is None else next_distances_m[gids, sids]
+        ))
+
+        # A run ended in the previous interval
+        gids, sids = np.nonzero(prev_possible & ~possible)
+        sets.append((
+            gids, sids, sample_times_ns[k - 1], sample_times_ns[k],
+            None if prev_distances_m is None else prev_distances_m[gids, sids], distances_m[gids, sids]
+        ))
+
+        prev_possible = possible
+        prev_distances_m = distances_m
+        distances_m = next_distances_m
+
+    # Window rises, refined by bisection: the first half is kept if the pair can be in range during it
+    gids, sids, lo_ns, hi_ns, d_lo_m, d_hi_m = _concatenate_bounds(rises)
+    while np.any(hi_ns - lo_ns > resolution_ns):
+        active = np.flatnonzero(hi_ns - lo_ns > resolution_ns)
+        mid_ns = lo_ns[active] + (hi_ns[active] - lo_ns[active]) // 2
+        d_mid_m = _pair_distances_m_at(epoch, satellites, ground_station_positions, gids[active], sids[active], mid_ns)
+        first_half = _distance_lower_bound_m(
+            d_lo_m[active], d_mid_m, mid_ns - lo_ns[active], max_range_rate_m_per_s
+        ) <= threshold_m
+        hi_ns[active] = np.where(first_half, mid_ns, hi_ns[active])
+        d_hi_m[active] = np.where(first_half, d_mid_m, d_hi_m[active])
+        lo_ns[active] = np.where(first_half, lo_ns[active], mid_ns)
+        d_lo_m[active] = np.where(first_half, d_lo_m[active], d_mid_m)
+    rise_order = np.lexsort((lo_ns, sids, gids))
+    rise_gids, rise_sids, rise_ns = gids[rise_order], sids[rise_order], lo_ns[rise_order]
+
+    # Window sets, refined by bisection: the second half is kept if the pair can be in range during it
+    gids, sids, lo_ns, hi_ns, d_lo_m, d_hi_m = _concatenate_bounds(sets)
+    while np.any(hi_ns - lo_ns > resolution_ns):
+        active = np.flatnonzero(hi_ns - lo_ns > resolution_ns)
+        mid_ns = lo_ns[active] + (hi_ns[active] - lo_ns[active]) // 2
+        d_mid_m = _pair_distances_m_at(epoch, satellites, ground_station_positions, gids[active], sids[active], mid_ns)
+        second_half = _distance_lower_bound_m(
+            d_mid_m, d_hi_m[active], hi_ns[active] - mid_ns, max_range_rate_m_per_s
+        ) <= threshold_m
+        lo_ns[active] = np.where(second_half, mid_ns, lo_ns[active])
+        d_lo_m[active] = np.where(second_half, d_mid_m, d_lo_m[active])
+        hi_ns[active] = np.where(second_half, hi_ns[active], mid_ns)
+        d_hi_m[active] = np.where(second_half, d_hi_m[active], d_mid_m)
+    set_order = np.lexsort((hi_ns, sids, gids))
+    set_ns = hi_ns[set_order]
+
+    # The i-th rise of a pair belongs to its i-th set, after which the windows are sorted by rise
+    window_order = np.argsort(rise_ns, kind="stable")
+    rise_ns, set_ns = rise_ns[window_order], set_ns[window_order]
+    return {
+        "start_time_ns": start_time_ns,
+        "end_time_ns": end_time_ns,
+        "rise_ns": rise_ns,
+        "set_ns": set_ns,
+        "gid": rise_gids[window_order],
+        "sid": rise_sids[window_order],
+        "max_window_ns": max(0, int(np.max(set_ns - rise_ns))) if len(rise_ns) > 0 else 0
+    }
+
+
+def _concatenate_bounds(bounds):
+    """
+    Concatenates the per-sample rise or set records into arrays.
+
+    :param bounds: List of (gids, sids, t_a, t_b, d_a, d_b) records
+
+    :return: Tuple of NumPy arrays (gids, sids, t_a, t_b, d_a, d_b)
+    """
+    bounds = [b for b in bounds if len(b[0]) > 0]
+    if len(bounds) == 0:
+        empty_int = np.zeros(0, dtype=np.int64)
+        return empty_int, empty_int, empty_int.copy(), empty_int.copy(), np.zeros(0), np.zeros(0)
+    return (
+        np.concatenate([b[0] for b in bounds]).astype(np.int64),
+        np.concatenate([b[1] for b in bounds]).astype(np.int64),
+        np.concatenate([np.full(len(b[0]), b[2], dtype=np.int64) for b in bounds]),
+        np.concatenate([np.full(len(b[0]), b[3], dtype=np.int64) for b in bounds]),
+        np.concatenate([b[4] for b in bounds]),
+        np.concatenate([b[5] for b in bounds])
+    )
+
+
+def get_visibility_window_candidates(visibility_windows, time_since_epoch_ns):
+    """
+    Looks up the (ground station, satellite) pairs which can be in range at a time instant.
+
+    :param visibility_windows:      Interval index (as returned by calculate_visibility_windows())
+    :param time_since_epoch_ns:     Time since epoch (ns)
+
+    :return: Tuple (gids, sids) of NumPy arrays with the candidate pairs
+    """
+    if not visibility_windows["start_time_ns"] <= time_since_epoch_ns <= visibility_windows["end_time_ns"]:
+        raise ValueError(
+            "Time %d ns is outside of the visibility windows range [%d ns, %d ns]" % (
+                time_since_epoch_ns, visibility_windows["start_time_ns"], visibility_windows["end_time_ns"]
+            )
+        )
+
+    # Only windows which rose at most the longest window duration ago can still be open
+    rise_ns = visibility_windows["rise_ns"]
+    lo = np.searchsorted(rise_ns, time_since_epoch_ns - visibility_windows["max_window_ns"], side="left")
+    hi = np.searchsorted(rise_ns, time_since_epoch_ns, side="right")
+    idxs = lo + np.flatnonzero(visibility_windows["set_ns"][lo:hi] >= time_since_epoch_ns)
+    return visibility_windows["gid"][idxs], visibility_windows["sid"][idxs]
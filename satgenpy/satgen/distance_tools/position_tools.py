@@ -0,0 +1,167 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import math
+import ephem
+import numpy as np
+
+#
+# The functions in this file compute the positions of all satellites (and ground stations) at once
+# as NumPy arrays, such that distances can be calculated in a vectorized way instead of creating
+# an ephem observer and re-computing the satellite for every single pair.
+#
+# The Earth model is the one used internally by pyephem for Earth satellites (libastro earthsat.c),
+# such that the resulting distances are numerically the same as those of:
+#
+# (a) distance_m_ground_station_to_satellite(): equal up to the float32 rounding
+#     which pyephem applies to the range (relative difference < 1e-6)
+#
+# (b) distance_m_between_satellites(): within 10 meters, as the latter derives the distance
+#     from two float32 ranges and the separation angle using the law of cosines
+#
+
+# Earth radius and flattening as used by pyephem for Earth satellites (libastro earthsat.c)
+EPHEM_EARTH_RADIUS_M = 6378160.0
+EPHEM_EARTH_FLATTENING = 1.0 / 298.25
+
+
+def ephem_sidereal_angle_rad(date_str):
+    """
+    Computes the sidereal angle which pyephem uses to rotate between its
+    equatorial frame of date and the Earth-fixed frame.
+
+    :param date_str: The time instant (string)
+
+    :return: Sidereal angle in radians
+    """
+
+    # pyephem dates are relative to noon, whereas the satellite routines count from midnight
+    current_time = float(ephem.Date(date_str)) + 0.5
+    sidereal_day = math.floor(current_time)
+    t = (sidereal_day - 0.5) / 36525.0
+    sidereal_reference = (6.6460656 + 2400.051262 * t + 0.00002581 * t * t) / 24.0
+    sidereal_reference -= math.floor(sidereal_reference)
+    return 2.0 * math.pi * ((current_time - sidereal_day) * 1.0027379093 + sidereal_reference)
+
+
+def satellite_positions_m(satellites, epoch_str, date_str):
+    """
+    Computes the Earth-fixed Cartesian position of every satellite.
+    Each satellite is propagated exactly once.
+
+    :param satellites:  List of satellites (as returned by read_tles()["satellites"])
+    :param epoch_str:   Epoch time (string)
+    :param date_str:    The time instant when the positions should be calculated (string)
+
+    :return: NumPy array of shape (number of satellites, 3) with (x, y, z) in meters
+    """
+
+    num_satellites = len(satellites)
+    right_ascension = np.empty(num_satellites)
+    declination = np.empty(num_satellites)
+    elevation_m = np.empty(num_satellites)
+    for i in range(num_satellites):
+        satellites[i].compute(date_str, epoch=epoch_str)
+        right_ascension[i] = satellites[i].g_ra
+        declination[i] = satellites[i].g_dec
+        elevation_m[i] = satellites[i].elevation
+
+    # The elevation is relative to the ellipsoid below the satellite, which gives the radius
+    radius_m = elevation_m + EPHEM_EARTH_RADIUS_M * np.sqrt(
+        1.0 - (2.0 * EPHEM_EARTH_FLATTENING - EPHEM_EARTH_FLATTENING ** 2) * np.sin(declination) ** 2
+    )
+
+    # Rotate from the equatorial frame of date to the Earth-fixed frame
+    longitude = right_ascension - ephem_sidereal_angle_rad(date_str)
+
+    positions_m = np.empty((num_satellites, 3))
+    positions_m[:, 0] = radius_m * np.cos(declination) * np.cos(longitude)
+    positions_m[:, 1] = radius_m * np.cos(declination) * np.sin(longitude)
+    positions_m[:, 2] = radius_m * np.sin(declination)
+    return positions_m
+
+
+def ground_station_positions_m(ground_stations):
+    """
+    Computes the Earth-fixed Cartesian position of every ground station, in the same Earth model
+    as the one pyephem uses for its observers (which is why the cartesian_x/y/z of the extended
+    ground stations, calculated with WGS72, are not used here).
+
+    :param ground_stations: List of ground stations
+
+    :return: NumPy array of shape (number of ground stations, 3) with (x, y, z) in meters
+    """
+
+    positions_m = np.empty((len(ground_stations), 3))
+    for i in range(len(ground_stations)):
+
+        # Exactly as an ephem.Observer would interpret it (string arguments are in degrees)
+        latitude = float(ephem.degrees(str(ground_stations[i]["latitude_degrees_str"])))
+        longitude = float(ephem.degrees(str(ground_stations[i]["longitude_degrees_str"])))
+        elevation_m = ground_stations[i]["elevation_m_float"]
+
+        # Correct for the flattening of the Earth
+        lat = math.atan(1.0 / (1.0 - EPHEM_EARTH_FLATTENING ** 2) * math.tan(latitude))
+        g1 = EPHEM_EARTH_RADIUS_M / math.sqrt(
+            1.0 - (2.0 * EPHEM_EARTH_FLATTENING - EPHEM_EARTH_FLATTENING ** 2) * math.sin(lat) ** 2
+        )
+        g2 = g1 * (1.0 - EPHEM_EARTH_FLATTENING) ** 2
+        g1 += elevation_m
+        g2 += elevation_m
+
+        positions_m[i] = (
+            g1 * math.cos(lat) * math.cos(longitude),
+            g1 * math.cos(lat) * math.sin(longitude),
+            g2 * math.sin(lat)
+        )
+
+    return positions_m
+
+
+def distances_m_between_satellites(satellite_positions, list_isls):
+    """
+    Computes the straight distance of each ISL in meters.
+
+    :param satellite_positions:  Satellite positions (as returned by satellite_positions_m())
+    :param list_isls:            List of ISLs as (a, b) satellite identifier tuples
+
+    :return: NumPy array of shape (number of ISLs,) with the distance of each ISL in meters
+    """
+    if len(list_isls) == 0:
+        return np.zeros(0)
+    isls = np.array(list_isls, dtype=int)
+    return np.linalg.norm(satellite_positions[isls[:, 0]] - satellite_positions[isls[:, 1]], axis=1)
+
+
+def distances_m_ground_stations_to_satellites(ground_station_positions, satellite_positions):
+    """
+    Computes the straight distance between every ground station and every satellite in meters.
+
+    :param ground_station_positions:  Ground station positions (as returned by ground_station_positions_m())
+    :param satellite_positions:       Satellite positions (as returned by satellite_positions_m())
+
+    :return: NumPy array of shape (number of ground stations, number of satellites) in meters
+    """
+    return np.linalg.norm(
+        ground_station_positions[:, np.newaxis, :] - satellite_positions[np.newaxis, :, :],
+        axis=2
+    )
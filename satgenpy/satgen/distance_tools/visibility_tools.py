@@ -0,0 +1,105 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+from scipy.spatial import cKDTree
+import numpy as np
+
+# The KD-tree range query is done with a slightly larger radius, after which the exact same
+# distance as distances_m_ground_stations_to_satellites() decides whether a satellite is in range
+KD_TREE_RADIUS_MARGIN = 1e-9
+
+
+def ground_station_satellites_in_range_m(
+        ground_station_positions,
+        satellite_positions,
+        max_gsl_length_m,
+        satellite_ids=None
+):
+    """
+    Finds for every ground station the satellites which are in range, using a KD-tree over
+    the satellite positions instead of testing every satellite against every ground station.
+
+    The distances and the in-range decision are exactly those of distances_m_ground_stations_to_satellites().
+
+    :param ground_station_positions:  Ground station positions (as returned by ground_station_positions_m())
+    :param satellite_positions:       Satellite positions (as returned by satellite_positions_m())
+    :param max_gsl_length_m:          Maximum length of a ground-to-satellite link (m)
+    :param satellite_ids:             Satellites which can be in range (if None, all satellites)
+
+    :return: For every ground station, the list of (distance (m), satellite id) of the satellites
+             in range, sorted by increasing distance (equal distances by satellite id)
+    """
+    num_ground_stations = len(ground_station_positions)
+    if satellite_ids is None:
+        satellite_ids = np.arange(len(satellite_positions))
+    satellite_ids = np.array(sorted(satellite_ids), dtype=int)
+    if num_ground_stations == 0 or len(satellite_ids) == 0:
+        return [[] for _ in range(num_ground_stations)]
+
+    # Candidates within the (slightly larger) range
+    tree = cKDTree(satellite_positions[satellite_ids])
+    candidates = tree.query_ball_point(ground_station_positions, max_gsl_length_m * (1.0 + KD_TREE_RADIUS_MARGIN))
+    gid = np.repeat(np.arange(num_ground_stations), list(map(len, candidates)))
+    sid = satellite_ids[np.array([idx for c in candidates for idx in c], dtype=int)]
+
+    return ground_station_candidates_in_range_m(
+        ground_station_positions, satellite_positions, max_gsl_length_m, gid, sid
+    )
+
+
+def ground_station_candidates_in_range_m(
+        ground_station_positions,
+        satellite_positions,
+        max_gsl_length_m,
+        candidate_gids,
+        candidate_sids
+):
+    """
+    Same as ground_station_satellites_in_range_m(), but only the given (ground station, satellite)
+    candidate pairs are evaluated. Each pair must occur at most once.
+
+    :param ground_station_positions:  Ground station positions (as returned by ground_station_positions_m())
+    :param satellite_positions:       Satellite positions (as returned by satellite_positions_m())
+    :param max_gsl_length_m:          Maximum length of a ground-to-satellite link (m)
+    :param candidate_gids:            Ground station identifier of each candidate pair
+    :param candidate_sids:            Satellite identifier of each candidate pair
+
+    :return: For every ground station, the list of (distance (m), satellite id) of the candidate
+             satellites in range, sorted by increasing distance (equal distances by satellite id)
+    """
+    num_ground_stations = len(ground_station_positions)
+    if num_ground_stations == 0:
+        return []
+    gid = np.asarray(candidate_gids, dtype=int)
+    sid = np.asarray(candidate_sids, dtype=int)
+
+    # Exact distance, and only those truly in range
+    distance_m = np.linalg.norm(ground_station_positions[gid] - satellite_positions[sid], axis=1)
+    in_range = distance_m <= max_gsl_length_m
+    gid, sid, distance_m = gid[in_range], sid[in_range], distance_m[in_range]
+
+    # Sort by ground station, then distance, then satellite identifier
+    order = np.lexsort((sid, distance_m, gid))
+    split_at = np.cumsum(np.bincount(gid, minlength=num_ground_stations))[:-1]
+    return [
+        list(zip(distances.tolist(), sids.tolist()))
+        for distances, sids in zip(np.split(distance_m[order], split_at), np.split(sid[order], split_at))
+    ]
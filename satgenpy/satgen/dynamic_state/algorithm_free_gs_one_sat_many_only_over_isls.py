@@ -21,6 +21,7 @@
 # SOFTWARE.
 
 from .fstate_calculation import *
+from satgen.fstate import write_gsl_if_bandwidth_delta
 
 
 def algorithm_free_gs_one_sat_many_only_over_isls(
@@ -28,13 +29,13 @@ def algorithm_free_gs_one_sat_many_only_over_isls(
         time_since_epoch_ns,
         satellites,
         ground_stations,
-        sat_net_graph_only_satellites_with_isls,
+        isl_topology,
         ground_station_satellites_in_range,
-        num_isls_per_sat,
-        sat_neighbor_to_if,
         list_gsl_interfaces_info,
         prev_output,
-        enable_verbose_logs
+        enable_verbose_logs,
+        shortest_path_backend="floyd_warshall",
+        fstate_format="txt"
 ):
     """
     FREE GROUND STATION (ONE) SATELLITE (MANY) OVER INTER-SATELLITE LINKS ALGORITHM
@@ -60,13 +61,10 @@ def algorithm_free_gs_one_sat_many_only_over_isls(
     if enable_verbose_logs:
         print("\nALGORITHM: FREE GROUND STATION ONE SATELLITE MANY ONLY OVER ISLS")
 
-    # Check the graph
-    if sat_net_graph_only_satellites_with_isls.number_of_nodes() != len(satellites):
-        raise ValueError("Number of nodes in the graph does not match the number of satellites")
-    for sid in range(len(satellites)):
-        for n in sat_net_graph_only_satellites_with_isls.neighbors(sid):
-            if n >= len(satellites):
-                raise ValueError("Graph cannot contain satellite-to-ground-station links")
+    # Check the ISL topology (its ISLs can only be between satellites)
+    if isl_topology["num_satellites"] != len(satellites):
+        raise ValueError("Number of satellites in the ISL topology does not match the number of satellites")
+    num_isls_per_sat = isl_topology["num_isls_per_sat"].tolist()
 
     # This algorithm only works:
     # (a) if the # of interfaces of satellites is exactly <number of ground stations>
@@ -92,29 +90,33 @@ def algorithm_free_gs_one_sat_many_only_over_isls(
     #
 
     # There is one GSL interface per ground station, and <# of GSs> interfaces per satellite
-    output_filename = output_dynamic_state_dir + "/gsl_if_bandwidth_" + str(time_since_epoch_ns) + ".txt"
-    if enable_verbose_logs:
-        print("  > Writing interface bandwidth state to: " + output_filename)
-    with open(output_filename, "w+") as f_out:
-        if time_since_epoch_ns == 0:
-
-            # Satellite have <# of GSs> interfaces besides their ISL interfaces
-            for node_id in range(len(satellites)):
-                for i in range(list_gsl_interfaces_info[node_id]["number_of_interfaces"]):
-                    f_out.write("%d,%d,%f\n" % (
-                        node_id,
-                        num_isls_per_sat[node_id] + i,
-                        list_gsl_interfaces_info[node_id]["aggregate_max_bandwidth"]
-                        / float(list_gsl_interfaces_info[node_id]["number_of_interfaces"])
-                    ))
-
-            # Ground stations have one GSL interface: 0
-            for node_id in range(len(satellites), len(satellites) + len(ground_stations)):
-                f_out.write("%d,%d,%f\n" % (
+    gsl_if_bandwidth_delta = []
+    if time_since_epoch_ns == 0:
+
+        # Satellite have <# of GSs> interfaces besides their ISL interfaces
+        for node_id in range(len(satellites)):
+            for i in range(list_gsl_interfaces_info[node_id]["number_of_interfaces"]):
+                gsl_if_bandwidth_delta.append((
                     node_id,
-                    0,
+                    num_isls_per_sat[node_id] + i,
                     list_gsl_interfaces_info[node_id]["aggregate_max_bandwidth"]
-                 ))
+                    / float(list_gsl_interfaces_info[node_id]["number_of_interfaces"])
+                ))
+
+        # Ground stations have one GSL interface: 0
+        for node_id in range(len(satellites), len(satellites) + len(ground_stations)):
+            gsl_if_bandwidth_delta.append((
+                node_id,
+                0,
+                list_gsl_interfaces_info[node_id]["aggregate_max_bandwidth"]
+             ))
+
+    # Write interface bandwidth state (delta)
+    output_filename = write_gsl_if_bandwidth_delta(
+        output_dynamic_state_dir, time_since_epoch_ns, gsl_if_bandwidth_delta, fstate_format
+    )
+    if enable_verbose_logs:
+        print("  > Written interface bandwidth state to: " + output_filename)
 
     #################################
     # FORWARDING STATE
@@ -122,8 +124,10 @@ def algorithm_free_gs_one_sat_many_only_over_isls(
 
     # Previous forwarding state (to only write delta)
     prev_fstate = None
+    shortest_path_state = create_shortest_path_state()
     if prev_output is not None:
         prev_fstate = prev_output["fstate"]
+        shortest_path_state = prev_output["shortest_path_state"]
 
     # GID to satellite GSL interface index
     # Each ground station has a GSL interface on every
@@ -136,18 +140,20 @@ def algorithm_free_gs_one_sat_many_only_over_isls(
         time_since_epoch_ns,
         len(satellites),
         len(ground_stations),
-        sat_net_graph_only_satellites_with_isls,
-        num_isls_per_sat,
+        isl_topology,
         gid_to_sat_gsl_if_idx,
         ground_station_satellites_in_range,
-        sat_neighbor_to_if,
         prev_fstate,
-        enable_verbose_logs
+        enable_verbose_logs,
+        shortest_path_backend,
+        fstate_format,
+        shortest_path_state
     )
 
     if enable_verbose_logs:
         print("")
 
     return {
-        "fstate": fstate
+        "fstate": fstate,
+        "shortest_path_state": shortest_path_state
     }
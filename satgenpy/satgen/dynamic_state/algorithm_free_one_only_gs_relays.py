@@ -21,6 +21,7 @@
 # SOFTWARE.
 
 from .fstate_calculation import *
+from satgen.fstate import write_gsl_if_bandwidth_delta
 
 
 def algorithm_free_one_only_gs_relays(
@@ -28,11 +29,12 @@ def algorithm_free_one_only_gs_relays(
         time_since_epoch_ns,
         satellites,
         ground_stations,
-        sat_net_graph_only_satellites_with_isls,
-        num_isls_per_sat,
+        isl_topology,
+        ground_station_satellites_in_range,
         list_gsl_interfaces_info,
         prev_output,
-        enable_verbose_logs
+        enable_verbose_logs,
+        fstate_format="txt"
 ):
     """
     FREE-ONE ONLY OVER GROUND STATION RELAYS ALGORITHM
@@ -57,42 +59,37 @@ def algorithm_free_one_only_gs_relays(
         print("\nALGORITHM: FREE ONE ONLY GS RELAYS")
 
     # For this algorithm to function, there cannot be any ISLs
+    num_isls_per_sat = isl_topology["num_isls_per_sat"].tolist()
     for sid in range(len(num_isls_per_sat)):
         if num_isls_per_sat[sid] > 0:
             raise ValueError("No satellite ISLs are permitted for this algorithm. Violated for satellite %d" % sid)
 
-    # Check the graph
-    for sid in range(len(satellites)):
-        for n in sat_net_graph_only_satellites_with_isls.neighbors(sid):
-            if n < len(satellites):
-                raise ValueError("Graph cannot contain inter-satellite links")
-    for gid in range(len(ground_stations)):
-        for n in sat_net_graph_only_satellites_with_isls.neighbors(len(satellites) + gid):
-            if n >= len(satellites):
-                raise ValueError("Graph cannot contain inter-ground-station links")
-
     #################################
     # BANDWIDTH STATE
     #
 
     # There is only one GSL interface for each node (pre-condition), which as-such will get the entire bandwidth
-    output_filename = output_dynamic_state_dir + "/gsl_if_bandwidth_" + str(time_since_epoch_ns) + ".txt"
+    gsl_if_bandwidth_delta = []
+    if time_since_epoch_ns == 0:
+        for node_id in range(len(satellites)):
+            gsl_if_bandwidth_delta.append((
+                node_id,
+                num_isls_per_sat[node_id],
+                list_gsl_interfaces_info[node_id]["aggregate_max_bandwidth"]
+            ))
+        for node_id in range(len(satellites), len(satellites) + len(ground_stations)):
+            gsl_if_bandwidth_delta.append((
+                node_id,
+                0,
+                list_gsl_interfaces_info[node_id]["aggregate_max_bandwidth"]
+            ))
+
+    # Write interface bandwidth state (delta)
+    output_filename = write_gsl_if_bandwidth_delta(
+        output_dynamic_state_dir, time_since_epoch_ns, gsl_if_bandwidth_delta, fstate_format
+    )
     if enable_verbose_logs:
-        print("  > Writing interface bandwidth state to: " + output_filename)
-    with open(output_filename, "w+") as f_out:
-        if time_since_epoch_ns == 0:
-            for node_id in range(len(satellites)):
-                f_out.write("%d,%d,%f\n" % (
-                    node_id,
-                    num_isls_per_sat[node_id],
-                    list_gsl_interfaces_info[node_id]["aggregate_max_bandwidth"]
-                ))
-            for node_id in range(len(satellites), len(satellites) + len(ground_stations)):
-                f_out.write("%d,%d,%f\n" % (
-                    node_id,
-                    0,
-                    list_gsl_interfaces_info[node_id]["aggregate_max_bandwidth"]
-                ))
+        print("  > Written interface bandwidth state to: " + output_filename)
 
     #################################
     # FORWARDING STATE
@@ -112,12 +109,12 @@ def algorithm_free_one_only_gs_relays(
         time_since_epoch_ns,
         len(satellites),
         len(ground_stations),
-        sat_net_graph_only_satellites_with_isls,
-        num_isls_per_sat,
+        isl_topology,
         gid_to_sat_gsl_if_idx,
-        {},
+        ground_station_satellites_in_range,
         prev_fstate,
-        enable_verbose_logs
+        enable_verbose_logs,
+        fstate_format
     )
 
     if enable_verbose_logs:
@@ -21,6 +21,7 @@
 # SOFTWARE.
 
 from .fstate_calculation import *
+from satgen.fstate import write_gsl_if_bandwidth_delta
 
 
 def algorithm_free_one_only_over_isls(
@@ -28,13 +29,13 @@ def algorithm_free_one_only_over_isls(
         time_since_epoch_ns,
         satellites,
         ground_stations,
-        sat_net_graph_only_satellites_with_isls,
+        isl_topology,
         ground_station_satellites_in_range,
-        num_isls_per_sat,
-        sat_neighbor_to_if,
         list_gsl_interfaces_info,
         prev_output,
-        enable_verbose_logs
+        enable_verbose_logs,
+        shortest_path_backend="floyd_warshall",
+        fstate_format="txt"
 ):
     """
     FREE-ONE ONLY OVER INTER-SATELLITE LINKS ALGORITHM
@@ -58,31 +59,30 @@ def algorithm_free_one_only_over_isls(
     if enable_verbose_logs:
         print("\nALGORITHM: FREE ONE ONLY OVER ISLS")
 
-    # Check the graph
-    if sat_net_graph_only_satellites_with_isls.number_of_nodes() != len(satellites):
-        raise ValueError("Number of nodes in the graph does not match the number of satellites")
-    for sid in range(len(satellites)):
-        for n in sat_net_graph_only_satellites_with_isls.neighbors(sid):
-            if n >= len(satellites):
-                raise ValueError("Graph cannot contain satellite-to-ground-station links")
+    # Check the ISL topology (its ISLs can only be between satellites)
+    if isl_topology["num_satellites"] != len(satellites):
+        raise ValueError("Number of satellites in the ISL topology does not match the number of satellites")
+    num_isls_per_sat = isl_topology["num_isls_per_sat"].tolist()
 
     #################################
     # BANDWIDTH STATE
     #
 
     # There is only one GSL interface for each node (pre-condition), which as-such will get the entire bandwidth
-    output_filename = output_dynamic_state_dir + "/gsl_if_bandwidth_" + str(time_since_epoch_ns) + ".txt"
+    gsl_if_bandwidth_delta = []
+    if time_since_epoch_ns == 0:
+        for node_id in range(len(satellites)):
+            gsl_if_bandwidth_delta.append((node_id, num_isls_per_sat[node_id],
+                                           list_gsl_interfaces_info[node_id]["aggregate_max_bandwidth"]))
+        for node_id in range(len(satellites), len(satellites) + len(ground_stations)):
+            gsl_if_bandwidth_delta.append((node_id, 0, list_gsl_interfaces_info[node_id]["aggregate_max_bandwidth"]))
+
+    # Write interface bandwidth state (delta)
+    output_filename = write_gsl_if_bandwidth_delta(
+        output_dynamic_state_dir, time_since_epoch_ns, gsl_if_bandwidth_delta, fstate_format
+    )
     if enable_verbose_logs:
-        print("  > Writing interface bandwidth state to: " + output_filename)
-    with open(output_filename, "w+") as f_out:
-        if time_since_epoch_ns == 0:
-            for node_id in range(len(satellites)):
-                f_out.write("%d,%d,%f\n"
-                            % (node_id, num_isls_per_sat[node_id],
-                               list_gsl_interfaces_info[node_id]["aggregate_max_bandwidth"]))
-            for node_id in range(len(satellites), len(satellites) + len(ground_stations)):
-                f_out.write("%d,%d,%f\n"
-                            % (node_id, 0, list_gsl_interfaces_info[node_id]["aggregate_max_bandwidth"]))
+        print("  > Written interface bandwidth state to: " + output_filename)
 
     #################################
     # FORWARDING STATE
@@ -90,8 +90,10 @@ def algorithm_free_one_only_over_isls(
 
     # Previous forwarding state (to only write delta)
     prev_fstate = None
+    shortest_path_state = create_shortest_path_state()
     if prev_output is not None:
         prev_fstate = prev_output["fstate"]
+        shortest_path_state = prev_output["shortest_path_state"]
 
     # GID to satellite GSL interface index
     gid_to_sat_gsl_if_idx = [0] * len(ground_stations)  # (Only one GSL interface per satellite, so the first)
@@ -102,18 +104,20 @@ def algorithm_free_one_only_over_isls(
         time_since_epoch_ns,
         len(satellites),
         len(ground_stations),
-        sat_net_graph_only_satellites_with_isls,
-        num_isls_per_sat,
+        isl_topology,
         gid_to_sat_gsl_if_idx,
         ground_station_satellites_in_range,
-        sat_neighbor_to_if,
         prev_fstate,
-        enable_verbose_logs
+        enable_verbose_logs,
+        shortest_path_backend,
+        fstate_format,
+        shortest_path_state
     )
 
     if enable_verbose_logs:
         print("")
 
     return {
-        "fstate": fstate
+        "fstate": fstate,
+        "shortest_path_state": shortest_path_state
     }
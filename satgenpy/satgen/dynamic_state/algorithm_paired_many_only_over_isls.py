@@ -21,6 +21,8 @@
 # SOFTWARE.
 
 from .fstate_calculation import *
+from satgen.fstate import write_gsl_if_bandwidth_delta
+import numpy as np
 
 
 def algorithm_paired_many_only_over_isls(
@@ -28,13 +30,13 @@ def algorithm_paired_many_only_over_isls(
         time_since_epoch_ns,
         satellites,
         ground_stations,
-        sat_net_graph_without_gs,
+        isl_topology,
         ground_station_satellites_in_range,
-        num_isls_per_sat,
-        sat_neighbor_to_if,
         list_gsl_interfaces_info,
         prev_output,
-        enable_verbose_logs
+        enable_verbose_logs,
+        shortest_path_backend="floyd_warshall",
+        fstate_format="txt"
 ):
     """
     PAIRED-MANY ONLY OVER INTER-SATELLITE LINKS ALGORITHM
@@ -56,13 +58,10 @@ def algorithm_paired_many_only_over_isls(
 
     print("\nALGORITHM: PAIRED MANY ONLY OVER ISLS")
 
-    # Check the graph
-    if sat_net_graph_without_gs.number_of_nodes() != len(satellites):
-        raise ValueError("Number of nodes in the graph does not match the number of satellites")
-    for sid in range(len(satellites)):
-        for n in sat_net_graph_without_gs.neighbors(sid):
-            if n >= len(satellites):
-                raise ValueError("Graph cannot contain satellite-to-ground-station links")
+    # Check the ISL topology (its ISLs can only be between satellites)
+    if isl_topology["num_satellites"] != len(satellites):
+        raise ValueError("Number of satellites in the ISL topology does not match the number of satellites")
+    num_isls_per_sat = isl_topology["num_isls_per_sat"].tolist()
 
     # This algorithm only works:
     # (a) if the # of interfaces of satellites is exactly <number of ground stations>
@@ -83,11 +82,9 @@ def algorithm_paired_many_only_over_isls(
     # Select the nearest satellite for each ground station
     #
 
-    # Keep track of which satellite GSL interfaces (it has <n of ground stations> interfaces) are paired
-    # because it is the closest satellite to a ground station
-    satellite_gsl_ifs_paired = []
-    for sid in range(len(satellites)):
-        satellite_gsl_ifs_paired.append([])
+    # Satellite each ground station is paired to (-1 if none), on the satellite GSL interface corresponding
+    # to its gid, because it is the closest satellite to the ground station
+    paired_sid = np.full(len(ground_stations), -1, dtype=int)
 
     # Go over each ground station
     ground_station_satellites_in_range_select_one_at_most = []
@@ -106,49 +103,31 @@ def algorithm_paired_many_only_over_isls(
             ground_station_satellites_in_range_select_one_at_most.append([])
         else:
             ground_station_satellites_in_range_select_one_at_most.append([(best_distance_m, chosen_sid)])
-            satellite_gsl_ifs_paired[chosen_sid].append(gid)
+            paired_sid[gid] = chosen_sid
 
     ##################################################
     # Determine the new GSL interface bandwidth state
     #
 
-    # Bandwidth state
-    gsl_if_bandwidth_state = {}
+    # Number of ground stations paired to each satellite
+    is_paired = paired_sid != -1
+    satellite_frequency_chosen = np.bincount(paired_sid[is_paired], minlength=len(satellites))
 
-    # For the satellite
-    for sid in range(len(satellites)):
-
-        # The paired GSL interfaces share the total bandwidth
-        # The other ones are not in use, but still need to flush out existing packets
-        satellite_frequency_chosen = len(satellite_gsl_ifs_paired[sid])
-        for gsl_if_idx in range(len(ground_stations)):
-
-            # If it is paired, it gets its fair share
-            if gsl_if_idx in satellite_gsl_ifs_paired[sid]:
-                gsl_if_bandwidth_state[(sid, num_isls_per_sat[sid] + gsl_if_idx)] = (
-                        1.0 / float(satellite_frequency_chosen)
-                )
-
-            # Else, it get the full bandwidth to get rid of the packets in it (it can also be kept, but then
-            # you cannot parallelize this generation process)
-            else:
-                gsl_if_bandwidth_state[(sid, num_isls_per_sat[sid] + gsl_if_idx)] = 1.0
-
-    # For the ground stations, the same principle applies
-    for gid in range(len(ground_stations)):
-
-        # Check if it is paired
-        if len(ground_station_satellites_in_range_select_one_at_most[gid]) == 1:
-
-            # Find the satellite it is paired to, and then only get its fair share
-            paired_satellite_id = ground_station_satellites_in_range_select_one_at_most[gid][0][1]
-            satellite_frequency_chosen = len(satellite_gsl_ifs_paired[paired_satellite_id])
-            gsl_if_bandwidth_state[(len(satellites) + gid, 0)] = 1.0 / float(satellite_frequency_chosen)
-
-        # If not paired, flush out the packets (it can also be kept, but then
-        # you cannot parallelize this generation process)
-        else:
-            gsl_if_bandwidth_state[(len(satellites) + gid, 0)] = 1.0
+    # Bandwidth state, per node type: (num_satellites x num_ground_stations) for the GSL interfaces of
+    # the satellites (interface num_isls_per_sat[sid] + gsl_if_idx), and (num_ground_stations x 1) for the
+    # one GSL interface of the ground stations (interface 0)
+    #
+    # The paired GSL interfaces share the total bandwidth of the satellite, they get their fair share
+    # The other ones are not in use, but still get the full bandwidth to flush out existing packets
+    # (it can also be kept, but then you cannot parallelize this generation process)
+    gsl_if_bandwidth_state = {
+        "satellites": np.ones((len(satellites), len(ground_stations))),
+        "ground_stations": np.ones((len(ground_stations), 1))
+    }
+    paired_gids = np.flatnonzero(is_paired)
+    fair_share = 1.0 / satellite_frequency_chosen[paired_sid[paired_gids]].astype(float)
+    gsl_if_bandwidth_state["satellites"][paired_sid[paired_gids], paired_gids] = fair_share
+    gsl_if_bandwidth_state["ground_stations"][paired_gids, 0] = fair_share
 
     ######################################################
     # Write the new GSL interface bandwidth state (delta)
@@ -159,22 +138,30 @@ def algorithm_paired_many_only_over_isls(
     if prev_output is not None:
         prev_gsl_if_bandwidth_state = prev_output["gsl_if_bandwidth_state"]
 
-    output_filename = output_dynamic_state_dir + "/gsl_if_bandwidth_" + str(time_since_epoch_ns) + ".txt"
-    print("  > Writing interface bandwidth state to: " + output_filename)
-    with open(output_filename, "w+") as f_out:
-        for (node_id, if_id) in gsl_if_bandwidth_state:
-
-            # Only delta if have previous bandwidth state
-            if (
-                    prev_gsl_if_bandwidth_state is None
-                    or
-                    prev_gsl_if_bandwidth_state[(node_id, if_id)] != gsl_if_bandwidth_state[(node_id, if_id)]
-            ):
-                f_out.write("%d,%d,%f\n" % (
-                    node_id,
-                    if_id,
-                    gsl_if_bandwidth_state[(node_id, if_id)]
-                ))
+    # Only delta if have previous bandwidth state (satellites first, then ground stations)
+    gsl_if_bandwidth_delta = []
+    for node_type, node_id_offset, if_id_offset in [
+        ("satellites", 0, np.array(num_isls_per_sat, dtype=int)),
+        ("ground_stations", len(satellites), np.zeros(len(ground_stations), dtype=int))
+    ]:
+        bandwidth = gsl_if_bandwidth_state[node_type]
+        if prev_gsl_if_bandwidth_state is None:
+            is_changed = np.ones(bandwidth.shape, dtype=bool)
+        else:
+            is_changed = bandwidth != prev_gsl_if_bandwidth_state[node_type]
+        node_idx, if_idx = np.nonzero(is_changed)
+        gsl_if_bandwidth_delta.append(np.column_stack((
+            node_id_offset + node_idx,
+            if_id_offset[node_idx] + if_idx,
+            bandwidth[node_idx, if_idx]
+        )))
+    gsl_if_bandwidth_delta = np.concatenate(gsl_if_bandwidth_delta)
+
+    # Write interface bandwidth state (delta)
+    output_filename = write_gsl_if_bandwidth_delta(
+        output_dynamic_state_dir, time_since_epoch_ns, gsl_if_bandwidth_delta, fstate_format
+    )
+    print("  > Written interface bandwidth state to: " + output_filename)
 
     #################################
 
@@ -182,8 +169,10 @@ def algorithm_paired_many_only_over_isls(
 
     # Previous forwarding state (to only write delta)
     prev_fstate = None
+    shortest_path_state = create_shortest_path_state()
     if prev_output is not None:
         prev_fstate = prev_output["fstate"]
+        shortest_path_state = prev_output["shortest_path_state"]
 
     # GID to satellite GSL interface index
     # Each ground station has a GSL interface on every
@@ -196,18 +185,20 @@ def algorithm_paired_many_only_over_isls(
         time_since_epoch_ns,
         len(satellites),
         len(ground_stations),
-        sat_net_graph_without_gs,
-        num_isls_per_sat,
+        isl_topology,
         gid_to_sat_gsl_if_idx,
         ground_station_satellites_in_range_select_one_at_most,
-        sat_neighbor_to_if,
         prev_fstate,
-        enable_verbose_logs
+        enable_verbose_logs,
+        shortest_path_backend,
+        fstate_format,
+        shortest_path_state
     )
 
     print("")
 
     return {
         "fstate": fstate,
+        "shortest_path_state": shortest_path_state,
         "gsl_if_bandwidth_state": gsl_if_bandwidth_state
     }
@@ -1,5 +1,268 @@
-import math
-import networkx as nx
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+from satgen.fstate import write_fstate_delta, calculate_fstate_array_delta
+from satgen.isls import get_isl_topology_csr_graph
+
+
+def create_shortest_path_state():
+    """
+    Creates the state which the "dijkstra_incremental" shortest path backend
+    carries over from one time step to the next.
+
+    :return: Shortest path state (dict) without any shortest-path trees yet
+    """
+    return {
+        "indptr": None,              # CSR structure of the graph the trees are of (to detect topology changes)
+        "indices": None,
+        "tree_edge": None,           # (num_satellites x num_satellites) CSR edge position of the tree edge
+                                     # leading into each node from the tree of each source (-1 if none)
+        "tree_depth": None,          # (num_satellites x num_satellites) hop count in the tree (-1 if unreachable)
+        "has_tree": None,            # Whether there is a tree of each source
+        "num_full_recomputations": 0,
+        "num_trees_kept": 0,
+        "num_trees_recomputed": 0
+    }
+
+
+def floyd_warshall_isl_topology(isl_topology):
+    """
+    Calculates the distance between all pairs of satellites using Floyd-Warshall.
+    It performs exactly the same operations as networkx floyd_warshall_numpy() does
+    on a graph with the satellites as nodes (in order) and the ISLs as edges.
+
+    :param isl_topology:    ISL topology
+
+    :return: Distance matrix (num_satellites x num_satellites), unreachable is infinity
+    """
+    num_satellites = isl_topology["num_satellites"]
+    dist = np.full((num_satellites, num_satellites), np.inf)
+    dist[isl_topology["edge_sources"], isl_topology["indices"]] = isl_topology["weights"]
+    np.fill_diagonal(dist, 0)
+    for i in range(num_satellites):
+        dist = np.minimum(dist, dist[i, :][np.newaxis, :] + dist[:, i][:, np.newaxis])
+    return dist
+
+
+def reset_shortest_path_state(shortest_path_state, csr_graph):
+    """
+    Discards all shortest-path trees, and sets the graph structure the new ones will be of.
+
+    :param shortest_path_state: Shortest path state (modified in-place)
+    :param csr_graph:           CSR graph
+    """
+    num_nodes = csr_graph.shape[0]
+    shortest_path_state["indptr"] = csr_graph.indptr.copy()
+    shortest_path_state["indices"] = csr_graph.indices.copy()
+    shortest_path_state["tree_edge"] = np.full((num_nodes, num_nodes), -1, dtype=np.int32)
+    shortest_path_state["tree_depth"] = np.full((num_nodes, num_nodes), -1, dtype=np.int16)
+    shortest_path_state["has_tree"] = np.zeros(num_nodes, dtype=bool)
+    shortest_path_state["num_full_recomputations"] += 1
+
+
+def calculate_tree_distances(csr_graph, edge_sources, sources, tree_edge, tree_depth):
+    """
+    Calculates the distances along shortest-path trees with the current edge weights.
+
+    Each distance is the distance of the parent plus the weight of the tree edge, which is the
+    same floating point arithmetic as Dijkstra performs when it settles a node via that edge.
+
+    :param csr_graph:       CSR graph
+    :param edge_sources:    Source node of each CSR edge position
+    :param sources:         Source node of each tree (length R)
+    :param tree_edge:       (R x num_nodes) CSR edge position of the tree edge into each node (-1 if none)
+    :param tree_depth:      (R x num_nodes) Hop count of each node in the tree (-1 if unreachable)
+
+    :return: Distances (R x num_nodes), unreachable is infinity
+    """
+    num_nodes = csr_graph.shape[0]
+    dist = np.full(tree_depth.shape, np.inf)
+    dist[np.arange(len(sources)), sources] = 0.0
+    dist = dist.ravel()
+    flat_depth = tree_depth.ravel()
+    flat_edge = tree_edge.ravel()
+
+    # Settle the nodes level by level, as every parent is exactly one level up
+    # (the depths are 16-bit, for which a stable sort is a linear-time radix sort)
+    order = np.argsort(flat_depth, kind="stable")
+    level_counts = np.bincount(flat_depth + 1)
+    level_start = np.cumsum(level_counts)
+    for depth in range(1, len(level_counts) - 1):
+        flat_idx = order[level_start[depth]:level_start[depth + 1]]
+        edges = flat_edge[flat_idx]
+        parent_flat_idx = (flat_idx // num_nodes) * num_nodes + edge_sources[edges]
+        dist[flat_idx] = dist[parent_flat_idx] + csr_graph.data[edges]
+
+    return dist.reshape(tree_depth.shape)
+
+
+def calculate_trees(csr_graph, edge_sources, sources):
+    """
+    Calculates the shortest-path trees from scratch using Dijkstra.
+
+    :param csr_graph:       CSR graph
+    :param edge_sources:    Source node of each CSR edge position
+    :param sources:         Source nodes (length R)
+
+    :return: Tuple of (distances (R x num_nodes), tree edge positions (R x num_nodes), tree depths (R x num_nodes))
+    """
+    num_nodes = csr_graph.shape[0]
+    dist, predecessors = dijkstra(csr_graph, directed=True, indices=sources, return_predecessors=True)
+    has_parent = predecessors >= 0
+
+    # CSR edge position of each (parent, node) edge
+    edge_keys = edge_sources.astype(np.int64) * num_nodes + csr_graph.indices
+    edge_keys_order = np.argsort(edge_keys, kind="stable")
+    node_ids = np.broadcast_to(np.arange(num_nodes), predecessors.shape)
+    tree_keys = predecessors[has_parent].astype(np.int64) * num_nodes + node_ids[has_parent]
+    tree_edge = np.full(predecessors.shape, -1, dtype=np.int32)
+    tree_edge[has_parent] = edge_keys_order[np.searchsorted(edge_keys, tree_keys, sorter=edge_keys_order)]
+
+    # Depth by pointer jumping: every round, each node adds the depth up to its current
+    # ancestor and then jumps to the ancestor's ancestor, until all have reached the source
+    row_ids = np.arange(len(sources))[:, np.newaxis]
+    ancestor = np.where(has_parent, predecessors, np.arange(num_nodes)[np.newaxis, :])
+    tree_depth = has_parent.astype(np.int16)
+    while np.any(tree_depth[row_ids, ancestor] > 0):
+        tree_depth += tree_depth[row_ids, ancestor]
+        ancestor = ancestor[row_ids, ancestor]
+    tree_depth[~has_parent] = -1
+    tree_depth[np.arange(len(sources)), sources] = 0
+
+    return dist, tree_edge, tree_depth
+
+
+def calculate_incremental_sat_net_distances(csr_graph, sources, shortest_path_state):
+    """
+    Calculates the shortest path distances from the sources by repairing the shortest-path trees
+    of the previous time step (dynamic single-source shortest paths).
+
+    The tree of a source is kept if, with the current edge weights, no edge offers a shorter
+    distance to a node than the tree does (all reduced costs are non-negative). Only the trees
+    for which that does not hold (or which do not exist yet) are recalculated using Dijkstra.
+    If the graph structure changed (e.g., due to failures), all trees are discarded.
+
+    The distances are exactly equal (bit-for-bit) to those of Dijkstra from scratch: the distances
+    along a kept tree are the least fixed point of the same floating point relaxations.
+
+    :param csr_graph:               CSR graph
+    :param sources:                 Source nodes (sorted, without duplicates)
+    :param shortest_path_state:     Shortest path state (modified in-place)
+
+    :return: Distances (len(sources) x num_nodes), unreachable is infinity
+    """
+
+    # A different graph structure invalidates all trees
+    if (
+            shortest_path_state["indptr"] is None
+            or not np.array_equal(shortest_path_state["indptr"], csr_graph.indptr)
+            or not np.array_equal(shortest_path_state["indices"], csr_graph.indices)
+    ):
+        reset_shortest_path_state(shortest_path_state, csr_graph)
+
+    sources = np.array(sources, dtype=int)
+    dist = np.full((len(sources), csr_graph.shape[0]), np.inf)
+    if len(sources) == 0:
+        return dist
+    edge_sources = np.repeat(np.arange(csr_graph.shape[0]), np.diff(csr_graph.indptr))
+
+    # Re-evaluate the existing trees with the current edge weights, and check that they are still optimal
+    has_tree = shortest_path_state["has_tree"][sources]
+    kept = np.flatnonzero(has_tree)
+    if len(kept) > 0:
+        kept_dist = calculate_tree_distances(
+            csr_graph,
+            edge_sources,
+            sources[kept],
+            shortest_path_state["tree_edge"][sources[kept]],
+            shortest_path_state["tree_depth"][sources[kept]]
+        )
+        violated = np.any(
+            kept_dist[:, edge_sources] + csr_graph.data[np.newaxis, :] < kept_dist[:, csr_graph.indices],
+            axis=1
+        )
+        dist[kept[~violated]] = kept_dist[~violated]
+        has_tree[kept[violated]] = False
+        shortest_path_state["num_trees_kept"] += int(np.sum(~violated))
+
+    # Recalculate the others
+    recalculate = np.flatnonzero(~has_tree)
+    if len(recalculate) > 0:
+        dist[recalculate], tree_edge, tree_depth = calculate_trees(csr_graph, edge_sources, sources[recalculate])
+        shortest_path_state["tree_edge"][sources[recalculate]] = tree_edge
+        shortest_path_state["tree_depth"][sources[recalculate]] = tree_depth
+        shortest_path_state["has_tree"][sources[recalculate]] = True
+        shortest_path_state["num_trees_recomputed"] += len(recalculate)
+
+    return dist
+
+
+def calculate_sat_net_distances_without_gs_relaying(
+        isl_topology,
+        ground_station_satellites_in_range_candidates,
+        shortest_path_backend,
+        shortest_path_state=None
+):
+    """
+    Calculates the shortest path distances over the inter-satellite network.
+
+    The forwarding state only ever uses the distance from a satellite to a satellite which is
+    in range of a ground station (the "destination satellites"). As such, the backend can
+    choose to only calculate the distance towards those.
+
+    :param isl_topology:                                    ISL topology (with the ISL lengths of this time step)
+    :param ground_station_satellites_in_range_candidates:   For each ground station, list of (distance, satellite id)
+                                                            of satellites in range (or an int if it has failed)
+    :param shortest_path_backend:                           Options:
+                                                            "floyd_warshall": Floyd-Warshall on the entire
+                                                                              graph (all-pairs, dense O(N^3))
+                                                            "dijkstra": scipy.sparse.csgraph Dijkstra on a CSR
+                                                                        graph from only the destination satellites
+                                                            "dijkstra_incremental": same distances as "dijkstra",
+                                                                        but repairs the shortest-path trees of
+                                                                        the previous time step
+    :param shortest_path_state:                             Shortest path state carried over between time steps
+                                                            (only used by "dijkstra_incremental", modified in-place;
+                                                            if None, all trees are calculated from scratch)
+
+    :return: Distance matrix (num_satellites x num_satellites), of which at least the columns
+             of the destination satellites are filled in (unreachable is infinity)
+    """
+
+    num_satellites = isl_topology["num_satellites"]
+    if shortest_path_backend == "floyd_warshall":
+        return floyd_warshall_isl_topology(isl_topology)
+
+    elif shortest_path_backend == "dijkstra" or shortest_path_backend == "dijkstra_incremental":
+
+        # Destination satellites
+        destination_satellites = set()
+        for candidates in ground_station_satellites_in_range_candidates:
+            if not isinstance(candidates, int):
+                for (_, sid) in candidates:
+                    destination_satellites.add(sid)
+        destination_satellites = sorted(destination_satellites)
+
+        # Sparse graph (undirected, so it has both directions)
+        csr_graph = get_isl_topology_csr_graph(isl_topology)
+
+        # The graph is undirected, so the distance from the destination satellite
+        # to a satellite is the same as the distance from the satellite to the destination
+        dist_sat_net = np.full((num_satellites, num_satellites), np.inf)
+        if shortest_path_backend == "dijkstra_incremental":
+            if shortest_path_state is None:
+                shortest_path_state = create_shortest_path_state()
+            dist_sat_net[:, destination_satellites] = calculate_incremental_sat_net_distances(
+                csr_graph, destination_satellites, shortest_path_state
+            ).T
+        elif len(destination_satellites) > 0:
+            dist_sat_net[:, destination_satellites] = dijkstra(
+                csr_graph, directed=True, indices=destination_satellites
+            ).T
+        return dist_sat_net
+
+    else:
+        raise ValueError("Unknown shortest path backend: " + str(shortest_path_backend))
 
 
 def calculate_fstate_shortest_path_without_gs_relaying(
@@ -7,147 +270,135 @@ def calculate_fstate_shortest_path_without_gs_relaying(
         time_since_epoch_ns,
         num_satellites,
         num_ground_stations,
-        sat_net_graph_only_satellites_with_isls,
-        num_isls_per_sat,
+        isl_topology,
         gid_to_sat_gsl_if_idx,
         ground_station_satellites_in_range_candidates,
-        sat_neighbor_to_if,
         prev_fstate,
-        enable_verbose_logs
+        enable_verbose_logs,
+        shortest_path_backend="floyd_warshall",
+        fstate_format="txt",
+        shortest_path_state=None
 ):
 
     # Calculate shortest path distances
     if enable_verbose_logs:
-        print("  > Calculating Floyd-Warshall for graph without ground-station relays")
-    # (Note: Numpy has a deprecation warning here because of how networkx uses matrices)
-    dist_sat_net_without_gs = nx.floyd_warshall_numpy(sat_net_graph_only_satellites_with_isls)
-
-    # Forwarding state
-    fstate = {}
+        print("  > Calculating shortest paths (" + shortest_path_backend
+              + ") for graph without ground-station relays")
+    dist_sat_net_without_gs = calculate_sat_net_distances_without_gs_relaying(
+        isl_topology,
+        ground_station_satellites_in_range_candidates,
+        shortest_path_backend,
+        shortest_path_state
+    )
+    if enable_verbose_logs and shortest_path_backend == "dijkstra_incremental" and shortest_path_state is not None:
+        print("  > Shortest-path trees so far: %d kept, %d recalculated (%d full recalculations)" % (
+            shortest_path_state["num_trees_kept"],
+            shortest_path_state["num_trees_recomputed"],
+            shortest_path_state["num_full_recomputations"]
+        ))
+
+    # Padded neighbor arrays (num_satellites x max. degree), with the neighbors in the order of the ISL
+    # interfaces, as that decides which neighbor is chosen if two promise the same distance
+    neighbor_ids = isl_topology["neighbor_ids"]
+    # (the padding edge is -1, which selects the appended infinite weight and -1 interfaces)
+    neighbor_edges = isl_topology["neighbor_edges"]
+    neighbor_weights_m = np.append(isl_topology["weights"], np.inf)[neighbor_edges]
+    neighbor_my_if = np.append(isl_topology["edge_my_if"], -1)[neighbor_edges]
+    neighbor_next_hop_if = np.append(isl_topology["edge_next_hop_if"], -1)[neighbor_edges]
+    num_isls_per_sat = isl_topology["num_isls_per_sat"]
+
+    # Padded candidate arrays (num_ground_stations x max. satellites in range), with the satellites
+    # in increasing identifier, as that decides which one is chosen if two promise the same distance
+    max_num_candidates = max([1] + list(map(lambda x: len(x), ground_station_satellites_in_range_candidates)))
+    candidate_sat_ids = np.zeros((num_ground_stations, max_num_candidates), dtype=int)
+    candidate_gsl_m = np.full((num_ground_stations, max_num_candidates), np.inf)
+    for gid in range(num_ground_stations):
+        for j, (distance_m, sid) in enumerate(
+                sorted(ground_station_satellites_in_range_candidates[gid], key=lambda x: x[1])
+        ):
+            candidate_sat_ids[gid, j] = sid
+            candidate_gsl_m[gid, j] = distance_m
+
+    # Satellites to ground stations
+    # From the satellites attached to the destination ground station,
+    # select the one which promises the shortest path to the destination ground station (getting there + last hop)
+    # (num_satellites x num_ground_stations x max. satellites in range; unreachable or padding is infinite)
+    via_candidate_m = dist_sat_net_without_gs[:, candidate_sat_ids] + candidate_gsl_m[np.newaxis, :, :]
+    best_candidate_idx = np.argmin(via_candidate_m, axis=2)
+    dist_satellite_to_ground_station = np.take_along_axis(
+        via_candidate_m, best_candidate_idx[:, :, np.newaxis], axis=2
+    )[:, :, 0]
+    dst_sat = candidate_sat_ids[np.arange(num_ground_stations)[np.newaxis, :], best_candidate_idx]
+
+    # If the current node is not that satellite, among its neighbors, find the one which
+    # promises the lowest distance to reach the destination satellite
+    # (num_satellites x num_ground_stations x max. degree)
+    via_neighbor_m = (
+        neighbor_weights_m[:, np.newaxis, :]
+        +
+        dist_sat_net_without_gs[neighbor_ids[:, np.newaxis, :], dst_sat[:, :, np.newaxis]]
+    )
+    best_neighbor_idx = np.argmin(via_neighbor_m, axis=2)
+    best_via_neighbor_m = np.take_along_axis(via_neighbor_m, best_neighbor_idx[:, :, np.newaxis], axis=2)[:, :, 0]
+    satellite_ids = np.arange(num_satellites)[:, np.newaxis]
+
+    # If it is the destination satellite, the next hop is the ground station itself
+    is_dst_sat = dst_sat == satellite_ids
+    sat_next_hop = np.where(
+        is_dst_sat,
+        num_satellites + np.arange(num_ground_stations)[np.newaxis, :],
+        neighbor_ids[satellite_ids, best_neighbor_idx]
+    )
+    sat_my_if = np.where(
+        is_dst_sat,
+        np.array(num_isls_per_sat, dtype=int)[dst_sat] + np.array(gid_to_sat_gsl_if_idx, dtype=int)[np.newaxis, :],
+        neighbor_my_if[satellite_ids, best_neighbor_idx]
+    )
+    sat_next_hop_if = np.where(is_dst_sat, 0, neighbor_next_hop_if[satellite_ids, best_neighbor_idx])
+
+    # By default, if there is no satellite in range for the
+    # destination ground station, it will be dropped (indicated by -1)
+    sat_has_next_hop = np.logical_and(
+        np.logical_not(np.isinf(dist_satellite_to_ground_station)),
+        np.logical_or(is_dst_sat, best_via_neighbor_m < 1000000000000000)
+    )
+    sat_next_hop = np.where(sat_has_next_hop, sat_next_hop, -1)
+    sat_my_if = np.where(sat_has_next_hop, sat_my_if, -1)
+    sat_next_hop_if = np.where(sat_has_next_hop, sat_next_hop_if, -1)
+
+    # Ground stations to ground stations
+    # Choose the source satellite which promises the shortest path
+    # (num_ground_stations (source) x max. satellites in range x num_ground_stations (destination))
+    via_src_candidate_m = candidate_gsl_m[:, :, np.newaxis] + dist_satellite_to_ground_station[candidate_sat_ids, :]
+    best_src_candidate_idx = np.argmin(via_src_candidate_m, axis=1)
+    best_via_src_candidate_m = np.take_along_axis(
+        via_src_candidate_m, best_src_candidate_idx[:, np.newaxis, :], axis=1
+    )[:, 0, :]
+    src_sat = candidate_sat_ids[np.arange(num_ground_stations)[:, np.newaxis], best_src_candidate_idx]
+
+    # By default, if there is no satellite in range for one of the
+    # ground stations, it will be dropped (indicated by -1)
+    gs_has_next_hop = np.logical_not(np.isinf(best_via_src_candidate_m))
+    gs_next_hop = np.where(gs_has_next_hop, src_sat, -1)
+    gs_my_if = np.where(gs_has_next_hop, 0, -1)
+    gs_next_hop_if = np.where(
+        gs_has_next_hop,
+        np.array(num_isls_per_sat, dtype=int)[src_sat] + np.array(gid_to_sat_gsl_if_idx, dtype=int)[:, np.newaxis],
+        -1
+    )
+
+    # Forwarding state (satellites to ground stations, then ground stations to ground stations)
+    fstate = np.empty((num_satellites + num_ground_stations, num_ground_stations, 3), dtype=np.int32)
+    fstate[:num_satellites] = np.stack((sat_next_hop, sat_my_if, sat_next_hop_if), axis=2)
+    fstate[num_satellites:] = np.stack((gs_next_hop, gs_my_if, gs_next_hop_if), axis=2)
+
+    # Difference with the previous forwarding state (which is written to file)
+    fstate_delta = calculate_fstate_array_delta(fstate, prev_fstate)
 
     # Now write state to file for complete graph
-    output_filename = output_dynamic_state_dir + "/fstate_" + str(time_since_epoch_ns) + ".txt"
+    output_filename = write_fstate_delta(output_dynamic_state_dir, time_since_epoch_ns, fstate_delta, fstate_format)
     if enable_verbose_logs:
-        print("  > Writing forwarding state to: " + output_filename)
-    with open(output_filename, "w+") as f_out:
-
-        # Satellites to ground stations
-        # From the satellites attached to the destination ground station,
-        # select the one which promises the shortest path to the destination ground station (getting there + last hop)
-        dist_satellite_to_ground_station = {}
-        for curr in range(num_satellites):
-            for dst_gid in range(num_ground_stations):
-                dst_gs_node_id = num_satellites + dst_gid
-
-                # Among the satellites in range of the destination ground station,
-                # find the one which promises the shortest distance
-                possible_dst_sats = ground_station_satellites_in_range_candidates[dst_gid]
-                possibilities = []
-                for b in possible_dst_sats:
-                    if not math.isinf(dist_sat_net_without_gs[(curr, b[1])]):  # Must be reachable
-                        possibilities.append(
-                            (
-                                dist_sat_net_without_gs[(curr, b[1])] + b[0],
-                                b[1]
-                            )
-                        )
-                possibilities = list(sorted(possibilities))
-
-                # By default, if there is no satellite in range for the
-                # destination ground station, it will be dropped (indicated by -1)
-                next_hop_decision = (-1, -1, -1)
-                distance_to_ground_station_m = float("inf")
-                if len(possibilities) > 0:
-                    dst_sat = possibilities[0][1]
-                    distance_to_ground_station_m = possibilities[0][0]
-
-                    # If the current node is not that satellite, determine how to get to the satellite
-                    if curr != dst_sat:
-
-                        # Among its neighbors, find the one which promises the
-                        # lowest distance to reach the destination satellite
-                        best_distance_m = 1000000000000000
-                        for neighbor_id in sat_net_graph_only_satellites_with_isls.neighbors(curr):
-                            distance_m = (
-                                    sat_net_graph_only_satellites_with_isls.edges[(curr, neighbor_id)]["weight"]
-                                    +
-                                    dist_sat_net_without_gs[(neighbor_id, dst_sat)]
-                            )
-                            if distance_m < best_distance_m:
-                                next_hop_decision = (
-                                    neighbor_id,
-                                    sat_neighbor_to_if[(curr, neighbor_id)],
-                                    sat_neighbor_to_if[(neighbor_id, curr)]
-                                )
-                                best_distance_m = distance_m
-
-                    else:
-                        # This is the destination satellite, as such the next hop is the ground station itself
-                        next_hop_decision = (
-                            dst_gs_node_id,
-                            num_isls_per_sat[dst_sat] + gid_to_sat_gsl_if_idx[dst_gid],
-                            0
-                        )
-
-                # In any case, save the distance of the satellite to the ground station to re-use
-                # when we calculate ground station to ground station forwarding
-                dist_satellite_to_ground_station[(curr, dst_gs_node_id)] = distance_to_ground_station_m
-
-                # Write to forwarding state
-                if not prev_fstate or prev_fstate[(curr, dst_gs_node_id)] != next_hop_decision:
-                    f_out.write("%d,%d,%d,%d,%d\n" % (
-                        curr,
-                        dst_gs_node_id,
-                        next_hop_decision[0],
-                        next_hop_decision[1],
-                        next_hop_decision[2]
-                    ))
-                fstate[(curr, dst_gs_node_id)] = next_hop_decision
-
-        # Ground stations to ground stations
-        # Choose the source satellite which promises the shortest path
-        for src_gid in range(num_ground_stations):
-            for dst_gid in range(num_ground_stations):
-                if src_gid != dst_gid:
-                    src_gs_node_id = num_satellites + src_gid
-                    dst_gs_node_id = num_satellites + dst_gid
-
-                    # Among the satellites in range of the source ground station,
-                    # find the one which promises the shortest distance
-                    possible_src_sats = ground_station_satellites_in_range_candidates[src_gid]
-                    possibilities = []
-                    for a in possible_src_sats:
-                        best_distance_offered_m = dist_satellite_to_ground_station[(a[1], dst_gs_node_id)]
-                        if not math.isinf(best_distance_offered_m):
-                            possibilities.append(
-                                (
-                                    a[0] + best_distance_offered_m,
-                                    a[1]
-                                )
-                            )
-                    possibilities = sorted(possibilities)
-
-                    # By default, if there is no satellite in range for one of the
-                    # ground stations, it will be dropped (indicated by -1)
-                    next_hop_decision = (-1, -1, -1)
-                    if len(possibilities) > 0:
-                        src_sat_id = possibilities[0][1]
-                        next_hop_decision = (
-                            src_sat_id,
-                            0,
-                            num_isls_per_sat[src_sat_id] + gid_to_sat_gsl_if_idx[src_gid]
-                        )
-
-                    # Update forwarding state
-                    if not prev_fstate or prev_fstate[(src_gs_node_id, dst_gs_node_id)] != next_hop_decision:
-                        f_out.write("%d,%d,%d,%d,%d\n" % (
-                            src_gs_node_id,
-                            dst_gs_node_id,
-                            next_hop_decision[0],
-                            next_hop_decision[1],
-                            next_hop_decision[2]
-                        ))
-                    fstate[(src_gs_node_id, dst_gs_node_id)] = next_hop_decision
+        print("  > Written forwarding state to: " + output_filename)
 
     # Finally return result
     return fstate
@@ -158,104 +409,102 @@ def calculate_fstate_shortest_path_with_gs_relaying(
         time_since_epoch_ns,
         num_satellites,
         num_ground_stations,
-        sat_net_graph,
-        num_isls_per_sat,
+        isl_topology,
         gid_to_sat_gsl_if_idx,
-        sat_neighbor_to_if,
+        ground_station_satellites_in_range,
         prev_fstate,
-        enable_verbose_logs
+        enable_verbose_logs,
+        fstate_format="txt"
 ):
-
-    # Calculate shortest paths
+    num_nodes = num_satellites + num_ground_stations
+    num_isls_per_sat = np.array(isl_topology["num_isls_per_sat"], dtype=int)
+
+    # Ground station links, ordered by ground station and then by satellite identifier
+    # (a failed ground station has no list, indicated by an int, and thus no links)
+    num_in_range = list(map(lambda x: 0 if isinstance(x, int) else len(x), ground_station_satellites_in_range))
+    gsls = np.array([
+        (distance_m, sid)
+        for satellites_in_range in ground_station_satellites_in_range if not isinstance(satellites_in_range, int)
+        for distance_m, sid in satellites_in_range
+    ], dtype=float).reshape((-1, 2))
+    gsl_gids = np.repeat(np.arange(num_ground_stations), num_in_range)
+    gsl_sids = gsls[:, 1].astype(int)
+    gsl_order = np.lexsort((gsl_sids, gsl_gids))
+    gsl_gids = gsl_gids[gsl_order]
+    gsl_sids = gsl_sids[gsl_order]
+    gsl_lengths_m = gsls[gsl_order, 0]
+    if np.any(gsl_sids < 0) or np.any(gsl_sids >= num_satellites):
+        raise ValueError("GS-to-GS link cannot exist")
+    gsl_sat_if = num_isls_per_sat[gsl_sids] + np.array(gid_to_sat_gsl_if_idx, dtype=int)[gsl_gids]
+
+    # Directed links (ISLs, satellite to ground station, ground station to satellite) with:
+    # (from, to, length, my outgoing interface id, next-hop incoming interface id)
+    link_from = np.concatenate((isl_topology["edge_sources"], gsl_sids, num_satellites + gsl_gids))
+    link_to = np.concatenate((isl_topology["indices"], num_satellites + gsl_gids, gsl_sids))
+    link_length_m = np.concatenate((isl_topology["weights"], gsl_lengths_m, gsl_lengths_m))
+    link_my_if = np.concatenate((isl_topology["edge_my_if"], gsl_sat_if, np.zeros(len(gsl_sids), dtype=int)))
+    link_next_hop_if = np.concatenate(
+        (isl_topology["edge_next_hop_if"], np.zeros(len(gsl_sids), dtype=int), gsl_sat_if)
+    )
+
+    # Any neighbor must be reachable
+    if np.any(np.isinf(link_length_m)):
+        raise ValueError("Neighbor cannot be unreachable")
+
+    # Padded neighbor arrays (num_nodes x max. degree), with first the ISLs and then the ground station
+    # links of each node, as the order decides which neighbor is chosen if two promise the same distance
+    link_order = np.argsort(link_from, kind="stable")
+    sorted_link_from = link_from[link_order]
+    degree = np.bincount(sorted_link_from, minlength=num_nodes)
+    link_column = np.arange(len(sorted_link_from)) - (np.cumsum(degree) - degree)[sorted_link_from]
+    max_degree = max(1, int(np.max(degree, initial=0)))
+    neighbor_ids = np.zeros((num_nodes, max_degree), dtype=int)
+    neighbor_weights_m = np.full((num_nodes, max_degree), np.inf)
+    neighbor_my_if = np.full((num_nodes, max_degree), -1, dtype=int)
+    neighbor_next_hop_if = np.full((num_nodes, max_degree), -1, dtype=int)
+    neighbor_ids[sorted_link_from, link_column] = link_to[link_order]
+    neighbor_weights_m[sorted_link_from, link_column] = link_length_m[link_order]
+    neighbor_my_if[sorted_link_from, link_column] = link_my_if[link_order]
+    neighbor_next_hop_if[sorted_link_from, link_column] = link_next_hop_if[link_order]
+
+    # Calculate shortest paths: the graph is sparse (every ground station only has links to the satellites
+    # in range), so Dijkstra is run from each destination ground station instead of calculating all pairs
+    # (the graph is undirected, so the distance from the destination is the same as to it)
     if enable_verbose_logs:
-        print("  > Calculating Floyd-Warshall for graph including ground-station relays")
-    # (Note: Numpy has a deprecation warning here because of how networkx uses matrices)
-    dist_sat_net = nx.floyd_warshall_numpy(sat_net_graph)
-
-    # Forwarding state
-    fstate = {}
+        print("  > Calculating Dijkstra from each ground station for graph including ground-station relays")
+    csr_graph = csr_matrix((link_length_m, (link_from, link_to)), shape=(num_nodes, num_nodes))
+    dist_to_ground_station = np.zeros((num_ground_stations, num_nodes))
+    if num_ground_stations > 0:
+        dist_to_ground_station = dijkstra(
+            csr_graph, directed=True, indices=np.arange(num_satellites, num_nodes)
+        )
+
+    # For every destination ground station, among its neighbors, each node chooses the
+    # one which promises the lowest distance to reach the destination ground station
+    # (num_ground_stations (destination) x num_nodes x max. degree; unreachable or padding is infinite)
+    next_hop = np.full((num_nodes, num_ground_stations), -1, dtype=int)
+    my_if = np.full((num_nodes, num_ground_stations), -1, dtype=int)
+    next_hop_if = np.full((num_nodes, num_ground_stations), -1, dtype=int)
+    node_ids = np.arange(num_nodes)[:, np.newaxis]
+    for dst_gid in range(num_ground_stations):
+        via_neighbor_m = neighbor_weights_m + dist_to_ground_station[dst_gid][neighbor_ids]
+        best_neighbor_idx = np.argmin(via_neighbor_m, axis=1)[:, np.newaxis]
+        has_next_hop = np.take_along_axis(via_neighbor_m, best_neighbor_idx, axis=1)[:, 0] < 1000000000000000
+        next_hop[:, dst_gid] = np.where(has_next_hop, neighbor_ids[node_ids, best_neighbor_idx][:, 0], -1)
+        my_if[:, dst_gid] = np.where(has_next_hop, neighbor_my_if[node_ids, best_neighbor_idx][:, 0], -1)
+        next_hop_if[:, dst_gid] = np.where(has_next_hop, neighbor_next_hop_if[node_ids, best_neighbor_idx][:, 0], -1)
+
+    # Forwarding state of the satellites and ground stations to ground stations (which cannot forward to itself):
+    # (next-hop node identifier, my outgoing interface id, next-hop incoming interface id)
+    fstate = np.stack((next_hop, my_if, next_hop_if), axis=2).astype(np.int32)
+
+    # Difference with the previous forwarding state (which is written to file)
+    fstate_delta = calculate_fstate_array_delta(fstate, prev_fstate)
 
     # Now write state to file for complete graph
-    output_filename = output_dynamic_state_dir + "/fstate_" + str(time_since_epoch_ns) + ".txt"
+    output_filename = write_fstate_delta(output_dynamic_state_dir, time_since_epoch_ns, fstate_delta, fstate_format)
     if enable_verbose_logs:
-        print("  > Writing forwarding state to: " + output_filename)
-    with open(output_filename, "w+") as f_out:
-
-        # Satellites and ground stations to ground stations
-        for current_node_id in range(num_satellites + num_ground_stations):
-            for dst_gid in range(num_ground_stations):
-                dst_gs_node_id = num_satellites + dst_gid
-
-                # Cannot forward to itself
-                if current_node_id != dst_gs_node_id:
-
-                    # Among its neighbors, find the one which promises the
-                    # lowest distance to reach the destination satellite
-                    next_hop_decision = (-1, -1, -1)
-                    best_distance_m = 1000000000000000
-                    for neighbor_id in sat_net_graph.neighbors(current_node_id):
-
-                        # Any neighbor must be reachable
-                        if math.isinf(dist_sat_net[(current_node_id, neighbor_id)]):
-                            raise ValueError("Neighbor cannot be unreachable")
-
-                        # Calculate distance = next-hop + distance the next hop node promises
-                        distance_m = (
-                            sat_net_graph.edges[(current_node_id, neighbor_id)]["weight"]
-                            +
-                            dist_sat_net[(neighbor_id, dst_gs_node_id)]
-                        )
-                        if (
-                                not math.isinf(dist_sat_net[(neighbor_id, dst_gs_node_id)])
-                                and
-                                distance_m < best_distance_m
-                        ):
-
-                            # Check node identifiers to determine what are the
-                            # correct interface identifiers
-                            if current_node_id >= num_satellites and neighbor_id < num_satellites:  # GS to sat.
-                                my_if = 0
-                                next_hop_if = (
-                                    num_isls_per_sat[neighbor_id]
-                                    +
-                                    gid_to_sat_gsl_if_idx[current_node_id - num_satellites]
-                                )
-
-                            elif current_node_id < num_satellites and neighbor_id >= num_satellites:  # Sat. to GS
-                                my_if = (
-                                    num_isls_per_sat[current_node_id]
-                                    +
-                                    gid_to_sat_gsl_if_idx[neighbor_id - num_satellites]
-                                )
-                                next_hop_if = 0
-
-                            elif current_node_id < num_satellites and neighbor_id < num_satellites:  # Sat. to sat.
-                                my_if = sat_neighbor_to_if[(current_node_id, neighbor_id)]
-                                next_hop_if = sat_neighbor_to_if[(neighbor_id, current_node_id)]
-
-                            else:  # GS to GS
-                                raise ValueError("GS-to-GS link cannot exist")
-
-                            # Write the next-hop decision
-                            next_hop_decision = (
-                                neighbor_id,  # Next-hop node identifier
-                                my_if,        # My outgoing interface id
-                                next_hop_if   # Next-hop incoming interface id
-                            )
-
-                            # Update best distance found
-                            best_distance_m = distance_m
-
-                    # Write to forwarding state
-                    if not prev_fstate or prev_fstate[(current_node_id, dst_gs_node_id)] != next_hop_decision:
-                        f_out.write("%d,%d,%d,%d,%d\n" % (
-                            current_node_id,
-                            dst_gs_node_id,
-                            next_hop_decision[0],
-                            next_hop_decision[1],
-                            next_hop_decision[2]
-                        ))
-                    fstate[(current_node_id, dst_gs_node_id)] = next_hop_decision
+        print("  > Written forwarding state to: " + output_filename)
 
     # Finally return result
     return fstate
@@ -21,9 +21,11 @@
 # SOFTWARE.
 
 from satgen.distance_tools import *
+from satgen.ephemeris import get_satellite_positions_at
+from satgen.fstate import write_fstate_snapshot, start_compressed_output, stop_compressed_output
+from satgen.isls import create_isl_topology, set_isl_topology_lengths
 from astropy import units as u
 import math
-import networkx as nx
 import numpy as np
 from .algorithm_free_one_only_gs_relays import algorithm_free_one_only_gs_relays
 from .algorithm_free_one_only_over_isls import algorithm_free_one_only_over_isls
@@ -47,34 +49,77 @@ def generate_dynamic_state(
                                   # "algorithm_free_one_only_gs_relays"
                                   # "algorithm_free_one_only_over_isls"
                                   # "algorithm_paired_many_only_over_isls"
-        enable_verbose_logs
+        enable_verbose_logs,
+        ephemeris=None,
+        shortest_path_backend="floyd_warshall",
+        fstate_format="txt",
+        fstate_snapshot_interval_steps=0,
+        pass_prediction=False,
+        compression=None
 ):
     if offset_ns % time_step_ns != 0:
         raise ValueError("Offset must be a multiple of time_step_ns")
-    prev_output = None
-    i = 0
-    total_iterations = ((simulation_end_time_ns - offset_ns) / time_step_ns)
-    for time_since_epoch_ns in range(offset_ns, simulation_end_time_ns, time_step_ns):
-        if not enable_verbose_logs:
-            if i % int(math.floor(total_iterations) / 10.0) == 0:
-                print("Progress: calculating for T=%d (time step granularity is still %d ms)" % (
-                    time_since_epoch_ns, time_step_ns / 1000000
-                ))
-            i += 1
-        prev_output = generate_dynamic_state_at(
-            output_dynamic_state_dir,
+    if compression is not None and fstate_format == "log":
+        raise ValueError("The log forwarding state format cannot be compressed")
+
+    # Time windows during which each satellite can be in range of each ground station,
+    # calculated once for the entire run (refined to the time step)
+    visibility_windows = None
+    if pass_prediction:
+        visibility_windows = calculate_visibility_windows(
             epoch,
-            time_since_epoch_ns,
             satellites,
-            ground_stations,
-            list_isls,
-            list_gsl_interfaces_info,
+            ground_station_positions_m(ground_stations),
             max_gsl_length_m,
-            max_isl_length_m,
-            dynamic_state_algorithm,
-            prev_output,
-            enable_verbose_logs
+            offset_ns,
+            simulation_end_time_ns,
+            time_step_ns
         )
+        if enable_verbose_logs:
+            print("Pass prediction: %d visibility windows" % len(visibility_windows["rise_ns"]))
+
+    # The files are compressed in a background thread while the next time steps are calculated
+    if compression is not None:
+        start_compressed_output(output_dynamic_state_dir, compression)
+
+    try:
+        prev_output = None
+        i = 0
+        total_iterations = ((simulation_end_time_ns - offset_ns) / time_step_ns)
+        for time_since_epoch_ns in range(offset_ns, simulation_end_time_ns, time_step_ns):
+            if not enable_verbose_logs:
+                if i % int(math.floor(total_iterations) / 10.0) == 0:
+                    print("Progress: calculating for T=%d (time step granularity is still %d ms)" % (
+                        time_since_epoch_ns, time_step_ns / 1000000
+                    ))
+                i += 1
+            prev_output = generate_dynamic_state_at(
+                output_dynamic_state_dir,
+                epoch,
+                time_since_epoch_ns,
+                satellites,
+                ground_stations,
+                list_isls,
+                list_gsl_interfaces_info,
+                max_gsl_length_m,
+                max_isl_length_m,
+                dynamic_state_algorithm,
+                prev_output,
+                enable_verbose_logs,
+                None if ephemeris is None else get_satellite_positions_at(ephemeris, time_since_epoch_ns),
+                shortest_path_backend,
+                fstate_format,
+                visibility_windows
+            )
+
+            # Complete forwarding state every so many time steps
+            if fstate_snapshot_interval_steps > 0 \
+                    and (time_since_epoch_ns // time_step_ns) % fstate_snapshot_interval_steps == 0:
+                write_fstate_snapshot(output_dynamic_state_dir, time_since_epoch_ns, prev_output["fstate"])
+
+    finally:
+        if compression is not None:
+            stop_compressed_output(output_dynamic_state_dir)
 
 
 def generate_dynamic_state_at(
@@ -89,7 +134,11 @@ def generate_dynamic_state_at(
         max_isl_length_m,
         dynamic_state_algorithm,
         prev_output,
-        enable_verbose_logs
+        enable_verbose_logs,
+        satellite_positions=None,
+        shortest_path_backend="floyd_warshall",
+        fstate_format="txt",
+        visibility_windows=None
 ):
     if enable_verbose_logs:
         print("FORWARDING STATE AT T = " + (str(time_since_epoch_ns))
@@ -107,16 +156,7 @@ def generate_dynamic_state_at(
         print("  > Time since epoch....... " + str(time_since_epoch_ns) + " ns")
         print("  > Absolute time.......... " + str(time))
 
-    # Graphs
-    sat_net_graph_only_satellites_with_isls = nx.Graph()
-    sat_net_graph_all_with_only_gsls = nx.Graph()
-
     # Information
-    for i in range(len(satellites)):
-        sat_net_graph_only_satellites_with_isls.add_node(i)
-        sat_net_graph_all_with_only_gsls.add_node(i)
-    for i in range(len(satellites) + len(ground_stations)):
-        sat_net_graph_all_with_only_gsls.add_node(i)
     if enable_verbose_logs:
         print("  > Satellites............. " + str(len(satellites)))
         print("  > Ground stations........ " + str(len(ground_stations)))
@@ -128,35 +168,34 @@ def generate_dynamic_state_at(
     if enable_verbose_logs:
         print("\nISL INFORMATION")
 
-    # ISL edges
-    total_num_isls = 0
-    num_isls_per_sat = [0] * len(satellites)
-    sat_neighbor_to_if = {}
-    for (a, b) in list_isls:
-
-        # ISLs are not permitted to exceed their maximum distance
-        # TODO: Technically, they can (could just be ignored by forwarding state calculation),
-        # TODO: but practically, defining a permanent ISL between two satellites which
-        # TODO: can go out of distance is generally unwanted
-        sat_distance_m = distance_m_between_satellites(satellites[a], satellites[b], str(epoch), str(time))
-        if sat_distance_m > max_isl_length_m:
-            raise ValueError(
-                "The distance between two satellites (%d and %d) "
-                "with an ISL exceeded the maximum ISL length (%.2fm > %.2fm at t=%dns)"
-                % (a, b, sat_distance_m, max_isl_length_m, time_since_epoch_ns)
-            )
-
-        # Add to networkx graph
-        sat_net_graph_only_satellites_with_isls.add_edge(
-            a, b, weight=sat_distance_m
+    # Positions of all satellites and ground stations at this time moment
+    # (each satellite is propagated once, unless they are taken from the precomputed ephemeris)
+    if satellite_positions is None:
+        satellite_positions = satellite_positions_m(satellites, str(epoch), str(time))
+    ground_station_positions = ground_station_positions_m(ground_stations)
+    isl_distances_m = distances_m_between_satellites(satellite_positions, list_isls)
+
+    # ISLs are not permitted to exceed their maximum distance
+    # TODO: Technically, they can (could just be ignored by forwarding state calculation),
+    # TODO: but practically, defining a permanent ISL between two satellites which
+    # TODO: can go out of distance is generally unwanted
+    too_long_isl_idxs = np.flatnonzero(isl_distances_m > max_isl_length_m)
+    if len(too_long_isl_idxs) > 0:
+        a, b = list_isls[too_long_isl_idxs[0]]
+        raise ValueError(
+            "The distance between two satellites (%d and %d) "
+            "with an ISL exceeded the maximum ISL length (%.2fm > %.2fm at t=%dns)"
+            % (a, b, float(isl_distances_m[too_long_isl_idxs[0]]), max_isl_length_m, time_since_epoch_ns)
         )
 
-        # Interface mapping of ISLs
-        sat_neighbor_to_if[(a, b)] = num_isls_per_sat[a]
-        sat_neighbor_to_if[(b, a)] = num_isls_per_sat[b]
-        num_isls_per_sat[a] += 1
-        num_isls_per_sat[b] += 1
-        total_num_isls += 1
+    # The ISL topology is static, as such it is built at the first time step and
+    # carried over to the next ones, which only update the ISL lengths
+    if prev_output is None:
+        isl_topology = create_isl_topology(len(satellites), list_isls)
+    else:
+        isl_topology = prev_output["isl_topology"]
+    set_isl_topology_lengths(isl_topology, isl_distances_m)
+    num_isls_per_sat = isl_topology["num_isls_per_sat"]
 
     if enable_verbose_logs:
         print("  > Total ISLs............. " + str(len(list_isls)))
@@ -187,25 +226,17 @@ def generate_dynamic_state_at(
     if enable_verbose_logs:
         print("\nGSL IN-RANGE INFORMATION")
 
-    # What satellites can a ground station see
-    ground_station_satellites_in_range = []
-    for ground_station in ground_stations:
-        # Find satellites in range
-        satellites_in_range = []
-        for sid in range(len(satellites)):
-            distance_m = distance_m_ground_station_to_satellite(
-                ground_station,
-                satellites[sid],
-                str(epoch),
-                str(time)
-            )
-            if distance_m <= max_gsl_length_m:
-                satellites_in_range.append((distance_m, sid))
-                sat_net_graph_all_with_only_gsls.add_edge(
-                    sid, len(satellites) + ground_station["gid"], weight=distance_m
-                )
-
-        ground_station_satellites_in_range.append(satellites_in_range)
+    # What satellites can a ground station see (sorted by distance), for which only the pairs
+    # whose visibility window is open have to be evaluated if the passes were predicted
+    if visibility_windows is None:
+        ground_station_satellites_in_range = ground_station_satellites_in_range_m(
+            ground_station_positions, satellite_positions, max_gsl_length_m
+        )
+    else:
+        candidate_gids, candidate_sids = get_visibility_window_candidates(visibility_windows, time_since_epoch_ns)
+        ground_station_satellites_in_range = ground_station_candidates_in_range_m(
+            ground_station_positions, satellite_positions, max_gsl_length_m, candidate_gids, candidate_sids
+        )
 
     # Print how many are in range
     ground_station_num_in_range = list(map(lambda x: len(x), ground_station_satellites_in_range))
@@ -223,65 +254,70 @@ def generate_dynamic_state_at(
     #
     if dynamic_state_algorithm == "algorithm_free_one_only_over_isls":
 
-        return algorithm_free_one_only_over_isls(
+        output = algorithm_free_one_only_over_isls(
             output_dynamic_state_dir,
             time_since_epoch_ns,
             satellites,
             ground_stations,
-            sat_net_graph_only_satellites_with_isls,
+            isl_topology,
             ground_station_satellites_in_range,
-            num_isls_per_sat,
-            sat_neighbor_to_if,
             list_gsl_interfaces_info,
             prev_output,
-            enable_verbose_logs
+            enable_verbose_logs,
+            shortest_path_backend,
+            fstate_format
         )
 
     elif dynamic_state_algorithm == "algorithm_free_gs_one_sat_many_only_over_isls":
 
-        return algorithm_free_gs_one_sat_many_only_over_isls(
+        output = algorithm_free_gs_one_sat_many_only_over_isls(
             output_dynamic_state_dir,
             time_since_epoch_ns,
             satellites,
             ground_stations,
-            sat_net_graph_only_satellites_with_isls,
+            isl_topology,
             ground_station_satellites_in_range,
-            num_isls_per_sat,
-            sat_neighbor_to_if,
             list_gsl_interfaces_info,
             prev_output,
-            enable_verbose_logs
+            enable_verbose_logs,
+            shortest_path_backend,
+            fstate_format
         )
 
     elif dynamic_state_algorithm == "algorithm_free_one_only_gs_relays":
 
-        return algorithm_free_one_only_gs_relays(
+        output = algorithm_free_one_only_gs_relays(
             output_dynamic_state_dir,
             time_since_epoch_ns,
             satellites,
             ground_stations,
-            sat_net_graph_all_with_only_gsls,
-            num_isls_per_sat,
+            isl_topology,
+            ground_station_satellites_in_range,
             list_gsl_interfaces_info,
             prev_output,
-            enable_verbose_logs
+            enable_verbose_logs,
+            fstate_format
         )
 
     elif dynamic_state_algorithm == "algorithm_paired_many_only_over_isls":
 
-        return algorithm_paired_many_only_over_isls(
+        output = algorithm_paired_many_only_over_isls(
             output_dynamic_state_dir,
             time_since_epoch_ns,
             satellites,
             ground_stations,
-            sat_net_graph_only_satellites_with_isls,
+            isl_topology,
             ground_station_satellites_in_range,
-            num_isls_per_sat,
-            sat_neighbor_to_if,
             list_gsl_interfaces_info,
             prev_output,
-            enable_verbose_logs
+            enable_verbose_logs,
+            shortest_path_backend,
+            fstate_format
         )
 
     else:
         raise ValueError("Unknown dynamic state algorithm: " + str(dynamic_state_algorithm))
+
+    # Carried over to the next time step
+    output["isl_topology"] = isl_topology
+    return output
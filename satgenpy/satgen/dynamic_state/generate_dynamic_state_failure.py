@@ -21,9 +21,12 @@
 # SOFTWARE.
 
 from satgen.distance_tools import *
+from satgen.ephemeris import get_satellite_positions_at
+from satgen.fstate import write_fstate_snapshot, start_compressed_output, stop_compressed_output
+from satgen.isls import create_isl_topology, set_isl_topology_lengths
+from satgen.simulate_failures import create_failure_timeline, create_failure_state, update_failure_state
 from astropy import units as u
 import math
-import networkx as nx
 import numpy as np
 from .algorithm_free_one_only_gs_relays import algorithm_free_one_only_gs_relays
 from .algorithm_free_one_only_over_isls_failure import algorithm_free_one_only_over_isls_failure
@@ -48,35 +51,60 @@ def generate_dynamic_state_failure(
                                   # "algorithm_free_one_only_over_isls"
                                   # "algorithm_paired_many_only_over_isls"
         failure_table,
-        enable_verbose_logs
+        enable_verbose_logs,
+        ephemeris=None,
+        shortest_path_backend="floyd_warshall",
+        fstate_format="txt",
+        fstate_snapshot_interval_steps=0,
+        compression=None
 ):
     if offset_ns % time_step_ns != 0:
         raise ValueError("Offset must be a multiple of time_step_ns")
-    prev_output = None
-    i = 0
-    total_iterations = ((simulation_end_time_ns - offset_ns) / time_step_ns)
-    for time_since_epoch_ns in range(offset_ns, simulation_end_time_ns, time_step_ns):
-        if not enable_verbose_logs:
-            if i % int(math.floor(total_iterations) / 10.0) == 0:
-                print("Progress: calculating for T=%d (time step granularity is still %d ms)" % (
-                    time_since_epoch_ns, time_step_ns / 1000000
-                ))
-            i += 1
-        prev_output = generate_dynamic_state_at_failure(
-            output_dynamic_state_dir,
-            epoch,
-            time_since_epoch_ns,
-            satellites,
-            ground_stations,
-            list_isls,
-            list_gsl_interfaces_info,
-            max_gsl_length_m,
-            max_isl_length_m,
-            dynamic_state_algorithm,
-            prev_output,
-            failure_table,
-            enable_verbose_logs
-        )
+    if compression is not None and fstate_format == "log":
+        raise ValueError("The log forwarding state format cannot be compressed")
+
+    # The files are compressed in a background thread while the next time steps are calculated
+    if compression is not None:
+        start_compressed_output(output_dynamic_state_dir, compression)
+
+    try:
+        prev_output = None
+        i = 0
+        total_iterations = ((simulation_end_time_ns - offset_ns) / time_step_ns)
+        for time_since_epoch_ns in range(offset_ns, simulation_end_time_ns, time_step_ns):
+            if not enable_verbose_logs:
+                if i % int(math.floor(total_iterations) / 10.0) == 0:
+                    print("Progress: calculating for T=%d (time step granularity is still %d ms)" % (
+                        time_since_epoch_ns, time_step_ns / 1000000
+                    ))
+                i += 1
+            prev_output = generate_dynamic_state_at_failure(
+                output_dynamic_state_dir,
+                epoch,
+                time_since_epoch_ns,
+                satellites,
+                ground_stations,
+                list_isls,
+                list_gsl_interfaces_info,
+                max_gsl_length_m,
+                max_isl_length_m,
+                dynamic_state_algorithm,
+                prev_output,
+                failure_table,
+                enable_verbose_logs,
+                None if ephemeris is None else get_satellite_positions_at(ephemeris, time_since_epoch_ns),
+                shortest_path_backend,
+                fstate_format
+            )
+
+            # Complete forwarding state every so many time steps
+            if fstate_snapshot_interval_steps > 0 \
+                    and (time_since_epoch_ns // time_step_ns) % fstate_snapshot_interval_steps == 0:
+                write_fstate_snapshot(output_dynamic_state_dir, time_since_epoch_ns, prev_output["fstate"])
+
+    finally:
+        if compression is not None:
+            stop_compressed_output(output_dynamic_state_dir)
 
 
 def generate_dynamic_state_at_failure(
@@ -92,7 +120,10 @@ def generate_dynamic_state_at_failure(
         dynamic_state_algorithm,
         prev_output,
         failure_table,
-        enable_verbose_logs
+        enable_verbose_logs,
+        satellite_positions=None,
+        shortest_path_backend="floyd_warshall",
+        fstate_format="txt"
 ):
     if enable_verbose_logs:
         print("FORWARDING STATE AT T = " + (str(time_since_epoch_ns))
@@ -110,37 +141,21 @@ def generate_dynamic_state_at_failure(
         print("  > Time since epoch....... " + str(time_since_epoch_ns) + " ns")
         print("  > Absolute time.......... " + str(time))
 
-    # Graphs
-    sat_net_graph_only_satellites_with_isls = nx.Graph()
-    sat_net_graph_all_with_only_gsls = nx.Graph()
-
-    # Active nodes
-    active_satellite_ids = set(range(len(satellites))) # 0 to 1583
-    active_ground_station_ids = set(range(len(satellites), len(satellites) + len(ground_stations))) # 1584 to 1584 + len(ground_stations)
-    active_isls = list_isls.copy()
-
-    # Check for failed satellites
-    for failed_sat in failure_table['SAT']:
-        if failure_table['SAT'][failed_sat][0] <= time_since_epoch_ns <= failure_table['SAT'][failed_sat][1]:
-            active_satellite_ids.remove(failed_sat)
-
-    # Check for failed ground stations
-    for failed_gs in failure_table['GS']:
-        if failure_table['GS'][failed_gs][0] <= time_since_epoch_ns <= failure_table['GS'][failed_gs][1]:
-            active_ground_station_ids.remove(failed_gs)
-
-    # Check for failed ISLs
-    for failed_isl in failure_table['ISL']:
-        if failure_table['ISL'][failed_isl][0] <= time_since_epoch_ns <= failure_table['ISL'][failed_isl][1]:
-            active_isls.remove(failed_isl)
+    # Active nodes and ISLs, which are updated only by the failures which start or end at this time
+    if prev_output is None:
+        failure_state = create_failure_state(
+            failure_table["timeline"] if "timeline" in failure_table else create_failure_timeline(failure_table),
+            len(satellites),
+            len(ground_stations),
+            list_isls
+        )
+    else:
+        failure_state = prev_output["failure_state"]
+    update_failure_state(failure_state, time_since_epoch_ns)
+    active_satellite_ids = failure_state["active_satellite_ids"]
+    active_ground_station_ids = failure_state["active_ground_station_ids"]
 
     # Information
-    # Add all nodes but don't add edges among failed nodes
-    for i in range(len(satellites)):
-        sat_net_graph_only_satellites_with_isls.add_node(i)
-        sat_net_graph_all_with_only_gsls.add_node(i)
-    for i in range(len(satellites) + len(ground_stations)):
-        sat_net_graph_all_with_only_gsls.add_node(i)
     if enable_verbose_logs:
         print("  > Active satellites............. " + str(len(active_satellite_ids)))
         print("  > Active ground stations........ " + str(len(active_ground_station_ids)))
@@ -152,42 +167,38 @@ def generate_dynamic_state_at_failure(
     if enable_verbose_logs:
         print("\nISL INFORMATION")
 
-    # ISL edges
-    total_num_isls = 0
-    num_isls_per_sat = [0] * len(satellites)
-    sat_neighbor_to_if = {}
-    for (a, b) in list_isls:
-        # Failed satellites
-        if a not in active_satellite_ids or b not in active_satellite_ids:
-            continue
-
-        # Failed ISLs
-        if (a, b) not in active_isls:
-            continue
-
-        # ISLs are not permitted to exceed their maximum distance
-        # TODO: Technically, they can (could just be ignored by forwarding state calculation),
-        # TODO: but practically, defining a permanent ISL between two satellites which
-        # TODO: can go out of distance is generally unwanted
-        sat_distance_m = distance_m_between_satellites(satellites[a], satellites[b], str(epoch), str(time))
-        if sat_distance_m > max_isl_length_m:
-            raise ValueError(
-                "The distance between two satellites (%d and %d) "
-                "with an ISL exceeded the maximum ISL length (%.2fm > %.2fm at t=%dns)"
-                % (a, b, sat_distance_m, max_isl_length_m, time_since_epoch_ns)
-            )
-
-        # Add to networkx graph
-        sat_net_graph_only_satellites_with_isls.add_edge(
-            a, b, weight=sat_distance_m
+    # Positions of all satellites and ground stations at this time moment
+    # (each satellite is propagated once, unless they are taken from the precomputed ephemeris)
+    if satellite_positions is None:
+        satellite_positions = satellite_positions_m(satellites, str(epoch), str(time))
+    ground_station_positions = ground_station_positions_m(ground_stations)
+    isl_distances_m = distances_m_between_satellites(satellite_positions, list_isls)
+
+    # Active ISLs: those which have not failed themselves, and of which neither satellite has failed
+    active_list_isls = failure_state["active_list_isls"]
+    active_isl_distances_m = isl_distances_m[failure_state["active_isl_idxs"]]
+
+    # ISLs are not permitted to exceed their maximum distance
+    # TODO: Technically, they can (could just be ignored by forwarding state calculation),
+    # TODO: but practically, defining a permanent ISL between two satellites which
+    # TODO: can go out of distance is generally unwanted
+    too_long_isl_idxs = np.flatnonzero(active_isl_distances_m > max_isl_length_m)
+    if len(too_long_isl_idxs) > 0:
+        a, b = active_list_isls[too_long_isl_idxs[0]]
+        raise ValueError(
+            "The distance between two satellites (%d and %d) "
+            "with an ISL exceeded the maximum ISL length (%.2fm > %.2fm at t=%dns)"
+            % (a, b, float(active_isl_distances_m[too_long_isl_idxs[0]]), max_isl_length_m, time_since_epoch_ns)
         )
 
-        # Interface mapping of ISLs
-        sat_neighbor_to_if[(a, b)] = num_isls_per_sat[a]
-        sat_neighbor_to_if[(b, a)] = num_isls_per_sat[b]
-        num_isls_per_sat[a] += 1
-        num_isls_per_sat[b] += 1
-        total_num_isls += 1
+    # The ISL topology of the previous time step is re-used as long as the same ISLs are active,
+    # only when a failure starts or ends is it rebuilt (which renumbers the ISL interfaces)
+    if prev_output is not None and not failure_state["isls_changed"]:
+        isl_topology = prev_output["isl_topology"]
+    else:
+        isl_topology = create_isl_topology(len(satellites), active_list_isls)
+    set_isl_topology_lengths(isl_topology, active_isl_distances_m)
+    num_isls_per_sat = isl_topology["num_isls_per_sat"]
 
     if enable_verbose_logs:
         print("  > Total ISLs............. " + str(len(list_isls)))
@@ -199,10 +210,13 @@ def generate_dynamic_state_at_failure(
     if enable_verbose_logs:
         print("\nGSL INTERFACE INFORMATION")
 
-    satellite_gsl_if_count_list = [list_gsl_interfaces_info[i]["number_of_interfaces"] for i in active_satellite_ids]
-    ground_station_gsl_if_count_list = [list_gsl_interfaces_info[i]["number_of_interfaces"] for i in active_ground_station_ids]
-
     if enable_verbose_logs:
+        satellite_gsl_if_count_list = [
+            list_gsl_interfaces_info[i]["number_of_interfaces"] for i in active_satellite_ids
+        ]
+        ground_station_gsl_if_count_list = [
+            list_gsl_interfaces_info[i]["number_of_interfaces"] for i in active_ground_station_ids
+        ]
         print("  > Min. GSL IFs/satellite........ " + str(np.min(satellite_gsl_if_count_list)))
         print("  > Max. GSL IFs/satellite........ " + str(np.max(satellite_gsl_if_count_list)))
         print("  > Min. GSL IFs/ground station... " + str(np.min(ground_station_gsl_if_count_list)))
@@ -213,28 +227,13 @@ def generate_dynamic_state_at_failure(
     if enable_verbose_logs:
         print("\nGSL IN-RANGE INFORMATION")
 
-    # What satellites can a ground station see
-    ground_station_satellites_in_range = [0] * len(ground_stations)
-    for ground_station in ground_stations:
-        if (ground_station['gid'] + 1584) not in active_ground_station_ids:
-            continue
-
-        # Find satellites in range
-        satellites_in_range = []
-        for sid in active_satellite_ids:
-            distance_m = distance_m_ground_station_to_satellite(
-                ground_station,
-                satellites[sid],
-                str(epoch),
-                str(time)
-            )
-            if distance_m <= max_gsl_length_m:
-                satellites_in_range.append((distance_m, sid))
-                sat_net_graph_all_with_only_gsls.add_edge(
-                    sid, len(satellites) + ground_station["gid"], weight=distance_m
-                )
-
-        ground_station_satellites_in_range[ground_station["gid"]] = satellites_in_range
+    # What satellites can a ground station see (sorted by distance), only active satellites
+    # are considered and a failed ground station has no list (indicated by 0)
+    ground_station_satellites_in_range = ground_station_satellites_in_range_m(
+        ground_station_positions, satellite_positions, max_gsl_length_m, active_satellite_ids
+    )
+    for node_id in failure_state["failed_ground_station_ids"]:
+        ground_station_satellites_in_range[node_id - len(satellites)] = 0
 
     # Print how many are in range
     ground_station_num_in_range = list(map(lambda x: len(x) if isinstance(x, list) else 0, ground_station_satellites_in_range))
@@ -252,67 +251,73 @@ def generate_dynamic_state_at_failure(
     #
     if dynamic_state_algorithm == "algorithm_free_one_only_over_isls":
 
-        return algorithm_free_one_only_over_isls_failure(
+        output = algorithm_free_one_only_over_isls_failure(
             output_dynamic_state_dir,
             time_since_epoch_ns,
             satellites,
             ground_stations,
             active_satellite_ids,
             active_ground_station_ids,
-            sat_net_graph_only_satellites_with_isls,
+            isl_topology,
             ground_station_satellites_in_range,
-            num_isls_per_sat,
-            sat_neighbor_to_if,
             list_gsl_interfaces_info,
             prev_output,
-            enable_verbose_logs
+            enable_verbose_logs,
+            shortest_path_backend,
+            fstate_format
         )
 
     elif dynamic_state_algorithm == "algorithm_free_gs_one_sat_many_only_over_isls":
 
-        return algorithm_free_gs_one_sat_many_only_over_isls(
+        output = algorithm_free_gs_one_sat_many_only_over_isls(
             output_dynamic_state_dir,
             time_since_epoch_ns,
             satellites,
             ground_stations,
-            sat_net_graph_only_satellites_with_isls,
+            isl_topology,
             ground_station_satellites_in_range,
-            num_isls_per_sat,
-            sat_neighbor_to_if,
             list_gsl_interfaces_info,
             prev_output,
-            enable_verbose_logs
+            enable_verbose_logs,
+            shortest_path_backend,
+            fstate_format
         )
 
     elif dynamic_state_algorithm == "algorithm_free_one_only_gs_relays":
 
-        return algorithm_free_one_only_gs_relays(
+        output = algorithm_free_one_only_gs_relays(
             output_dynamic_state_dir,
             time_since_epoch_ns,
             satellites,
             ground_stations,
-            sat_net_graph_all_with_only_gsls,
-            num_isls_per_sat,
+            isl_topology,
+            ground_station_satellites_in_range,
             list_gsl_interfaces_info,
             prev_output,
-            enable_verbose_logs
+            enable_verbose_logs,
+            fstate_format
         )
 
     elif dynamic_state_algorithm == "algorithm_paired_many_only_over_isls":
 
-        return algorithm_paired_many_only_over_isls(
+        output = algorithm_paired_many_only_over_isls(
             output_dynamic_state_dir,
             time_since_epoch_ns,
             satellites,
             ground_stations,
-            sat_net_graph_only_satellites_with_isls,
+            isl_topology,
             ground_station_satellites_in_range,
-            num_isls_per_sat,
-            sat_neighbor_to_if,
             list_gsl_interfaces_info,
             prev_output,
-            enable_verbose_logs
+            enable_verbose_logs,
+            shortest_path_backend,
+            fstate_format
         )
 
     else:
         raise ValueError("Unknown dynamic state algorithm: " + str(dynamic_state_algorithm))
+
+    # Carried over to the next time step
+    output["isl_topology"] = isl_topology
+    output["failure_state"] = failure_state
+    return output
@@ -24,12 +24,102 @@ from satgen.isls import *
 from satgen.ground_stations import *
 from satgen.tles import *
 from satgen.interfaces import *
+from satgen.ephemeris import *
+from satgen.fstate import remove_logs, merge_worker_logs, remove_fstate_snapshots, remove_state_files, \
+    write_fstate_snapshots_info
 from .generate_dynamic_state import generate_dynamic_state
 import os
 import math
+import multiprocessing
 from multiprocessing.dummy import Pool as ThreadPool
 
 
+# Static inputs shared by all worker processes (only used when parallelism="processes").
+# They are set in the parent before the worker processes are forked, such that the workers
+# inherit them copy-on-write instead of each re-reading (and re-parsing) the input files.
+shared_static_inputs = None
+
+
+def load_static_inputs(output_generated_data_dir, name, time_step_ms, duration_s):
+    """
+    Reads the static inputs of the satellite network (which do not change over time).
+
+    :param output_generated_data_dir:   Directory of the generated data
+    :param name:                        Name of the satellite network
+    :param time_step_ms:                Time step (ms)
+    :param duration_s:                  Duration (s)
+
+    :return: Dictionary with the epoch, satellites, ground stations, ISLs, GSL interfaces info and ephemeris
+    """
+    ground_stations = read_ground_stations_extended(output_generated_data_dir + "/" + name + "/ground_stations.txt")
+    tles = read_tles(output_generated_data_dir + "/" + name + "/tles.txt")
+    satellites = tles["satellites"]
+    list_isls = read_isls(output_generated_data_dir + "/" + name + "/isls.txt", len(satellites))
+    list_gsl_interfaces_info = read_gsl_interfaces_info(
+        output_generated_data_dir + "/" + name + "/gsl_interfaces_info.txt",
+        len(satellites),
+        len(ground_stations)
+    )
+    return {
+        "epoch": tles["epoch"],
+        "satellites": satellites,
+        "ground_stations": ground_stations,
+        "list_isls": list_isls,
+        "list_gsl_interfaces_info": list_gsl_interfaces_info,
+        "ephemeris": read_ephemeris_if_available(output_generated_data_dir + "/" + name, time_step_ms, duration_s)
+    }
+
+
+def initialize_worker_process(output_generated_data_dir, name, time_step_ms, duration_s):
+    global shared_static_inputs
+
+    # Only if not already inherited from the parent (i.e., if the start method is not fork)
+    if shared_static_inputs is None:
+        shared_static_inputs = load_static_inputs(output_generated_data_dir, name, time_step_ms, duration_s)
+
+
+def worker_process(args):
+
+    # The arguments do not contain the static inputs, as those would otherwise be pickled
+    (
+        output_dynamic_state_dir,
+        simulation_end_time_ns,
+        time_step_ns,
+        offset_ns,
+        max_gsl_length_m,
+        max_isl_length_m,
+        dynamic_state_algorithm,
+        print_logs,
+        shortest_path_backend,
+        fstate_format,
+        fstate_snapshot_interval_steps,
+        pass_prediction,
+        compression
+    ) = args
+
+    worker((
+        output_dynamic_state_dir,
+        shared_static_inputs["epoch"],
+        simulation_end_time_ns,
+        time_step_ns,
+        offset_ns,
+        shared_static_inputs["satellites"],
+        shared_static_inputs["ground_stations"],
+        shared_static_inputs["list_isls"],
+        shared_static_inputs["list_gsl_interfaces_info"],
+        max_gsl_length_m,
+        max_isl_length_m,
+        dynamic_state_algorithm,
+        print_logs,
+        shared_static_inputs["ephemeris"],
+        shortest_path_backend,
+        fstate_format,
+        fstate_snapshot_interval_steps,
+        pass_prediction,
+        compression
+    ))
+
+
 def worker(args):
 
     # Extract arguments
@@ -46,7 +136,13 @@ def worker(args):
         max_gsl_length_m,
         max_isl_length_m,
         dynamic_state_algorithm,
-        print_logs
+        print_logs,
+        ephemeris,
+        shortest_path_backend,
+        fstate_format,
+        fstate_snapshot_interval_steps,
+        pass_prediction,
+        compression
      ) = args
 
     # Generate dynamic state
@@ -67,14 +163,31 @@ def worker(args):
                                   # "algorithm_free_one_only_over_isls"
                                   # "algorithm_free_gs_one_sat_many_only_over_isls"
                                   # "algorithm_paired_many_only_over_isls"
-        print_logs
+        print_logs,
+        ephemeris,
+        shortest_path_backend,
+        fstate_format,
+        fstate_snapshot_interval_steps,
+        pass_prediction,
+        compression
     )
 
 
 def help_dynamic_state(
         output_generated_data_dir, num_threads, name, time_step_ms, duration_s,
-        max_gsl_length_m, max_isl_length_m, dynamic_state_algorithm, print_logs
+        max_gsl_length_m, max_isl_length_m, dynamic_state_algorithm, print_logs,
+        shortest_path_backend="floyd_warshall", parallelism="threads", fstate_format="txt",
+        fstate_snapshot_interval_steps=0, pass_prediction=False, compression=None
 ):
+    global shared_static_inputs
+
+    # Parallelism:
+    # "threads"   -- Thread pool, each thread has its own copy of the static inputs (cheap to start,
+    #                but as the calculation is CPU-bound it is largely serialized by the GIL)
+    # "processes" -- Process pool, the static inputs are loaded once and shared with the worker
+    #                processes (scales with the number of cores)
+    if parallelism not in ("threads", "processes"):
+        raise ValueError("Unknown parallelism: " + str(parallelism))
 
     # Directory
     output_dynamic_state_dir = output_generated_data_dir + "/" + name + "/dynamic_state_" + str(time_step_ms) \
@@ -82,14 +195,33 @@ def help_dynamic_state(
     if not os.path.isdir(output_dynamic_state_dir):
         os.makedirs(output_dynamic_state_dir)
 
+    # Files of a previous run (possibly in another format) would otherwise be merged in, or be read instead
+    remove_logs(output_dynamic_state_dir)
+    remove_fstate_snapshots(output_dynamic_state_dir)
+    remove_state_files(output_dynamic_state_dir)
+
     # In nanoseconds
     simulation_end_time_ns = duration_s * 1000 * 1000 * 1000
     time_step_ns = time_step_ms * 1000 * 1000
 
+    # Written once for all workers, which each only write the snapshots of their own time steps
+    if fstate_snapshot_interval_steps > 0:
+        write_fstate_snapshots_info(output_dynamic_state_dir, time_step_ns, fstate_snapshot_interval_steps)
+
     num_calculations = math.floor(simulation_end_time_ns / time_step_ns)
     calculations_per_thread = int(math.floor(float(num_calculations) / float(num_threads)))
     num_threads_with_one_more = num_calculations % num_threads
 
+    # Static inputs for the worker processes are loaded only once
+    if parallelism == "processes":
+        shared_static_inputs = load_static_inputs(output_generated_data_dir, name, time_step_ms, duration_s)
+        ephemeris = shared_static_inputs["ephemeris"]
+    else:
+        # Precomputed satellite positions (if generated), shared by all threads
+        ephemeris = read_ephemeris_if_available(output_generated_data_dir + "/" + name, time_step_ms, duration_s)
+    if ephemeris is not None:
+        print("Using the precomputed ephemeris for the satellite positions")
+
     # Prepare arguments
     current = 0
     list_args = []
@@ -100,6 +232,36 @@ def help_dynamic_state(
         if i < num_threads_with_one_more:
             num_time_steps += 1
 
+        # Print goal
+        print("%s %d does interval [%.2f ms, %.2f ms]" % (
+            "Thread" if parallelism == "threads" else "Process",
+            i,
+            (current * time_step_ns) / 1e6,
+            ((current + num_time_steps) * time_step_ns) / 1e6
+        ))
+
+        # End of the interval (includes the first time step of the next one, to write its difference)
+        end_time_ns = (current + num_time_steps) * time_step_ns + (time_step_ns if (i + 1) != num_threads else 0)
+
+        if parallelism == "processes":
+            list_args.append((
+                output_dynamic_state_dir,
+                end_time_ns,
+                time_step_ns,
+                current * time_step_ns,
+                max_gsl_length_m,
+                max_isl_length_m,
+                dynamic_state_algorithm,
+                print_logs,
+                shortest_path_backend,
+                fstate_format,
+                fstate_snapshot_interval_steps,
+                pass_prediction,
+                compression
+            ))
+            current += num_time_steps
+            continue
+
         # Variables (load in for each thread such that they don't interfere)
         ground_stations = read_ground_stations_extended(output_generated_data_dir + "/" + name + "/ground_stations.txt")
         tles = read_tles(output_generated_data_dir + "/" + name + "/tles.txt")
@@ -112,17 +274,10 @@ def help_dynamic_state(
         )
         epoch = tles["epoch"]
 
-        # Print goal
-        print("Thread %d does interval [%.2f ms, %.2f ms]" % (
-            i,
-            (current * time_step_ns) / 1e6,
-            ((current + num_time_steps) * time_step_ns) / 1e6
-        ))
-
         list_args.append((
             output_dynamic_state_dir,
             epoch,
-            (current + num_time_steps) * time_step_ns + (time_step_ns if (i + 1) != num_threads else 0),
+            end_time_ns,
             time_step_ns,
             current * time_step_ns,
             satellites,
@@ -132,13 +287,45 @@ def help_dynamic_state(
             max_gsl_length_m,
             max_isl_length_m,
             dynamic_state_algorithm,
-            print_logs
+            print_logs,
+            ephemeris,
+            shortest_path_backend,
+            fstate_format,
+            fstate_snapshot_interval_steps,
+            pass_prediction,
+            compression
         ))
 
         current += num_time_steps
 
     # Run in parallel
-    pool = ThreadPool(num_threads)
-    pool.map(worker, list_args)
-    pool.close()
-    pool.join()
+    if parallelism == "processes":
+
+        # Fork (where available) such that the static inputs are inherited copy-on-write
+        if "fork" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("fork")
+        else:
+            context = multiprocessing.get_context()
+        pool = context.Pool(
+            num_threads,
+            initializer=initialize_worker_process,
+            initargs=(output_generated_data_dir, name, time_step_ms, duration_s)
+        )
+        try:
+            pool.map(worker_process, list_args, chunksize=1)
+        finally:
+            # Also if a worker failed, such that neither the pool nor the static inputs are left behind
+            pool.close()
+            pool.join()
+            shared_static_inputs = None
+
+    else:
+        pool = ThreadPool(num_threads)
+        pool.map(worker, list_args)
+        pool.close()
+        pool.join()
+
+    # Merge the logs of all workers into one log per run
+    if fstate_format == "log":
+        merge_worker_logs(output_dynamic_state_dir, "fstate")
+        merge_worker_logs(output_dynamic_state_dir, "gsl_if_bandwidth")
@@ -24,6 +24,9 @@ from satgen.isls import *
 from satgen.ground_stations import *
 from satgen.tles import *
 from satgen.interfaces import *
+from satgen.ephemeris import *
+from satgen.fstate import remove_logs, merge_worker_logs, remove_fstate_snapshots, remove_state_files, \
+    write_fstate_snapshots_info
 from .generate_dynamic_state_failure import generate_dynamic_state_failure
 import os
 import math
@@ -47,7 +50,12 @@ def worker(args):
         max_isl_length_m,
         dynamic_state_algorithm,
         failure_table,
-        print_logs
+        print_logs,
+        ephemeris,
+        shortest_path_backend,
+        fstate_format,
+        fstate_snapshot_interval_steps,
+        compression
      ) = args
 
     # Generate dynamic state
@@ -69,13 +77,20 @@ def worker(args):
                                   # "algorithm_free_gs_one_sat_many_only_over_isls"
                                   # "algorithm_paired_many_only_over_isls"
         failure_table,
-        print_logs
+        print_logs,
+        ephemeris,
+        shortest_path_backend,
+        fstate_format,
+        fstate_snapshot_interval_steps,
+        compression
     )
 
 
 def help_dynamic_state_failure(
         output_generated_data_dir, num_threads, name, time_step_ms, duration_s,
-        max_gsl_length_m, max_isl_length_m, dynamic_state_algorithm, failure_table, print_logs
+        max_gsl_length_m, max_isl_length_m, dynamic_state_algorithm, failure_table, print_logs,
+        shortest_path_backend="floyd_warshall", fstate_format="txt",
+        fstate_snapshot_interval_steps=0, compression=None
 ):
 
     # Directory
@@ -84,14 +99,28 @@ def help_dynamic_state_failure(
     if not os.path.isdir(output_dynamic_state_dir):
         os.makedirs(output_dynamic_state_dir)
 
+    # Files of a previous run (possibly in another format) would otherwise be merged in, or be read instead
+    remove_logs(output_dynamic_state_dir)
+    remove_fstate_snapshots(output_dynamic_state_dir)
+    remove_state_files(output_dynamic_state_dir)
+
     # In nanoseconds
     simulation_end_time_ns = duration_s * 1000 * 1000 * 1000
     time_step_ns = time_step_ms * 1000 * 1000
 
+    # Written once for all workers, which each only write the snapshots of their own time steps
+    if fstate_snapshot_interval_steps > 0:
+        write_fstate_snapshots_info(output_dynamic_state_dir, time_step_ns, fstate_snapshot_interval_steps)
+
     num_calculations = math.floor(simulation_end_time_ns / time_step_ns)
     calculations_per_thread = int(math.floor(float(num_calculations) / float(num_threads)))
     num_threads_with_one_more = num_calculations % num_threads
 
+    # Precomputed satellite positions (if generated), shared by all threads
+    ephemeris = read_ephemeris_if_available(output_generated_data_dir + "/" + name, time_step_ms, duration_s)
+    if ephemeris is not None:
+        print("Using the precomputed ephemeris for the satellite positions")
+
     # Prepare arguments
     current = 0
     list_args = []
@@ -135,7 +164,12 @@ def help_dynamic_state_failure(
             max_isl_length_m,
             dynamic_state_algorithm,
             failure_table,
-            print_logs
+            print_logs,
+            ephemeris,
+            shortest_path_backend,
+            fstate_format,
+            fstate_snapshot_interval_steps,
+            compression
         ))
 
         current += num_time_steps
@@ -145,3 +179,8 @@ def help_dynamic_state_failure(
     pool.map(worker, list_args)
     pool.close()
     pool.join()
+
+    # Merge the logs of all workers into one log per run
+    if fstate_format == "log":
+        merge_worker_logs(output_dynamic_state_dir, "fstate")
+        merge_worker_logs(output_dynamic_state_dir, "gsl_if_bandwidth")
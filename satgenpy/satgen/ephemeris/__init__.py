@@ -0,0 +1,10 @@
+from .generate_ephemeris import (
+    generate_ephemeris,
+    get_ephemeris_dir
+)
+from .read_ephemeris import (
+    has_ephemeris,
+    read_ephemeris,
+    read_ephemeris_if_available,
+    get_satellite_positions_at
+)
@@ -0,0 +1,110 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from satgen.distance_tools import *
+from satgen.tles import *
+from astropy import units as u
+import hashlib
+import math
+import numpy as np
+import os
+
+
+def get_ephemeris_dir(satellite_network_dir, time_step_ms, duration_s):
+    """
+    Directory in which the ephemeris of a satellite network is stored for a given time grid.
+
+    :param satellite_network_dir:   Satellite network directory (containing tles.txt)
+    :param time_step_ms:            Time step in milliseconds
+    :param duration_s:              Duration in seconds
+
+    :return: Ephemeris directory
+    """
+    return "%s/ephemeris_%dms_for_%ds" % (satellite_network_dir, time_step_ms, duration_s)
+
+
+def calculate_tles_fingerprint(filename_tles):
+    """
+    Fingerprint of a TLEs file, such that an ephemeris can be matched to the TLEs it was propagated from.
+
+    :param filename_tles:   Filename of the TLEs (typically /path/to/tles.txt)
+
+    :return: SHA-256 hex digest of the file content
+    """
+    with open(filename_tles, "rb") as f_in:
+        return hashlib.sha256(f_in.read()).hexdigest()
+
+
+def generate_ephemeris(satellite_network_dir, time_step_ms, duration_s, print_logs=True):
+    """
+    Propagates every satellite in tles.txt once for each time step in [0, duration) and stores
+    the Earth-fixed positions as a memory-mappable T x N x 3 array (float64, meters) in
+    <satellite_network_dir>/ephemeris_<time_step_ms>ms_for_<duration_s>s/satellite_positions_m.npy.
+
+    The positions are exactly those of satellite_positions_m() at the same time instants,
+    so any stage which reads them produces the same output as when it propagates itself.
+
+    :param satellite_network_dir:   Satellite network directory (containing tles.txt)
+    :param time_step_ms:            Time step in milliseconds
+    :param duration_s:              Duration in seconds
+    :param print_logs:              True to print progress
+
+    :return: Ephemeris directory
+    """
+
+    # Directory
+    ephemeris_dir = get_ephemeris_dir(satellite_network_dir, time_step_ms, duration_s)
+    if not os.path.isdir(ephemeris_dir):
+        os.makedirs(ephemeris_dir)
+
+    # Constellation
+    tles = read_tles(satellite_network_dir + "/tles.txt")
+    satellites = tles["satellites"]
+    epoch = tles["epoch"]
+
+    # In nanoseconds
+    simulation_end_time_ns = duration_s * 1000 * 1000 * 1000
+    time_step_ns = time_step_ms * 1000 * 1000
+    num_time_steps = math.floor(simulation_end_time_ns / time_step_ns)
+
+    # Propagate into a temporary file, such that a partially written ephemeris is never picked up
+    temporary_filename = ephemeris_dir + "/satellite_positions_m.npy.tmp"
+    positions = np.lib.format.open_memmap(
+        temporary_filename, mode="w+", dtype=np.float64, shape=(num_time_steps, len(satellites), 3)
+    )
+    for i in range(num_time_steps):
+        time = epoch + i * time_step_ns * u.ns
+        positions[i] = satellite_positions_m(satellites, str(epoch), str(time))
+        if print_logs and i % max(1, num_time_steps // 10) == 0:
+            print("Progress: propagated T=%d (%d out of %d time steps)" % (i * time_step_ns, i + 1, num_time_steps))
+    positions.flush()
+    del positions
+    os.replace(temporary_filename, ephemeris_dir + "/satellite_positions_m.npy")
+
+    # Information to validate the ephemeris when it is read
+    with open(ephemeris_dir + "/ephemeris_info.txt", "w+") as f_out:
+        f_out.write("tles_sha256=%s\n" % calculate_tles_fingerprint(satellite_network_dir + "/tles.txt"))
+        f_out.write("time_step_ns=%d\n" % time_step_ns)
+        f_out.write("num_time_steps=%d\n" % num_time_steps)
+        f_out.write("num_satellites=%d\n" % len(satellites))
+
+    return ephemeris_dir
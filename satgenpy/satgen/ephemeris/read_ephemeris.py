@@ -0,0 +1,119 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from .generate_ephemeris import get_ephemeris_dir, calculate_tles_fingerprint
+import numpy as np
+import os
+
+
+def has_ephemeris(satellite_network_dir, time_step_ms, duration_s):
+    """
+    Whether an ephemeris was generated for the satellite network and time grid.
+
+    :param satellite_network_dir:   Satellite network directory (containing tles.txt)
+    :param time_step_ms:            Time step in milliseconds
+    :param duration_s:              Duration in seconds
+
+    :return: True iff the ephemeris exists
+    """
+    ephemeris_dir = get_ephemeris_dir(satellite_network_dir, time_step_ms, duration_s)
+    return os.path.isfile(ephemeris_dir + "/satellite_positions_m.npy") \
+        and os.path.isfile(ephemeris_dir + "/ephemeris_info.txt")
+
+
+def read_ephemeris(satellite_network_dir, time_step_ms, duration_s):
+    """
+    Memory-maps the ephemeris generated by generate_ephemeris(). Only the time steps which
+    are accessed are read from disk, and they are shared among all readers by the OS page cache.
+
+    :param satellite_network_dir:   Satellite network directory (containing tles.txt)
+    :param time_step_ms:            Time step in milliseconds
+    :param duration_s:              Duration in seconds
+
+    :return: Dictionary: {
+                    "time_step_ns":             Time step in nanoseconds
+                    "num_time_steps":           Number of time steps (T)
+                    "num_satellites":           Number of satellites (N)
+                    "satellite_positions_m":    Read-only memory-mapped array of shape (T, N, 3)
+              }
+    """
+    ephemeris_dir = get_ephemeris_dir(satellite_network_dir, time_step_ms, duration_s)
+
+    # Information
+    info = {}
+    with open(ephemeris_dir + "/ephemeris_info.txt", "r") as f_in:
+        for line in f_in:
+            key, value = line.strip().split("=")
+            info[key] = value
+
+    # It must have been generated from the current TLEs
+    if info["tles_sha256"] != calculate_tles_fingerprint(satellite_network_dir + "/tles.txt"):
+        raise ValueError("Ephemeris in " + ephemeris_dir + " was not generated from the current tles.txt")
+
+    # Positions
+    satellite_positions = np.load(ephemeris_dir + "/satellite_positions_m.npy", mmap_mode="r")
+    time_step_ns = int(info["time_step_ns"])
+    num_time_steps = int(info["num_time_steps"])
+    num_satellites = int(info["num_satellites"])
+    if satellite_positions.shape != (num_time_steps, num_satellites, 3):
+        raise ValueError("Ephemeris positions have shape " + str(satellite_positions.shape)
+                         + " instead of " + str((num_time_steps, num_satellites, 3)))
+
+    return {
+        "time_step_ns": time_step_ns,
+        "num_time_steps": num_time_steps,
+        "num_satellites": num_satellites,
+        "satellite_positions_m": satellite_positions
+    }
+
+
+def read_ephemeris_if_available(satellite_network_dir, time_step_ms, duration_s):
+    """
+    Same as read_ephemeris(), but returns None if no ephemeris was generated.
+
+    :param satellite_network_dir:   Satellite network directory (containing tles.txt)
+    :param time_step_ms:            Time step in milliseconds
+    :param duration_s:              Duration in seconds
+
+    :return: Ephemeris dictionary, or None
+    """
+    if not has_ephemeris(satellite_network_dir, time_step_ms, duration_s):
+        return None
+    return read_ephemeris(satellite_network_dir, time_step_ms, duration_s)
+
+
+def get_satellite_positions_at(ephemeris, time_since_epoch_ns):
+    """
+    Satellite positions at a time instant of the ephemeris time grid.
+
+    :param ephemeris:               Ephemeris (as returned by read_ephemeris())
+    :param time_since_epoch_ns:     Time since epoch in nanoseconds
+
+    :return: Array of shape (number of satellites, 3) with (x, y, z) in meters
+    """
+    if time_since_epoch_ns % ephemeris["time_step_ns"] != 0:
+        raise ValueError("Time %d ns is not on the ephemeris time grid (time step: %d ns)"
+                         % (time_since_epoch_ns, ephemeris["time_step_ns"]))
+    index = time_since_epoch_ns // ephemeris["time_step_ns"]
+    if index < 0 or index >= ephemeris["num_time_steps"]:
+        raise ValueError("Time %d ns is outside of the ephemeris time grid" % time_since_epoch_ns)
+    return ephemeris["satellite_positions_m"][index]
@@ -0,0 +1,41 @@
+from .fstate_io import (
+    start_compressed_output,
+    stop_compressed_output,
+    get_fstate_filename,
+    write_fstate_delta,
+    read_fstate_delta_file,
+    read_fstate_delta,
+    fstate_delta_next_hops,
+    write_gsl_if_bandwidth_delta,
+    read_gsl_if_bandwidth_delta,
+    remove_state_files
+)
+from .fstate_array import (
+    get_fstate_array_entries,
+    calculate_fstate_array_delta,
+    fstate_array_to_dict
+)
+from .state_log import (
+    get_log_filename,
+    has_log,
+    remove_logs,
+    merge_worker_logs,
+    read_log_index,
+    read_from_log
+)
+from .convert_fstate import (
+    convert_fstate_dir,
+    unpack_logs,
+    recompress_dynamic_state_dir
+)
+from .fstate_snapshot import (
+    write_fstate_snapshot,
+    write_fstate_snapshots_info,
+    read_fstate_snapshots_info,
+    remove_fstate_snapshots,
+    fstate_dict_to_entries,
+    apply_fstate_delta,
+    iterate_fstate_deltas,
+    iterate_fstate,
+    load_fstate_at
+)
@@ -0,0 +1,157 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from .fstate_io import read_fstate_delta_file, write_fstate_delta, write_gsl_if_bandwidth_delta
+from .state_log import get_log_filename, read_log_index, read_from_log
+from satgen.text_io import get_compression_extension, get_compression_of_filename, strip_compression_extension, \
+    open_compressed, write_compressed
+import multiprocessing
+import os
+import re
+
+
+def convert_fstate_dir(dynamic_state_dir, fstate_format, remove_source=False):
+    """
+    Converts all forwarding state delta files in a dynamic state directory to the other format
+    (e.g., to "txt" to make a directory generated in "npy" readable by ns-3).
+
+    :param dynamic_state_dir:   Dynamic state directory
+    :param fstate_format:       Forwarding state format to convert to ("txt" or "npy")
+    :param remove_source:       True iff the files in the other format should be removed after conversion
+
+    :return: Number of files converted
+    """
+    if fstate_format not in ("txt", "npy"):
+        raise ValueError("Can only convert to forwarding state format txt or npy: " + str(fstate_format))
+    source_format = "npy" if fstate_format == "txt" else "txt"
+
+    num_converted = 0
+    pattern = re.compile(r"^fstate_(\d+)\." + source_format + "$")
+    for filename in sorted(os.listdir(dynamic_state_dir)):
+        match = pattern.match(filename)
+        if match is not None:
+            source_filename = dynamic_state_dir + "/" + filename
+            write_fstate_delta(
+                dynamic_state_dir,
+                int(match.group(1)),
+                read_fstate_delta_file(source_filename).tolist(),
+                fstate_format
+            )
+            if remove_source:
+                os.remove(source_filename)
+            num_converted += 1
+
+    return num_converted
+
+
+def unpack_logs(dynamic_state_dir, fstate_format="txt", remove_logs=False):
+    """
+    Unpacks the merged logs of a dynamic state directory into one file per time step
+    (e.g., to make a directory generated in "log" readable by ns-3).
+
+    :param dynamic_state_dir:   Dynamic state directory
+    :param fstate_format:       Forwarding state format to unpack to ("txt" or "npy")
+    :param remove_logs:         True iff the merged logs should be removed after unpacking
+
+    :return: Number of time steps unpacked
+    """
+    if fstate_format not in ("txt", "npy"):
+        raise ValueError("Can only unpack to forwarding state format txt or npy: " + str(fstate_format))
+
+    # Forwarding state
+    fstate_log_filename = get_log_filename(dynamic_state_dir, "fstate")
+    index = read_log_index(fstate_log_filename)
+    num_time_steps = len(index)
+    for time_since_epoch_ns in index[:, 0].tolist():
+        write_fstate_delta(
+            dynamic_state_dir,
+            time_since_epoch_ns,
+            read_from_log(fstate_log_filename, "fstate", time_since_epoch_ns, index).tolist(),
+            fstate_format
+        )
+
+    # GSL interface bandwidth
+    gsl_if_bandwidth_log_filename = get_log_filename(dynamic_state_dir, "gsl_if_bandwidth")
+    gsl_if_bandwidth_index = read_log_index(gsl_if_bandwidth_log_filename)
+    for time_since_epoch_ns in gsl_if_bandwidth_index[:, 0].tolist():
+        write_gsl_if_bandwidth_delta(
+            dynamic_state_dir,
+            time_since_epoch_ns,
+            read_from_log(
+                gsl_if_bandwidth_log_filename, "gsl_if_bandwidth", time_since_epoch_ns, gsl_if_bandwidth_index
+            ).tolist(),
+            "txt"
+        )
+
+    # (The memory-mapped indices must be released before the logs can be removed)
+    if remove_logs:
+        del index
+        del gsl_if_bandwidth_index
+        os.remove(fstate_log_filename)
+        os.remove(gsl_if_bandwidth_log_filename)
+
+    return num_time_steps
+
+
+def recompress_file(args):
+    (filename, compression) = args
+    with open_compressed(filename, "rb") as f_in:
+        data = f_in.read()
+    write_compressed(strip_compression_extension(filename), data, compression)
+
+
+def recompress_dynamic_state_dir(dynamic_state_dir, compression, num_processes=1):
+    """
+    (Re)compresses all forwarding state and GSL interface bandwidth delta files of a dynamic state directory
+    (e.g., to compress a directory generated without compression, or to decompress it before running ns-3).
+
+    :param dynamic_state_dir:   Dynamic state directory
+    :param compression:         Compression ("gzip", "zstd", or None to decompress)
+    :param num_processes:       Number of processes to (de)compress in parallel
+
+    :return: Number of files (re)compressed
+    """
+    get_compression_extension(compression)
+
+    # Files per time step which do not yet have the compression
+    # (the logs and snapshots are not compressed, as they are read by seeking)
+    pattern = re.compile(r"^(fstate|gsl_if_bandwidth)_\d+\.(txt|npy)(\.gz|\.zst)?$")
+    list_args = []
+    for filename in sorted(os.listdir(dynamic_state_dir)):
+        if pattern.match(filename) is not None and get_compression_of_filename(filename) != compression:
+            list_args.append((dynamic_state_dir + "/" + filename, compression))
+
+    # (De)compress in parallel
+    if num_processes > 1 and len(list_args) > 1:
+        if "fork" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("fork")
+        else:
+            context = multiprocessing.get_context()
+        pool = context.Pool(num_processes)
+        pool.map(recompress_file, list_args, chunksize=max(1, len(list_args) // (num_processes * 16)))
+        pool.close()
+        pool.join()
+    else:
+        for args in list_args:
+            recompress_file(args)
+
+    return len(list_args)
@@ -0,0 +1,82 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import numpy as np
+
+#
+# During the generation, the forwarding state of a time step is a dense NumPy int32 array of shape
+# (num_satellites + num_ground_stations, num_ground_stations, 3), in which fstate[current, dst_gid]
+# is (next_hop, my_if, next_hop_if) for destination node num_satellites + dst_gid (-1 if dropped).
+#
+# A ground station does not have an entry to itself (fstate[num_satellites + gid, gid] is not used).
+#
+
+
+def get_fstate_array_entries(num_satellites, num_ground_stations):
+    """
+    Which (current, destination ground station) of the forwarding state array are entries.
+
+    :param num_satellites:          Number of satellites
+    :param num_ground_stations:     Number of ground stations
+
+    :return: Boolean array of shape (num_satellites + num_ground_stations, num_ground_stations)
+    """
+    is_entry = np.ones((num_satellites + num_ground_stations, num_ground_stations), dtype=bool)
+    is_entry[num_satellites + np.arange(num_ground_stations), np.arange(num_ground_stations)] = False
+    return is_entry
+
+
+def calculate_fstate_array_delta(fstate, prev_fstate=None):
+    """
+    Calculates the difference of a forwarding state array with the previous one.
+
+    :param fstate:          Forwarding state array
+    :param prev_fstate:     Previous forwarding state array (None to have all entries in the delta)
+
+    :return: NumPy int32 array of shape (number of changed entries, 5), with in each row
+             (current, destination, next_hop, my_if, next_hop_if), ordered by current and then destination
+    """
+    num_ground_stations = fstate.shape[1]
+    num_satellites = fstate.shape[0] - num_ground_stations
+    is_changed = get_fstate_array_entries(num_satellites, num_ground_stations)
+    if prev_fstate is not None:
+        is_changed &= np.any(fstate != prev_fstate, axis=2)
+    current, dst_gid = np.nonzero(is_changed)
+    fstate_delta = np.empty((len(current), 5), dtype=np.int32)
+    fstate_delta[:, 0] = current
+    fstate_delta[:, 1] = num_satellites + dst_gid
+    fstate_delta[:, 2:] = fstate[current, dst_gid]
+    return fstate_delta
+
+
+def fstate_array_to_dict(fstate):
+    """
+    Converts a forwarding state array into a dictionary.
+
+    :param fstate:      Forwarding state array
+
+    :return: Forwarding state {(current, destination): (next_hop, my_if, next_hop_if)}
+    """
+    return dict(map(
+        lambda x: ((x[0], x[1]), (x[2], x[3], x[4])),
+        calculate_fstate_array_delta(fstate).tolist()
+    ))
@@ -0,0 +1,256 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from .state_log import append_to_worker_log, get_log_filename, read_from_log
+from satgen.text_io import read_fstate_txt, read_gsl_if_bandwidth_txt, find_file_or_compressed, open_compressed, \
+    strip_compression_extension, start_background_writer, submit_to_background_writer, stop_background_writer
+import numpy as np
+import io
+import os
+import re
+import threading
+
+#
+# The forwarding state of a time step t is stored as the difference with the
+# previous time step ("delta"), in which each entry is:
+#
+# (current node id, destination node id, next-hop node id, my interface id, next-hop interface id)
+#
+# It can be stored in three formats:
+#
+# "txt" -- fstate_<t>.txt, one comma-separated entry per line (read by ns-3)
+# "npy" -- fstate_<t>.npy, NumPy int32 array of shape (number of entries, 5)
+# "log" -- appended to a log per worker, which are merged into fstate.log (see state_log.py)
+#
+# The GSL interface bandwidth delta, (node, interface, bandwidth) entries, is stored in the
+# gsl_if_bandwidth.log log for the "log" format, and else in gsl_if_bandwidth_<t>.txt.
+#
+# The files per time step can be compressed (e.g., fstate_<t>.txt.gz, see satgen/text_io/compression.py),
+# which the readers decompress transparently. The logs are not compressed, as they are read by seeking.
+#
+
+FSTATE_FORMATS = ("txt", "npy", "log")
+
+# Background writers which compress the files written to a dynamic state directory,
+# per (dynamic state directory, thread) as each worker writes the time steps it calculates
+compressed_outputs = {}
+
+
+def start_compressed_output(dynamic_state_dir, compression):
+    """
+    Starts compressing the forwarding state and GSL interface bandwidth delta files which the calling
+    thread writes to the dynamic state directory (compressed and written in a background thread).
+
+    :param dynamic_state_dir:       Dynamic state directory
+    :param compression:             Compression ("gzip" or "zstd")
+    """
+    key = (dynamic_state_dir, threading.get_ident())
+    if key in compressed_outputs:
+        raise ValueError("Compressed output is already started for: " + dynamic_state_dir)
+    compressed_outputs[key] = start_background_writer(compression)
+
+
+def stop_compressed_output(dynamic_state_dir):
+    """
+    Waits until all files the calling thread wrote to the dynamic state directory are compressed
+    and written, and stops compressing.
+
+    :param dynamic_state_dir:       Dynamic state directory
+    """
+    key = (dynamic_state_dir, threading.get_ident())
+    if key not in compressed_outputs:
+        raise ValueError("Compressed output is not started for: " + dynamic_state_dir)
+    stop_background_writer(compressed_outputs.pop(key))
+
+
+def get_compressed_output(dynamic_state_dir):
+    return compressed_outputs.get((dynamic_state_dir, threading.get_ident()))
+
+
+def get_fstate_filename(dynamic_state_dir, time_since_epoch_ns, fstate_format="txt"):
+    """
+    Filename of the forwarding state delta of a time step.
+
+    :param dynamic_state_dir:       Dynamic state directory
+    :param time_since_epoch_ns:     Time since epoch (ns)
+    :param fstate_format:           Forwarding state format ("txt" or "npy")
+
+    :return: Filename
+    """
+    if fstate_format not in ("txt", "npy"):
+        raise ValueError("Forwarding state format without a file per time step: " + str(fstate_format))
+    return dynamic_state_dir + "/fstate_" + str(time_since_epoch_ns) + "." + fstate_format
+
+
+def write_fstate_delta(dynamic_state_dir, time_since_epoch_ns, fstate_delta, fstate_format="txt"):
+    """
+    Writes the forwarding state delta of a time step.
+
+    :param dynamic_state_dir:       Dynamic state directory
+    :param time_since_epoch_ns:     Time since epoch (ns)
+    :param fstate_delta:            List or NumPy array of (current, destination, next_hop, my_if, next_hop_if) entries
+    :param fstate_format:           Forwarding state format ("txt", "npy" or "log")
+
+    :return: Filename written to (with compression: which will be written to by the background writer)
+    """
+    if fstate_format not in FSTATE_FORMATS:
+        raise ValueError("Unknown forwarding state format: " + str(fstate_format))
+    if fstate_format == "log":
+        return append_to_worker_log(dynamic_state_dir, "fstate", time_since_epoch_ns, fstate_delta)
+    filename = get_fstate_filename(dynamic_state_dir, time_since_epoch_ns, fstate_format)
+    writer = get_compressed_output(dynamic_state_dir)
+    if fstate_format == "txt":
+        if isinstance(fstate_delta, np.ndarray):
+            fstate_delta = fstate_delta.tolist()
+        content = "".join(map(lambda x: "%d,%d,%d,%d,%d\n" % tuple(x), fstate_delta))
+        if writer is not None:
+            return submit_to_background_writer(writer, filename, content.encode())
+        with open(filename, "w+") as f_out:
+            f_out.write(content)
+    else:
+        fstate_delta = np.array(fstate_delta, dtype=np.int32).reshape((-1, 5))
+        if writer is not None:
+            buffer = io.BytesIO()
+            np.save(buffer, fstate_delta)
+            return submit_to_background_writer(writer, filename, buffer.getvalue())
+        np.save(filename, fstate_delta)
+    return filename
+
+
+def read_fstate_delta_file(filename, mmap_mode=None):
+    """
+    Reads a forwarding state delta file, in the format of its extension.
+
+    :param filename:    Filename (fstate_<t>.txt or fstate_<t>.npy, optionally compressed with .gz or .zst)
+    :param mmap_mode:   Memory-map mode for uncompressed .npy files (e.g., "r"), None to read it in entirely
+
+    :return: NumPy int32 array of shape (number of entries, 5), with in each row:
+             (current, destination, next_hop, my_if, next_hop_if)
+    """
+    uncompressed_filename = strip_compression_extension(filename)
+    if uncompressed_filename.endswith(".npy"):
+        if uncompressed_filename != filename:
+            with open_compressed(filename, "rb") as f_in:
+                fstate_delta = np.lib.format.read_array(f_in)
+        else:
+            fstate_delta = np.load(filename, mmap_mode=mmap_mode)
+        if fstate_delta.ndim != 2 or fstate_delta.shape[1] != 5 or fstate_delta.dtype != np.int32:
+            raise ValueError("Forwarding state file is not an int32 array of shape (n, 5): " + filename)
+        return fstate_delta
+    elif uncompressed_filename.endswith(".txt"):
+        return read_fstate_txt(filename)
+    else:
+        raise ValueError("Unknown forwarding state file extension: " + filename)
+
+
+def read_fstate_delta(dynamic_state_dir, time_since_epoch_ns, mmap_mode=None):
+    """
+    Reads the forwarding state delta of a time step, in whichever format it was written
+    (in order of preference: merged log, binary, text; each uncompressed before compressed).
+
+    :param dynamic_state_dir:       Dynamic state directory
+    :param time_since_epoch_ns:     Time since epoch (ns)
+    :param mmap_mode:               Memory-map mode for .npy files (e.g., "r"), None to read it in entirely
+
+    :return: NumPy int32 array of shape (number of entries, 5), with in each row:
+             (current, destination, next_hop, my_if, next_hop_if)
+    """
+    log_filename = get_log_filename(dynamic_state_dir, "fstate")
+    if os.path.isfile(log_filename):
+        return read_from_log(log_filename, "fstate", time_since_epoch_ns)
+    filename = find_file_or_compressed(get_fstate_filename(dynamic_state_dir, time_since_epoch_ns, "npy"))
+    if not os.path.isfile(filename):
+        filename = find_file_or_compressed(get_fstate_filename(dynamic_state_dir, time_since_epoch_ns, "txt"))
+    return read_fstate_delta_file(filename, mmap_mode)
+
+
+def fstate_delta_next_hops(fstate_delta):
+    """
+    Converts a forwarding state delta into a dictionary of only the next hops,
+    which can be used to update a {(current, destination): next_hop} forwarding state.
+
+    :param fstate_delta:    Forwarding state delta (as returned by read_fstate_delta())
+
+    :return: Dictionary {(current, destination): next_hop}
+    """
+    return dict(zip(
+        zip(fstate_delta[:, 0].tolist(), fstate_delta[:, 1].tolist()),
+        fstate_delta[:, 2].tolist()
+    ))
+
+
+def write_gsl_if_bandwidth_delta(dynamic_state_dir, time_since_epoch_ns, gsl_if_bandwidth_delta, fstate_format="txt"):
+    """
+    Writes the GSL interface bandwidth delta of a time step.
+
+    :param dynamic_state_dir:           Dynamic state directory
+    :param time_since_epoch_ns:         Time since epoch (ns)
+    :param gsl_if_bandwidth_delta:      List or NumPy array of (node, interface, bandwidth) entries
+    :param fstate_format:               Forwarding state format ("txt", "npy" or "log")
+
+    :return: Filename written to (with compression: which will be written to by the background writer)
+    """
+    if fstate_format not in FSTATE_FORMATS:
+        raise ValueError("Unknown forwarding state format: " + str(fstate_format))
+    if fstate_format == "log":
+        return append_to_worker_log(dynamic_state_dir, "gsl_if_bandwidth", time_since_epoch_ns, gsl_if_bandwidth_delta)
+    filename = dynamic_state_dir + "/gsl_if_bandwidth_" + str(time_since_epoch_ns) + ".txt"
+    if isinstance(gsl_if_bandwidth_delta, np.ndarray):
+        gsl_if_bandwidth_delta = gsl_if_bandwidth_delta.tolist()
+    content = "".join(map(lambda x: "%d,%d,%f\n" % tuple(x), gsl_if_bandwidth_delta))
+    writer = get_compressed_output(dynamic_state_dir)
+    if writer is not None:
+        return submit_to_background_writer(writer, filename, content.encode())
+    with open(filename, "w+") as f_out:
+        f_out.write(content)
+    return filename
+
+
+def read_gsl_if_bandwidth_delta(dynamic_state_dir, time_since_epoch_ns):
+    """
+    Reads the GSL interface bandwidth delta of a time step, from the merged log if present,
+    else from gsl_if_bandwidth_<t>.txt (or its compressed version).
+
+    :param dynamic_state_dir:       Dynamic state directory
+    :param time_since_epoch_ns:     Time since epoch (ns)
+
+    :return: NumPy float64 array of shape (number of entries, 3), with in each row: (node, interface, bandwidth)
+    """
+    log_filename = get_log_filename(dynamic_state_dir, "gsl_if_bandwidth")
+    if os.path.isfile(log_filename):
+        return read_from_log(log_filename, "gsl_if_bandwidth", time_since_epoch_ns)
+    return read_gsl_if_bandwidth_txt(
+        find_file_or_compressed(dynamic_state_dir + "/gsl_if_bandwidth_" + str(time_since_epoch_ns) + ".txt")
+    )
+
+
+def remove_state_files(dynamic_state_dir):
+    """
+    Removes all forwarding state and GSL interface bandwidth delta files per time step in the dynamic
+    state directory, of any format and compression. The readers pick a format by which file exists,
+    so files left over from a previous run would otherwise be read instead of the new ones.
+
+    :param dynamic_state_dir:   Dynamic state directory
+    """
+    for filename in os.listdir(dynamic_state_dir):
+        if re.match(r"^(fstate_\d+\.(txt|npy)|gsl_if_bandwidth_\d+\.txt)$", strip_compression_extension(filename)):
+            os.remove(dynamic_state_dir + "/" + filename)
@@ -0,0 +1,237 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from .fstate_io import read_fstate_delta
+from .fstate_array import calculate_fstate_array_delta
+import numpy as np
+import os
+import re
+
+#
+# As the forwarding state is stored as deltas, getting the forwarding state at time t requires
+# applying all deltas from t=0 up to t. To avoid this, the generation can also write the complete
+# forwarding state every K time steps (fstate_snapshot_<t>.npy, a NumPy int32 array of shape
+# (number of entries, 5)), such that only the deltas after the nearest snapshot need to be applied.
+#
+# The time step and K are recorded in fstate_snapshots_info.txt.
+#
+
+
+def get_fstate_snapshot_filename(dynamic_state_dir, time_since_epoch_ns):
+    return dynamic_state_dir + "/fstate_snapshot_" + str(time_since_epoch_ns) + ".npy"
+
+
+def write_fstate_snapshots_info(dynamic_state_dir, time_step_ns, snapshot_interval_steps):
+    """
+    Records the time step and snapshot interval of the snapshots in a dynamic state directory.
+
+    :param dynamic_state_dir:           Dynamic state directory
+    :param time_step_ns:                Time step (ns)
+    :param snapshot_interval_steps:     Snapshot every this many time steps
+    """
+    with open(dynamic_state_dir + "/fstate_snapshots_info.txt", "w+") as f_out:
+        f_out.write("time_step_ns=%d\nsnapshot_interval_steps=%d\n" % (time_step_ns, snapshot_interval_steps))
+
+
+def read_fstate_snapshots_info(dynamic_state_dir):
+    """
+    Reads the time step and snapshot interval of the snapshots in a dynamic state directory.
+
+    :param dynamic_state_dir:   Dynamic state directory
+
+    :return: Tuple (time step (ns), snapshot interval (steps)), or None if there are no snapshots
+    """
+    if not os.path.isfile(dynamic_state_dir + "/fstate_snapshots_info.txt"):
+        return None
+    info = {}
+    with open(dynamic_state_dir + "/fstate_snapshots_info.txt", "r") as f_in:
+        for line in f_in:
+            key, value = line.strip().split("=")
+            info[key] = value
+    return int(info["time_step_ns"]), int(info["snapshot_interval_steps"])
+
+
+def write_fstate_snapshot(dynamic_state_dir, time_since_epoch_ns, fstate):
+    """
+    Writes the complete forwarding state at a time step.
+
+    :param dynamic_state_dir:       Dynamic state directory
+    :param time_since_epoch_ns:     Time since epoch (ns)
+    :param fstate:                  Forwarding state array (see fstate_array.py), or
+                                    dictionary {(current, destination): (next_hop, my_if, next_hop_if)}
+
+    :return: Filename written to
+    """
+    if isinstance(fstate, np.ndarray):
+        snapshot = calculate_fstate_array_delta(fstate)
+    else:
+        snapshot = fstate_dict_to_entries(fstate)
+
+    # The time step at the border of two workers is calculated by both
+    filename = get_fstate_snapshot_filename(dynamic_state_dir, time_since_epoch_ns)
+    temporary_filename = "%s.%d.%d.tmp.npy" % (filename, os.getpid(), id(fstate))
+    np.save(temporary_filename, snapshot)
+    os.replace(temporary_filename, filename)
+    return filename
+
+
+def remove_fstate_snapshots(dynamic_state_dir):
+    """
+    Removes all snapshots (and their information) in the dynamic state directory.
+
+    :param dynamic_state_dir:   Dynamic state directory
+    """
+    for filename in os.listdir(dynamic_state_dir):
+        if filename == "fstate_snapshots_info.txt" or re.match(r"^fstate_snapshot_\d+\.npy$", filename):
+            os.remove(dynamic_state_dir + "/" + filename)
+
+
+def fstate_dict_to_entries(fstate):
+    """
+    Converts a forwarding state dictionary into an array of its entries, in the same format as a delta.
+
+    :param fstate:  Forwarding state {(current, destination): (next_hop, my_if, next_hop_if)}
+
+    :return: NumPy int32 array of (current, destination, next_hop, my_if, next_hop_if) entries
+    """
+    return np.array(
+        list(map(lambda x: (x[0][0], x[0][1], x[1][0], x[1][1], x[1][2]), fstate.items())),
+        dtype=np.int32
+    ).reshape((-1, 5))
+
+
+def apply_fstate_delta(fstate, fstate_delta):
+    """
+    Applies a forwarding state delta (or snapshot) to a forwarding state.
+
+    :param fstate:          Forwarding state {(current, destination): (next_hop, my_if, next_hop_if)} (updated)
+    :param fstate_delta:    Forwarding state delta (as returned by read_fstate_delta())
+    """
+    for (current, destination, next_hop, my_if, next_hop_if) in fstate_delta.tolist():
+        fstate[(current, destination)] = (next_hop, my_if, next_hop_if)
+
+
+def infer_time_step_ns(dynamic_state_dir):
+    match = re.match(r"^dynamic_state_(\d+)ms_for_(\d+)s$", os.path.basename(os.path.normpath(dynamic_state_dir)))
+    if match is None:
+        raise ValueError("Cannot infer the time step of dynamic state directory: " + dynamic_state_dir)
+    return int(match.group(1)) * 1000 * 1000
+
+
+def iterate_fstate_deltas(dynamic_state_dir, start_time_ns, end_time_ns, time_step_ns=None):
+    """
+    Iterates over the forwarding state deltas of the time steps in [start_time_ns, end_time_ns).
+    The first one is the complete forwarding state at start_time_ns (such that it can be applied
+    to an empty forwarding state), which is obtained by only applying the deltas after the nearest
+    snapshot at or before start_time_ns. As such it takes time proportional to the window
+    (and the snapshot interval).
+
+    :param dynamic_state_dir:   Dynamic state directory
+    :param start_time_ns:       Start time (ns), must be a multiple of the time step
+    :param end_time_ns:         End time (ns, exclusive)
+    :param time_step_ns:        Time step (ns), None to use the one recorded with the
+                                snapshots (or else the one in the directory name)
+
+    :return: Iterator of (time since epoch (ns), forwarding state delta), in which the delta is
+             in the same format as returned by read_fstate_delta()
+    """
+
+    # Time step and snapshot interval
+    snapshots_info = read_fstate_snapshots_info(dynamic_state_dir)
+    snapshot_interval_steps = 0
+    if snapshots_info is not None:
+        if time_step_ns is not None and time_step_ns != snapshots_info[0]:
+            raise ValueError("Time step does not match the one of the snapshots")
+        time_step_ns, snapshot_interval_steps = snapshots_info
+    elif time_step_ns is None:
+        time_step_ns = infer_time_step_ns(dynamic_state_dir)
+    if start_time_ns % time_step_ns != 0:
+        raise ValueError("Start time must be a multiple of the time step")
+
+    # Forwarding state before the start, which is caught up on until the start
+    # (starting from the nearest snapshot, if there is none, from the very beginning)
+    catch_up_fstate = {} if start_time_ns > 0 else None
+    replay_start_time_ns = 0
+    if snapshot_interval_steps > 0:
+        snapshot_time_ns = (start_time_ns // time_step_ns // snapshot_interval_steps) \
+                           * snapshot_interval_steps * time_step_ns
+        if os.path.isfile(get_fstate_snapshot_filename(dynamic_state_dir, snapshot_time_ns)):
+            snapshot = np.load(get_fstate_snapshot_filename(dynamic_state_dir, snapshot_time_ns))
+            replay_start_time_ns = snapshot_time_ns + time_step_ns
+            if snapshot_time_ns == start_time_ns:
+                catch_up_fstate = None
+                if start_time_ns < end_time_ns:
+                    yield start_time_ns, snapshot
+            else:
+                apply_fstate_delta(catch_up_fstate, snapshot)
+        else:
+            raise ValueError("Missing forwarding state snapshot at t=%d ns" % snapshot_time_ns)
+
+    # Read the deltas
+    for t in range(replay_start_time_ns, end_time_ns, time_step_ns):
+        fstate_delta = read_fstate_delta(dynamic_state_dir, t)
+        if catch_up_fstate is not None:
+            apply_fstate_delta(catch_up_fstate, fstate_delta)
+            if t < start_time_ns:
+                continue
+            fstate_delta = fstate_dict_to_entries(catch_up_fstate)
+            catch_up_fstate = None
+        yield t, fstate_delta
+
+
+def iterate_fstate(dynamic_state_dir, start_time_ns, end_time_ns, time_step_ns=None):
+    """
+    Iterates over the forwarding state of the time steps in [start_time_ns, end_time_ns).
+    It only applies the deltas after the nearest snapshot at or before start_time_ns,
+    as such it takes time proportional to the window (and the snapshot interval).
+
+    :param dynamic_state_dir:   Dynamic state directory
+    :param start_time_ns:       Start time (ns), must be a multiple of the time step
+    :param end_time_ns:         End time (ns, exclusive)
+    :param time_step_ns:        Time step (ns), None to use the one recorded with the
+                                snapshots (or else the one in the directory name)
+
+    :return: Iterator of (time since epoch (ns), forwarding state), in which the forwarding state
+             is a dictionary {(current, destination): (next_hop, my_if, next_hop_if)}
+             (the same dictionary is updated each time step, so copy it to keep it)
+    """
+    fstate = {}
+    for t, fstate_delta in iterate_fstate_deltas(dynamic_state_dir, start_time_ns, end_time_ns, time_step_ns):
+        apply_fstate_delta(fstate, fstate_delta)
+        yield t, fstate
+
+
+def load_fstate_at(dynamic_state_dir, time_since_epoch_ns, time_step_ns=None):
+    """
+    Loads the complete forwarding state at a time step, starting from the nearest snapshot.
+
+    :param dynamic_state_dir:       Dynamic state directory
+    :param time_since_epoch_ns:     Time since epoch (ns), must be a multiple of the time step
+    :param time_step_ns:            Time step (ns), None to use the one recorded with the
+                                    snapshots (or else the one in the directory name)
+
+    :return: Forwarding state {(current, destination): (next_hop, my_if, next_hop_if)}
+    """
+    fstate = None
+    for _, fstate in iterate_fstate(dynamic_state_dir, time_since_epoch_ns, time_since_epoch_ns + 1, time_step_ns):
+        pass
+    return fstate
@@ -0,0 +1,46 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import sys
+from satgen.fstate.convert_fstate import convert_fstate_dir, unpack_logs
+from satgen.fstate.state_log import has_log
+
+
+def main():
+    args = sys.argv[1:]
+    if len(args) != 2 and len(args) != 3:
+        print("Must supply two or three arguments")
+        print("Usage: python -m satgen.fstate.main_convert_fstate [dynamic_state_dir] [txt|npy] "
+              "[remove_source (optional, default: 0)]")
+        exit(1)
+    else:
+        remove_source = len(args) == 3 and args[2] == "1"
+        if has_log(args[0], "fstate"):
+            num_unpacked = unpack_logs(args[0], args[1], remove_source)
+            print("Unpacked %d time steps from the logs to %s" % (num_unpacked, args[1]))
+        else:
+            num_converted = convert_fstate_dir(args[0], args[1], remove_source)
+            print("Converted %d forwarding state files to %s" % (num_converted, args[1]))
+
+
+if __name__ == "__main__":
+    main()
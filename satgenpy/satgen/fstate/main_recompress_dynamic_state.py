@@ -0,0 +1,42 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import sys
+from satgen.fstate.convert_fstate import recompress_dynamic_state_dir
+
+
+def main():
+    args = sys.argv[1:]
+    if len(args) != 2 and len(args) != 3:
+        print("Must supply two or three arguments")
+        print("Usage: python -m satgen.fstate.main_recompress_dynamic_state [dynamic_state_dir] [gzip|zstd|none] "
+              "[num_processes (optional, default: 1)]")
+        exit(1)
+    else:
+        compression = None if args[1] == "none" else args[1]
+        num_processes = int(args[2]) if len(args) == 3 else 1
+        num_recompressed = recompress_dynamic_state_dir(args[0], compression, num_processes)
+        print("Recompressed %d files to %s" % (num_recompressed, args[1]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import numpy as np
+import os
+import threading
+
+#
+# Instead of one file per time step, the dynamic state can be stored in logs:
+#
+# (a) Every worker appends the delta of each time step it calculates to its own log
+#     (<kind>_worker_<pid>_<thread>.log), each delta framed as:
+#
+#     [int64 time since epoch (ns)] [int64 number of rows] [rows]
+#
+# (b) After all workers are done, the worker logs are merged into one log per run (<kind>.log):
+#
+#     [magic] [framed deltas in increasing time] [index] [int64 index offset] [int64 number of time steps] [magic]
+#
+#     The index is an int64 array of shape (number of time steps, 3) with in each row
+#     (time since epoch (ns), offset of the rows, number of rows), such that readers can
+#     seek directly to any time step.
+#
+
+LOG_MAGIC = b"SATGNLOG"
+
+# Kind of log: (data type of the rows, number of columns per row)
+LOG_KINDS = {
+    "fstate": (np.dtype("<i4"), 5),                # (current, destination, next_hop, my_if, next_hop_if)
+    "gsl_if_bandwidth": (np.dtype("<f8"), 3),      # (node, interface, bandwidth)
+}
+
+
+def get_log_kind(kind):
+    if kind not in LOG_KINDS:
+        raise ValueError("Unknown log kind: " + str(kind))
+    return LOG_KINDS[kind]
+
+
+def get_worker_log_filename(dynamic_state_dir, kind):
+    """
+    Filename of the log of the calling worker (unique per process and thread).
+
+    :param dynamic_state_dir:   Dynamic state directory
+    :param kind:                Kind of log ("fstate" or "gsl_if_bandwidth")
+
+    :return: Filename
+    """
+    get_log_kind(kind)
+    return "%s/%s_worker_%d_%d.log" % (dynamic_state_dir, kind, os.getpid(), threading.get_ident())
+
+
+def get_log_filename(dynamic_state_dir, kind):
+    """
+    Filename of the merged log.
+
+    :param dynamic_state_dir:   Dynamic state directory
+    :param kind:                Kind of log ("fstate" or "gsl_if_bandwidth")
+
+    :return: Filename
+    """
+    get_log_kind(kind)
+    return dynamic_state_dir + "/" + kind + ".log"
+
+
+def has_log(dynamic_state_dir, kind):
+    return os.path.isfile(get_log_filename(dynamic_state_dir, kind))
+
+
+def list_worker_logs(dynamic_state_dir, kind):
+    get_log_kind(kind)
+    return sorted(map(
+        lambda x: dynamic_state_dir + "/" + x,
+        filter(lambda x: x.startswith(kind + "_worker_") and x.endswith(".log"), os.listdir(dynamic_state_dir))
+    ))
+
+
+def remove_logs(dynamic_state_dir):
+    """
+    Removes all (left-over) worker logs and merged logs in the dynamic state directory.
+
+    :param dynamic_state_dir:   Dynamic state directory
+    """
+    for kind in LOG_KINDS:
+        for filename in list_worker_logs(dynamic_state_dir, kind):
+            os.remove(filename)
+        if has_log(dynamic_state_dir, kind):
+            os.remove(get_log_filename(dynamic_state_dir, kind))
+
+
+def append_to_worker_log(dynamic_state_dir, kind, time_since_epoch_ns, rows):
+    """
+    Appends the delta of a time step to the log of the calling worker.
+
+    :param dynamic_state_dir:       Dynamic state directory
+    :param kind:                    Kind of log ("fstate" or "gsl_if_bandwidth")
+    :param time_since_epoch_ns:     Time since epoch (ns)
+    :param rows:                    List of rows (tuples with the number of columns of the kind)
+
+    :return: Filename of the worker log
+    """
+    dtype, num_columns = get_log_kind(kind)
+    data = np.array(rows, dtype=dtype).reshape((-1, num_columns))
+    filename = get_worker_log_filename(dynamic_state_dir, kind)
+    with open(filename, "ab") as f_out:
+        f_out.write(np.array([time_since_epoch_ns, data.shape[0]], dtype="<i8").tobytes())
+        f_out.write(data.tobytes())
+    return filename
+
+
+def scan_worker_log(filename, kind):
+    """
+    Finds the framed deltas in a worker log (by only reading the frame headers).
+
+    :param filename:    Worker log filename
+    :param kind:        Kind of log ("fstate" or "gsl_if_bandwidth")
+
+    :return: List of (time since epoch (ns), offset of the rows, number of rows)
+    """
+    dtype, num_columns = get_log_kind(kind)
+    frames = []
+    size = os.path.getsize(filename)
+    with open(filename, "rb") as f_in:
+        offset = 0
+        while offset < size:
+            header = np.frombuffer(f_in.read(16), dtype="<i8")
+            if len(header) != 2:
+                raise ValueError("Truncated frame header in worker log: " + filename)
+            frames.append((int(header[0]), offset + 16, int(header[1])))
+            offset += 16 + int(header[1]) * num_columns * dtype.itemsize
+            if offset > size:
+                raise ValueError("Truncated frame in worker log: " + filename)
+            f_in.seek(offset)
+    return frames
+
+
+def merge_worker_logs(dynamic_state_dir, kind):
+    """
+    Merges the worker logs into one log, and removes the worker logs.
+
+    If a time step is present in multiple worker logs (the first time step of a worker is
+    also calculated by the worker before it, to write its difference), the smallest delta is taken.
+    Both describe the same state, as the other one is the complete state.
+
+    :param dynamic_state_dir:   Dynamic state directory
+    :param kind:                Kind of log ("fstate" or "gsl_if_bandwidth")
+
+    :return: Number of time steps in the merged log
+    """
+    dtype, num_columns = get_log_kind(kind)
+    worker_logs = list_worker_logs(dynamic_state_dir, kind)
+
+    # Select for each time step the frame to use
+    selected = {}
+    for filename in worker_logs:
+        for (time_since_epoch_ns, offset, num_rows) in scan_worker_log(filename, kind):
+            if time_since_epoch_ns not in selected or num_rows < selected[time_since_epoch_ns][2]:
+                selected[time_since_epoch_ns] = (filename, offset, num_rows)
+
+    # Write merged log
+    merged_filename = get_log_filename(dynamic_state_dir, kind)
+    index = np.zeros((len(selected), 3), dtype="<i8")
+    input_files = {}
+    try:
+        for filename in worker_logs:
+            input_files[filename] = open(filename, "rb")
+        with open(merged_filename + ".tmp", "wb") as f_out:
+            f_out.write(LOG_MAGIC)
+            for i, time_since_epoch_ns in enumerate(sorted(selected.keys())):
+                (filename, offset, num_rows) = selected[time_since_epoch_ns]
+                input_files[filename].seek(offset)
+                data = input_files[filename].read(num_rows * num_columns * dtype.itemsize)
+                f_out.write(np.array([time_since_epoch_ns, num_rows], dtype="<i8").tobytes())
+                index[i] = (time_since_epoch_ns, f_out.tell(), num_rows)
+                f_out.write(data)
+            index_offset = f_out.tell()
+            f_out.write(index.tobytes())
+            f_out.write(np.array([index_offset, len(selected)], dtype="<i8").tobytes())
+            f_out.write(LOG_MAGIC)
+    finally:
+        for f_in in input_files.values():
+            f_in.close()
+    os.replace(merged_filename + ".tmp", merged_filename)
+
+    # Worker logs are no longer needed
+    for filename in worker_logs:
+        os.remove(filename)
+
+    return len(selected)
+
+
+def read_log_index(filename):
+    """
+    Memory-maps the index of a merged log.
+
+    :param filename:    Merged log filename
+
+    :return: Read-only int64 array of shape (number of time steps, 3) with in each row
+             (time since epoch (ns), offset of the rows, number of rows)
+    """
+    size = os.path.getsize(filename)
+    with open(filename, "rb") as f_in:
+        if size < 2 * len(LOG_MAGIC) + 16 or f_in.read(len(LOG_MAGIC)) != LOG_MAGIC:
+            raise ValueError("Not a merged log: " + filename)
+        f_in.seek(size - len(LOG_MAGIC) - 16)
+        footer = f_in.read(16 + len(LOG_MAGIC))
+        if footer[16:] != LOG_MAGIC:
+            raise ValueError("Merged log is incomplete: " + filename)
+        index_offset, num_time_steps = np.frombuffer(footer[:16], dtype="<i8").tolist()
+    if num_time_steps == 0:
+        return np.zeros((0, 3), dtype="<i8")
+    return np.memmap(filename, dtype="<i8", mode="r", offset=index_offset, shape=(num_time_steps, 3))
+
+
+def read_from_log(filename, kind, time_since_epoch_ns, index=None):
+    """
+    Reads the delta of a time step from a merged log by seeking to it.
+
+    :param filename:                Merged log filename
+    :param kind:                    Kind of log ("fstate" or "gsl_if_bandwidth")
+    :param time_since_epoch_ns:     Time since epoch (ns)
+    :param index:                   Index (as returned by read_log_index()), None to read it
+
+    :return: NumPy array of shape (number of rows, number of columns of the kind)
+    """
+    dtype, num_columns = get_log_kind(kind)
+    if index is None:
+        index = read_log_index(filename)
+    i = int(np.searchsorted(index[:, 0], time_since_epoch_ns))
+    if i == len(index) or index[i, 0] != time_since_epoch_ns:
+        raise ValueError("Time step %d ns is not in the log: %s" % (time_since_epoch_ns, filename))
+    with open(filename, "rb") as f_in:
+        f_in.seek(int(index[i, 1]))
+        data = np.fromfile(f_in, dtype=dtype, count=int(index[i, 2]) * num_columns)
+    return data.reshape((-1, num_columns))
@@ -1,3 +1,9 @@
 from .read_isls import read_isls
 from .generate_plus_grid_isls import generate_plus_grid_isls
 from .generate_empty_isls import generate_empty_isls
+from .isl_topology import (
+    create_isl_topology,
+    set_isl_topology_lengths,
+    get_isl_topology_csr_graph,
+    get_isl_topology_neighbors
+)
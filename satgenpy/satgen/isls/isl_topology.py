@@ -0,0 +1,138 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+from scipy.sparse import csr_matrix
+import numpy as np
+
+
+def create_isl_topology(num_satellites, list_isls):
+    """
+    Creates the inter-satellite network topology, which is built once and of which only the
+    ISL lengths are updated every time step.
+
+    The directed edges (both directions of every ISL) are stored in CSR format. Within a row, the edges
+    are in the order of list_isls, which is the order in which networkx would list the neighbors if the
+    ISLs were added to it in that order. Each satellite numbers its ISL interfaces in that same order.
+
+    :param num_satellites:  Number of satellites
+    :param list_isls:       List of undirected ISLs (a, b)
+
+    :return: ISL topology (dict):
+             "num_satellites":      Number of satellites
+             "list_isls":           List of undirected ISLs (copy)
+             "num_isls_per_sat":    Number of ISLs (and thus ISL interfaces) of each satellite (num_satellites)
+             "indptr":              CSR row pointers (num_satellites + 1)
+             "indices":             CSR column (neighbor) of each directed edge (2 * num_isls)
+             "edge_sources":        Row (satellite) of each directed edge (2 * num_isls)
+             "edge_isl_idx":        ISL index in list_isls of each directed edge (2 * num_isls)
+             "edge_my_if":          ISL interface of the edge's satellite (2 * num_isls)
+             "edge_next_hop_if":    ISL interface of the edge's neighbor (2 * num_isls)
+             "neighbor_ids":        Neighbors of each satellite (num_satellites x max. degree, padding is 0)
+             "neighbor_edges":      Directed edge of each neighbor (num_satellites x max. degree, padding is -1)
+             "isl_lengths_m":       Current length of each ISL (num_isls)
+             "weights":             Current length of each directed edge (2 * num_isls)
+    """
+    num_isls = len(list_isls)
+    isl_endpoints = np.array(list_isls, dtype=int).reshape((num_isls, 2))
+    if np.any(isl_endpoints < 0) or np.any(isl_endpoints >= num_satellites):
+        raise ValueError("ISL endpoints must be satellites")
+    if np.any(isl_endpoints[:, 0] == isl_endpoints[:, 1]):
+        raise ValueError("ISL cannot connect a satellite to itself")
+
+    # Interface of each satellite, numbered in the order the ISLs are listed
+    # (edge 2 * i is a -> b, edge 2 * i + 1 is b -> a of ISL i)
+    edge_src = isl_endpoints.ravel()
+    edge_dst = isl_endpoints[:, ::-1].ravel()
+    edge_order = np.argsort(edge_src, kind="stable")
+    edge_if = np.empty(2 * num_isls, dtype=int)
+    num_isls_per_sat = np.bincount(edge_src, minlength=num_satellites)
+    indptr = np.concatenate(([0], np.cumsum(num_isls_per_sat)))
+    edge_if[edge_order] = np.arange(2 * num_isls) - indptr[edge_src[edge_order]]
+    edge_other_if = edge_if.reshape((num_isls, 2))[:, ::-1].ravel()
+
+    # Padded neighbor arrays
+    max_degree = max(1, int(np.max(num_isls_per_sat, initial=0)))
+    neighbor_ids = np.zeros((num_satellites, max_degree), dtype=int)
+    neighbor_edges = np.full((num_satellites, max_degree), -1, dtype=int)
+    neighbor_ids[edge_src[edge_order], edge_if[edge_order]] = edge_dst[edge_order]
+    neighbor_edges[edge_src[edge_order], edge_if[edge_order]] = np.arange(2 * num_isls)
+
+    return {
+        "num_satellites": num_satellites,
+        "list_isls": list(map(tuple, list_isls)),
+        "num_isls_per_sat": num_isls_per_sat,
+        "indptr": indptr,
+        "indices": edge_dst[edge_order],
+        "edge_sources": edge_src[edge_order],
+        "edge_isl_idx": edge_order // 2,
+        "edge_my_if": edge_if[edge_order],
+        "edge_next_hop_if": edge_other_if[edge_order],
+        "neighbor_ids": neighbor_ids,
+        "neighbor_edges": neighbor_edges,
+        "isl_lengths_m": np.full(num_isls, np.nan),
+        "weights": np.full(2 * num_isls, np.nan)
+    }
+
+
+def set_isl_topology_lengths(isl_topology, isl_lengths_m):
+    """
+    Updates the ISL lengths of the topology (in-place) to those of the current time step.
+
+    :param isl_topology:    ISL topology
+    :param isl_lengths_m:   Length of each ISL in the order of list_isls (num_isls)
+    """
+    isl_topology["isl_lengths_m"][:] = isl_lengths_m
+    isl_topology["weights"][:] = isl_topology["isl_lengths_m"][isl_topology["edge_isl_idx"]]
+
+
+def get_isl_topology_csr_graph(isl_topology):
+    """
+    Sparse (CSR) graph of the ISL topology with the current ISL lengths as weights.
+    It shares the arrays with the topology, as such it is only valid until the next update.
+
+    :param isl_topology:    ISL topology
+
+    :return: CSR matrix (num_satellites x num_satellites)
+    """
+    num_satellites = isl_topology["num_satellites"]
+    return csr_matrix(
+        (isl_topology["weights"], isl_topology["indices"], isl_topology["indptr"]),
+        shape=(num_satellites, num_satellites)
+    )
+
+
+def get_isl_topology_neighbors(isl_topology, sid):
+    """
+    Neighbors of a satellite, in the order of its ISL interfaces.
+
+    :param isl_topology:    ISL topology
+    :param sid:             Satellite identifier
+
+    :return: List of (neighbor id, ISL length (m), my interface, neighbor's interface)
+    """
+    start = isl_topology["indptr"][sid]
+    end = isl_topology["indptr"][sid + 1]
+    return list(zip(
+        isl_topology["indices"][start:end].tolist(),
+        isl_topology["weights"][start:end].tolist(),
+        isl_topology["edge_my_if"][start:end].tolist(),
+        isl_topology["edge_next_hop_if"][start:end].tolist()
+    ))
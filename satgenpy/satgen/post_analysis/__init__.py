@@ -1,6 +1,8 @@
-from .print_routes_and_rtt import print_routes_and_rtt
+from .print_routes_and_rtt import print_routes_and_rtt, print_routes_and_rtt_multiple_pairs
 from .analyze_path import analyze_path
 from .analyze_rtt import analyze_rtt
+from .analyze_all_pairs import analyze_all_pairs
+from .all_pairs_metrics import collect_all_pairs_metrics
 from .analyze_time_step_path import analyze_time_step_path
 from .print_graphical_routes_and_rtt import print_graphical_routes_and_rtt
 from .print_routes_and_rtt_failure import print_routes_and_rtt_failure
@@ -11,8 +13,27 @@ from .graph_tools import (
     construct_graph_with_distances,
     compute_path_length_with_graph,
     compute_path_length_without_graph,
+    compute_path_length_with_positions,
+    get_node_positions_m,
     get_path,
     get_path_with_weights,
     augment_path_with_weights,
     sum_path_weights
 )
+from .batched_path_tools import (
+    create_next_hop_table,
+    update_next_hop_table,
+    next_hop_table_from_fstate,
+    all_ground_station_pairs,
+    walk_paths,
+    get_walked_path,
+    compute_path_lengths_m,
+    compute_path_length_m,
+    get_isl_keys
+)
+from .path_cache import (
+    create_path_cache,
+    update_path_cache,
+    get_cached_path,
+    get_path_cache_lengths_m
+)
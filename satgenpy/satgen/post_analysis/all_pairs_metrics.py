@@ -0,0 +1,172 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from .path_cache import *
+from satgen.distance_tools import *
+from satgen.fstate import *
+from satgen.ephemeris import *
+from satgen.ground_stations import *
+from satgen.isls import *
+from satgen.tles import *
+from astropy import units as u
+import exputil
+import numpy as np
+
+
+SPEED_OF_LIGHT_M_PER_S = 299792458.0
+
+
+def collect_all_pairs_metrics(
+        satellite_network_dir, dynamic_state_update_interval_ms, simulation_end_time_s,
+        with_rtt=True, with_paths=True
+):
+    """
+    Goes once over all time steps, and collects for every ground station pair (src < dst)
+    the metrics of both the RTT and the path analysis.
+
+    :param satellite_network_dir:               Satellite network directory
+    :param dynamic_state_update_interval_ms:    Dynamic state update interval (ms)
+    :param simulation_end_time_s:               Simulation end time (s)
+    :param with_rtt:                            True iff the RTTs should be calculated (which requires
+                                                the distances between all nodes at every time step)
+    :param with_paths:                          True iff the paths should be kept
+
+    :return: Dictionary: {
+                "satellites":                       Satellites
+                "ground_stations":                  Ground stations
+                "rtt_list_per_pair":                [src][dst] list of RTT (ns) at each time step it is reachable
+                                                    (only if with_rtt)
+                "unreachable_per_pair":             (src, dst) number of time steps it is unreachable
+                "path_list_per_pair":               [src][dst] list of every new path ([] if unreachable)
+                                                    (only if with_paths)
+                "time_step_num_path_changes":       Number of path changes at each time step (except the first)
+                "time_step_num_fstate_updates":     Number of fstate updates at each time step (except the first)
+             }
+    """
+
+    # Dynamic state directory
+    satellite_network_dynamic_state_dir = "%s/dynamic_state_%dms_for_%ds" % (
+        satellite_network_dir, dynamic_state_update_interval_ms, simulation_end_time_s
+    )
+
+    # Variables
+    ground_stations = read_ground_stations_extended(satellite_network_dir + "/ground_stations.txt")
+    tles = read_tles(satellite_network_dir + "/tles.txt")
+    satellites = tles["satellites"]
+    epoch = tles["epoch"]
+
+    # Derivatives
+    simulation_end_time_ns = simulation_end_time_s * 1000 * 1000 * 1000
+    dynamic_state_update_interval_ns = dynamic_state_update_interval_ms * 1000 * 1000
+
+    # Only the RTT needs the distances
+    if with_rtt:
+        list_isls = read_isls(satellite_network_dir + "/isls.txt", len(satellites))
+        description = exputil.PropertiesConfig(satellite_network_dir + "/description.txt")
+        max_gsl_length_m = exputil.parse_positive_float(description.get_property_or_fail("max_gsl_length_m"))
+        max_isl_length_m = exputil.parse_positive_float(description.get_property_or_fail("max_isl_length_m"))
+
+        # Precomputed satellite positions (if generated)
+        ephemeris = read_ephemeris_if_available(
+            satellite_network_dir, dynamic_state_update_interval_ms, simulation_end_time_s
+        )
+
+        ground_station_positions = ground_station_positions_m(ground_stations)
+
+    # Accumulators
+    rtt_list_per_pair = []
+    path_list_per_pair = []
+    for i in range(len(ground_stations)):
+        rtt_list_per_pair.append([[] for _ in range(len(ground_stations))])
+        path_list_per_pair.append([[] for _ in range(len(ground_stations))])
+    unreachable_per_pair = np.zeros((len(ground_stations), len(ground_stations)))
+    time_step_num_path_changes = []
+    time_step_num_fstate_updates = []
+
+    # The paths of all pairs are kept up-to-date in a cache, which only walks again
+    # the paths of pairs which use a forwarding state entry that changed
+    src_node_ids, dst_node_ids = all_ground_station_pairs(len(satellites), len(ground_stations))
+    src_gids = src_node_ids - len(satellites)
+    dst_gids = dst_node_ids - len(satellites)
+    path_cache = create_path_cache(len(satellites), len(ground_stations), src_node_ids, dst_node_ids)
+
+    # For each time moment
+    num_iterations = simulation_end_time_ns / dynamic_state_update_interval_ns
+    it = 1
+    for t in range(0, simulation_end_time_ns, dynamic_state_update_interval_ns):
+
+        # Read in forwarding state, and update the paths which use it
+        fstate_delta = read_fstate_delta(satellite_network_dynamic_state_dir, t)
+        changed = update_path_cache(path_cache, fstate_delta)
+        if np.any(path_cache["loop"]):
+            i = int(np.argmax(path_cache["loop"]))
+            raise ValueError("Forwarding loop between %d and %d at t=%d ns" % (src_node_ids[i], dst_node_ids[i], t))
+        reachable = path_cache["hop_count"] >= 0
+
+        # RTT
+        np.add.at(unreachable_per_pair, (src_gids[~reachable], dst_gids[~reachable]), 1)
+        if with_rtt:
+            if ephemeris is not None:
+                satellite_positions = get_satellite_positions_at(ephemeris, t)
+            else:
+                satellite_positions = satellite_positions_m(satellites, str(epoch), str(epoch + t * u.ns))
+            length_m = get_path_cache_lengths_m(
+                path_cache, np.concatenate((satellite_positions, ground_station_positions)),
+                list_isls=list_isls, max_gsl_length_m=max_gsl_length_m, max_isl_length_m=max_isl_length_m
+            )
+            rtt_ns = (2 * length_m) * 1000000000.0 / SPEED_OF_LIGHT_M_PER_S
+            for i in np.nonzero(reachable)[0]:
+                rtt_list_per_pair[src_gids[i]][dst_gids[i]].append(float(rtt_ns[i]))
+
+        # Path changes (at the first time step, every pair gets its first path)
+        if it == 1:
+            changed = np.arange(len(src_node_ids))
+        num_path_changes = len(changed)
+        if with_paths:
+            for i in changed:
+                path = get_cached_path(path_cache, i)
+                path_list_per_pair[src_gids[i]][dst_gids[i]].append([] if path is None else path)
+
+        # First iteration has an update for all, which is not interesting
+        # to show in the ECDF and is not really a "change" / "update"
+        if it != 1:
+            time_step_num_path_changes.append(num_path_changes)
+            time_step_num_fstate_updates.append(len(fstate_delta))
+
+        # Show progress a bit
+        print("%d / %d" % (it, num_iterations))
+        it += 1
+    print("")
+
+    metrics = {
+        "satellites": satellites,
+        "ground_stations": ground_stations,
+        "unreachable_per_pair": unreachable_per_pair,
+        "time_step_num_path_changes": time_step_num_path_changes,
+        "time_step_num_fstate_updates": time_step_num_fstate_updates
+    }
+    if with_rtt:
+        metrics["rtt_list_per_pair"] = rtt_list_per_pair
+    if with_paths:
+        metrics["path_list_per_pair"] = path_list_per_pair
+    return metrics
+
@@ -0,0 +1,52 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from .all_pairs_metrics import collect_all_pairs_metrics
+from .analyze_path import write_path_analysis
+from .analyze_rtt import write_rtt_analysis
+
+
+def analyze_all_pairs(
+        output_data_dir, satellite_network_dir, dynamic_state_update_interval_ms,
+        simulation_end_time_s, satgenpy_dir_with_ending_slash
+):
+    """
+    Performs both analyze_rtt() and analyze_path(), reading every time step only once.
+
+    :param output_data_dir:                     Output data directory
+    :param satellite_network_dir:               Satellite network directory
+    :param dynamic_state_update_interval_ms:    Dynamic state update interval (ms)
+    :param simulation_end_time_s:               Simulation end time (s)
+    :param satgenpy_dir_with_ending_slash:      Satgenpy directory (for the plot scripts)
+    """
+    metrics = collect_all_pairs_metrics(
+        satellite_network_dir, dynamic_state_update_interval_ms, simulation_end_time_s,
+        with_rtt=True, with_paths=True
+    )
+    write_rtt_analysis(
+        output_data_dir, satellite_network_dir, dynamic_state_update_interval_ms,
+        simulation_end_time_s, satgenpy_dir_with_ending_slash, metrics
+    )
+    write_path_analysis(
+        output_data_dir, satellite_network_dir, dynamic_state_update_interval_ms,
+        simulation_end_time_s, satgenpy_dir_with_ending_slash, metrics
+    )
@@ -20,28 +20,183 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from satgen.post_analysis.analyze_pair import analyze_pair
+from .path_cache import *
+from satgen.distance_tools import *
+from satgen.fstate import *
+from satgen.ephemeris import *
+from satgen.isls import *
+from satgen.ground_stations import *
+from satgen.tles import *
+from astropy import units as u
+import exputil
+import numpy as np
+import tempfile
+
 
 def analyze_all_pairs_failure(base_output_dir, satellite_network_dir, dynamic_state_update_interval_ms,
-                      simulation_end_time_s, satgenpy_dir_with_ending_slash):
-    
-    num_ground_stations = 100
-    total_routes = 0
-    unreachable_route_count = 0
-    unreachable_routes = []
-
-    for src in range(num_ground_stations):
-        for dst in range(src + 1, num_ground_stations):
-            print("Analyzing route from {} to {}".format(src, dst))
-            route_reachable = analyze_pair(base_output_dir, satellite_network_dir, dynamic_state_update_interval_ms,
-                                         simulation_end_time_s, src + 1584, dst + 1584, satgenpy_dir_with_ending_slash)
-            
-            if not route_reachable:
-                unreachable_route_count += 1
-                unreachable_routes.append((src, dst))
-            total_routes += 1
-            
-    print("Total routes: " + str(total_routes))
-    print("Unreachable route count " + str(unreachable_route_count))
+                              simulation_end_time_s, satgenpy_dir_with_ending_slash, plot=False):
+    """
+    Analyzes the reachability and RTT of all ground station pairs (src < dst) under failures,
+    in which each forwarding state file contains the complete forwarding state. Each forwarding
+    state file is read once, and the paths of all pairs (in both directions) are evaluated together.
+
+    The result is written to a single file (data/networkx_all_pairs_rtt.txt), with for each time step
+    and pair a line "t,src,dst,rtt_ns", in which the RTT is the length of the path there and the one
+    back, and 0.0 if either one is unreachable.
+
+    :param base_output_dir:                     Base output directory (with data/ and pdf/ in it)
+    :param satellite_network_dir:               Satellite network directory
+    :param dynamic_state_update_interval_ms:    Dynamic state update interval (ms)
+    :param simulation_end_time_s:               Simulation end time (s)
+    :param satgenpy_dir_with_ending_slash:      Satgenpy directory (for the plot scripts)
+    :param plot:                                True iff for every pair its path and RTT files should be
+                                                written and its RTT plotted (as analyze_pair() does)
+
+    :return: Dictionary: {
+                "total_routes":         Number of pairs
+                "unreachable_routes":   List of (src, dst) pairs (ground station ids) which are unreachable
+                                        at one or more time steps
+             }
+    """
+
+    # Local shell
+    local_shell = exputil.LocalShell()
+
+    # Dynamic state dir can be inferred
+    satellite_network_dynamic_state_dir = "%s/dynamic_state_%dms_for_%ds" % (
+        satellite_network_dir, dynamic_state_update_interval_ms, simulation_end_time_s
+    )
+
+    # Default output dir assumes it is done manual
+    pdf_dir = base_output_dir + "/pdf"
+    data_dir = base_output_dir + "/data"
+    local_shell.make_full_dir(pdf_dir)
+    local_shell.make_full_dir(data_dir)
+
+    # Variables (the number of satellites and ground stations follow from the network)
+    ground_stations = read_ground_stations_extended(satellite_network_dir + "/ground_stations.txt")
+    tles = read_tles(satellite_network_dir + "/tles.txt")
+    satellites = tles["satellites"]
+    list_isls = read_isls(satellite_network_dir + "/isls.txt", len(satellites))
+    epoch = tles["epoch"]
+    description = exputil.PropertiesConfig(satellite_network_dir + "/description.txt")
+    num_satellites = len(satellites)
+    num_ground_stations = len(ground_stations)
+
+    # Derivatives
+    simulation_end_time_ns = simulation_end_time_s * 1000 * 1000 * 1000
+    dynamic_state_update_interval_ns = dynamic_state_update_interval_ms * 1000 * 1000
+    max_gsl_length_m = exputil.parse_positive_float(description.get_property_or_fail("max_gsl_length_m"))
+    max_isl_length_m = exputil.parse_positive_float(description.get_property_or_fail("max_isl_length_m"))
+
+    # Precomputed satellite positions (if generated)
+    ephemeris = read_ephemeris_if_available(
+        satellite_network_dir, dynamic_state_update_interval_ms, simulation_end_time_s
+    )
+    ground_station_positions = ground_station_positions_m(ground_stations)
+
+    # The paths there (first half) and back (second half) of all pairs
+    src_node_ids, dst_node_ids = all_ground_station_pairs(num_satellites, num_ground_stations)
+    num_pairs = len(src_node_ids)
+    path_cache = create_path_cache(
+        num_satellites, num_ground_stations,
+        np.concatenate((src_node_ids, dst_node_ids)), np.concatenate((dst_node_ids, src_node_ids))
+    )
+
+    # Accumulators
+    pair_reachable = np.ones(num_pairs, dtype=bool)
+    rtt_ns_list_per_pair = [[] for _ in range(num_pairs)]
+    path_list_per_pair = [[] for _ in range(num_pairs)]
+
+    # For each time moment
+    data_filename = data_dir + "/networkx_all_pairs_rtt.txt"
+    with open(data_filename, "w+") as data_file:
+        num_iterations = simulation_end_time_ns / dynamic_state_update_interval_ns
+        it = 1
+        for t in range(0, simulation_end_time_ns, dynamic_state_update_interval_ns):
+
+            # Each forwarding state file contains the complete forwarding state
+            changed = set_path_cache_fstate(path_cache, read_fstate_delta(satellite_network_dynamic_state_dir, t))
+            if np.any(path_cache["loop"]):
+                i = int(np.argmax(path_cache["loop"]))
+                raise ValueError("Forwarding loop from %d to %d at t=%d ns" % (
+                    path_cache["src_node_ids"][i], path_cache["dst_node_ids"][i], t
+                ))
+
+            # Calculate the path lengths
+            if ephemeris is not None:
+                satellite_positions = get_satellite_positions_at(ephemeris, t)
+            else:
+                satellite_positions = satellite_positions_m(satellites, str(epoch), str(epoch + t * u.ns))
+            length_m = get_path_cache_lengths_m(
+                path_cache, np.concatenate((satellite_positions, ground_station_positions)),
+                list_isls=list_isls, max_gsl_length_m=max_gsl_length_m, max_isl_length_m=max_isl_length_m
+            )
+
+            # RTT (0.0 if unreachable in either direction)
+            reachable = np.logical_and(path_cache["hop_count"][:num_pairs] >= 0,
+                                       path_cache["hop_count"][num_pairs:] >= 0)
+            rtt_ns = np.where(
+                reachable, (length_m[:num_pairs] + length_m[num_pairs:]) * 1000000000.0 / 299792458.0, 0.0
+            )
+            pair_reachable = np.logical_and(pair_reachable, reachable)
+            data_file.write("".join(map(
+                lambda x: "%d,%d,%d,%.10f\n" % (t, x[0], x[1], x[2]),
+                zip(src_node_ids.tolist(), dst_node_ids.tolist(), rtt_ns.tolist())
+            )))
+
+            # For the per-pair files, each new path there
+            if plot:
+                for i in range(num_pairs):
+                    rtt_ns_list_per_pair[i].append((t, rtt_ns[i]))
+                for i in (range(num_pairs) if it == 1 else changed[changed < num_pairs]):
+                    path_list_per_pair[i].append((t, get_cached_path(path_cache, i)))
+
+            # Show progress a bit
+            print("%d / %d" % (it, num_iterations))
+            it += 1
+        print("")
+
+    # Per-pair files and plots
+    if plot:
+        for i in range(num_pairs):
+            src = src_node_ids[i]
+            dst = dst_node_ids[i]
+
+            # Write path file
+            with open(data_dir + "/networkx_path_" + str(src) + "_to_" + str(dst) + ".txt", "w+") as data_path_file:
+                for (t, path) in path_list_per_pair[i]:
+                    data_path_file.write(str(t) + "," + ("-".join(list(map(lambda x: str(x), path)))
+                                                         if path is not None else "Unreachable") + "\n")
+
+            # Write data file
+            pair_data_filename = data_dir + "/networkx_rtt_" + str(src) + "_to_" + str(dst) + ".txt"
+            with open(pair_data_filename, "w+") as pair_data_file:
+                for (t, rtt_ns) in rtt_ns_list_per_pair[i]:
+                    pair_data_file.write("%d,%.10f\n" % (t, rtt_ns))
+
+            # Make plot
+            pdf_filename = pdf_dir + "/time_vs_networkx_rtt_" + str(src) + "_to_" + str(dst) + ".pdf"
+            tf = tempfile.NamedTemporaryFile(delete=False)
+            tf.close()
+            local_shell.copy_file(satgenpy_dir_with_ending_slash + "plot/plot_time_vs_networkx_rtt.plt", tf.name)
+            local_shell.sed_replace_in_file_plain(tf.name, "[OUTPUT-FILE]", pdf_filename)
+            local_shell.sed_replace_in_file_plain(tf.name, "[DATA-FILE]", pair_data_filename)
+            local_shell.perfect_exec("gnuplot " + tf.name)
+            print("Produced plot: " + pdf_filename)
+            local_shell.remove(tf.name)
+
+    # Summary
+    unreachable_routes = list(zip(
+        (src_node_ids[~pair_reachable] - num_satellites).tolist(),
+        (dst_node_ids[~pair_reachable] - num_satellites).tolist()
+    ))
+    print("Total routes: " + str(num_pairs))
+    print("Unreachable route count " + str(len(unreachable_routes)))
     print("Unreachable routes " + str(unreachable_routes))
-    
\ No newline at end of file
+    print("Written all pairs RTT to: " + data_filename)
+
+    return {
+        "total_routes": num_pairs,
+        "unreachable_routes": unreachable_routes
+    }
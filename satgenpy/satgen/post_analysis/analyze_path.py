@@ -20,12 +20,10 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from .graph_tools import *
-from satgen.ground_stations import *
-from satgen.tles import *
 import exputil
 import numpy as np
-from .print_routes_and_rtt import print_routes_and_rtt
+from .all_pairs_metrics import collect_all_pairs_metrics
+from .print_routes_and_rtt import print_routes_and_rtt_multiple_pairs
 from statsmodels.distributions.empirical_distribution import ECDF
 
 
@@ -33,14 +31,20 @@ def analyze_path(
         output_data_dir, satellite_network_dir, dynamic_state_update_interval_ms,
         simulation_end_time_s, satgenpy_dir_with_ending_slash
 ):
-
-    # Variables (load in for each thread such that they don't interfere)
-    satellite_network_dynamic_state_dir = "%s/dynamic_state_%dms_for_%ds" % (
-        satellite_network_dir, dynamic_state_update_interval_ms, simulation_end_time_s
+    metrics = collect_all_pairs_metrics(
+        satellite_network_dir, dynamic_state_update_interval_ms, simulation_end_time_s,
+        with_rtt=False, with_paths=True
+    )
+    write_path_analysis(
+        output_data_dir, satellite_network_dir, dynamic_state_update_interval_ms,
+        simulation_end_time_s, satgenpy_dir_with_ending_slash, metrics
     )
-    ground_stations = read_ground_stations_extended(satellite_network_dir + "/ground_stations.txt")
-    tles = read_tles(satellite_network_dir + "/tles.txt")
-    satellites = tles["satellites"]
+
+
+def write_path_analysis(
+        output_data_dir, satellite_network_dir, dynamic_state_update_interval_ms,
+        simulation_end_time_s, satgenpy_dir_with_ending_slash, metrics
+):
 
     # Local shell
     local_shell = exputil.LocalShell()
@@ -55,65 +59,12 @@ def analyze_path(
     local_shell.make_full_dir(pdf_dir)
     local_shell.make_full_dir(data_dir)
 
-    # Derivatives
-    simulation_end_time_ns = simulation_end_time_s * 1000 * 1000 * 1000
-    dynamic_state_update_interval_ns = dynamic_state_update_interval_ms * 1000 * 1000
-
-    # Analysis
-    path_list_per_pair = []
-    for i in range(len(ground_stations)):
-        temp_list = []
-        for j in range(len(ground_stations)):
-            temp_list.append([])
-        path_list_per_pair.append(temp_list)
-
-    # Time step analysis
-    time_step_num_path_changes = []
-    time_step_num_fstate_updates = []
-
-    # For each time moment
-    fstate = {}
-    num_iterations = simulation_end_time_ns / dynamic_state_update_interval_ns
-    it = 1
-    for t in range(0, simulation_end_time_ns, dynamic_state_update_interval_ns):
-        num_path_changes = 0
-        num_fstate_updates = 0
-
-        # Read in forwarding state
-        with open(satellite_network_dynamic_state_dir + "/fstate_" + str(t) + ".txt", "r") as f_in:
-            for line in f_in:
-                spl = line.split(",")
-                current = int(spl[0])
-                destination = int(spl[1])
-                next_hop = int(spl[2])
-                fstate[(current, destination)] = next_hop
-                num_fstate_updates += 1
-
-            # Go over each pair of ground stations and calculate the length
-            for src in range(len(ground_stations)):
-                for dst in range(src + 1, len(ground_stations)):
-                    src_node_id = len(satellites) + src
-                    dst_node_id = len(satellites) + dst
-                    path = get_path(src_node_id, dst_node_id, fstate)
-                    if path is None:
-                        if len(path_list_per_pair[src][dst]) == 0 or path_list_per_pair[src][dst][-1] != []:
-                            path_list_per_pair[src][dst].append([])
-                            num_path_changes += 1
-                    else:
-                        if len(path_list_per_pair[src][dst]) == 0 or path != path_list_per_pair[src][dst][-1]:
-                            path_list_per_pair[src][dst].append(path)
-                            num_path_changes += 1
-
-        # First iteration has an update for all, which is not interesting
-        # to show in the ECDF and is not really a "change" / "update"
-        if it != 1:
-            time_step_num_path_changes.append(num_path_changes)
-            time_step_num_fstate_updates.append(num_fstate_updates)
-
-        # Show progress a bit
-        print("%d / %d" % (it, num_iterations))
-        it += 1
-    print("")
+    # Metrics of all pairs (as collected by collect_all_pairs_metrics())
+    satellites = metrics["satellites"]
+    ground_stations = metrics["ground_stations"]
+    path_list_per_pair = metrics["path_list_per_pair"]
+    time_step_num_path_changes = metrics["time_step_num_path_changes"]
+    time_step_num_fstate_updates = metrics["time_step_num_fstate_updates"]
 
     # Calculate hop count list
     hop_count_list_per_pair = []
@@ -161,6 +112,9 @@ def analyze_path(
 
     #################################################
 
+    # The routes and RTTs of the pairs in the top-10s are printed afterwards, all at once
+    pairs_to_print = []
+
     # Largest hop count delta
     with open(data_dir + "/top_10_largest_hop_count_delta.txt", "w+") as f_out:
         largest_hop_count_delta_list = []
@@ -187,10 +141,10 @@ def analyze_path(
                     largest_hop_count_delta_list[i][1],
                     largest_hop_count_delta_list[i][2],
                 ))
-                print_routes_and_rtt(base_output_dir, satellite_network_dir, dynamic_state_update_interval_ms,
-                                     simulation_end_time_s, len(satellites) + largest_hop_count_delta_list[i][3],
-                                     len(satellites) + largest_hop_count_delta_list[i][4],
-                                     satgenpy_dir_with_ending_slash)
+                pairs_to_print.append((
+                    len(satellites) + largest_hop_count_delta_list[i][3],
+                    len(satellites) + largest_hop_count_delta_list[i][4]
+                ))
                 already_plotted_nodes.add(largest_hop_count_delta_list[i][3])
                 already_plotted_nodes.add(largest_hop_count_delta_list[i][4])
                 num_plotted += 1
@@ -220,11 +174,10 @@ def analyze_path(
                     len(satellites) + most_path_changes_list[i][2],
                     most_path_changes_list[i][0]
                 ))
-                print_routes_and_rtt(base_output_dir, satellite_network_dir,
-                                     dynamic_state_update_interval_ms, simulation_end_time_s,
-                                     len(satellites) + most_path_changes_list[i][1],
-                                     len(satellites) + most_path_changes_list[i][2],
-                                     satgenpy_dir_with_ending_slash)
+                pairs_to_print.append((
+                    len(satellites) + most_path_changes_list[i][1],
+                    len(satellites) + most_path_changes_list[i][2]
+                ))
                 already_plotted_nodes.add(most_path_changes_list[i][1])
                 already_plotted_nodes.add(most_path_changes_list[i][2])
                 num_plotted += 1
@@ -233,4 +186,8 @@ def analyze_path(
         f_out.write("---------------------------------------\n")
         f_out.write("\n")
 
+    # Routes and RTTs of the pairs in the top-10s
+    print_routes_and_rtt_multiple_pairs(base_output_dir, satellite_network_dir, dynamic_state_update_interval_ms,
+                                        simulation_end_time_s, pairs_to_print, satgenpy_dir_with_ending_slash)
+
     print("Done")
@@ -20,19 +20,14 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from .graph_tools import *
 from satgen.distance_tools import *
-from satgen.isls import *
-from satgen.ground_stations import *
-from satgen.tles import *
 import exputil
 import numpy as np
-from .print_routes_and_rtt import print_routes_and_rtt
+from .all_pairs_metrics import collect_all_pairs_metrics, SPEED_OF_LIGHT_M_PER_S
+from .print_routes_and_rtt import print_routes_and_rtt_multiple_pairs
 from statsmodels.distributions.empirical_distribution import ECDF
 
 
-SPEED_OF_LIGHT_M_PER_S = 299792458.0
-
 GEODESIC_ECDF_PLOT_CUTOFF_KM = 500
 
 
@@ -40,12 +35,21 @@ def analyze_rtt(
         output_data_dir, satellite_network_dir, dynamic_state_update_interval_ms,
         simulation_end_time_s, satgenpy_dir_with_ending_slash
 ):
-
-    # Dynamic state directory
-    satellite_network_dynamic_state_dir = "%s/dynamic_state_%dms_for_%ds" % (
-        satellite_network_dir, dynamic_state_update_interval_ms, simulation_end_time_s
+    metrics = collect_all_pairs_metrics(
+        satellite_network_dir, dynamic_state_update_interval_ms, simulation_end_time_s,
+        with_rtt=True, with_paths=False
+    )
+    write_rtt_analysis(
+        output_data_dir, satellite_network_dir, dynamic_state_update_interval_ms,
+        simulation_end_time_s, satgenpy_dir_with_ending_slash, metrics
     )
 
+
+def write_rtt_analysis(
+        output_data_dir, satellite_network_dir, dynamic_state_update_interval_ms,
+        simulation_end_time_s, satgenpy_dir_with_ending_slash, metrics
+):
+
     # Local shell
     local_shell = exputil.LocalShell()
     core_network_folder_name = satellite_network_dir.split("/")[-1]
@@ -59,64 +63,11 @@ def analyze_rtt(
     local_shell.make_full_dir(pdf_dir)
     local_shell.make_full_dir(data_dir)
 
-    # Variables (load in for each thread such that they don't interfere)
-    ground_stations = read_ground_stations_extended(satellite_network_dir + "/ground_stations.txt")
-    tles = read_tles(satellite_network_dir + "/tles.txt")
-    satellites = tles["satellites"]
-    list_isls = read_isls(satellite_network_dir + "/isls.txt", len(satellites))
-    epoch = tles["epoch"]
-    description = exputil.PropertiesConfig(satellite_network_dir + "/description.txt")
-
-    # Derivatives
-    simulation_end_time_ns = simulation_end_time_s * 1000 * 1000 * 1000
-    dynamic_state_update_interval_ns = dynamic_state_update_interval_ms * 1000 * 1000
-    max_gsl_length_m = exputil.parse_positive_float(description.get_property_or_fail("max_gsl_length_m"))
-    max_isl_length_m = exputil.parse_positive_float(description.get_property_or_fail("max_isl_length_m"))
-
-    # Analysis
-    rtt_list_per_pair = []
-    for i in range(len(ground_stations)):
-        temp_list = []
-        for j in range(len(ground_stations)):
-            temp_list.append([])
-        rtt_list_per_pair.append(temp_list)
-    unreachable_per_pair = np.zeros((len(ground_stations), len(ground_stations)))
-
-    # For each time moment
-    fstate = {}
-    num_iterations = simulation_end_time_ns / dynamic_state_update_interval_ns
-    it = 1
-    for t in range(0, simulation_end_time_ns, dynamic_state_update_interval_ns):
-
-        # Read in forwarding state
-        with open(satellite_network_dynamic_state_dir + "/fstate_" + str(t) + ".txt", "r") as f_in:
-            for line in f_in:
-                spl = line.split(",")
-                current = int(spl[0])
-                destination = int(spl[1])
-                next_hop = int(spl[2])
-                fstate[(current, destination)] = next_hop
-
-            # Given we are going to graph often, we can pre-compute the edge lengths
-            graph_with_distance = construct_graph_with_distances(epoch, t, satellites, ground_stations,
-                                                                 list_isls, max_gsl_length_m, max_isl_length_m)
-
-            # Go over each pair of ground stations and calculate the length
-            for src in range(len(ground_stations)):
-                for dst in range(src + 1, len(ground_stations)):
-                    src_node_id = len(satellites) + src
-                    dst_node_id = len(satellites) + dst
-                    path = get_path(src_node_id, dst_node_id, fstate)
-                    if path is None:
-                        unreachable_per_pair[(src, dst)] += 1
-                    else:
-                        length_path_m = compute_path_length_with_graph(path, graph_with_distance)
-                        rtt_list_per_pair[src][dst].append((2 * length_path_m) * 1000000000.0 / SPEED_OF_LIGHT_M_PER_S)
-
-        # Show progress a bit
-        print("%d / %d" % (it, num_iterations))
-        it += 1
-    print("")
+    # Metrics of all pairs (as collected by collect_all_pairs_metrics())
+    satellites = metrics["satellites"]
+    ground_stations = metrics["ground_stations"]
+    rtt_list_per_pair = metrics["rtt_list_per_pair"]
+    unreachable_per_pair = metrics["unreachable_per_pair"]
 
     #################################################
 
@@ -164,6 +115,9 @@ def analyze_rtt(
 
     #################################################
 
+    # The routes and RTTs of the pairs in the top-10s are printed afterwards, all at once
+    pairs_to_print = []
+
     # Largest RTT delta
     with open(data_dir + "/top_10_largest_rtt_delta.txt", "w+") as f_out:
         largest_rtt_delta_list = []
@@ -189,9 +143,10 @@ def analyze_rtt(
                     largest_rtt_delta_list[i][1] / 1e6,
                     largest_rtt_delta_list[i][2] / 1e6,
                 ))
-                print_routes_and_rtt(base_output_dir, satellite_network_dir, dynamic_state_update_interval_ms,
-                                     simulation_end_time_s, len(satellites) + largest_rtt_delta_list[i][3],
-                                     len(satellites) + largest_rtt_delta_list[i][4], satgenpy_dir_with_ending_slash)
+                pairs_to_print.append((
+                    len(satellites) + largest_rtt_delta_list[i][3],
+                    len(satellites) + largest_rtt_delta_list[i][4]
+                ))
                 already_plotted_nodes.add(largest_rtt_delta_list[i][3])
                 already_plotted_nodes.add(largest_rtt_delta_list[i][4])
                 num_plotted += 1
@@ -221,9 +176,10 @@ def analyze_rtt(
                     len(satellites) + most_unreachable_list[i][2],
                     most_unreachable_list[i][0]
                 ))
-                print_routes_and_rtt(base_output_dir, satellite_network_dir, dynamic_state_update_interval_ms,
-                                     simulation_end_time_s, len(satellites) + most_unreachable_list[i][1],
-                                     len(satellites) + most_unreachable_list[i][2], satgenpy_dir_with_ending_slash)
+                pairs_to_print.append((
+                    len(satellites) + most_unreachable_list[i][1],
+                    len(satellites) + most_unreachable_list[i][2]
+                ))
                 already_plotted_nodes.add(most_unreachable_list[i][1])
                 already_plotted_nodes.add(most_unreachable_list[i][2])
                 num_plotted += 1
@@ -232,4 +188,8 @@ def analyze_rtt(
         f_out.write("---------------------------------------\n")
         f_out.write("\n")
 
+    # Routes and RTTs of the pairs in the top-10s
+    print_routes_and_rtt_multiple_pairs(base_output_dir, satellite_network_dir, dynamic_state_update_interval_ms,
+                                        simulation_end_time_s, pairs_to_print, satgenpy_dir_with_ending_slash)
+
     print("Done")
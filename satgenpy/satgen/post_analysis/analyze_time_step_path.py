@@ -20,10 +20,12 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from .graph_tools import *
+from .path_cache import *
+from satgen.fstate import *
 from satgen.ground_stations import *
 from satgen.tles import *
 import exputil
+import numpy as np
 from statsmodels.distributions.empirical_distribution import ECDF
 
 
@@ -74,8 +76,13 @@ def analyze_time_step_path(output_data_dir, satellite_network_dir,
             path_list_per_pair.append(temp_list)
         per_dyn_state_path_list_per_pair.append(path_list_per_pair)
 
-    # For each time moment
-    fstate = {}
+    # For each time moment (the paths are kept up-to-date in a cache, with the
+    # forwarding state delta of each dynamic state applied to it when it is at a time step)
+    src_node_ids, dst_node_ids = all_ground_station_pairs(len(satellites), len(ground_stations))
+    src_gids = src_node_ids - len(satellites)
+    dst_gids = dst_node_ids - len(satellites)
+    path_cache = create_path_cache(len(satellites), len(ground_stations), src_node_ids, dst_node_ids)
+    per_dyn_state_path_version = [np.full(len(src_node_ids), -1) for _ in range(len(configs))]
     smallest_step_ns = min(multiple_dynamic_state_update_interval_ms) * 1000 * 1000
     num_iterations = simulation_end_time_ns / smallest_step_ns
     it = 1
@@ -86,29 +93,25 @@ def analyze_time_step_path(output_data_dir, satellite_network_dir,
             if t % (c[0] * 1000 * 1000) == 0:
 
                 # Read in forwarding state
-                with open(c[1] + "/fstate_" + str(t) + ".txt", "r") as f_in:
-                    for line in f_in:
-                        spl = line.split(",")
-                        current = int(spl[0])
-                        destination = int(spl[1])
-                        next_hop = int(spl[2])
-                        fstate[(current, destination)] = next_hop
-
-                    # Go over each pair of ground stations and calculate the length
-                    for src in range(len(ground_stations)):
-                        for dst in range(src + 1, len(ground_stations)):
-                            src_node_id = len(satellites) + src
-                            dst_node_id = len(satellites) + dst
-                            path = get_path(src_node_id, dst_node_id, fstate)
-                            path_list_per_pair = per_dyn_state_path_list_per_pair[c_idx]
-                            if path is None:
-                                if len(path_list_per_pair[src][dst]) == 0 or [] != path_list_per_pair[src][dst][-1][0]:
-                                    path_list_per_pair[src][dst].append(([], t))
-
-                            else:
-                                if len(path_list_per_pair[src][dst]) == 0 \
-                                        or path != path_list_per_pair[src][dst][-1][0]:
-                                    path_list_per_pair[src][dst].append((path, t))
+                fstate_delta = read_fstate_delta(c[1], t)
+                update_path_cache(path_cache, fstate_delta)
+
+                # Only the pairs of which the path changed since this dynamic state last looked at it
+                path_list_per_pair = per_dyn_state_path_list_per_pair[c_idx]
+                path_version = per_dyn_state_path_version[c_idx]
+                for i in np.nonzero(path_version != path_cache["path_version"])[0]:
+                    src = src_gids[i]
+                    dst = dst_gids[i]
+                    path = get_cached_path(path_cache, i)
+                    if path is None:
+                        if len(path_list_per_pair[src][dst]) == 0 or [] != path_list_per_pair[src][dst][-1][0]:
+                            path_list_per_pair[src][dst].append(([], t))
+
+                    else:
+                        if len(path_list_per_pair[src][dst]) == 0 \
+                                or path != path_list_per_pair[src][dst][-1][0]:
+                            path_list_per_pair[src][dst].append((path, t))
+                path_version[:] = path_cache["path_version"]
 
             c_idx += 1
 
@@ -0,0 +1,299 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import numpy as np
+
+#
+# The next hops of the forwarding state as a NumPy array ("next-hop table") of shape
+# (number of satellites + number of ground stations, number of ground stations),
+# in which entry [node id, destination ground station id] is the next-hop node id
+# (-1 if there is none), such that the paths of many pairs can be walked at once.
+#
+
+
+def create_next_hop_table(num_satellites, num_ground_stations):
+    """
+    Creates a next-hop table without any next hops.
+
+    :param num_satellites:          Number of satellites
+    :param num_ground_stations:     Number of ground stations
+
+    :return: Next-hop table (int32 array of shape (num_satellites + num_ground_stations, num_ground_stations))
+    """
+    return np.full((num_satellites + num_ground_stations, num_ground_stations), -1, dtype=np.int32)
+
+
+def update_next_hop_table(next_hop_table, num_satellites, fstate_delta):
+    """
+    Applies a forwarding state delta to a next-hop table.
+
+    :param next_hop_table:  Next-hop table (updated)
+    :param num_satellites:  Number of satellites
+    :param fstate_delta:    Forwarding state delta (as returned by read_fstate_delta())
+    """
+    next_hop_table[fstate_delta[:, 0], fstate_delta[:, 1] - num_satellites] = fstate_delta[:, 2]
+
+
+def next_hop_table_from_fstate(forward_state, num_satellites, num_ground_stations):
+    """
+    Creates a next-hop table from a forwarding state dictionary.
+
+    :param forward_state:           Forwarding state {(current, destination): next_hop}
+    :param num_satellites:          Number of satellites
+    :param num_ground_stations:     Number of ground stations
+
+    :return: Next-hop table
+    """
+    next_hop_table = create_next_hop_table(num_satellites, num_ground_stations)
+    if len(forward_state) > 0:
+        entries = np.array(list(map(lambda x: (x[0][0], x[0][1], x[1]), forward_state.items())), dtype=np.int64)
+        next_hop_table[entries[:, 0], entries[:, 1] - num_satellites] = entries[:, 2]
+    return next_hop_table
+
+
+def all_ground_station_pairs(num_satellites, num_ground_stations):
+    """
+    All ground station pairs (src < dst), in the order of the usual double loop over them.
+
+    :param num_satellites:          Number of satellites
+    :param num_ground_stations:     Number of ground stations
+
+    :return: Tuple (source node ids, destination node ids), each an int64 array
+    """
+    src_gids, dst_gids = np.triu_indices(num_ground_stations, k=1)
+    return num_satellites + src_gids, num_satellites + dst_gids
+
+
+def walk_paths(next_hop_table, num_satellites, src_node_ids, dst_node_ids, node_positions=None,
+               record_paths=False, list_isls=None, max_gsl_length_m=None, max_isl_length_m=None):
+    """
+    Walks the paths of all (source, destination) pairs at once, advancing all of them
+    by one hop per iteration.
+
+    :param next_hop_table:      Next-hop table
+    :param num_satellites:      Number of satellites
+    :param src_node_ids:        Source node ids (array of length P)
+    :param dst_node_ids:        Destination ground station node ids (array of length P)
+    :param node_positions:      Positions (m) of all nodes (array of shape (number of nodes, 3), satellites
+                                followed by ground stations), to calculate the path lengths (None to not)
+    :param record_paths:        True iff the nodes of the paths should be recorded
+    :param list_isls:           If given (with node_positions), each hop is checked to be a link which exists:
+                                a satellite-to-satellite hop must be an ISL of at most max_isl_length_m,
+                                a ground station-to-satellite hop must be at most max_gsl_length_m
+    :param max_gsl_length_m:    Maximum GSL length (m)
+    :param max_isl_length_m:    Maximum ISL length (m)
+
+    :return: Dictionary: {
+                "hop_count":        Number of hops of each path (-1 if it is unreachable or loops)
+                "unreachable":      Boolean array, True iff there is no next hop at some point along the path
+                "loop":             Boolean array, True iff the path does not reach the destination
+                "length_m":         Length (m) of each path, NaN if it is unreachable or loops (only with positions)
+                "path_nodes":       Array of shape (P, longest path + 1), in which row i is the path of pair i
+                                    padded with -1 (only if record_paths)
+                "walked_nodes":     As path_nodes, but with the nodes that were walked for the unreachable
+                                    and looping pairs as well (only if record_paths)
+             }
+    """
+    src_node_ids = np.asarray(src_node_ids, dtype=np.int64)
+    dst_node_ids = np.asarray(dst_node_ids, dtype=np.int64)
+    num_pairs = len(src_node_ids)
+    num_nodes = next_hop_table.shape[0]
+    dst_gids = dst_node_ids - num_satellites
+
+    isl_keys = None if list_isls is None else get_isl_keys(list_isls, num_nodes)
+
+    # State of the walk
+    current = src_node_ids.copy()
+    hop_count = np.zeros(num_pairs, dtype=np.int64)
+    unreachable = np.zeros(num_pairs, dtype=bool)
+    length_m = np.zeros(num_pairs) if node_positions is not None else None
+    path_columns = [current.copy()] if record_paths else None
+    active = current != dst_node_ids
+
+    # A path without loops has at most (number of nodes - 1) hops
+    for _ in range(num_nodes):
+        active_idx = np.nonzero(active)[0]
+        if len(active_idx) == 0:
+            break
+
+        # Next hop
+        next_hops = next_hop_table[current[active_idx], dst_gids[active_idx]].astype(np.int64)
+        no_next_hop = next_hops == -1
+        unreachable[active_idx[no_next_hop]] = True
+        active[active_idx[no_next_hop]] = False
+        active_idx = active_idx[~no_next_hop]
+        next_hops = next_hops[~no_next_hop]
+        from_nodes = current[active_idx]
+
+        # Hop length
+        if node_positions is not None:
+            hop_length_m = np.linalg.norm(node_positions[from_nodes] - node_positions[next_hops], axis=1)
+            if isl_keys is not None:
+                check_hops(from_nodes, next_hops, hop_length_m, num_satellites, num_nodes, isl_keys,
+                           max_gsl_length_m, max_isl_length_m)
+            length_m[active_idx] += hop_length_m
+
+        # Advance
+        current[active_idx] = next_hops
+        hop_count[active_idx] += 1
+        if record_paths:
+            column = np.full(num_pairs, -1, dtype=np.int64)
+            column[active_idx] = next_hops
+            path_columns.append(column)
+        active[active_idx[next_hops == dst_node_ids[active_idx]]] = False
+
+    # Those still not at their destination are in a loop
+    loop = active
+    failed = np.logical_or(unreachable, loop)
+    hop_count[failed] = -1
+    result = {
+        "hop_count": hop_count,
+        "unreachable": unreachable,
+        "loop": loop
+    }
+    if node_positions is not None:
+        length_m[failed] = np.nan
+        result["length_m"] = length_m
+    if record_paths:
+        walked_nodes = np.stack(path_columns, axis=1)
+        path_nodes = walked_nodes[:, :max(1, int(np.max(hop_count, initial=0)) + 1)].copy()
+        path_nodes[failed] = -1
+        result["path_nodes"] = path_nodes
+        result["walked_nodes"] = walked_nodes
+    return result
+
+
+def compute_path_lengths_m(path_nodes, hop_count, num_satellites, node_positions, list_isls=None,
+                           max_gsl_length_m=None, max_isl_length_m=None):
+    """
+    Calculates the length of many paths at once from the node positions.
+
+    :param path_nodes:          Paths, as array of shape (P, L) padded with -1 (as walk_paths() records them)
+    :param hop_count:           Number of hops of each path (-1 if there is no path)
+    :param num_satellites:      Number of satellites
+    :param node_positions:      Positions (m) of all nodes (satellites followed by ground stations)
+    :param list_isls:           If given, each hop is checked to be a link which exists (see walk_paths())
+    :param max_gsl_length_m:    Maximum GSL length (m)
+    :param max_isl_length_m:    Maximum ISL length (m)
+
+    :return: Length (m) of each path, NaN if there is no path
+    """
+    num_nodes = len(node_positions)
+    isl_keys = None if list_isls is None else get_isl_keys(list_isls, num_nodes)
+    length_m = np.zeros(len(path_nodes))
+    for k in range(1, path_nodes.shape[1]):
+        idx = np.nonzero(hop_count >= k)[0]
+        if len(idx) == 0:
+            break
+        from_nodes = path_nodes[idx, k - 1].astype(np.int64)
+        to_nodes = path_nodes[idx, k].astype(np.int64)
+        hop_length_m = np.linalg.norm(node_positions[from_nodes] - node_positions[to_nodes], axis=1)
+        if isl_keys is not None:
+            check_hops(from_nodes, to_nodes, hop_length_m, num_satellites, num_nodes, isl_keys,
+                       max_gsl_length_m, max_isl_length_m)
+        length_m[idx] += hop_length_m
+    length_m[hop_count < 0] = np.nan
+    return length_m
+
+
+def compute_path_length_m(path, num_satellites, node_positions, isl_keys=None, max_gsl_length_m=None,
+                          max_isl_length_m=None):
+    """
+    Calculates the length of a single path from the node positions, with all its hops at once.
+
+    :param path:                Path as list of node ids
+    :param num_satellites:      Number of satellites
+    :param node_positions:      Positions (m) of all nodes (satellites followed by ground stations)
+    :param isl_keys:            If given (as returned by get_isl_keys()), each hop is checked to be a link
+                                which exists (see walk_paths())
+    :param max_gsl_length_m:    Maximum GSL length (m)
+    :param max_isl_length_m:    Maximum ISL length (m)
+
+    :return: Path length (m)
+    """
+    path = np.asarray(path, dtype=np.int64)
+    from_nodes = path[:-1]
+    to_nodes = path[1:]
+    hop_length_m = np.linalg.norm(node_positions[from_nodes] - node_positions[to_nodes], axis=1)
+    if isl_keys is not None:
+        check_hops(from_nodes, to_nodes, hop_length_m, num_satellites, len(node_positions), isl_keys,
+                   max_gsl_length_m, max_isl_length_m)
+    return float(np.sum(hop_length_m))
+
+
+def get_isl_keys(list_isls, num_nodes):
+    """
+    ISLs as sorted keys (lowest id * number of nodes + highest id), to check hops against.
+
+    :param list_isls:   List of ISLs as (a, b) satellite identifier tuples
+    :param num_nodes:   Number of nodes (satellites and ground stations)
+
+    :return: Sorted int64 array of keys
+    """
+    if len(list_isls) == 0:
+        return np.zeros(0, dtype=np.int64)
+    isls = np.array(list_isls, dtype=np.int64)
+    return np.sort(np.minimum(isls[:, 0], isls[:, 1]) * num_nodes + np.maximum(isls[:, 0], isls[:, 1]))
+
+
+def check_hops(from_nodes, to_nodes, hop_length_m, num_satellites, num_nodes, isl_keys,
+               max_gsl_length_m, max_isl_length_m):
+    from_is_satellite = from_nodes < num_satellites
+    to_is_satellite = to_nodes < num_satellites
+
+    # Hops between ground stations
+    gs_to_gs = np.logical_and(~from_is_satellite, ~to_is_satellite)
+    if np.any(gs_to_gs):
+        i = int(np.argmax(gs_to_gs))
+        raise ValueError("Hops between ground stations are not permitted: %d -> %d" % (from_nodes[i], to_nodes[i]))
+
+    # Satellite to satellite
+    sat_to_sat = np.logical_and(from_is_satellite, to_is_satellite)
+    keys = np.minimum(from_nodes, to_nodes) * num_nodes + np.maximum(from_nodes, to_nodes)
+    positions = np.minimum(np.searchsorted(isl_keys, keys), max(0, len(isl_keys) - 1))
+    is_isl = (isl_keys[positions] == keys) if len(isl_keys) > 0 else np.zeros(len(keys), dtype=bool)
+    invalid_isl = np.logical_and(sat_to_sat, np.logical_or(~is_isl, hop_length_m > max_isl_length_m))
+    if np.any(invalid_isl):
+        i = int(np.argmax(invalid_isl))
+        raise ValueError("Invalid ISL hop from %d to %d" % (from_nodes[i], to_nodes[i]))
+
+    # Ground station to satellite, or satellite to ground station
+    invalid_gsl = np.logical_and(from_is_satellite != to_is_satellite, hop_length_m > max_gsl_length_m)
+    if np.any(invalid_gsl):
+        i = int(np.argmax(invalid_gsl))
+        raise ValueError("Invalid GSL hop from %d to %d (%s larger than %s)" % (
+            from_nodes[i], to_nodes[i], str(hop_length_m[i]), str(max_gsl_length_m)
+        ))
+
+
+def get_walked_path(walk, i):
+    """
+    Materializes the path of one pair of a walk (which recorded the paths).
+
+    :param walk:    Result of walk_paths() with record_paths=True
+    :param i:       Index of the pair
+
+    :return: Path as a list of node ids, or None if there is none
+    """
+    if walk["hop_count"][i] < 0:
+        return None
+    return walk["path_nodes"][i, :walk["hop_count"][i] + 1].tolist()
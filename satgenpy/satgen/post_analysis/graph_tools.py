@@ -20,38 +20,45 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+from .batched_path_tools import *
 from satgen.distance_tools import *
 import networkx as nx
+import numpy as np
 from astropy import units as u
 
 
 def construct_graph_with_distances(epoch, time_since_epoch_ns, satellites, ground_stations, list_isls,
-                                   max_gsl_length_m, max_isl_length_m):
+                                   max_gsl_length_m, max_isl_length_m, satellite_positions=None):
 
     # Time
     time = epoch + time_since_epoch_ns * u.ns
 
+    # Positions (each satellite is propagated once, unless they are taken from the precomputed ephemeris)
+    if satellite_positions is None:
+        satellite_positions = satellite_positions_m(satellites, str(epoch), str(time))
+    ground_station_positions = ground_station_positions_m(ground_stations)
+
     # Graph
     sat_net_graph_with_gs = nx.Graph()
 
     # ISLs
-    for (a, b) in list_isls:
+    isl_distances_m = distances_m_between_satellites(satellite_positions, list_isls)
+    for isl_idx, (a, b) in enumerate(list_isls):
 
         # Only ISLs which are close enough are considered
-        sat_distance_m = distance_m_between_satellites(satellites[a], satellites[b], str(epoch), str(time))
+        sat_distance_m = float(isl_distances_m[isl_idx])
         if sat_distance_m <= max_isl_length_m:
             sat_net_graph_with_gs.add_edge(
                 a, b, weight=sat_distance_m
             )
 
-    # GSLs
+    # GSLs (added in the order of satellite identifier)
+    ground_station_satellites_in_range = ground_station_satellites_in_range_m(
+        ground_station_positions, satellite_positions, max_gsl_length_m
+    )
     for ground_station in ground_stations:
-
-        # Find satellites in range
-        for sid in range(len(satellites)):
-            distance_m = distance_m_ground_station_to_satellite(ground_station, satellites[sid], str(epoch), str(time))
-            if distance_m <= max_gsl_length_m:
-                sat_net_graph_with_gs.add_edge(len(satellites) + ground_station["gid"], sid, weight=distance_m)
+        for distance_m, sid in sorted(ground_station_satellites_in_range[ground_station["gid"]], key=lambda x: x[1]):
+            sat_net_graph_with_gs.add_edge(len(satellites) + ground_station["gid"], sid, weight=distance_m)
 
     return sat_net_graph_with_gs
 
@@ -61,11 +68,19 @@ def compute_path_length_with_graph(path, graph):
 
 
 def compute_path_length_without_graph(path, epoch, time_since_epoch_ns, satellites, ground_stations, list_isls,
-                                      max_gsl_length_m, max_isl_length_m):
+                                      max_gsl_length_m, max_isl_length_m, satellite_positions=None):
 
     # Time
     time = epoch + time_since_epoch_ns * u.ns
 
+    # With the positions of all satellites at hand (e.g., from the precomputed ephemeris),
+    # the distances do not require re-propagating the satellites on the path
+    if satellite_positions is not None:
+        return compute_path_length_with_positions(
+            path, satellite_positions, ground_station_positions_m(ground_stations), list_isls,
+            max_gsl_length_m, max_isl_length_m
+        )
+
     # Go hop-by-hop and compute
     path_length_m = 0.0
     for i in range(1, len(path)):
@@ -120,6 +135,46 @@ def compute_path_length_without_graph(path, epoch, time_since_epoch_ns, satellit
     return path_length_m
 
 
+def compute_path_length_with_positions(path, satellite_positions, ground_station_positions, list_isls,
+                                       max_gsl_length_m, max_isl_length_m):
+    node_positions = np.concatenate((satellite_positions, ground_station_positions))
+    return compute_path_length_m(
+        path, len(satellite_positions), node_positions, get_isl_keys(list_isls, len(node_positions)),
+        max_gsl_length_m, max_isl_length_m
+    )
+
+
+def get_node_positions_m(epoch, time_since_epoch_ns, satellites, ground_station_positions, satellite_positions=None,
+                         satellite_ids=None):
+    """
+    Positions of the nodes at a time step, calculated once such that the length of the paths
+    at that time step can be calculated with compute_path_length_m().
+
+    :param epoch:                       Epoch
+    :param time_since_epoch_ns:         Time since epoch (ns)
+    :param satellites:                  Satellites
+    :param ground_station_positions:    Ground station positions (as returned by ground_station_positions_m())
+    :param satellite_positions:         Satellite positions at this time step (e.g., from the precomputed
+                                        ephemeris), or None to propagate the satellites (each once)
+    :param satellite_ids:               If the satellites are propagated, only these are (the positions of
+                                        the others are NaN), or all if None
+
+    :return: NumPy array of shape (number of satellites + number of ground stations, 3) in meters
+    """
+    if satellite_positions is None:
+        time = epoch + time_since_epoch_ns * u.ns
+        if satellite_ids is None:
+            satellite_positions = satellite_positions_m(satellites, str(epoch), str(time))
+        else:
+            satellite_ids = list(satellite_ids)
+            satellite_positions = np.full((len(satellites), 3), np.nan)
+            if len(satellite_ids) > 0:
+                satellite_positions[satellite_ids] = satellite_positions_m(
+                    list(map(lambda x: satellites[x], satellite_ids)), str(epoch), str(time)
+                )
+    return np.concatenate((satellite_positions, ground_station_positions))
+
+
 def get_path(src, dst, forward_state):
     if (src, dst) not in forward_state or forward_state[(src, dst)] == -1:
         return None
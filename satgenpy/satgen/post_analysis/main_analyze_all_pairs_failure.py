@@ -25,10 +25,10 @@ from satgen.post_analysis.analyze_all_pairs_failure import analyze_all_pairs_fai
 
 def main():
     args = sys.argv[1:]
-    if len(args) != 4:
-        print("Must supply exactly 4 arguments")
+    if len(args) != 4 and not (len(args) == 5 and args[4] == "plot"):
+        print("Must supply exactly 4 arguments (and optionally \"plot\" as fifth)")
         print("Usage: python -m satgen.post_analysis.main_analyze_all_pairs_failure [data_dir] [satellite_network_dir] "
-              "[dynamic_state_update_interval_ms] [end_time_s]")
+              "[dynamic_state_update_interval_ms] [end_time_s] [plot (optional)]")
         exit(1)
     else:
         core_network_folder_name = args[1].split("/")[-1]
@@ -44,6 +44,7 @@ def main():
             int(args[2]),
             int(args[3]),
             "", # Must be executed in satgenpy directory
+            plot=len(args) == 5
         )
 
 
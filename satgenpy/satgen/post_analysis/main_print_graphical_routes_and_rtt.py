@@ -26,10 +26,10 @@ from satgen.post_analysis.print_graphical_routes_and_rtt import print_graphical_
 
 def main():
     args = sys.argv[1:]
-    if len(args) != 6:
-        print("Must supply exactly six arguments")
+    if len(args) != 6 and len(args) != 7:
+        print("Must supply six or seven arguments")
         print("Usage: python -m satgen.post_analysis.main_print_graphical_routes_and_rtt [data_dir] "
-              "[satellite_network_dir] [dynamic_state_update_interval_ms] [end_time_s] [src] [dst]")
+              "[satellite_network_dir] [dynamic_state_update_interval_ms] [end_time_s] [src] [dst] (start_time_s)")
         exit(1)
     else:
         core_network_folder_name = args[1].split("/")[-1]
@@ -44,7 +44,8 @@ def main():
             int(args[2]),
             int(args[3]),
             int(args[4]),
-            int(args[5])
+            int(args[5]),
+            start_time_s=int(args[6]) if len(args) == 7 else 0
         )
 
 
@@ -21,15 +21,33 @@
 # SOFTWARE.
 
 import sys
-from satgen.post_analysis.print_routes_and_rtt import print_routes_and_rtt
+import numpy as np
+from satgen.post_analysis.print_routes_and_rtt import print_routes_and_rtt_multiple_pairs
+from satgen.text_io import parse_numeric_text
+
+
+def read_pairs(filename):
+    with open(filename, "r") as f_in:
+        lines = [line.strip() for line in f_in if line.strip() != ""]
+    try:
+        pairs = parse_numeric_text("\n".join(lines), 2, np.int64, filename)
+    except ValueError:
+        raise ValueError("Pair lines must be \"src,dst\": " + filename)
+    return list(map(tuple, pairs.tolist()))
 
 
 def main():
     args = sys.argv[1:]
-    if len(args) != 6:
-        print("Must supply exactly six arguments")
+    plot = True
+    if len(args) > 0 and args[-1] == "no_plot":
+        plot = False
+        args = args[:-1]
+    if len(args) < 5 or (len(args) > 5 and len(args) % 2 != 0):
+        print("Must supply at least five arguments")
         print("Usage: python -m satgen.post_analysis.main_print_routes_and_rtt [data_dir] [satellite_network_dir] "
-              "[dynamic_state_update_interval_ms] [end_time_s] [src] [dst]")
+              "[dynamic_state_update_interval_ms] [end_time_s] [src] [dst] ([src] [dst] ...) (no_plot)")
+        print("   or: python -m satgen.post_analysis.main_print_routes_and_rtt [data_dir] [satellite_network_dir] "
+              "[dynamic_state_update_interval_ms] [end_time_s] [pairs_file with a src,dst line per pair] (no_plot)")
         exit(1)
     else:
         core_network_folder_name = args[1].split("/")[-1]
@@ -38,14 +56,18 @@ def main():
         )
         print("Data dir: " + args[0])
         print("Used data dir to form base output dir: " + base_output_dir)
-        print_routes_and_rtt(
+        if len(args) == 5:
+            list_pairs = read_pairs(args[4])
+        else:
+            list_pairs = list(map(lambda i: (int(args[i]), int(args[i + 1])), range(4, len(args), 2)))
+        print_routes_and_rtt_multiple_pairs(
             base_output_dir,
             args[1],
             int(args[2]),
             int(args[3]),
-            int(args[4]),
-            int(args[5]),
-            ""  # Must be executed in satgenpy directory
+            list_pairs,
+            "",  # Must be executed in satgenpy directory
+            plot=plot
         )
 
 
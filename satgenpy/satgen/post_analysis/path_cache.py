@@ -0,0 +1,217 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from .batched_path_tools import *
+import numpy as np
+
+#
+# A path cache keeps the paths of a fixed set of (source, destination) pairs up-to-date
+# with the forwarding state. Besides the paths, it keeps a reverse index from each
+# forwarding state entry (node, destination) to the pairs whose path looks it up, such
+# that a forwarding state delta only causes the paths which use a changed entry to be walked again.
+#
+
+
+def create_path_cache(num_satellites, num_ground_stations, src_node_ids, dst_node_ids):
+    """
+    Creates a path cache, which starts out with an empty forwarding state (so all pairs are unreachable).
+
+    :param num_satellites:          Number of satellites
+    :param num_ground_stations:     Number of ground stations
+    :param src_node_ids:            Source node ids of the pairs
+    :param dst_node_ids:            Destination ground station node ids of the pairs
+
+    :return: Path cache (dictionary)
+    """
+    src_node_ids = np.asarray(src_node_ids, dtype=np.int64)
+    dst_node_ids = np.asarray(dst_node_ids, dtype=np.int64)
+    num_pairs = len(src_node_ids)
+    path_nodes = np.full((num_pairs, 1), -1, dtype=np.int64)
+    path_nodes[src_node_ids == dst_node_ids, 0] = src_node_ids[src_node_ids == dst_node_ids]
+    cache = {
+        "num_satellites": num_satellites,
+        "num_ground_stations": num_ground_stations,
+        "next_hop_table": create_next_hop_table(num_satellites, num_ground_stations),
+        "src_node_ids": src_node_ids,
+        "dst_node_ids": dst_node_ids,
+        "path_nodes": path_nodes,
+        "hop_count": np.where(src_node_ids == dst_node_ids, 0, -1),
+        "unreachable": src_node_ids != dst_node_ids,
+        "loop": np.zeros(num_pairs, dtype=bool),
+        "path_version": np.zeros(num_pairs, dtype=np.int64),
+        "reverse_index": {},
+        "pair_entries": [[] for _ in range(num_pairs)],
+        "num_walked": 0
+    }
+
+    # The first lookup of each unreachable pair is its source
+    for i in np.nonzero(cache["unreachable"])[0]:
+        set_pair_entries(cache, int(i), [get_entry_key(cache, src_node_ids[i], dst_node_ids[i])])
+
+    return cache
+
+
+def update_path_cache(cache, fstate_delta):
+    """
+    Applies a forwarding state delta to the path cache, and walks again the paths of
+    only those pairs which look up an entry whose next hop changed.
+
+    :param cache:           Path cache (updated)
+    :param fstate_delta:    Forwarding state delta (as returned by read_fstate_delta())
+
+    :return: Indices of the pairs of which the path changed
+    """
+    num_satellites = cache["num_satellites"]
+    next_hop_table = cache["next_hop_table"]
+    fstate_delta = np.asarray(fstate_delta)
+    if len(fstate_delta) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    # Entries of which the next hop actually changed
+    nodes = fstate_delta[:, 0].astype(np.int64)
+    dst_gids = fstate_delta[:, 1].astype(np.int64) - num_satellites
+    changed = next_hop_table[nodes, dst_gids] != fstate_delta[:, 2]
+    update_next_hop_table(next_hop_table, num_satellites, fstate_delta)
+
+    # Affected pairs
+    reverse_index = cache["reverse_index"]
+    affected = set()
+    for key in (nodes[changed] * cache["num_ground_stations"] + dst_gids[changed]).tolist():
+        if key in reverse_index:
+            affected.update(reverse_index[key])
+    if len(affected) == 0:
+        return np.zeros(0, dtype=np.int64)
+    affected = np.array(sorted(affected), dtype=np.int64)
+
+    # Walk their paths again
+    walk = walk_paths(
+        next_hop_table, num_satellites, cache["src_node_ids"][affected], cache["dst_node_ids"][affected],
+        record_paths=True
+    )
+    cache["num_walked"] += len(affected)
+
+    # Make the cached paths as wide as needed to compare
+    width = max(cache["path_nodes"].shape[1], walk["path_nodes"].shape[1])
+    cache["path_nodes"] = pad_path_nodes(cache["path_nodes"], width)
+    new_path_nodes = pad_path_nodes(walk["path_nodes"], width)
+    path_changed = np.any(cache["path_nodes"][affected] != new_path_nodes, axis=1)
+
+    # Update the cache
+    cache["path_nodes"][affected] = new_path_nodes
+    cache["hop_count"][affected] = walk["hop_count"]
+    cache["unreachable"][affected] = walk["unreachable"]
+    cache["loop"][affected] = walk["loop"]
+    changed_pairs = affected[path_changed]
+    cache["path_version"][changed_pairs] += 1
+
+    # Update the entries each pair looks up (all walked nodes, except the destination it reached)
+    walked_nodes = walk["walked_nodes"]
+    for j in range(len(affected)):
+        i = int(affected[j])
+        row = walked_nodes[j]
+        row = row[row != -1]
+        if walk["hop_count"][j] >= 0:
+            row = row[:-1]
+        set_pair_entries(cache, i, [get_entry_key(cache, node, cache["dst_node_ids"][i]) for node in row.tolist()])
+
+    return changed_pairs
+
+
+def set_path_cache_fstate(cache, fstate):
+    """
+    Replaces the complete forwarding state of the path cache (entries which are
+    not in it have no next hop), such as the forwarding state files written
+    under failures, which each contain the complete forwarding state.
+
+    :param cache:   Path cache (updated)
+    :param fstate:  Complete forwarding state, in the same format as a delta (as returned by read_fstate_delta())
+
+    :return: Indices of the pairs of which the path changed
+    """
+    num_satellites = cache["num_satellites"]
+    next_hop_table = create_next_hop_table(num_satellites, cache["num_ground_stations"])
+    update_next_hop_table(next_hop_table, num_satellites, np.asarray(fstate))
+
+    # Only the entries which differ are applied as delta
+    nodes, dst_gids = np.nonzero(next_hop_table != cache["next_hop_table"])
+    fstate_delta = np.zeros((len(nodes), 5), dtype=np.int64)
+    fstate_delta[:, 0] = nodes
+    fstate_delta[:, 1] = num_satellites + dst_gids
+    fstate_delta[:, 2] = next_hop_table[nodes, dst_gids]
+    return update_path_cache(cache, fstate_delta)
+
+
+def get_cached_path(cache, i):
+    """
+    Materializes the cached path of a pair.
+
+    :param cache:   Path cache
+    :param i:       Index of the pair
+
+    :return: Path as a list of node ids, or None if there is none
+    """
+    if cache["hop_count"][i] < 0:
+        return None
+    return cache["path_nodes"][i, :cache["hop_count"][i] + 1].tolist()
+
+
+def get_path_cache_lengths_m(cache, node_positions, list_isls=None, max_gsl_length_m=None, max_isl_length_m=None):
+    """
+    Calculates the lengths of all cached paths from the node positions at this time step.
+
+    :param cache:               Path cache
+    :param node_positions:      Positions (m) of all nodes (satellites followed by ground stations)
+    :param list_isls:           If given, each hop is checked to be a link which exists (see walk_paths())
+    :param max_gsl_length_m:    Maximum GSL length (m)
+    :param max_isl_length_m:    Maximum ISL length (m)
+
+    :return: Length (m) of each path, NaN if there is no path
+    """
+    return compute_path_lengths_m(
+        cache["path_nodes"], cache["hop_count"], cache["num_satellites"], node_positions,
+        list_isls=list_isls, max_gsl_length_m=max_gsl_length_m, max_isl_length_m=max_isl_length_m
+    )
+
+
+def get_entry_key(cache, node_id, dst_node_id):
+    return int(node_id) * cache["num_ground_stations"] + int(dst_node_id) - cache["num_satellites"]
+
+
+def set_pair_entries(cache, i, keys):
+    reverse_index = cache["reverse_index"]
+    for key in cache["pair_entries"][i]:
+        pairs = reverse_index[key]
+        pairs.discard(i)
+        if len(pairs) == 0:
+            del reverse_index[key]
+    keys = set(keys)
+    for key in keys:
+        if key not in reverse_index:
+            reverse_index[key] = set()
+        reverse_index[key].add(i)
+    cache["pair_entries"][i] = keys
+
+
+def pad_path_nodes(path_nodes, width):
+    if path_nodes.shape[1] >= width:
+        return path_nodes
+    return np.pad(path_nodes, ((0, 0), (0, width - path_nodes.shape[1])), constant_values=-1)
@@ -21,15 +21,42 @@
 # SOFTWARE.
 
 from .graph_tools import *
+from .path_cache import *
+from satgen.fstate import *
+from satgen.ephemeris import *
 from satgen.isls import *
 from satgen.ground_stations import *
 from satgen.tles import *
 import exputil
+import numpy as np
 import tempfile
 
 
 def print_routes_and_rtt(base_output_dir, satellite_network_dir, dynamic_state_update_interval_ms,
-                         simulation_end_time_s, src, dst, satgenpy_dir_with_ending_slash):
+                         simulation_end_time_s, src, dst, satgenpy_dir_with_ending_slash, start_time_s=0):
+    print_routes_and_rtt_multiple_pairs(
+        base_output_dir, satellite_network_dir, dynamic_state_update_interval_ms,
+        simulation_end_time_s, [(src, dst)], satgenpy_dir_with_ending_slash, start_time_s=start_time_s
+    )
+
+
+def print_routes_and_rtt_multiple_pairs(base_output_dir, satellite_network_dir, dynamic_state_update_interval_ms,
+                                        simulation_end_time_s, list_pairs, satgenpy_dir_with_ending_slash,
+                                        plot=True, start_time_s=0):
+    """
+    Writes for each (src, dst) pair its paths (networkx_path_<src>_to_<dst>.txt) and
+    RTTs (networkx_rtt_<src>_to_<dst>.txt) over time, going over the dynamic state only once for all pairs.
+
+    :param base_output_dir:                     Base output directory (with data/ and pdf/ in it)
+    :param satellite_network_dir:               Satellite network directory
+    :param dynamic_state_update_interval_ms:    Dynamic state update interval (ms)
+    :param simulation_end_time_s:               Simulation end time (s)
+    :param list_pairs:                          List of (src, dst) ground station node id pairs
+    :param satgenpy_dir_with_ending_slash:      Satgenpy directory (for the plot script)
+    :param plot:                                True iff the RTT of each pair should be plotted
+    :param start_time_s:                        Start time (s) of the time steps to go over (the forwarding
+                                                state at it is obtained from the nearest snapshot before it)
+    """
 
     # Local shell
     local_shell = exputil.LocalShell()
@@ -54,83 +81,138 @@ def print_routes_and_rtt(base_output_dir, satellite_network_dir, dynamic_state_u
     description = exputil.PropertiesConfig(satellite_network_dir + "/description.txt")
 
     # Derivatives
+    start_time_ns = start_time_s * 1000 * 1000 * 1000
     simulation_end_time_ns = simulation_end_time_s * 1000 * 1000 * 1000
     dynamic_state_update_interval_ns = dynamic_state_update_interval_ms * 1000 * 1000
     max_gsl_length_m = exputil.parse_positive_float(description.get_property_or_fail("max_gsl_length_m"))
     max_isl_length_m = exputil.parse_positive_float(description.get_property_or_fail("max_isl_length_m"))
 
-    # Write data file
-
-    data_path_filename = data_dir + "/networkx_path_" + str(src) + "_to_" + str(dst) + ".txt"
-    with open(data_path_filename, "w+") as data_path_file:
-
-        # For each time moment
-        fstate = {}
-        current_path = []
-        rtt_ns_list = []
-        for t in range(0, simulation_end_time_ns, dynamic_state_update_interval_ns):
-
-            with open(satellite_network_dynamic_state_dir + "/fstate_" + str(t) + ".txt", "r") as f_in:
-                for line in f_in:
-                    spl = line.split(",")
-                    current = int(spl[0])
-                    destination = int(spl[1])
-                    next_hop = int(spl[2])
-                    fstate[(current, destination)] = next_hop
-
-                # Calculate path length
-                path_there = get_path(src, dst, fstate)
-                path_back = get_path(dst, src, fstate)
-                if path_there is not None and path_back is not None:
-                    length_src_to_dst_m = compute_path_length_without_graph(path_there, epoch, t, satellites,
-                                                                            ground_stations, list_isls,
-                                                                            max_gsl_length_m, max_isl_length_m)
-                    length_dst_to_src_m = compute_path_length_without_graph(path_back, epoch, t,
-                                                                            satellites, ground_stations, list_isls,
-                                                                            max_gsl_length_m, max_isl_length_m)
-                    rtt_ns = (length_src_to_dst_m + length_dst_to_src_m) * 1000000000.0 / 299792458.0
-                else:
-                    length_src_to_dst_m = 0.0
-                    length_dst_to_src_m = 0.0
-                    rtt_ns = 0.0
-
-                # Add to RTT list
-                rtt_ns_list.append((t, rtt_ns))
-
-                # Only if there is a new path, print new path
-                new_path = get_path(src, dst, fstate)
-                if current_path != new_path:
+    # Precomputed satellite positions (if generated)
+    ephemeris = read_ephemeris_if_available(
+        satellite_network_dir, dynamic_state_update_interval_ms, simulation_end_time_s
+    )
 
-                    # This is the new path
-                    current_path = new_path
+    ground_station_positions = ground_station_positions_m(ground_stations)
+
+    # Pairs (each only once)
+    pairs = []
+    for (src, dst) in list_pairs:
+        for node_id in (src, dst):
+            if node_id < len(satellites) or node_id >= len(satellites) + len(ground_stations):
+                raise ValueError("Node %d of pair (%d, %d) is not a ground station" % (node_id, src, dst))
+        if (src, dst) not in pairs:
+            pairs.append((src, dst))
+    num_pairs = len(pairs)
+    if num_pairs == 0:
+        return
+
+    # The paths there (first half) and back (second half) of all pairs are kept up-to-date at once
+    src_node_ids = list(map(lambda x: x[0], pairs))
+    dst_node_ids = list(map(lambda x: x[1], pairs))
+    path_cache = create_path_cache(
+        len(satellites), len(ground_stations), src_node_ids + dst_node_ids, dst_node_ids + src_node_ids
+    )
 
-                    # Write change nicely to the console
+    # For each time moment
+    path_changes_per_pair = [[] for _ in range(num_pairs)]
+    rtt_ns_list_per_pair = [[] for _ in range(num_pairs)]
+    current_path_per_pair = [[] for _ in range(num_pairs)]
+    for t, fstate_delta in iterate_fstate_deltas(
+            satellite_network_dynamic_state_dir, start_time_ns, simulation_end_time_ns,
+            dynamic_state_update_interval_ns
+    ):
+        update_path_cache(path_cache, fstate_delta)
+
+        # Calculate the lengths of all paths at once, from the positions of the nodes at this time step
+        path_node_ids = np.unique(path_cache["path_nodes"])
+        node_positions = get_node_positions_m(
+            epoch, t, satellites, ground_station_positions,
+            None if ephemeris is None else get_satellite_positions_at(ephemeris, t),
+            satellite_ids=path_node_ids[np.logical_and(path_node_ids >= 0, path_node_ids < len(satellites))].tolist()
+        )
+        length_m = get_path_cache_lengths_m(path_cache, node_positions, list_isls=list_isls,
+                                            max_gsl_length_m=max_gsl_length_m, max_isl_length_m=max_isl_length_m)
+
+        for i in range(num_pairs):
+            src, dst = pairs[i]
+
+            # Path length
+            path_there = get_cached_path(path_cache, i)
+            path_back = get_cached_path(path_cache, num_pairs + i)
+            if path_there is not None and path_back is not None:
+                length_src_to_dst_m = float(length_m[i])
+                length_dst_to_src_m = float(length_m[num_pairs + i])
+                rtt_ns = (length_src_to_dst_m + length_dst_to_src_m) * 1000000000.0 / 299792458.0
+            else:
+                length_src_to_dst_m = 0.0
+                length_dst_to_src_m = 0.0
+                rtt_ns = 0.0
+
+            # Add to RTT list
+            rtt_ns_list_per_pair[i].append((t, rtt_ns))
+
+            # Only if there is a new path, print new path
+            new_path = path_there
+            if current_path_per_pair[i] != new_path:
+
+                # This is the new path
+                current_path = new_path
+                current_path_per_pair[i] = current_path
+
+                # Write change nicely to the console
+                if num_pairs == 1:
                     print("Change at t=" + str(t) + " ns (= " + str(t / 1e9) + " seconds)")
-                    print("  > Path..... " + (" -- ".join(list(map(lambda x: str(x), current_path)))
-                                              if current_path is not None else "Unreachable"))
-                    print("  > Length... " + str(length_src_to_dst_m + length_dst_to_src_m) + " m")
-                    print("  > RTT...... %.2f ms" % (rtt_ns / 1e6))
-                    print("")
-
-                    # Write to path file
-                    data_path_file.write(str(t) + "," + ("-".join(list(map(lambda x: str(x), current_path)))
-                                                         if current_path is not None else "Unreachable") + "\n")
-
-        # Write data file
+                else:
+                    print("Change of " + str(src) + " -> " + str(dst)
+                          + " at t=" + str(t) + " ns (= " + str(t / 1e9) + " seconds)")
+                print("  > Path..... " + (" -- ".join(list(map(lambda x: str(x), current_path)))
+                                          if current_path is not None else "Unreachable"))
+                print("  > Length... " + str(length_src_to_dst_m + length_dst_to_src_m) + " m")
+                print("  > RTT...... %.2f ms" % (rtt_ns / 1e6))
+                print("")
+
+                # Path change
+                path_changes_per_pair[i].append((t, current_path))
+
+    # Write data files
+    plot_jobs = []
+    for i in range(num_pairs):
+        src, dst = pairs[i]
+
+        # Path file
+        data_path_filename = data_dir + "/networkx_path_" + str(src) + "_to_" + str(dst) + ".txt"
+        with open(data_path_filename, "w+") as data_path_file:
+            for (t, current_path) in path_changes_per_pair[i]:
+                data_path_file.write(str(t) + "," + ("-".join(list(map(lambda x: str(x), current_path)))
+                                                     if current_path is not None else "Unreachable") + "\n")
+
+        # RTT file
         data_filename = data_dir + "/networkx_rtt_" + str(src) + "_to_" + str(dst) + ".txt"
         with open(data_filename, "w+") as data_file:
-            for i in range(len(rtt_ns_list)):
-                data_file.write("%d,%.10f\n" % (rtt_ns_list[i][0], rtt_ns_list[i][1]))
+            for (t, rtt_ns) in rtt_ns_list_per_pair[i]:
+                data_file.write("%d,%.10f\n" % (t, rtt_ns))
 
-        # Make plot
+        # To plot
         pdf_filename = pdf_dir + "/time_vs_networkx_rtt_" + str(src) + "_to_" + str(dst) + ".pdf"
-        tf = tempfile.NamedTemporaryFile(delete=False)
-        tf.close()
-        local_shell.copy_file(satgenpy_dir_with_ending_slash + "plot/plot_time_vs_networkx_rtt.plt", tf.name)
-        local_shell.sed_replace_in_file_plain(tf.name, "[OUTPUT-FILE]", pdf_filename)
-        local_shell.sed_replace_in_file_plain(tf.name, "[DATA-FILE]", data_filename)
-        local_shell.perfect_exec("gnuplot " + tf.name)
-        print("Produced plot: " + pdf_filename)
-        local_shell.remove(tf.name)
-
-
+        plot_jobs.append((data_filename, pdf_filename))
+
+    # Make plots (with one gnuplot process for many plots)
+    if plot:
+        plot_time_vs_networkx_rtt(local_shell, satgenpy_dir_with_ending_slash, plot_jobs)
+
+
+def plot_time_vs_networkx_rtt(local_shell, satgenpy_dir_with_ending_slash, plot_jobs, plots_per_gnuplot=50):
+    for j in range(0, len(plot_jobs), plots_per_gnuplot):
+        tf_names = []
+        for (data_filename, pdf_filename) in plot_jobs[j:j + plots_per_gnuplot]:
+            tf = tempfile.NamedTemporaryFile(delete=False)
+            tf.close()
+            local_shell.copy_file(satgenpy_dir_with_ending_slash + "plot/plot_time_vs_networkx_rtt.plt", tf.name)
+            local_shell.sed_replace_in_file_plain(tf.name, "[OUTPUT-FILE]", pdf_filename)
+            local_shell.sed_replace_in_file_plain(tf.name, "[DATA-FILE]", data_filename)
+            tf_names.append(tf.name)
+        local_shell.perfect_exec("gnuplot " + " ".join(tf_names))
+        for (data_filename, pdf_filename) in plot_jobs[j:j + plots_per_gnuplot]:
+            print("Produced plot: " + pdf_filename)
+        for tf_name in tf_names:
+            local_shell.remove(tf_name)
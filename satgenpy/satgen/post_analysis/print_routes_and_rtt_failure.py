@@ -21,6 +21,8 @@
 # SOFTWARE.
 
 from .graph_tools import *
+from satgen.fstate import *
+from satgen.ephemeris import *
 from satgen.isls import *
 from satgen.ground_stations import *
 from satgen.tles import *
@@ -59,6 +61,15 @@ def print_routes_and_rtt_failure(base_output_dir, satellite_network_dir, dynamic
     max_gsl_length_m = exputil.parse_positive_float(description.get_property_or_fail("max_gsl_length_m"))
     max_isl_length_m = exputil.parse_positive_float(description.get_property_or_fail("max_isl_length_m"))
 
+    # Precomputed satellite positions (if generated)
+    ephemeris = read_ephemeris_if_available(
+        satellite_network_dir, dynamic_state_update_interval_ms, simulation_end_time_s
+    )
+
+    # The path lengths are calculated from the node positions, which are calculated once per time step
+    ground_station_positions = ground_station_positions_m(ground_stations)
+    isl_keys = get_isl_keys(list_isls, len(satellites) + len(ground_stations))
+
     # Write data file
 
     data_path_filename = data_dir + "/networkx_path_" + str(src) + "_to_" + str(dst) + ".txt"
@@ -69,51 +80,51 @@ def print_routes_and_rtt_failure(base_output_dir, satellite_network_dir, dynamic
         rtt_ns_list = []
         for t in range(0, simulation_end_time_ns, dynamic_state_update_interval_ns):
             fstate = {}
-            with open(satellite_network_dynamic_state_dir + "/fstate_" + str(t) + ".txt", "r") as f_in:
-                for line in f_in:
-                    spl = line.split(",")
-                    current = int(spl[0])
-                    destination = int(spl[1])
-                    next_hop = int(spl[2])
-                    fstate[(current, destination)] = next_hop
-
-                # Calculate path length
-                path_there = get_path(src, dst, fstate)
-                path_back = get_path(dst, src, fstate)
-                if path_there is not None and path_back is not None:
-                    length_src_to_dst_m = compute_path_length_without_graph(path_there, epoch, t, satellites,
-                                                                            ground_stations, list_isls,
-                                                                            max_gsl_length_m, max_isl_length_m)
-                    length_dst_to_src_m = compute_path_length_without_graph(path_back, epoch, t,
-                                                                            satellites, ground_stations, list_isls,
-                                                                            max_gsl_length_m, max_isl_length_m)
-                    rtt_ns = (length_src_to_dst_m + length_dst_to_src_m) * 1000000000.0 / 299792458.0
-                else:
-                    length_src_to_dst_m = 0.0
-                    length_dst_to_src_m = 0.0
-                    rtt_ns = 0.0
-
-                # Add to RTT list
-                rtt_ns_list.append((t, rtt_ns))
-
-                # Only if there is a new path, print new path
-                new_path = get_path(src, dst, fstate)
-                if current_path != new_path:
-
-                    # This is the new path
-                    current_path = new_path
-
-                    # Write change nicely to the console
-                    print("Change at t=" + str(t) + " ns (= " + str(t / 1e9) + " seconds)")
-                    print("  > Path..... " + (" -- ".join(list(map(lambda x: str(x), current_path)))
-                                              if current_path is not None else "Unreachable"))
-                    print("  > Length... " + str(length_src_to_dst_m + length_dst_to_src_m) + " m")
-                    print("  > RTT...... %.2f ms" % (rtt_ns / 1e6))
-                    print("")
-
-                    # Write to path file
-                    data_path_file.write(str(t) + "," + ("-".join(list(map(lambda x: str(x), current_path)))
-                                                         if current_path is not None else "Unreachable") + "\n")
+            fstate_delta = read_fstate_delta(satellite_network_dynamic_state_dir, t)
+            fstate.update(fstate_delta_next_hops(fstate_delta))
+
+            # Calculate path length
+            path_there = get_path(src, dst, fstate)
+            path_back = get_path(dst, src, fstate)
+            if path_there is not None and path_back is not None:
+                node_positions = get_node_positions_m(
+                    epoch, t, satellites, ground_station_positions,
+                    None if ephemeris is None else get_satellite_positions_at(ephemeris, t),
+                    satellite_ids=set(filter(lambda x: x < len(satellites), path_there + path_back))
+                )
+                length_src_to_dst_m = compute_path_length_m(
+                    path_there, len(satellites), node_positions, isl_keys, max_gsl_length_m, max_isl_length_m
+                )
+                length_dst_to_src_m = compute_path_length_m(
+                    path_back, len(satellites), node_positions, isl_keys, max_gsl_length_m, max_isl_length_m
+                )
+                rtt_ns = (length_src_to_dst_m + length_dst_to_src_m) * 1000000000.0 / 299792458.0
+            else:
+                length_src_to_dst_m = 0.0
+                length_dst_to_src_m = 0.0
+                rtt_ns = 0.0
+
+            # Add to RTT list
+            rtt_ns_list.append((t, rtt_ns))
+
+            # Only if there is a new path, print new path
+            new_path = get_path(src, dst, fstate)
+            if current_path != new_path:
+
+                # This is the new path
+                current_path = new_path
+
+                # Write change nicely to the console
+                print("Change at t=" + str(t) + " ns (= " + str(t / 1e9) + " seconds)")
+                print("  > Path..... " + (" -- ".join(list(map(lambda x: str(x), current_path)))
+                                          if current_path is not None else "Unreachable"))
+                print("  > Length... " + str(length_src_to_dst_m + length_dst_to_src_m) + " m")
+                print("  > RTT...... %.2f ms" % (rtt_ns / 1e6))
+                print("")
+
+                # Write to path file
+                data_path_file.write(str(t) + "," + ("-".join(list(map(lambda x: str(x), current_path)))
+                                                     if current_path is not None else "Unreachable") + "\n")
 
         # Write data file
         data_filename = data_dir + "/networkx_rtt_" + str(src) + "_to_" + str(dst) + ".txt"
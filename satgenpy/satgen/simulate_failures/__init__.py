@@ -1 +1,9 @@
-from .parse_failure_file import parse_failure_file
\ No newline at end of file
+from .parse_failure_file import parse_failure_file
+from .failure_timeline import create_failure_timeline, create_failure_state, update_failure_state
+from .failure_sweep import (
+    FAILURE_SWEEP_COLUMNS,
+    generate_random_failure_tables,
+    calculate_healthy_network_states,
+    calculate_failure_scenario_rtts_ns,
+    failure_sweep
+)
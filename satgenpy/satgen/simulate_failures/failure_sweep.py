@@ -0,0 +1,349 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from .failure_timeline import create_failure_timeline, create_failure_state, update_failure_state
+from satgen.distance_tools import *
+from satgen.dynamic_state.fstate_calculation import (
+    calculate_sat_net_distances_without_gs_relaying,
+    create_shortest_path_state
+)
+from satgen.ephemeris import read_ephemeris_if_available, get_satellite_positions_at
+from satgen.ground_stations import read_ground_stations_extended
+from satgen.isls import read_isls, create_isl_topology, set_isl_topology_lengths
+from satgen.tles import read_tles
+from astropy import units as u
+import exputil
+import math
+import multiprocessing
+import numpy as np
+import random
+
+#
+# A failure sweep evaluates many failure scenarios on the same satellite network. The satellites are
+# propagated, and the ISL lengths and the satellites in range of each ground station are calculated,
+# only once per time step. Each scenario then masks out its failed satellites, ISLs and ground stations,
+# and routes as algorithm_free_one_only_over_isls does under failures: a ground station pair is connected
+# via the satellites in range of either which together offer the shortest path over the ISLs.
+#
+
+# Inputs shared by all worker processes, set in the parent before the worker processes are forked
+# such that they are inherited copy-on-write instead of being pickled for each scenario
+shared_sweep_inputs = None
+
+# Columns of the failure sweep table
+FAILURE_SWEEP_COLUMNS = [
+    "scenario",
+    "num_failed_satellites",
+    "num_failed_isls",
+    "num_failed_ground_stations",
+    "reachable_fraction",
+    "num_unreachable_pairs",
+    "mean_rtt_ns",
+    "median_rtt_ns",
+    "max_rtt_ns",
+    "mean_rtt_increase_ns"
+]
+
+
+def generate_random_failure_tables(num_scenarios, seed, num_satellites, list_isls, num_ground_stations, duration_s,
+                                   num_failed_satellites, num_failed_isls, num_failed_ground_stations):
+    """
+    Generates random failure scenarios. Each failed device fails at a random whole second in
+    [0, duration) and stays failed until a random whole second in [start, duration), such that
+    they can be written to and read from a failure file exactly.
+
+    :param num_scenarios:               Number of scenarios
+    :param seed:                        Random seed
+    :param num_satellites:              Number of satellites
+    :param list_isls:                   List of ISLs as (a, b) satellite identifier tuples
+    :param num_ground_stations:         Number of ground stations
+    :param duration_s:                  Duration (s)
+    :param num_failed_satellites:       Number of failed satellites per scenario
+    :param num_failed_isls:             Number of failed ISLs per scenario
+    :param num_failed_ground_stations:  Number of failed ground stations per scenario
+
+    :return: List of failure tables (as returned by parse_failure_file())
+    """
+    if num_failed_satellites > num_satellites or num_failed_isls > len(list_isls) \
+            or num_failed_ground_stations > num_ground_stations:
+        raise ValueError("Cannot fail more devices than there are")
+    rng = random.Random(seed)
+    failure_tables = []
+    for _ in range(num_scenarios):
+        failure_table = {"SAT": {}, "ISL": {}, "GS": {}}
+        for device, device_ids in [
+            ("SAT", rng.sample(range(num_satellites), num_failed_satellites)),
+            ("ISL", rng.sample(list_isls, num_failed_isls)),
+            ("GS", rng.sample(range(num_satellites, num_satellites + num_ground_stations), num_failed_ground_stations))
+        ]:
+            for device_id in device_ids:
+                start_s = rng.randrange(duration_s)
+                end_s = rng.randrange(start_s, duration_s)
+                failure_table[device][device_id] = (start_s * 1000000000, end_s * 1000000000)
+        failure_table["timeline"] = create_failure_timeline(failure_table)
+        failure_tables.append(failure_table)
+    return failure_tables
+
+
+def calculate_healthy_network_states(satellite_network_dir, time_step_ms, duration_s):
+    """
+    Calculates the state of the network without failures at every time step: the ISL lengths
+    and the satellites in range of each ground station. The satellites are propagated once per
+    time step (or taken from the ephemeris if it was generated).
+
+    :param satellite_network_dir:   Satellite network directory
+    :param time_step_ms:            Time step (ms)
+    :param duration_s:              Duration (s)
+
+    :return: Dictionary with the static inputs and for each time step its state
+    """
+
+    # Static inputs
+    ground_stations = read_ground_stations_extended(satellite_network_dir + "/ground_stations.txt")
+    tles = read_tles(satellite_network_dir + "/tles.txt")
+    satellites = tles["satellites"]
+    epoch = tles["epoch"]
+    list_isls = read_isls(satellite_network_dir + "/isls.txt", len(satellites))
+    description = exputil.PropertiesConfig(satellite_network_dir + "/description.txt")
+    max_gsl_length_m = exputil.parse_positive_float(description.get_property_or_fail("max_gsl_length_m"))
+    ephemeris = read_ephemeris_if_available(satellite_network_dir, time_step_ms, duration_s)
+    ground_station_positions = ground_station_positions_m(ground_stations)
+
+    # Each time step
+    simulation_end_time_ns = duration_s * 1000 * 1000 * 1000
+    time_step_ns = time_step_ms * 1000 * 1000
+    time_steps = []
+    for t in range(0, simulation_end_time_ns, time_step_ns):
+        if ephemeris is not None:
+            satellite_positions = get_satellite_positions_at(ephemeris, t)
+        else:
+            satellite_positions = satellite_positions_m(satellites, str(epoch), str(epoch + t * u.ns))
+        time_steps.append({
+            "time_ns": t,
+            "isl_lengths_m": distances_m_between_satellites(satellite_positions, list_isls),
+            "ground_station_satellites_in_range": ground_station_satellites_in_range_m(
+                ground_station_positions, satellite_positions, max_gsl_length_m
+            )
+        })
+
+    return {
+        "num_satellites": len(satellites),
+        "num_ground_stations": len(ground_stations),
+        "list_isls": list_isls,
+        "time_steps": time_steps
+    }
+
+
+def calculate_one_way_distances_m(isl_topology, ground_station_satellites_in_range, shortest_path_backend,
+                                  shortest_path_state):
+    """
+    Calculates the length of the shortest path from each ground station to each other ground station,
+    which goes from the source to a satellite in its range, over the ISLs to a satellite in range of the
+    destination, and to the destination. This is the path the forwarding state of
+    algorithm_free_one_only_over_isls (under failures) follows.
+
+    :param isl_topology:                            ISL topology (with the ISL lengths of this time step)
+    :param ground_station_satellites_in_range:      For each ground station, list of (distance, satellite id)
+                                                    of satellites in range (or an int if it has failed)
+    :param shortest_path_backend:                   Shortest path backend
+    :param shortest_path_state:                     Shortest path state (only used by "dijkstra_incremental")
+
+    :return: NumPy array of shape (number of ground stations, number of ground stations), infinity if unreachable
+    """
+    num_satellites = isl_topology["num_satellites"]
+    num_ground_stations = len(ground_station_satellites_in_range)
+    dist_sat_net = calculate_sat_net_distances_without_gs_relaying(
+        isl_topology, ground_station_satellites_in_range, shortest_path_backend, shortest_path_state
+    )
+
+    # Shortest distance from each satellite to each destination ground station (getting there + last hop)
+    dist_satellite_to_ground_station = np.full((num_ground_stations, num_satellites), np.inf)
+    for dst_gid, in_range in enumerate(ground_station_satellites_in_range):
+        if not isinstance(in_range, int) and len(in_range) > 0:
+            distances_m, sids = zip(*in_range)
+            dist_satellite_to_ground_station[dst_gid] = np.min(
+                dist_sat_net[:, list(sids)] + np.array(distances_m)[np.newaxis, :], axis=1
+            )
+
+    # Shortest distance from each source ground station (first hop + from there)
+    one_way_distances_m = np.full((num_ground_stations, num_ground_stations), np.inf)
+    for src_gid, in_range in enumerate(ground_station_satellites_in_range):
+        if not isinstance(in_range, int) and len(in_range) > 0:
+            distances_m, sids = zip(*in_range)
+            one_way_distances_m[src_gid] = np.min(
+                np.array(distances_m)[np.newaxis, :] + dist_satellite_to_ground_station[:, list(sids)], axis=1
+            )
+
+    # Failed destination ground stations cannot be reached
+    for gid, in_range in enumerate(ground_station_satellites_in_range):
+        if isinstance(in_range, int):
+            one_way_distances_m[:, gid] = np.inf
+    return one_way_distances_m
+
+
+def calculate_failure_scenario_rtts_ns(healthy_network_states, failure_table, shortest_path_backend="dijkstra"):
+    """
+    Calculates the RTT of every ground station pair (src < dst) at every time step under a failure scenario.
+
+    :param healthy_network_states:  Network states (as returned by calculate_healthy_network_states())
+    :param failure_table:           Failure table (as returned by parse_failure_file())
+    :param shortest_path_backend:   Shortest path backend
+
+    :return: NumPy array of shape (time steps, pairs) with the RTT in ns (NaN if unreachable)
+    """
+    num_satellites = healthy_network_states["num_satellites"]
+    num_ground_stations = healthy_network_states["num_ground_stations"]
+    list_isls = healthy_network_states["list_isls"]
+    failure_state = create_failure_state(
+        failure_table["timeline"] if "timeline" in failure_table else create_failure_timeline(failure_table),
+        num_satellites,
+        num_ground_stations,
+        list_isls
+    )
+    shortest_path_state = create_shortest_path_state()
+    src_gids, dst_gids = np.triu_indices(num_ground_stations, k=1)
+
+    isl_topology = None
+    rtts_ns = np.empty((len(healthy_network_states["time_steps"]), len(src_gids)))
+    for i, time_step in enumerate(healthy_network_states["time_steps"]):
+        update_failure_state(failure_state, time_step["time_ns"])
+
+        # Mask out the failed ISLs (the topology is only rebuilt if those changed)
+        if isl_topology is None or failure_state["isls_changed"]:
+            isl_topology = create_isl_topology(num_satellites, failure_state["active_list_isls"])
+        set_isl_topology_lengths(isl_topology, time_step["isl_lengths_m"][failure_state["active_isl_idxs"]])
+
+        # Mask out the failed satellites and ground stations
+        failed_satellite_ids = failure_state["failed_satellite_ids"]
+        ground_station_satellites_in_range = [
+            [x for x in in_range if x[1] not in failed_satellite_ids] if len(failed_satellite_ids) > 0 else in_range
+            for in_range in time_step["ground_station_satellites_in_range"]
+        ]
+        for node_id in failure_state["failed_ground_station_ids"]:
+            ground_station_satellites_in_range[node_id - num_satellites] = 0
+
+        # Path there and back
+        one_way_distances_m = calculate_one_way_distances_m(
+            isl_topology, ground_station_satellites_in_range, shortest_path_backend, shortest_path_state
+        )
+        rtt_m = one_way_distances_m[src_gids, dst_gids] + one_way_distances_m[dst_gids, src_gids]
+        rtts_ns[i] = np.where(np.isinf(rtt_m), np.nan, rtt_m * 1000000000.0 / 299792458.0)
+
+    return rtts_ns
+
+
+def summarize_failure_scenario(scenario_name, failure_table, rtts_ns, healthy_rtts_ns):
+    """
+    Summarizes the RTTs of a failure scenario into one row of the failure sweep table.
+
+    :param scenario_name:       Name of the scenario
+    :param failure_table:       Failure table
+    :param rtts_ns:             RTTs of the scenario (as returned by calculate_failure_scenario_rtts_ns())
+    :param healthy_rtts_ns:     RTTs without failures
+
+    :return: Dictionary with the FAILURE_SWEEP_COLUMNS
+    """
+    reachable = ~np.isnan(rtts_ns)
+    both_reachable = np.logical_and(reachable, ~np.isnan(healthy_rtts_ns))
+    return {
+        "scenario": scenario_name,
+        "num_failed_satellites": len(failure_table["SAT"]),
+        "num_failed_isls": len(failure_table["ISL"]),
+        "num_failed_ground_stations": len(failure_table["GS"]),
+        "reachable_fraction": float(np.mean(reachable)) if reachable.size > 0 else 1.0,
+        "num_unreachable_pairs": int(np.sum(~np.all(reachable, axis=0))),
+        "mean_rtt_ns": float(np.mean(rtts_ns[reachable])) if np.any(reachable) else math.nan,
+        "median_rtt_ns": float(np.median(rtts_ns[reachable])) if np.any(reachable) else math.nan,
+        "max_rtt_ns": float(np.max(rtts_ns[reachable])) if np.any(reachable) else math.nan,
+        "mean_rtt_increase_ns": float(np.mean(rtts_ns[both_reachable] - healthy_rtts_ns[both_reachable]))
+        if np.any(both_reachable) else math.nan
+    }
+
+
+def failure_sweep_worker(scenario_idx):
+    scenario_name, failure_table = shared_sweep_inputs["scenarios"][scenario_idx]
+    rtts_ns = calculate_failure_scenario_rtts_ns(
+        shared_sweep_inputs["healthy_network_states"], failure_table, shared_sweep_inputs["shortest_path_backend"]
+    )
+    return summarize_failure_scenario(scenario_name, failure_table, rtts_ns, shared_sweep_inputs["healthy_rtts_ns"])
+
+
+def failure_sweep(satellite_network_dir, time_step_ms, duration_s, scenarios, num_processes, output_filename,
+                  shortest_path_backend="dijkstra"):
+    """
+    Evaluates the reachability and RTT of all ground station pairs (src < dst) under many failure
+    scenarios, of which the results are written as a single table (one line per scenario, with first
+    the scenario without failures named "healthy").
+
+    The network without failures is calculated once per time step, and shared by all scenarios.
+    The scenarios are evaluated in parallel by a process pool. The routing is that of
+    algorithm_free_one_only_over_isls under failures.
+
+    :param satellite_network_dir:   Satellite network directory
+    :param time_step_ms:            Time step (ms)
+    :param duration_s:              Duration (s)
+    :param scenarios:               List of (scenario name, failure table)
+    :param num_processes:           Number of worker processes
+    :param output_filename:         Output filename of the table (comma-separated, with FAILURE_SWEEP_COLUMNS)
+    :param shortest_path_backend:   Shortest path backend (see calculate_sat_net_distances_without_gs_relaying())
+
+    :return: List of dictionaries with the FAILURE_SWEEP_COLUMNS, one per scenario (the first is "healthy")
+    """
+    global shared_sweep_inputs
+
+    # Network without failures
+    healthy_network_states = calculate_healthy_network_states(satellite_network_dir, time_step_ms, duration_s)
+    no_failures = {"SAT": {}, "ISL": {}, "GS": {}}
+    healthy_rtts_ns = calculate_failure_scenario_rtts_ns(healthy_network_states, no_failures, shortest_path_backend)
+    rows = [summarize_failure_scenario("healthy", no_failures, healthy_rtts_ns, healthy_rtts_ns)]
+
+    # Scenarios, of which the shared inputs are inherited by the forked worker processes
+    shared_sweep_inputs = {
+        "healthy_network_states": healthy_network_states,
+        "healthy_rtts_ns": healthy_rtts_ns,
+        "scenarios": scenarios,
+        "shortest_path_backend": shortest_path_backend
+    }
+    try:
+        if num_processes > 1 and "fork" in multiprocessing.get_all_start_methods():
+            pool = multiprocessing.get_context("fork").Pool(num_processes)
+            try:
+                rows += pool.map(failure_sweep_worker, range(len(scenarios)), chunksize=1)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            rows += list(map(failure_sweep_worker, range(len(scenarios))))
+    finally:
+        # Also if a scenario failed, such that the per-step network states are not kept alive
+        shared_sweep_inputs = None
+
+    # Table
+    with open(output_filename, "w+") as f_out:
+        f_out.write(",".join(FAILURE_SWEEP_COLUMNS) + "\n")
+        for row in rows:
+            f_out.write(",".join(
+                ("%.10f" % row[column]) if isinstance(row[column], float) else str(row[column])
+                for column in FAILURE_SWEEP_COLUMNS
+            ) + "\n")
+
+    return rows
@@ -0,0 +1,162 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import numpy as np
+
+
+def create_failure_timeline(failure_table):
+    """
+    Converts the failure table into a timeline of events sorted by time. A device is failed at time t
+    if start <= t <= end, as such it fails at its start and recovers at end + 1.
+
+    :param failure_table:   Failure table (as returned by parse_failure_file())
+
+    :return: List of (time (ns), is_failure, device ("SAT", "GS" or "ISL"), device identifier), sorted by time
+    """
+    timeline = []
+    for device in ["SAT", "GS", "ISL"]:
+        for device_id, (start_ns, end_ns) in failure_table[device].items():
+            if start_ns <= end_ns:
+                timeline.append((start_ns, True, device, device_id))
+                timeline.append((end_ns + 1, False, device, device_id))
+    timeline.sort(key=lambda event: event[0])
+    return timeline
+
+
+def create_failure_state(failure_timeline, num_satellites, num_ground_stations, list_isls):
+    """
+    Creates the state of the failures (before any event), which is swept forward in time
+    with update_failure_state().
+
+    :param failure_timeline:        Failure timeline (as returned by create_failure_timeline())
+    :param num_satellites:          Number of satellites
+    :param num_ground_stations:     Number of ground stations
+    :param list_isls:               List of ISLs as (a, b) satellite identifier tuples
+
+    :return: Failure state dictionary
+    """
+
+    # ISL index of each ISL, and the ISLs of each satellite
+    isl_idx = {}
+    satellite_isl_idxs = [[] for _ in range(num_satellites)]
+    for i, (a, b) in enumerate(list_isls):
+        isl_idx[(a, b)] = i
+        satellite_isl_idxs[a].append(i)
+        satellite_isl_idxs[b].append(i)
+
+    # Every failure must be of an existing device
+    for _, _, device, device_id in failure_timeline:
+        if device == "SAT" and not 0 <= device_id < num_satellites:
+            raise ValueError("Failed satellite does not exist: %d" % device_id)
+        if device == "GS" and not num_satellites <= device_id < num_satellites + num_ground_stations:
+            raise ValueError("Failed ground station node does not exist: %d" % device_id)
+        if device == "ISL" and device_id not in isl_idx:
+            raise ValueError("Failed ISL does not exist: " + str(device_id))
+
+    return {
+        "timeline": failure_timeline,
+        "next_event_idx": 0,
+        "time_ns": None,
+        "num_satellites": num_satellites,
+        "num_ground_stations": num_ground_stations,
+        "list_isls": list_isls,
+        "isl_idx": isl_idx,
+        "satellite_isl_idxs": satellite_isl_idxs,
+        "failed_satellite_ids": set(),
+        "failed_ground_station_ids": set(),
+        "isl_num_failures": np.zeros(len(list_isls), dtype=int),  # Failure of the ISL itself or either satellite
+        "active_satellite_ids": set(range(num_satellites)),
+        "active_ground_station_ids": set(range(num_satellites, num_satellites + num_ground_stations)),
+        "active_isl_idxs": np.arange(len(list_isls)),
+        "active_list_isls": list(list_isls),
+        "isls_changed": True
+    }
+
+
+def update_failure_state(failure_state, time_ns):
+    """
+    Applies all events of the timeline up to and including the time instant. Only the devices of
+    which a failure starts or ends are updated, as such steps without events do not cost anything.
+
+    The active sets are (re-)created as set(range(...)) from which the failed devices are removed,
+    such that they are iterated in the same order as when they were created from scratch.
+
+    :param failure_state:   Failure state (as returned by create_failure_state())
+    :param time_ns:         Time since epoch (ns), which cannot be before that of the previous update
+
+    :return: Number of events which were applied
+    """
+    if failure_state["time_ns"] is not None and time_ns < failure_state["time_ns"]:
+        raise ValueError("Failure state can only be updated forward in time")
+    failure_state["time_ns"] = time_ns
+    failure_state["isls_changed"] = False
+
+    # Apply events
+    timeline = failure_state["timeline"]
+    isl_num_failures = failure_state["isl_num_failures"]
+    first_event_idx = failure_state["next_event_idx"]
+    event_idx = first_event_idx
+    satellites_changed = False
+    ground_stations_changed = False
+    while event_idx < len(timeline) and timeline[event_idx][0] <= time_ns:
+        _, is_failure, device, device_id = timeline[event_idx]
+        delta = 1 if is_failure else -1
+        if device == "SAT":
+            if is_failure:
+                failure_state["failed_satellite_ids"].add(device_id)
+            else:
+                failure_state["failed_satellite_ids"].discard(device_id)
+            for i in failure_state["satellite_isl_idxs"][device_id]:
+                isl_num_failures[i] += delta
+            satellites_changed = True
+            failure_state["isls_changed"] = failure_state["isls_changed"] \
+                or len(failure_state["satellite_isl_idxs"][device_id]) > 0
+        elif device == "GS":
+            if is_failure:
+                failure_state["failed_ground_station_ids"].add(device_id)
+            else:
+                failure_state["failed_ground_station_ids"].discard(device_id)
+            ground_stations_changed = True
+        else:
+            isl_num_failures[failure_state["isl_idx"][device_id]] += delta
+            failure_state["isls_changed"] = True
+        event_idx += 1
+    failure_state["next_event_idx"] = event_idx
+
+    # Active sets
+    if satellites_changed:
+        active_satellite_ids = set(range(failure_state["num_satellites"]))
+        for sid in failure_state["failed_satellite_ids"]:
+            active_satellite_ids.remove(sid)
+        failure_state["active_satellite_ids"] = active_satellite_ids
+    if ground_stations_changed:
+        active_ground_station_ids = set(range(
+            failure_state["num_satellites"], failure_state["num_satellites"] + failure_state["num_ground_stations"]
+        ))
+        for node_id in failure_state["failed_ground_station_ids"]:
+            active_ground_station_ids.remove(node_id)
+        failure_state["active_ground_station_ids"] = active_ground_station_ids
+    if failure_state["isls_changed"]:
+        failure_state["active_isl_idxs"] = np.flatnonzero(isl_num_failures == 0)
+        failure_state["active_list_isls"] = [failure_state["list_isls"][i] for i in failure_state["active_isl_idxs"]]
+
+    return event_idx - first_event_idx
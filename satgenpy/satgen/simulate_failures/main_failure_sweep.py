@@ -0,0 +1,77 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import sys
+import os
+from satgen.isls import read_isls
+from satgen.ground_stations import read_ground_stations_extended
+from satgen.tles import read_tles
+from satgen.simulate_failures.parse_failure_file import parse_failure_file
+from satgen.simulate_failures.failure_sweep import failure_sweep, generate_random_failure_tables
+
+
+def main():
+    args = sys.argv[1:]
+    if len(args) < 6 or (args[5] == "random" and len(args) != 11):
+        print("Must supply at least six arguments")
+        print("Usage: python -m satgen.simulate_failures.main_failure_sweep [satellite_network_dir] "
+              "[time_step_ms] [duration_s] [num_processes] [output_filename] "
+              "[failure_file_1] [failure_file_2] ...")
+        print("   or: python -m satgen.simulate_failures.main_failure_sweep [satellite_network_dir] "
+              "[time_step_ms] [duration_s] [num_processes] [output_filename] "
+              "random [num_scenarios] [seed] [num_failed_satellites] [num_failed_isls] [num_failed_ground_stations]")
+        exit(1)
+    else:
+        satellite_network_dir = args[0]
+        duration_s = int(args[2])
+
+        # Scenarios
+        if args[5] == "random":
+            num_satellites = len(read_tles(satellite_network_dir + "/tles.txt")["satellites"])
+            failure_tables = generate_random_failure_tables(
+                int(args[6]),
+                int(args[7]),
+                num_satellites,
+                read_isls(satellite_network_dir + "/isls.txt", num_satellites),
+                len(read_ground_stations_extended(satellite_network_dir + "/ground_stations.txt")),
+                duration_s,
+                int(args[8]),
+                int(args[9]),
+                int(args[10])
+            )
+            scenarios = [("random_%d_%d" % (int(args[7]), i), t) for i, t in enumerate(failure_tables)]
+        else:
+            scenarios = [(os.path.basename(filename), parse_failure_file(filename)) for filename in args[5:]]
+
+        failure_sweep(
+            satellite_network_dir,
+            int(args[1]),
+            duration_s,
+            scenarios,
+            int(args[3]),
+            args[4]
+        )
+        print("Written failure sweep table to: " + args[4])
+
+
+if __name__ == "__main__":
+    main()
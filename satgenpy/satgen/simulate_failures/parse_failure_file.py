@@ -20,6 +20,9 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+from .failure_timeline import create_failure_timeline
+
+
 def parse_failure_file(failure_file):
     failure_table = {'SAT': {}, 'ISL': {}, 'GS': {}}
     with open(failure_file, "r") as f:
@@ -32,4 +35,7 @@ def parse_failure_file(failure_file):
             elif device == 'ISL':
                 sat1, sat2, failure_start_time, failure_end_time = parts[1:]
                 failure_table[device][(int(sat1), int(sat2))] = (int(float(failure_start_time) * 1_000_000_000), int(float(failure_end_time) * 1_000_000_000))
+
+    # Events sorted by time, such that the active devices can be updated incrementally
+    failure_table['timeline'] = create_failure_timeline(failure_table)
     return failure_table
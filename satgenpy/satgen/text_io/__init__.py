@@ -0,0 +1,23 @@
+from .bulk_text_readers import (
+    parse_numeric_text,
+    read_numeric_text,
+    read_numeric_text_files,
+    read_fstate_txt,
+    read_fstate_txt_files,
+    read_gsl_if_bandwidth_txt,
+    read_gsl_if_bandwidth_txt_files,
+    read_isl_utilization_csv,
+    read_path_file
+)
+from .compression import (
+    get_compression_extension,
+    get_compression_of_filename,
+    strip_compression_extension,
+    find_file_or_compressed,
+    open_compressed,
+    compress_bytes,
+    write_compressed,
+    start_background_writer,
+    submit_to_background_writer,
+    stop_background_writer
+)
@@ -0,0 +1,189 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+from .compression import open_compressed
+import numpy as np
+import warnings
+
+#
+# Bulk readers for the comma-separated text state files, which parse an entire file (or a batch of files)
+# with a single numpy.fromstring() call instead of splitting and converting line by line:
+#
+# fstate_<t>.txt            -- (current, destination, next_hop, my_if, next_hop_if) (int)
+# gsl_if_bandwidth_<t>.txt  -- (node, interface, bandwidth) (float)
+# isl_utilization.csv       -- (from, to, interval start (ns), interval end (ns), utilization) (int and float)
+#
+# All lines must have the same number of values, and there are no empty lines.
+# Compressed files (.gz or .zst) are decompressed while reading.
+#
+
+
+def parse_numeric_text(content, num_columns, dtype, name="text"):
+    """
+    Parses comma-separated numeric text, with num_columns values on each line.
+
+    :param content:         Text content
+    :param num_columns:     Number of values on each line
+    :param dtype:           NumPy data type of the values (e.g., np.int64 or np.float64)
+    :param name:            Name of the content (for the error message)
+
+    :return: NumPy array of shape (number of lines, num_columns)
+    """
+
+    # Every line must have num_columns - 1 commas
+    data = np.frombuffer(content.encode(), dtype=np.uint8)
+    line_ends = np.flatnonzero(data == ord("\n"))
+    if len(data) > 0 and data[-1] != ord("\n"):
+        line_ends = np.append(line_ends, len(data))
+    commas_up_to_line_end = np.searchsorted(np.flatnonzero(data == ord(",")), line_ends)
+    if np.any(np.diff(commas_up_to_line_end, prepend=0) != num_columns - 1):
+        raise ValueError("Not every line has %d comma-separated values: %s" % (num_columns, name))
+
+    # Parse all values at once (depending on the NumPy version, a value which is not numeric
+    # either raises an error or stops the parsing with a warning)
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", DeprecationWarning)
+            values = np.fromstring(content.replace("\n", ","), dtype=dtype, sep=",")
+    except ValueError:
+        values = None
+    if values is None or values.size != len(line_ends) * num_columns:
+        raise ValueError("Not every line has %d numeric values: %s" % (num_columns, name))
+    return values.reshape((len(line_ends), num_columns))
+
+
+def read_numeric_text(filename, num_columns, dtype):
+    """
+    Reads a comma-separated numeric text file, with num_columns values on each line.
+
+    :param filename:        Filename
+    :param num_columns:     Number of values on each line
+    :param dtype:           NumPy data type of the values (e.g., np.int64 or np.float64)
+
+    :return: NumPy array of shape (number of lines, num_columns)
+    """
+    with open_compressed(filename, "r") as f_in:
+        return parse_numeric_text(f_in.read(), num_columns, dtype, filename)
+
+
+def read_numeric_text_files(filenames, num_columns, dtype):
+    """
+    Reads a batch of comma-separated numeric text files (with num_columns values on each line) at once.
+
+    :param filenames:       List of filenames
+    :param num_columns:     Number of values on each line
+    :param dtype:           NumPy data type of the values (e.g., np.int64 or np.float64)
+
+    :return: Tuple (values, row_offsets), in which values is a NumPy array of shape (total number of lines,
+             num_columns) and the lines of file i are values[row_offsets[i]:row_offsets[i + 1]]
+    """
+    contents = []
+    for filename in filenames:
+        with open_compressed(filename, "r") as f_in:
+            content = f_in.read()
+        contents.append(content if len(content) == 0 or content.endswith("\n") else content + "\n")
+    row_offsets = np.zeros(len(filenames) + 1, dtype=np.int64)
+    row_offsets[1:] = np.cumsum([content.count("\n") for content in contents])
+    values = parse_numeric_text("".join(contents), num_columns, dtype, ", ".join(filenames))
+    return values, row_offsets
+
+
+def read_fstate_txt(filename):
+    """
+    Reads a forwarding state delta text file (fstate_<t>.txt).
+
+    :param filename:    Filename
+
+    :return: NumPy int32 array of shape (number of entries, 5), with in each row:
+             (current, destination, next_hop, my_if, next_hop_if)
+    """
+    return read_numeric_text(filename, 5, np.int64).astype(np.int32)
+
+
+def read_fstate_txt_files(filenames):
+    """
+    Reads a batch of forwarding state delta text files at once.
+
+    :param filenames:   List of filenames
+
+    :return: Tuple (fstate deltas, row_offsets), see read_numeric_text_files()
+    """
+    values, row_offsets = read_numeric_text_files(filenames, 5, np.int64)
+    return values.astype(np.int32), row_offsets
+
+
+def read_gsl_if_bandwidth_txt(filename):
+    """
+    Reads a GSL interface bandwidth delta text file (gsl_if_bandwidth_<t>.txt).
+
+    :param filename:    Filename
+
+    :return: NumPy float64 array of shape (number of entries, 3), with in each row: (node, interface, bandwidth)
+    """
+    return read_numeric_text(filename, 3, np.float64)
+
+
+def read_gsl_if_bandwidth_txt_files(filenames):
+    """
+    Reads a batch of GSL interface bandwidth delta text files at once.
+
+    :param filenames:   List of filenames
+
+    :return: Tuple (GSL interface bandwidth deltas, row_offsets), see read_numeric_text_files()
+    """
+    return read_numeric_text_files(filenames, 3, np.float64)
+
+
+def read_isl_utilization_csv(filename):
+    """
+    Reads the ISL utilization written by ns-3 (isl_utilization.csv).
+
+    :param filename:    Filename
+
+    :return: Tuple (intervals, utilization), in which intervals is a NumPy int64 array of shape
+             (number of lines, 4) with in each row (from, to, interval start (ns), interval end (ns)),
+             and utilization a NumPy float64 array with the utilization (0.0 - 1.0) of each line
+    """
+    values = read_numeric_text(filename, 5, np.float64)
+
+    # The integers are exactly represented (as they are below 2^53)
+    return values[:, :4].astype(np.int64), values[:, 4].copy()
+
+
+def read_path_file(filename):
+    """
+    Reads a path file (as written by the post-analysis, e.g., networkx_path_<src>_to_<dst>.txt),
+    in which each line is "t,path" with the path as "-"-separated node ids or "Unreachable".
+
+    :param filename:    Filename
+
+    :return: List of (t, path), in which path is a list of node ids or None if unreachable
+    """
+    paths = []
+    with open_compressed(filename, "r") as f_in:
+        for line in f_in.read().splitlines():
+            t, path = line.split(",")
+            if path.strip() == "Unreachable":
+                paths.append((int(t), None))
+            else:
+                paths.append((int(t), list(map(int, path.split("-")))))
+    return paths
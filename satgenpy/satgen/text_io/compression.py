@@ -0,0 +1,236 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import gzip
+import os
+import queue
+import threading
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+#
+# Files can be stored compressed, which is recognized by their extension:
+#
+# <filename>.gz   -- gzip stream (standard library)
+# <filename>.zst  -- zstd frame (requires the zstandard package)
+#
+# Readers open them through open_compressed(), which decompresses while reading (as a stream).
+#
+# As compressing is slower than writing the uncompressed text, the writers hand it over to a background
+# thread (see start_background_writer()). Both zlib and zstandard release the GIL while compressing,
+# such that it overlaps with the calculation of the next time step.
+#
+
+COMPRESSION_EXTENSIONS = {
+    "gzip": ".gz",
+    "zstd": ".zst",
+}
+GZIP_COMPRESS_LEVEL = 6
+ZSTD_COMPRESS_LEVEL = 3
+
+# Maximum number of files waiting to be compressed before the writer has to wait
+BACKGROUND_WRITER_MAX_QUEUED = 64
+
+
+def get_compression_extension(compression):
+    """
+    Extension of files with a compression.
+
+    :param compression:     Compression ("gzip", "zstd", or None for uncompressed)
+
+    :return: Extension (".gz", ".zst", or "" for uncompressed)
+    """
+    if compression is None:
+        return ""
+    if compression not in COMPRESSION_EXTENSIONS:
+        raise ValueError("Unknown compression: " + str(compression))
+    if compression == "zstd" and zstandard is None:
+        raise ValueError("The zstd compression requires the zstandard package")
+    return COMPRESSION_EXTENSIONS[compression]
+
+
+def get_compression_of_filename(filename):
+    """
+    Compression of a file, by its extension.
+
+    :param filename:    Filename
+
+    :return: Compression ("gzip", "zstd", or None for uncompressed)
+    """
+    for compression, extension in COMPRESSION_EXTENSIONS.items():
+        if filename.endswith(extension):
+            return compression
+    return None
+
+
+def strip_compression_extension(filename):
+    """
+    Filename without its compression extension (if any).
+
+    :param filename:    Filename
+
+    :return: Filename of the uncompressed file
+    """
+    return filename[:len(filename) - len(COMPRESSION_EXTENSIONS.get(get_compression_of_filename(filename), ""))]
+
+
+def find_file_or_compressed(filename):
+    """
+    Finds a file, or else a compressed version of it.
+
+    :param filename:    Filename of the uncompressed file
+
+    :return: Filename of the file or its compressed version if it exists, else the filename itself
+    """
+    if os.path.isfile(filename):
+        return filename
+    for extension in COMPRESSION_EXTENSIONS.values():
+        if os.path.isfile(filename + extension):
+            return filename + extension
+    return filename
+
+
+def open_compressed(filename, mode="r"):
+    """
+    Opens a file for reading or writing, (de)compressing it as a stream according to its extension.
+
+    :param filename:    Filename
+    :param mode:        Mode (e.g., "r", "rb", "w" or "wb"), text if not binary
+
+    :return: File object
+    """
+    compression = get_compression_of_filename(filename)
+    if compression is None:
+        return open(filename, mode)
+    get_compression_extension(compression)
+    if "b" not in mode and "t" not in mode:
+        mode += "t"
+    if compression == "gzip":
+        return gzip.open(filename, mode)
+    else:
+        return zstandard.open(filename, mode)
+
+
+def compress_bytes(data, compression):
+    """
+    Compresses data.
+
+    :param data:            Bytes
+    :param compression:     Compression ("gzip", "zstd", or None for uncompressed)
+
+    :return: Compressed bytes
+    """
+    get_compression_extension(compression)
+    if compression is None:
+        return data
+    elif compression == "gzip":
+        # Without modification time in the header, such that the same data results in the same file
+        return gzip.compress(data, compresslevel=GZIP_COMPRESS_LEVEL, mtime=0)
+    else:
+        return zstandard.ZstdCompressor(level=ZSTD_COMPRESS_LEVEL).compress(data)
+
+
+def write_compressed(filename, data, compression):
+    """
+    Writes data compressed (replacing the file at once), and removes any other (un)compressed
+    version of the file (such that readers do not find an outdated one).
+
+    :param filename:        Filename of the uncompressed file
+    :param data:            Bytes
+    :param compression:     Compression ("gzip", "zstd", or None for uncompressed)
+
+    :return: Filename written to
+    """
+    extension = get_compression_extension(compression)
+
+    # Written under a temporary name first, as two workers can write the same time step
+    # (the first time step of a worker is also calculated by the worker before it)
+    temporary_filename = "%s%s.tmp_%d_%d" % (filename, extension, os.getpid(), threading.get_ident())
+    with open(temporary_filename, "wb") as f_out:
+        f_out.write(compress_bytes(data, compression))
+    os.replace(temporary_filename, filename + extension)
+    for other_extension in [""] + list(COMPRESSION_EXTENSIONS.values()):
+        if other_extension != extension and os.path.isfile(filename + other_extension):
+            os.remove(filename + other_extension)
+    return filename + extension
+
+
+def background_writer_loop(writer):
+    while True:
+        item = writer["queue"].get()
+        if item is None:
+            break
+        if writer["error"] is None:
+            try:
+                write_compressed(item[0], item[1], writer["compression"])
+            except Exception as e:
+                writer["error"] = e
+
+
+def start_background_writer(compression):
+    """
+    Starts a background thread which compresses and writes files.
+
+    :param compression:     Compression ("gzip" or "zstd")
+
+    :return: Background writer (to pass to submit_to_background_writer() and stop_background_writer())
+    """
+    get_compression_extension(compression)
+    writer = {
+        "compression": compression,
+        "queue": queue.Queue(BACKGROUND_WRITER_MAX_QUEUED),
+        "error": None
+    }
+    writer["thread"] = threading.Thread(target=background_writer_loop, args=(writer,), daemon=True)
+    writer["thread"].start()
+    return writer
+
+
+def submit_to_background_writer(writer, filename, data):
+    """
+    Hands over data to be compressed and written by the background writer
+    (waits if too many files are already queued).
+
+    :param writer:      Background writer
+    :param filename:    Filename of the uncompressed file
+    :param data:        Bytes
+
+    :return: Filename which will be written to
+    """
+    if writer["error"] is not None:
+        raise writer["error"]
+    writer["queue"].put((filename, data))
+    return filename + get_compression_extension(writer["compression"])
+
+
+def stop_background_writer(writer):
+    """
+    Waits until the background writer has written all files, and stops it.
+
+    :param writer:      Background writer
+    """
+    writer["queue"].put(None)
+    writer["thread"].join()
+    if writer["error"] is not None:
+        raise writer["error"]
@@ -0,0 +1,119 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import sys
+import os
+import time
+import tempfile
+import numpy as np
+from .bulk_text_readers import read_fstate_txt_files, read_gsl_if_bandwidth_txt_files, read_isl_utilization_csv
+
+
+def read_line_by_line(filenames, num_columns, convert):
+    rows = []
+    for filename in filenames:
+        with open(filename, "r") as f_in:
+            for line in f_in:
+                spl = line.split(",")
+                if len(spl) != num_columns:
+                    raise ValueError("Line does not have %d values: %s" % (num_columns, filename))
+                rows.append(list(map(convert, spl)))
+    return rows
+
+
+def write_synthetic_files(directory, num_files, num_rows, seed):
+    rng = np.random.RandomState(seed)
+    fstate_filenames = []
+    gsl_if_bandwidth_filenames = []
+    for i in range(num_files):
+        fstate = rng.randint(0, 2000, size=(num_rows, 5))
+        fstate_filenames.append(directory + "/fstate_%d.txt" % i)
+        np.savetxt(fstate_filenames[-1], fstate, fmt="%d", delimiter=",")
+        gsl_if_bandwidth = np.column_stack((
+            rng.randint(0, 2000, size=num_rows), np.zeros(num_rows), rng.uniform(0.0, 1.0, size=num_rows)
+        ))
+        gsl_if_bandwidth_filenames.append(directory + "/gsl_if_bandwidth_%d.txt" % i)
+        np.savetxt(gsl_if_bandwidth_filenames[-1], gsl_if_bandwidth, fmt=("%d", "%d", "%f"), delimiter=",")
+    isl_utilization = np.column_stack((
+        rng.randint(0, 2000, size=num_files * num_rows),
+        rng.randint(0, 2000, size=num_files * num_rows),
+        np.arange(num_files * num_rows) * 100000000,
+        np.arange(1, num_files * num_rows + 1) * 100000000,
+        rng.uniform(0.0, 1.0, size=num_files * num_rows)
+    ))
+    isl_utilization_filename = directory + "/isl_utilization.csv"
+    np.savetxt(isl_utilization_filename, isl_utilization, fmt=("%d", "%d", "%d", "%d", "%f"), delimiter=",")
+    return fstate_filenames, gsl_if_bandwidth_filenames, isl_utilization_filename
+
+
+def report(name, filenames, num_rows, line_by_line_s, bulk_s):
+    num_bytes = sum(map(os.path.getsize, filenames))
+    print("%-20s  line-by-line: %8.1f MB/s  %12.0f rows/s    bulk: %8.1f MB/s  %12.0f rows/s    speed-up: %.1fx" % (
+        name,
+        num_bytes / 1e6 / line_by_line_s, num_rows / line_by_line_s,
+        num_bytes / 1e6 / bulk_s, num_rows / bulk_s,
+        line_by_line_s / bulk_s
+    ))
+
+
+def main():
+    args = sys.argv[1:]
+    if len(args) != 2:
+        print("Must supply exactly two arguments")
+        print("Usage: python -m satgen.text_io.main_benchmark_bulk_text_readers [num_files] [num_rows_per_file]")
+        exit(1)
+    num_files = int(args[0])
+    num_rows = int(args[1])
+
+    with tempfile.TemporaryDirectory() as directory:
+        fstate_filenames, gsl_if_bandwidth_filenames, isl_utilization_filename = \
+            write_synthetic_files(directory, num_files, num_rows, 123456789)
+
+        # Forwarding state
+        start = time.time()
+        read_line_by_line(fstate_filenames, 5, int)
+        line_by_line_s = time.time() - start
+        start = time.time()
+        read_fstate_txt_files(fstate_filenames)
+        report("fstate", fstate_filenames, num_files * num_rows, line_by_line_s, time.time() - start)
+
+        # GSL interface bandwidth
+        start = time.time()
+        read_line_by_line(gsl_if_bandwidth_filenames, 3, float)
+        line_by_line_s = time.time() - start
+        start = time.time()
+        read_gsl_if_bandwidth_txt_files(gsl_if_bandwidth_filenames)
+        report(
+            "gsl_if_bandwidth", gsl_if_bandwidth_filenames, num_files * num_rows, line_by_line_s, time.time() - start
+        )
+
+        # ISL utilization
+        start = time.time()
+        read_line_by_line([isl_utilization_filename], 5, float)
+        line_by_line_s = time.time() - start
+        start = time.time()
+        read_isl_utilization_csv(isl_utilization_filename)
+        report("isl_utilization", [isl_utilization_filename], num_files * num_rows, line_by_line_s, time.time() - start)
+
+
+if __name__ == "__main__":
+    main()
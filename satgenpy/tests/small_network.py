@@ -0,0 +1,57 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import exputil
+from satgen import *
+
+
+def generate_small_kuiper_network(satellite_network_dir, with_isls=True, num_gsl_ifs_per_satellite=1):
+    """
+    Generates the static inputs of a small satellite network: a 12 x 12 Kuiper-630 shell
+    (144 satellites) with four ground stations (Luanda, Lagos, Kinshasa and Riyadh).
+
+    :param satellite_network_dir:       Satellite network directory (created if it does not exist)
+    :param with_isls:                   True for +Grid ISLs, False for no ISLs
+    :param num_gsl_ifs_per_satellite:   Number of GSL interfaces per satellite
+    """
+    local_shell = exputil.LocalShell()
+    local_shell.make_full_dir(satellite_network_dir)
+    generate_tles_from_scratch_manual(
+        satellite_network_dir + "/tles.txt", "Kuiper-630", 12, 12, True, 51.9, 0.0000001, 0.0, 14.80
+    )
+    if with_isls:
+        generate_plus_grid_isls(satellite_network_dir + "/isls.txt", 12, 12, isl_shift=0, idx_offset=0)
+    else:
+        generate_empty_isls(satellite_network_dir + "/isls.txt")
+    local_shell.write_file(
+        satellite_network_dir + "/ground_stations.txt",
+        (
+            "0,Luanda,-8.836820,13.234320,0.000000,6135530.183815,1442953.502786,-973332.344974\n"
+            "1,Lagos,6.453060,3.395830,0.000000,6326864.177950,375422.898833,712064.787620\n"
+            "2,Kinshasa,-4.327580,15.313570,0.000000,6134256.671861,1679704.404461,-478073.165313\n"
+            "3,Ar-Riyadh-(Riyadh),24.690466,46.709566,0.000000,3975957.341095,4220595.030186,2647959.980346"
+        )
+    )
+    generate_description(satellite_network_dir + "/description.txt", 1089686.4181956202, 5016591.2330984278)
+    generate_simple_gsl_interfaces_info(
+        satellite_network_dir + "/gsl_interfaces_info.txt", 144, 4, num_gsl_ifs_per_satellite, 1, 1, 1
+    )
@@ -0,0 +1,93 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import exputil
+import numpy as np
+import unittest
+from satgen import *
+from satgen.post_analysis import *
+from small_network import generate_small_kuiper_network
+
+
+class TestAnalyzeAllPairsFailure(unittest.TestCase):
+
+    def setUp(self):
+        self.local_shell = exputil.LocalShell()
+        self.temp_gen_data = "temp_analyze_all_pairs_failure_gen_data"
+        self.temp_analysis_data = "temp_analyze_all_pairs_failure_analysis_data"
+        self.local_shell.make_full_dir(self.temp_gen_data)
+
+    def tearDown(self):
+        self.local_shell.remove_force_recursive(self.temp_gen_data)
+        self.local_shell.remove_force_recursive(self.temp_analysis_data)
+
+    def test_same_as_analyze_pair(self):
+
+        # Small constellation
+        name = "small_kuiper_constellation"
+        satellite_network_dir = self.temp_gen_data + "/" + name
+        generate_small_kuiper_network(satellite_network_dir)
+        help_dynamic_state(
+            self.temp_gen_data, 1, name, 1000, 20,
+            1089686.4181956202, 5016591.2330984278, "algorithm_free_one_only_over_isls", False
+        )
+
+        # Under failures, each forwarding state file contains the complete forwarding state
+        dynamic_state_dir = satellite_network_dir + "/dynamic_state_1000ms_for_20s"
+        for t, fstate in iterate_fstate(dynamic_state_dir, 0, 20 * 1000 * 1000 * 1000):
+            write_fstate_delta(dynamic_state_dir, t, list(map(lambda x: x[0] + x[1], sorted(fstate.items()))))
+
+        # All pairs at once
+        result = analyze_all_pairs_failure(
+            self.temp_analysis_data + "/all", satellite_network_dir, 1000, 20, "", plot=True
+        )
+        self.assertEqual(result["total_routes"], 6)
+
+        # Each pair on its own
+        all_pairs_rtt = np.loadtxt(
+            self.temp_analysis_data + "/all/data/networkx_all_pairs_rtt.txt", delimiter=",", ndmin=2
+        )
+        self.assertEqual(all_pairs_rtt.shape, (20 * 6, 4))
+        unreachable_routes = []
+        for src in range(4):
+            for dst in range(src + 1, 4):
+                if not analyze_pair(self.temp_analysis_data + "/pair", satellite_network_dir, 1000, 20,
+                                    144 + src, 144 + dst, ""):
+                    unreachable_routes.append((src, dst))
+                suffix = "%d_to_%d.txt" % (144 + src, 144 + dst)
+
+                # Same paths
+                with open(self.temp_analysis_data + "/all/data/networkx_path_" + suffix, "r") as f_all, \
+                        open(self.temp_analysis_data + "/pair/data/networkx_path_" + suffix, "r") as f_pair:
+                    self.assertEqual(f_all.read(), f_pair.read())
+
+                # Same RTTs
+                rtt_pair = np.loadtxt(
+                    self.temp_analysis_data + "/pair/data/networkx_rtt_" + suffix, delimiter=",", ndmin=2
+                )
+                rtt_all = all_pairs_rtt[np.logical_and(all_pairs_rtt[:, 1] == 144 + src,
+                                                       all_pairs_rtt[:, 2] == 144 + dst)]
+                self.assertEqual(rtt_all[:, 0].tolist(), rtt_pair[:, 0].tolist())
+                for i in range(len(rtt_pair)):
+                    self.assertAlmostEqual(rtt_all[i, 3], rtt_pair[i, 1], places=4)
+
+        self.assertEqual(result["unreachable_routes"], unreachable_routes)
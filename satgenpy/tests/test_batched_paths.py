@@ -0,0 +1,111 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import numpy as np
+import unittest
+from satgen.post_analysis import *
+
+
+class TestBatchedPaths(unittest.TestCase):
+
+    def test_walk_paths(self):
+
+        # 4 satellites (0-3), 3 ground stations (4-6)
+        forward_state = {
+            (4, 5): 0, (0, 5): 1, (1, 5): 5,  # 4 -> 0 -> 1 -> 5
+            (4, 6): 2, (2, 6): 3, (3, 6): 2,  # 4 -> 2 -> 3 -> 2 -> ... (loop)
+            (5, 6): 1, (1, 6): -1,            # 5 -> 1 -> (drop)
+            (5, 4): 1, (1, 4): 0, (0, 4): 4,  # 5 -> 1 -> 0 -> 4
+        }
+        next_hop_table = next_hop_table_from_fstate(forward_state, 4, 3)
+        self.assertEqual(next_hop_table.shape, (7, 3))
+        self.assertEqual(next_hop_table[0, 1], 1)
+        self.assertEqual(next_hop_table[6, 0], -1)
+
+        # Walk the pairs
+        src_node_ids = [4, 4, 5, 5, 6, 4]
+        dst_node_ids = [5, 6, 6, 4, 4, 4]
+        walk = walk_paths(next_hop_table, 4, src_node_ids, dst_node_ids, record_paths=True)
+        self.assertEqual(walk["hop_count"].tolist(), [3, -1, -1, 3, -1, 0])
+        self.assertEqual(walk["unreachable"].tolist(), [False, False, True, False, True, False])
+        self.assertEqual(walk["loop"].tolist(), [False, True, False, False, False, False])
+        self.assertEqual(get_walked_path(walk, 0), [4, 0, 1, 5])
+        self.assertIsNone(get_walked_path(walk, 1))
+        self.assertIsNone(get_walked_path(walk, 2))
+        self.assertEqual(get_walked_path(walk, 3), [5, 1, 0, 4])
+        self.assertEqual(get_walked_path(walk, 5), [4])
+        for i in [0, 2, 3, 4]:
+            self.assertEqual(get_walked_path(walk, i), get_path(src_node_ids[i], dst_node_ids[i], forward_state))
+
+        # Path lengths
+        node_positions = np.array([
+            [0.0, 0.0, 10.0], [3.0, 0.0, 10.0], [0.0, 4.0, 10.0], [3.0, 4.0, 10.0],
+            [0.0, 0.0, 0.0], [3.0, 0.0, 0.0], [0.0, 4.0, 0.0]
+        ])
+        walk = walk_paths(next_hop_table, 4, src_node_ids, dst_node_ids, node_positions=node_positions)
+        self.assertNotIn("path_nodes", walk)
+        self.assertEqual(walk["length_m"][0], 23.0)
+        self.assertEqual(walk["length_m"][3], 23.0)
+        self.assertEqual(walk["length_m"][5], 0.0)
+        self.assertTrue(np.all(np.isnan(walk["length_m"][[1, 2, 4]])))
+
+        # Each hop must be a valid link
+        walk_paths(next_hop_table, 4, [4], [5], node_positions=node_positions, list_isls=[(0, 1)],
+                   max_gsl_length_m=10.0, max_isl_length_m=3.0)
+        with self.assertRaises(ValueError):
+            walk_paths(next_hop_table, 4, [4], [5], node_positions=node_positions, list_isls=[(0, 2)],
+                       max_gsl_length_m=10.0, max_isl_length_m=3.0)
+        with self.assertRaises(ValueError):
+            walk_paths(next_hop_table, 4, [4], [5], node_positions=node_positions, list_isls=[(0, 1)],
+                       max_gsl_length_m=10.0, max_isl_length_m=2.0)
+        with self.assertRaises(ValueError):
+            walk_paths(next_hop_table, 4, [4], [5], node_positions=node_positions, list_isls=[(0, 1)],
+                       max_gsl_length_m=9.0, max_isl_length_m=3.0)
+
+    def test_update_next_hop_table(self):
+        next_hop_table = create_next_hop_table(2, 2)
+        update_next_hop_table(next_hop_table, 2, np.array([[0, 2, 2, 0, 0], [1, 3, 0, 0, 0], [2, 3, 1, 0, 0]]))
+        update_next_hop_table(next_hop_table, 2, np.array([[1, 3, 3, 0, 0]]))
+        self.assertEqual(next_hop_table.tolist(), [[2, -1], [-1, 3], [-1, 1], [-1, -1]])
+        src_node_ids, dst_node_ids = all_ground_station_pairs(2, 3)
+        self.assertEqual(list(zip(src_node_ids.tolist(), dst_node_ids.tolist())), [(2, 3), (2, 4), (3, 4)])
+
+    def test_compute_path_length(self):
+        node_positions = np.array([
+            [0.0, 0.0, 10.0], [3.0, 0.0, 10.0], [3.0, 4.0, 10.0], [0.0, 0.0, 0.0], [3.0, 4.0, 0.0]
+        ])
+        isl_keys = get_isl_keys([(0, 1), (2, 1)], 5)
+        path = [3, 0, 1, 2, 4]
+        self.assertEqual(compute_path_length_m(path, 3, node_positions), 27.0)
+        self.assertEqual(compute_path_length_m(path, 3, node_positions, isl_keys, 10.0, 4.0), 27.0)
+        self.assertEqual(compute_path_length_with_positions(
+            path, node_positions[:3], node_positions[3:], [(0, 1), (2, 1)], 10.0, 4.0
+        ), 27.0)
+        for (isl_keys, max_gsl_length_m, max_isl_length_m) in [
+            (get_isl_keys([(0, 1)], 5), 10.0, 4.0),  # 1 -> 2 is not an ISL
+            (isl_keys, 10.0, 3.5),  # 1 -> 2 is too long
+            (isl_keys, 9.0, 4.0),  # GSLs are too long
+        ]:
+            with self.assertRaises(ValueError):
+                compute_path_length_m(path, 3, node_positions, isl_keys, max_gsl_length_m, max_isl_length_m)
+        with self.assertRaises(ValueError):
+            compute_path_length_m([3, 4], 3, node_positions, isl_keys, 10.0, 4.0)
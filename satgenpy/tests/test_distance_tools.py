@@ -28,9 +28,11 @@ import math
 from astropy.time import Time
 from astropy import units as u
 import exputil
+import numpy as np
 
 from satgen.distance_tools import *
 from satgen.ground_stations import *
+from satgen.tles import *
 
 
 class TestDistanceTools(unittest.TestCase):
@@ -320,3 +322,176 @@ class TestDistanceTools(unittest.TestCase):
             straight_shadow_distance_m,
             delta=20000  # 20km
         )
+
+    def test_vectorized_distances(self):
+
+        # A few satellites of the Telesat and Kuiper shells
+        satellites = [
+            ephem.readtle(
+                "Telesat-1015 18",
+                "1 00019U 00000ABC 00001.00000000  .00000000  00000-0  00000+0 0    03",
+                "2 00019  98.9800  13.3333 0000001   0.0000 152.3077 13.66000000    04"
+            ),
+            ephem.readtle(
+                "Telesat-1015 19",
+                "1 00020U 00000ABC 00001.00000000  .00000000  00000-0  00000+0 0    05",
+                "2 00020  98.9800  13.3333 0000001   0.0000 180.0000 13.66000000    00"
+            ),
+            ephem.readtle(
+                "Kuiper-630 0",
+                "1 00001U 00000ABC 00001.00000000  .00000000  00000-0  00000+0 0    04",
+                "2 00001  51.9000   0.0000 0000001   0.0000   0.0000 14.80000000    02"
+            ),
+            ephem.readtle(
+                "Kuiper-630 1",
+                "1 00002U 00000ABC 00001.00000000  .00000000  00000-0  00000+0 0    05",
+                "2 00002  51.9000   0.0000 0000001   0.0000  10.5882 14.80000000    07"
+            ),
+            ephem.readtle(
+                "Kuiper-630 17",
+                "1 00018U 00000ABC 00001.00000000  .00000000  00000-0  00000+0 0    02",
+                "2 00018  51.9000   0.0000 0000001   0.0000 180.0000 14.80000000    09"
+            )
+        ]
+        list_isls = [(0, 1), (2, 3), (2, 4), (3, 4), (0, 2)]
+
+        # Ground stations
+        ground_stations = [
+            {"gid": 0, "name": "Amsterdam", "latitude_degrees_str": "52.379189",
+             "longitude_degrees_str": "4.899431", "elevation_m_float": 0.0},
+            {"gid": 1, "name": "Rio de Janeiro", "latitude_degrees_str": "-22.970722",
+             "longitude_degrees_str": "-43.182365", "elevation_m_float": 0.0},
+            {"gid": 2, "name": "Manila", "latitude_degrees_str": "14.599512",
+             "longitude_degrees_str": "120.984222", "elevation_m_float": 0.0},
+            {"gid": 3, "name": "Some place in Greenland", "latitude_degrees_str": "79.741382",
+             "longitude_degrees_str": "-53.143087", "elevation_m_float": 1000.0},
+        ]
+        ground_station_positions = ground_station_positions_m(ground_stations)
+        self.assertEqual(ground_station_positions.shape, (4, 3))
+
+        epoch = Time("2000-01-01 00:00:00", scale="tdb")
+        for extra_time_ns in [
+            0,  # 0
+            1000000,  # 1ms
+            1000000000,  # 1s
+            10 * 60000000000,  # 10 minutes
+            100 * 60000000000,  # 100 minutes
+        ]:
+            time = epoch + extra_time_ns * u.ns
+
+            # Positions
+            satellite_positions = satellite_positions_m(satellites, str(epoch), str(time))
+            self.assertEqual(satellite_positions.shape, (5, 3))
+
+            # ISLs must match within 10m (the scalar version rounds the range to float32)
+            isl_distances_m = distances_m_between_satellites(satellite_positions, list_isls)
+            self.assertEqual(isl_distances_m.shape, (5,))
+            for i in range(len(list_isls)):
+                self.assertAlmostEqual(
+                    isl_distances_m[i],
+                    distance_m_between_satellites(
+                        satellites[list_isls[i][0]], satellites[list_isls[i][1]], str(epoch), str(time)
+                    ),
+                    delta=10.0
+                )
+
+            # Ground station to satellite must match up to the float32 rounding of the range
+            gs_distances_m = distances_m_ground_stations_to_satellites(ground_station_positions, satellite_positions)
+            self.assertEqual(gs_distances_m.shape, (4, 5))
+            for gid in range(len(ground_stations)):
+                for sid in range(len(satellites)):
+                    distance_m = distance_m_ground_station_to_satellite(
+                        ground_stations[gid], satellites[sid], str(epoch), str(time)
+                    )
+                    self.assertAlmostEqual(gs_distances_m[gid, sid], distance_m, delta=distance_m * 1e-6)
+
+        # No ISLs
+        self.assertEqual(distances_m_between_satellites(satellite_positions, []).shape, (0,))
+
+    def test_ground_station_satellites_in_range(self):
+        np.random.seed(123456)
+
+        # Ground stations on the surface, satellites in a shell above it
+        ground_station_positions = np.random.normal(size=(25, 3))
+        ground_station_positions *= 6378135.0 / np.linalg.norm(ground_station_positions, axis=1)[:, np.newaxis]
+        satellite_positions = np.random.normal(size=(400, 3))
+        satellite_positions *= 6978135.0 / np.linalg.norm(satellite_positions, axis=1)[:, np.newaxis]
+        max_gsl_length_m = 1500000.0
+
+        # Brute-force reference
+        distances_m = distances_m_ground_stations_to_satellites(ground_station_positions, satellite_positions)
+        for satellite_ids in [None, list(range(0, 400, 3))]:
+            in_range = ground_station_satellites_in_range_m(
+                ground_station_positions, satellite_positions, max_gsl_length_m, satellite_ids=satellite_ids
+            )
+            self.assertEqual(len(in_range), 25)
+            allowed = range(400) if satellite_ids is None else satellite_ids
+            for gid in range(25):
+                expected = sorted(
+                    (distances_m[gid, sid], sid) for sid in allowed if distances_m[gid, sid] <= max_gsl_length_m
+                )
+                self.assertEqual(in_range[gid], expected)
+            self.assertTrue(any(len(x) > 0 for x in in_range))
+
+        # Exactly at the maximum length is still in range
+        in_range = ground_station_satellites_in_range_m(
+            ground_station_positions[:1], satellite_positions, distances_m[0, 7]
+        )
+        self.assertIn((distances_m[0, 7], 7), in_range[0])
+
+        # No ground stations or no satellites
+        self.assertEqual(ground_station_satellites_in_range_m(
+            np.zeros((0, 3)), satellite_positions, max_gsl_length_m
+        ), [])
+        self.assertEqual(ground_station_satellites_in_range_m(
+            ground_station_positions[:2], satellite_positions, max_gsl_length_m, satellite_ids=[]
+        ), [[], []])
+
+    def test_visibility_windows(self):
+        local_shell = exputil.LocalShell()
+        local_shell.make_full_dir("temp_visibility_windows")
+        generate_tles_from_scratch_manual(
+            "temp_visibility_windows/tles.txt", "Kuiper-630", 12, 12, True, 51.9, 0.0000001, 0.0, 14.80
+        )
+        tles = read_tles("temp_visibility_windows/tles.txt")
+        local_shell.remove_force_recursive("temp_visibility_windows")
+        satellites = tles["satellites"]
+        epoch = tles["epoch"]
+        ground_station_positions = ground_station_positions_m([
+            {"latitude_degrees_str": "48.856614", "longitude_degrees_str": "2.3522219", "elevation_m_float": 0.0},
+            {"latitude_degrees_str": "55.755826", "longitude_degrees_str": "37.6173", "elevation_m_float": 0.0},
+            {"latitude_degrees_str": "-33.8688197", "longitude_degrees_str": "151.2092955", "elevation_m_float": 0.0},
+            {"latitude_degrees_str": "40.7127753", "longitude_degrees_str": "-74.0059728", "elevation_m_float": 0.0},
+        ])
+        max_gsl_length_m = 1089686.4181956202
+
+        # Windows over 200 seconds, refined to 1 second
+        visibility_windows = calculate_visibility_windows(
+            epoch, satellites, ground_station_positions, max_gsl_length_m, 0, 200 * 10**9, 10**9
+        )
+        self.assertTrue(len(visibility_windows["rise_ns"]) > 0)
+        self.assertTrue(np.all(np.diff(visibility_windows["rise_ns"]) >= 0))
+        self.assertTrue(np.all(visibility_windows["rise_ns"] >= 0))
+        self.assertTrue(np.all(visibility_windows["set_ns"] <= 200 * 10**9))
+
+        # At every time step, the candidates must include every satellite which is in range
+        num_in_range = 0
+        for t in range(0, 200 * 10**9 + 1, 10**9):
+            satellite_positions = satellite_positions_m(satellites, str(epoch), str(epoch + t * u.ns))
+            candidate_gids, candidate_sids = get_visibility_window_candidates(visibility_windows, t)
+            self.assertEqual(len(set(zip(candidate_gids.tolist(), candidate_sids.tolist()))), len(candidate_gids))
+            expected = ground_station_satellites_in_range_m(
+                ground_station_positions, satellite_positions, max_gsl_length_m
+            )
+            self.assertEqual(
+                ground_station_candidates_in_range_m(
+                    ground_station_positions, satellite_positions, max_gsl_length_m, candidate_gids, candidate_sids
+                ),
+                expected
+            )
+            num_in_range += sum(map(len, expected))
+        self.assertTrue(num_in_range > 0)
+
+        # Outside of the time range
+        with self.assertRaises(ValueError):
+            get_visibility_window_candidates(visibility_windows, 200 * 10**9 + 1)
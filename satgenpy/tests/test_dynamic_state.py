@@ -22,8 +22,11 @@
 
 
 import exputil
+import filecmp
+import os
 import unittest
 from satgen import *
+from small_network import generate_small_kuiper_network
 
 
 class TestDynamicState(unittest.TestCase):
@@ -196,3 +199,124 @@ class TestDynamicState(unittest.TestCase):
 
         # Clean up
         local_shell.remove_force_recursive(temp_gen_data)
+
+    def test_threads_and_processes_same_output(self):
+        local_shell = exputil.LocalShell()
+
+        # Output directories
+        temp_gen_data = "temp_dynamic_state_parallelism_gen_data"
+        name = "small_kuiper_constellation"
+
+        # Constellation
+        generate_small_kuiper_network(temp_gen_data + "/threads/" + name)
+        local_shell.make_full_dir(temp_gen_data + "/processes/" + name)
+        for filename in ["tles.txt", "isls.txt", "ground_stations.txt", "gsl_interfaces_info.txt"]:
+            local_shell.copy_file(
+                temp_gen_data + "/threads/" + name + "/" + filename,
+                temp_gen_data + "/processes/" + name + "/" + filename
+            )
+
+        # Same calculation, once with threads and once with processes
+        for parallelism in ["threads", "processes"]:
+            help_dynamic_state(
+                temp_gen_data + "/" + parallelism, 2, name, 1000, 20,
+                1089686.4181956202, 5016591.2330984278, "algorithm_free_one_only_over_isls", False,
+                parallelism=parallelism
+            )
+
+        # Must result in exactly the same files
+        dir_threads = temp_gen_data + "/threads/" + name + "/dynamic_state_1000ms_for_20s"
+        dir_processes = temp_gen_data + "/processes/" + name + "/dynamic_state_1000ms_for_20s"
+        filenames = sorted(os.listdir(dir_threads))
+        self.assertEqual(filenames, sorted(os.listdir(dir_processes)))
+        self.assertEqual(len(filenames), 40)
+        for filename in filenames:
+            self.assertTrue(filecmp.cmp(dir_threads + "/" + filename, dir_processes + "/" + filename, shallow=False))
+
+        # Unknown parallelism
+        with self.assertRaises(ValueError):
+            help_dynamic_state(
+                temp_gen_data + "/threads", 2, name, 1000, 20,
+                1089686.4181956202, 5016591.2330984278, "algorithm_free_one_only_over_isls", False,
+                parallelism="fibers"
+            )
+
+        # Clean up
+        local_shell.remove_force_recursive(temp_gen_data)
+
+    def test_pass_prediction_same_output(self):
+        local_shell = exputil.LocalShell()
+
+        # Output directories
+        temp_gen_data = "temp_dynamic_state_pass_prediction_gen_data"
+        name = "small_kuiper_constellation"
+        for variant in ["scan", "pass_prediction"]:
+            generate_small_kuiper_network(temp_gen_data + "/" + variant + "/" + name, with_isls=False)
+
+            # Ground station relays, such that every satellite in range matters
+            help_dynamic_state(
+                temp_gen_data + "/" + variant, 2, name, 1000, 100,
+                1089686.4181956202, 5016591.2330984278, "algorithm_free_one_only_gs_relays", False,
+                pass_prediction=(variant == "pass_prediction")
+            )
+
+        # Must result in exactly the same files
+        dir_scan = temp_gen_data + "/scan/" + name + "/dynamic_state_1000ms_for_100s"
+        dir_pass_prediction = temp_gen_data + "/pass_prediction/" + name + "/dynamic_state_1000ms_for_100s"
+        filenames = sorted(os.listdir(dir_scan))
+        self.assertEqual(filenames, sorted(os.listdir(dir_pass_prediction)))
+        self.assertEqual(len(filenames), 200)
+        for filename in filenames:
+            self.assertTrue(
+                filecmp.cmp(dir_scan + "/" + filename, dir_pass_prediction + "/" + filename, shallow=False)
+            )
+
+        # Clean up
+        local_shell.remove_force_recursive(temp_gen_data)
+
+    def test_paired_many_gsl_if_bandwidth(self):
+        local_shell = exputil.LocalShell()
+
+        # Output directory
+        temp_gen_data = "temp_dynamic_state_paired_many_gen_data"
+        name = "small_kuiper_constellation"
+        generate_small_kuiper_network(temp_gen_data + "/" + name, num_gsl_ifs_per_satellite=4)
+        help_dynamic_state(
+            temp_gen_data, 2, name, 10000, 1000,
+            1089686.4181956202, 5016591.2330984278, "algorithm_paired_many_only_over_isls", False,
+            shortest_path_backend="dijkstra"
+        )
+        dynamic_state_dir = temp_gen_data + "/" + name + "/dynamic_state_10000ms_for_1000s"
+
+        # Apply the deltas
+        gsl_if_bandwidth = {}
+        num_changed = 0
+        for t in range(0, 1000 * 1000 * 1000 * 1000, 10 * 1000 * 1000 * 1000):
+            gsl_if_bandwidth_delta = read_gsl_if_bandwidth_delta(dynamic_state_dir, t).tolist()
+            if t == 0:
+                self.assertEqual(len(gsl_if_bandwidth_delta), 144 * 4 + 4)
+            else:
+                num_changed += len(gsl_if_bandwidth_delta)
+            for node_id, if_id, bandwidth in gsl_if_bandwidth_delta:
+
+                # Only what changed is in the delta
+                if t > 0:
+                    self.assertNotEqual(gsl_if_bandwidth[(int(node_id), int(if_id))], bandwidth)
+                gsl_if_bandwidth[(int(node_id), int(if_id))] = bandwidth
+            self.assertEqual(len(gsl_if_bandwidth), 144 * 4 + 4)
+
+            # The ground stations paired to the same satellite share its bandwidth:
+            # the shares of the satellite interfaces are the same as the ground station ones
+            satellite_shares = sorted(filter(lambda x: x < 1.0, map(
+                lambda x: x[1], filter(lambda x: x[0][0] < 144, gsl_if_bandwidth.items())
+            )))
+            ground_station_shares = sorted(filter(lambda x: x < 1.0, map(
+                lambda x: gsl_if_bandwidth[(144 + x, 0)], range(4)
+            )))
+            self.assertEqual(satellite_shares, ground_station_shares)
+            for share in satellite_shares:
+                self.assertEqual(satellite_shares.count(share), round(1.0 / share))
+        self.assertGreater(num_changed, 0)
+
+        # Clean up
+        local_shell.remove_force_recursive(temp_gen_data)
@@ -22,6 +22,7 @@
 
 import satgen
 import unittest
+import filecmp
 import math
 import os
 import exputil
@@ -290,7 +291,9 @@ class TestEndToEnd(unittest.TestCase):
                         a_rtt = float(a_spl[1])
                         b_rtt = float(b_spl[1])
                         self.assertEqual(a_time, b_time)
-                        self.assertAlmostEqual(a_rtt, b_rtt, places=6)
+                        # The path lengths are calculated from the satellite positions at each time step,
+                        # which differ by at most 7.5 ns RTT from the pyephem ranges of the reference
+                        self.assertAlmostEqual(a_rtt, b_rtt, delta=10)
 
             # Now let's run all analyses available
 
@@ -509,6 +512,25 @@ class TestEndToEnd(unittest.TestCase):
                 else:
                     self.assertAlmostEqual(columns[0][i], 48165140.010532916 / (2 * 2703000 / 0.299792), delta=0.01)
 
+            # Analyzing RTTs and paths in a single pass gives exactly the same output
+            satgen.post_analysis.analyze_all_pairs(
+                output_analysis_data_dir + "/" + name + "_all_pairs",
+                output_generated_data_dir + "/" + name,
+                default_time_step_ms,
+                duration_s,
+                ""
+            )
+            for analysis in ["rtt", "path"]:
+                data_dir = output_analysis_data_dir + "/" + name + "/" + name + "/100ms_for_200s/" \
+                    + analysis + "/data"
+                data_dir_all_pairs = output_analysis_data_dir + "/" + name + "_all_pairs/" + name \
+                    + "/100ms_for_200s/" + analysis + "/data"
+                self.assertEqual(sorted(os.listdir(data_dir)), sorted(os.listdir(data_dir_all_pairs)))
+                for filename in os.listdir(data_dir):
+                    self.assertTrue(filecmp.cmp(
+                        data_dir + "/" + filename, data_dir_all_pairs + "/" + filename, shallow=False
+                    ))
+
             # Analyze time step paths
             satgen.post_analysis.analyze_time_step_path(
                 output_analysis_data_dir + "/" + name,
@@ -364,7 +364,9 @@ class TestEndToEnd(unittest.TestCase):
                                 lowest_rtt_ns = min(a_rtt, lowest_rtt_ns)
                                 highest_rtt_ns = max(a_rtt, highest_rtt_ns)
                             self.assertEqual(a_time, b_time)
-                            self.assertAlmostEqual(a_rtt, b_rtt, places=5)
+                            # The path lengths are calculated from the satellite positions at each time
+                            # step, which differ by at most 7.5 ns RTT from the pyephem ranges
+                            self.assertAlmostEqual(a_rtt, b_rtt, delta=10)
 
                 # Save RTTs
                 if src < dst:
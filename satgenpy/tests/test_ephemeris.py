@@ -0,0 +1,139 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import exputil
+import filecmp
+import numpy as np
+import os
+import unittest
+from astropy import units as u
+from satgen import *
+from small_network import generate_small_kuiper_network
+
+
+class TestEphemeris(unittest.TestCase):
+
+    def setUp(self):
+        self.local_shell = exputil.LocalShell()
+        self.temp_gen_data = "temp_ephemeris_gen_data"
+        self.name = "small_kuiper_constellation"
+        self.satellite_network_dir = self.temp_gen_data + "/" + self.name
+
+        # Constellation
+        generate_small_kuiper_network(self.satellite_network_dir)
+
+    def tearDown(self):
+        self.local_shell.remove_force_recursive(self.temp_gen_data)
+
+    def test_generate_and_read(self):
+        self.assertFalse(has_ephemeris(self.satellite_network_dir, 1000, 5))
+        self.assertIsNone(read_ephemeris_if_available(self.satellite_network_dir, 1000, 5))
+        generate_ephemeris(self.satellite_network_dir, 1000, 5, print_logs=False)
+        self.assertTrue(has_ephemeris(self.satellite_network_dir, 1000, 5))
+
+        # It is memory-mapped, and exactly the positions of a live propagation
+        ephemeris = read_ephemeris(self.satellite_network_dir, 1000, 5)
+        self.assertEqual(ephemeris["time_step_ns"], 1000000000)
+        self.assertEqual(ephemeris["num_time_steps"], 5)
+        self.assertEqual(ephemeris["num_satellites"], 144)
+        self.assertIsInstance(ephemeris["satellite_positions_m"], np.memmap)
+        self.assertEqual(ephemeris["satellite_positions_m"].shape, (5, 144, 3))
+        tles = read_tles(self.satellite_network_dir + "/tles.txt")
+        for t in [0, 2000000000, 4000000000]:
+            time = tles["epoch"] + t * u.ns
+            self.assertTrue(np.array_equal(
+                get_satellite_positions_at(ephemeris, t),
+                satellite_positions_m(tles["satellites"], str(tles["epoch"]), str(time))
+            ))
+
+        # Only time instants on the grid
+        for t in [500000000, 5000000000, -1000000000]:
+            try:
+                get_satellite_positions_at(ephemeris, t)
+                self.fail()
+            except ValueError:
+                self.assertTrue(True)
+
+        # The ephemeris must belong to the current TLEs
+        generate_tles_from_scratch_manual(
+            self.satellite_network_dir + "/tles.txt", "Kuiper-630", 12, 12, True, 53.0, 0.0000001, 0.0, 14.80
+        )
+        try:
+            read_ephemeris(self.satellite_network_dir, 1000, 5)
+            self.fail()
+        except ValueError:
+            self.assertTrue(True)
+
+    def test_dynamic_state_and_analysis_with_ephemeris(self):
+
+        # Without ephemeris
+        help_dynamic_state(
+            self.temp_gen_data, 1, self.name, 1000, 20, 1089686.4181956202, 5016591.2330984278,
+            "algorithm_free_one_only_over_isls", False
+        )
+        dynamic_state_dir = self.satellite_network_dir + "/dynamic_state_1000ms_for_20s"
+        os.rename(dynamic_state_dir, dynamic_state_dir + "_without_ephemeris")
+
+        # With ephemeris (with two threads which share it)
+        generate_ephemeris(self.satellite_network_dir, 1000, 20, print_logs=False)
+        help_dynamic_state(
+            self.temp_gen_data, 2, self.name, 1000, 20, 1089686.4181956202, 5016591.2330984278,
+            "algorithm_free_one_only_over_isls", False
+        )
+
+        # Exactly the same output
+        filenames = sorted(os.listdir(dynamic_state_dir))
+        self.assertEqual(filenames, sorted(os.listdir(dynamic_state_dir + "_without_ephemeris")))
+        self.assertEqual(len(filenames), 40)
+        for filename in filenames:
+            self.assertTrue(filecmp.cmp(
+                dynamic_state_dir + "/" + filename,
+                dynamic_state_dir + "_without_ephemeris/" + filename,
+                shallow=False
+            ))
+
+        # Path lengths from the ephemeris are close to those calculated pair-wise
+        ground_stations = read_ground_stations_extended(self.satellite_network_dir + "/ground_stations.txt")
+        tles = read_tles(self.satellite_network_dir + "/tles.txt")
+        satellites = tles["satellites"]
+        list_isls = read_isls(self.satellite_network_dir + "/isls.txt", len(satellites))
+        ephemeris = read_ephemeris(self.satellite_network_dir, 1000, 20)
+        for t in [0, 7000000000, 19000000000]:
+            graph = construct_graph_with_distances(
+                tles["epoch"], t, satellites, ground_stations, list_isls, 1089686.4181956202, 5016591.2330984278,
+                get_satellite_positions_at(ephemeris, t)
+            )
+            for (a, b) in list_isls[:10]:
+                path = [a, b]
+                length_m = compute_path_length_without_graph(
+                    path, tles["epoch"], t, satellites, ground_stations, list_isls,
+                    1089686.4181956202, 5016591.2330984278
+                )
+                self.assertAlmostEqual(
+                    compute_path_length_without_graph(
+                        path, tles["epoch"], t, satellites, ground_stations, list_isls,
+                        1089686.4181956202, 5016591.2330984278, get_satellite_positions_at(ephemeris, t)
+                    ),
+                    length_m,
+                    delta=10.0
+                )
+                self.assertAlmostEqual(compute_path_length_with_graph(path, graph), length_m, delta=10.0)
@@ -0,0 +1,366 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import exputil
+import filecmp
+import numpy as np
+import os
+import unittest
+from satgen import *
+from small_network import generate_small_kuiper_network
+
+
+class TestFstate(unittest.TestCase):
+
+    def setUp(self):
+        self.local_shell = exputil.LocalShell()
+        self.temp_gen_data = "temp_fstate_gen_data"
+        self.local_shell.make_full_dir(self.temp_gen_data)
+
+    def tearDown(self):
+        self.local_shell.remove_force_recursive(self.temp_gen_data)
+
+    def test_write_and_read(self):
+        fstate_delta = [(0, 4, 1, 0, 0), (3, 5, -1, -1, -1), (4, 5, 3, 0, 2)]
+        for fstate_format in ["txt", "npy"]:
+            filename = write_fstate_delta(self.temp_gen_data, 1000, fstate_delta, fstate_format)
+            self.assertEqual(filename, self.temp_gen_data + "/fstate_1000." + fstate_format)
+            for mmap_mode in [None, "r"]:
+                result = read_fstate_delta_file(filename, mmap_mode)
+                self.assertEqual(result.dtype, np.int32)
+                self.assertEqual(result.shape, (3, 5))
+                self.assertEqual(list(map(tuple, result.tolist())), fstate_delta)
+            self.assertEqual(fstate_delta_next_hops(result), {(0, 4): 1, (3, 5): -1, (4, 5): 3})
+
+        # Text is exactly the same as before
+        with open(self.temp_gen_data + "/fstate_1000.txt", "r") as f_in:
+            self.assertEqual(f_in.read(), "0,4,1,0,0\n3,5,-1,-1,-1\n4,5,3,0,2\n")
+
+        # Binary is preferred if both are present
+        os.remove(self.temp_gen_data + "/fstate_1000.txt")
+        self.assertEqual(read_fstate_delta(self.temp_gen_data, 1000).tolist(), read_fstate_delta_file(
+            self.temp_gen_data + "/fstate_1000.npy"
+        ).tolist())
+
+        # Empty
+        for fstate_format in ["txt", "npy"]:
+            filename = write_fstate_delta(self.temp_gen_data, 2000, [], fstate_format)
+            self.assertEqual(read_fstate_delta_file(filename).shape, (0, 5))
+
+        # Invalid
+        with self.assertRaises(ValueError):
+            write_fstate_delta(self.temp_gen_data, 3000, fstate_delta, "csv")
+        self.local_shell.write_file(self.temp_gen_data + "/fstate_3000.txt", "0,4,1,0\n")
+        with self.assertRaises(ValueError):
+            read_fstate_delta(self.temp_gen_data, 3000)
+        np.save(self.temp_gen_data + "/fstate_4000.npy", np.zeros((2, 5), dtype=np.int64))
+        with self.assertRaises(ValueError):
+            read_fstate_delta(self.temp_gen_data, 4000)
+
+    def test_fstate_array(self):
+
+        # 2 satellites, 2 ground stations (nodes 2 and 3)
+        fstate = np.array([
+            [[2, 1, 0], [1, 0, 0]],
+            [[0, 0, 0], [3, 1, 0]],
+            [[-1, -1, -1], [0, 0, 1]],
+            [[1, 0, 1], [-1, -1, -1]],
+        ], dtype=np.int32)
+        self.assertEqual(get_fstate_array_entries(2, 2).tolist(), [
+            [True, True], [True, True], [False, True], [True, False]
+        ])
+
+        # Without previous forwarding state, all entries (but not of a ground station to itself)
+        fstate_delta = calculate_fstate_array_delta(fstate)
+        self.assertEqual(fstate_delta.dtype, np.int32)
+        self.assertEqual(fstate_delta.tolist(), [
+            [0, 2, 2, 1, 0], [0, 3, 1, 0, 0], [1, 2, 0, 0, 0], [1, 3, 3, 1, 0], [2, 3, 0, 0, 1], [3, 2, 1, 0, 1]
+        ])
+        self.assertEqual(fstate_array_to_dict(fstate), {
+            (0, 2): (2, 1, 0), (0, 3): (1, 0, 0), (1, 2): (0, 0, 0), (1, 3): (3, 1, 0), (2, 3): (0, 0, 1),
+            (3, 2): (1, 0, 1)
+        })
+
+        # Only the changed entries
+        next_fstate = fstate.copy()
+        next_fstate[1, 1] = (-1, -1, -1)
+        next_fstate[3, 0, 2] = 2
+        next_fstate[2, 0] = (5, 5, 5)
+        self.assertEqual(calculate_fstate_array_delta(next_fstate, fstate).tolist(), [
+            [1, 3, -1, -1, -1], [3, 2, 1, 0, 2]
+        ])
+        self.assertEqual(calculate_fstate_array_delta(fstate, fstate).shape, (0, 5))
+
+        # Written the same as the list of entries
+        write_fstate_delta(self.temp_gen_data, 1000, fstate_delta, "txt")
+        write_fstate_delta(self.temp_gen_data, 2000, fstate_delta.tolist(), "txt")
+        self.assertTrue(filecmp.cmp(
+            self.temp_gen_data + "/fstate_1000.txt", self.temp_gen_data + "/fstate_2000.txt", shallow=False
+        ))
+
+    def generate_dynamic_state(self, output_generated_data_dir, name, num_threads, parallelism, fstate_format,
+                               fstate_snapshot_interval_steps=0, compression=None):
+        satellite_network_dir = output_generated_data_dir + "/" + name
+        generate_small_kuiper_network(satellite_network_dir)
+        help_dynamic_state(
+            output_generated_data_dir, num_threads, name, 1000, 20,
+            1089686.4181956202, 5016591.2330984278, "algorithm_free_one_only_over_isls", False,
+            parallelism=parallelism, fstate_format=fstate_format,
+            fstate_snapshot_interval_steps=fstate_snapshot_interval_steps, compression=compression
+        )
+        return satellite_network_dir + "/dynamic_state_1000ms_for_20s"
+
+    def test_generate_and_convert(self):
+        name = "small_kuiper_constellation"
+        for fstate_format in ["txt", "npy"]:
+            self.generate_dynamic_state(self.temp_gen_data + "/" + fstate_format, name, 1, "threads", fstate_format)
+
+        # Both formats contain the same forwarding state
+        dir_txt = self.temp_gen_data + "/txt/" + name + "/dynamic_state_1000ms_for_20s"
+        dir_npy = self.temp_gen_data + "/npy/" + name + "/dynamic_state_1000ms_for_20s"
+        self.assertEqual(len(list(filter(lambda x: x.startswith("fstate_"), os.listdir(dir_npy)))), 20)
+        for t in range(0, 20 * 1000 * 1000 * 1000, 1000 * 1000 * 1000):
+            self.assertTrue(os.path.isfile(dir_npy + "/fstate_" + str(t) + ".npy"))
+            self.assertFalse(os.path.isfile(dir_npy + "/fstate_" + str(t) + ".txt"))
+            self.assertEqual(read_fstate_delta(dir_txt, t).tolist(), read_fstate_delta(dir_npy, t).tolist())
+
+        # Converting binary to text results in exactly the original text files
+        self.assertEqual(convert_fstate_dir(dir_npy, "txt", remove_source=True), 20)
+        for t in range(0, 20 * 1000 * 1000 * 1000, 1000 * 1000 * 1000):
+            self.assertFalse(os.path.isfile(dir_npy + "/fstate_" + str(t) + ".npy"))
+            self.assertTrue(filecmp.cmp(
+                dir_txt + "/fstate_" + str(t) + ".txt", dir_npy + "/fstate_" + str(t) + ".txt", shallow=False
+            ))
+
+        # And back
+        self.assertEqual(convert_fstate_dir(dir_npy, "npy"), 20)
+        self.assertTrue(os.path.isfile(dir_npy + "/fstate_0.npy"))
+        self.assertTrue(os.path.isfile(dir_npy + "/fstate_0.txt"))
+        with self.assertRaises(ValueError):
+            convert_fstate_dir(dir_npy, "csv")
+
+    def test_regenerate_in_other_format(self):
+        name = "small_kuiper_constellation"
+        dir_txt = self.generate_dynamic_state(self.temp_gen_data + "/txt", name, 1, "threads", "txt")
+
+        # The same directory is regenerated in each format, after a previous run in another format
+        # (of which a file is changed, such that reading any of them would result in a different state)
+        output_generated_data_dir = self.temp_gen_data + "/regenerated"
+        for fstate_format, compression, extension in [
+            ("npy", None, ".npy"), ("txt", None, ".txt"), ("txt", "gzip", ".txt.gz"), ("npy", None, ".npy")
+        ]:
+            dir_regenerated = self.generate_dynamic_state(
+                output_generated_data_dir, name, 1, "threads", fstate_format, compression=compression
+            )
+            fstate_filenames = sorted(filter(lambda x: x.startswith("fstate_"), os.listdir(dir_regenerated)))
+            self.assertEqual(fstate_filenames, sorted(map(
+                lambda t: "fstate_" + str(t) + extension, range(0, 20 * 1000 * 1000 * 1000, 1000 * 1000 * 1000)
+            )))
+            self.assertEqual(len(os.listdir(dir_regenerated)), 40)
+            for t in range(0, 20 * 1000 * 1000 * 1000, 1000 * 1000 * 1000):
+                self.assertEqual(read_fstate_delta(dir_txt, t).tolist(), read_fstate_delta(dir_regenerated, t).tolist())
+            write_fstate_delta(dir_regenerated, 0, [(9, 9, 9, 9, 9)], fstate_format)
+
+    def test_log(self):
+        name = "small_kuiper_constellation"
+        dir_txt = self.generate_dynamic_state(self.temp_gen_data + "/txt", name, 1, "threads", "txt")
+        for parallelism in ["threads", "processes"]:
+            dir_log = self.generate_dynamic_state(self.temp_gen_data + "/" + parallelism, name, 2, parallelism, "log")
+
+            # Only the merged logs are left
+            self.assertEqual(sorted(os.listdir(dir_log)), ["fstate.log", "gsl_if_bandwidth.log"])
+            self.assertEqual(read_log_index(get_log_filename(dir_log, "fstate"))[:, 0].tolist(), list(range(
+                0, 20 * 1000 * 1000 * 1000, 1000 * 1000 * 1000
+            )))
+
+            # Same as the per time step files, in any order
+            for t in reversed(range(0, 20 * 1000 * 1000 * 1000, 1000 * 1000 * 1000)):
+                self.assertEqual(read_fstate_delta(dir_txt, t).tolist(), read_fstate_delta(dir_log, t).tolist())
+                self.assertEqual(
+                    read_gsl_if_bandwidth_delta(dir_txt, t).tolist(),
+                    read_gsl_if_bandwidth_delta(dir_log, t).tolist()
+                )
+            with self.assertRaises(ValueError):
+                read_fstate_delta(dir_log, 500 * 1000 * 1000)
+
+            # Unpacking results in exactly the files
+            self.assertEqual(unpack_logs(dir_log, "txt", remove_logs=True), 20)
+            self.assertEqual(sorted(os.listdir(dir_log)), sorted(os.listdir(dir_txt)))
+            for filename in os.listdir(dir_txt):
+                self.assertTrue(filecmp.cmp(dir_txt + "/" + filename, dir_log + "/" + filename, shallow=False))
+
+        # Not a log
+        with self.assertRaises(ValueError):
+            read_log_index(dir_txt + "/fstate_0.txt")
+
+    def test_compression(self):
+        name = "small_kuiper_constellation"
+        dir_txt = self.generate_dynamic_state(self.temp_gen_data + "/txt", name, 1, "threads", "txt")
+        compressions = ["gzip"]
+        try:
+            get_compression_extension("zstd")
+            compressions.append("zstd")
+        except ValueError:
+            pass  # The zstandard package is not installed
+        for compression in compressions:
+            extension = get_compression_extension(compression)
+            for (parallelism, fstate_format) in [("threads", "txt"), ("processes", "npy")]:
+                dir_compressed = self.generate_dynamic_state(
+                    self.temp_gen_data + "/" + compression + "_" + parallelism, name, 2, parallelism, fstate_format,
+                    compression=compression
+                )
+
+                # Only compressed files, which are read transparently
+                self.assertEqual(
+                    sorted(os.listdir(dir_compressed)),
+                    sorted(map(
+                        lambda x: x.replace(".txt", "." + fstate_format if x.startswith("fstate_") else ".txt")
+                        + extension,
+                        os.listdir(dir_txt)
+                    ))
+                )
+                for t in range(0, 20 * 1000 * 1000 * 1000, 1000 * 1000 * 1000):
+                    self.assertEqual(
+                        read_fstate_delta(dir_txt, t).tolist(), read_fstate_delta(dir_compressed, t).tolist()
+                    )
+                    self.assertEqual(
+                        read_gsl_if_bandwidth_delta(dir_txt, t).tolist(),
+                        read_gsl_if_bandwidth_delta(dir_compressed, t).tolist()
+                    )
+
+            # Decompressing results in exactly the files
+            dir_compressed = self.temp_gen_data + "/" + compression + "_threads/" + name \
+                + "/dynamic_state_1000ms_for_20s"
+            self.assertEqual(recompress_dynamic_state_dir(dir_compressed, None, 2), 40)
+            self.assertEqual(sorted(os.listdir(dir_compressed)), sorted(os.listdir(dir_txt)))
+            for filename in os.listdir(dir_txt):
+                self.assertTrue(filecmp.cmp(dir_txt + "/" + filename, dir_compressed + "/" + filename, shallow=False))
+
+            # Compressing (again) only leaves the compressed files
+            self.assertEqual(recompress_dynamic_state_dir(dir_compressed, compression), 40)
+            self.assertEqual(recompress_dynamic_state_dir(dir_compressed, compression), 0)
+            self.assertEqual(
+                sorted(os.listdir(dir_compressed)), sorted(map(lambda x: x + extension, os.listdir(dir_txt)))
+            )
+            with open_compressed(dir_compressed + "/fstate_0.txt" + extension, "r") as f_in:
+                with open(dir_txt + "/fstate_0.txt", "r") as f_txt:
+                    self.assertEqual(f_in.read(), f_txt.read())
+
+        # Invalid
+        with self.assertRaises(ValueError):
+            recompress_dynamic_state_dir(dir_txt, "bzip2")
+        with self.assertRaises(ValueError):
+            self.generate_dynamic_state(self.temp_gen_data + "/log", name, 1, "threads", "log", compression="gzip")
+
+    def test_snapshots(self):
+        name = "small_kuiper_constellation"
+        dir_txt = self.generate_dynamic_state(self.temp_gen_data + "/txt", name, 1, "threads", "txt")
+        dir_snapshots = self.generate_dynamic_state(self.temp_gen_data + "/snapshots", name, 2, "threads", "txt", 5)
+        time_step_ns = 1000 * 1000 * 1000
+        end_time_ns = 20 * time_step_ns
+
+        # Snapshots every 5 time steps
+        self.assertEqual(read_fstate_snapshots_info(dir_snapshots), (time_step_ns, 5))
+        self.assertIsNone(read_fstate_snapshots_info(dir_txt))
+        for t in range(0, end_time_ns, time_step_ns):
+            self.assertEqual(
+                os.path.isfile(dir_snapshots + "/fstate_snapshot_" + str(t) + ".npy"),
+                (t // time_step_ns) % 5 == 0
+            )
+
+        # Complete forwarding state by replaying all deltas
+        expected = []
+        fstate = {}
+        for t in range(0, end_time_ns, time_step_ns):
+            apply_fstate_delta(fstate, read_fstate_delta(dir_txt, t))
+            self.assertEqual(len(fstate), 144 * 4 + 4 * 3)
+            expected.append(dict(fstate))
+
+        # Loading any time step (with or without snapshots) gives the same
+        for t in range(0, end_time_ns, time_step_ns):
+            self.assertEqual(load_fstate_at(dir_snapshots, t), expected[t // time_step_ns])
+            self.assertEqual(load_fstate_at(dir_txt, t), expected[t // time_step_ns])
+
+        # Deltas before the nearest snapshot are not needed
+        for t in range(0, 10 * time_step_ns, time_step_ns):
+            os.remove(dir_snapshots + "/fstate_" + str(t) + ".txt")
+        self.assertEqual(load_fstate_at(dir_snapshots, 13 * time_step_ns), expected[13])
+        self.assertEqual(load_fstate_at(dir_snapshots, 10 * time_step_ns), expected[10])
+        window = list(map(
+            lambda x: (x[0], dict(x[1])),
+            iterate_fstate(dir_snapshots, 12 * time_step_ns, 17 * time_step_ns)
+        ))
+        self.assertEqual(window, list(map(lambda t: (t * time_step_ns, expected[t]), range(12, 17))))
+
+        # As deltas, the first of a window is the complete forwarding state, after which the deltas follow
+        window_deltas = list(iterate_fstate_deltas(dir_snapshots, 12 * time_step_ns, 17 * time_step_ns))
+        self.assertEqual(list(map(lambda x: x[0], window_deltas)), list(map(lambda t: t * time_step_ns, range(12, 17))))
+        fstate = {}
+        apply_fstate_delta(fstate, window_deltas[0][1])
+        self.assertEqual(fstate, expected[12])
+        for (t, fstate_delta) in window_deltas[1:]:
+            self.assertTrue(np.array_equal(fstate_delta, read_fstate_delta(dir_snapshots, t)))
+        self.assertEqual(
+            list(map(lambda x: x[0], iterate_fstate_deltas(dir_snapshots, 10 * time_step_ns, 12 * time_step_ns))),
+            [10 * time_step_ns, 11 * time_step_ns]
+        )
+
+        # Invalid
+        with self.assertRaises(ValueError):
+            load_fstate_at(dir_snapshots, 13 * time_step_ns + 1)
+        with self.assertRaises(ValueError):
+            load_fstate_at(dir_snapshots, 13 * time_step_ns, time_step_ns=100)
+
+        # Regenerating without snapshots removes them
+        self.generate_dynamic_state(self.temp_gen_data + "/snapshots", name, 1, "threads", "txt")
+        self.assertIsNone(read_fstate_snapshots_info(dir_snapshots))
+        self.assertFalse(os.path.isfile(dir_snapshots + "/fstate_snapshot_0.npy"))
+
+    def test_snapshots_with_many_threads(self):
+        name = "small_kuiper_constellation"
+        satellite_network_dir = self.temp_gen_data + "/" + name
+        generate_small_kuiper_network(satellite_network_dir)
+        time_step_ns = 1000 * 1000 * 1000
+
+        # Threads write the snapshots to the same directory, with and without failures
+        failure_table = {"SAT": {5: (2000000000, 5000000000)}, "ISL": {}, "GS": {}}
+        for with_failures in [False, True]:
+            if with_failures:
+                help_dynamic_state_failure(
+                    self.temp_gen_data, 4, name, 1000, 40,
+                    1089686.4181956202, 5016591.2330984278, "algorithm_free_one_only_over_isls", failure_table, False,
+                    fstate_snapshot_interval_steps=3
+                )
+            else:
+                help_dynamic_state(
+                    self.temp_gen_data, 4, name, 1000, 40,
+                    1089686.4181956202, 5016591.2330984278, "algorithm_free_one_only_over_isls", False,
+                    fstate_snapshot_interval_steps=3
+                )
+            dynamic_state_dir = satellite_network_dir + "/dynamic_state_1000ms_for_40s"
+            self.assertEqual(read_fstate_snapshots_info(dynamic_state_dir), (time_step_ns, 3))
+            self.assertEqual(
+                sorted(filter(lambda x: x.startswith("fstate_snapshot"), os.listdir(dynamic_state_dir))),
+                sorted(["fstate_snapshots_info.txt"] + list(map(
+                    lambda t: "fstate_snapshot_" + str(t * time_step_ns) + ".npy", range(0, 40, 3)
+                )))
+            )
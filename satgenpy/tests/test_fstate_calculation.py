@@ -21,60 +21,45 @@
 # SOFTWARE.
 
 import exputil
+import math
+import random
 import unittest
 from satgen.dynamic_state.fstate_calculation import *
+from satgen.isls import create_isl_topology, set_isl_topology_lengths
+from satgen.fstate import fstate_array_to_dict
 
 
 def calculate_fstate_for(
         num_satellites,
         num_ground_stations,
-        edges
+        edges,
+        shortest_path_backend="floyd_warshall"
 ):
     local_shell = exputil.LocalShell()
 
-    sat_net_graph_only_isls = nx.Graph()
-    sat_net_graph_only_gsls = nx.Graph()
-    sat_net_graph_complete = nx.Graph()
-
-    # Nodes
+    # Ground station links of each ground station
     ground_station_satellites_in_range = []
-    for i in range(num_satellites):
-        sat_net_graph_only_isls.add_node(i)
-        sat_net_graph_only_gsls.add_node(i)
-        sat_net_graph_complete.add_node(i)
     for i in range(num_satellites, num_satellites + num_ground_stations):
-        sat_net_graph_only_gsls.add_node(i)
-        sat_net_graph_complete.add_node(i)
         ground_station_satellites_in_range.append([])
 
     # Edges
-    num_isls_per_sat = [0] * num_satellites
-    sat_neighbor_to_if = {}
+    list_isls = []
+    isl_lengths_m = []
     for e in edges:
         if e[0] < num_satellites and e[1] < num_satellites:
-            sat_net_graph_only_isls.add_edge(
-                e[0], e[1], weight=e[2]
-            )
-            sat_net_graph_complete.add_edge(
-                e[0], e[1], weight=e[2]
-            )
-            sat_neighbor_to_if[(e[0], e[1])] = num_isls_per_sat[e[0]]
-            sat_neighbor_to_if[(e[1], e[0])] = num_isls_per_sat[e[1]]
-            num_isls_per_sat[e[0]] += 1
-            num_isls_per_sat[e[1]] += 1
+            list_isls.append((e[0], e[1]))
+            isl_lengths_m.append(e[2])
         if e[0] >= num_satellites or e[1] >= num_satellites:
-            sat_net_graph_only_gsls.add_edge(
-                e[0], e[1], weight=e[2]
-            )
-            sat_net_graph_complete.add_edge(
-                e[0], e[1], weight=e[2]
-            )
             ground_station_satellites_in_range[max(e[0], e[1]) - num_satellites].append(
                 (e[2], min(e[0], e[1]))
             )
 
+    # Topology of only the ISLs
+    isl_topology = create_isl_topology(num_satellites, list_isls)
+    set_isl_topology_lengths(isl_topology, isl_lengths_m)
+
     # GS relays only does not have ISLs
-    num_isls_per_sat_for_only_gs_relays = [0] * num_satellites
+    isl_topology_without_isls = create_isl_topology(num_satellites, [])
 
     # Finally, GID to the satellite GSL interface index it communicates to on each satellite
     gid_to_sat_gsl_if_idx = list(range(num_ground_stations))
@@ -89,30 +74,28 @@ def calculate_fstate_for(
     prev_fstate = None
     enable_verbose_logs = True
 
-    # Return all three
+    # Return all three (as dictionaries)
     result = {
         "without_gs_relays": calculate_fstate_shortest_path_without_gs_relaying(
             output_dynamic_state_dir,
             time_since_epoch_ns,
             num_satellites,
             num_ground_stations,
-            sat_net_graph_only_isls,
-            num_isls_per_sat,
+            isl_topology,
             gid_to_sat_gsl_if_idx,
             ground_station_satellites_in_range,
-            sat_neighbor_to_if,
             prev_fstate,
-            enable_verbose_logs
+            enable_verbose_logs,
+            shortest_path_backend
         ),
         "only_gs_relays": calculate_fstate_shortest_path_with_gs_relaying(
             output_dynamic_state_dir,
             time_since_epoch_ns,
             num_satellites,
             num_ground_stations,
-            sat_net_graph_only_gsls,
-            num_isls_per_sat_for_only_gs_relays,
+            isl_topology_without_isls,
             gid_to_sat_gsl_if_idx,
-            sat_neighbor_to_if,
+            ground_station_satellites_in_range,
             prev_fstate,
             enable_verbose_logs
         ),
@@ -121,10 +104,9 @@ def calculate_fstate_for(
             time_since_epoch_ns,
             num_satellites,
             num_ground_stations,
-            sat_net_graph_complete,
-            num_isls_per_sat,
+            isl_topology,
             gid_to_sat_gsl_if_idx,
-            sat_neighbor_to_if,
+            ground_station_satellites_in_range,
             prev_fstate,
             enable_verbose_logs
         )
@@ -133,7 +115,7 @@ def calculate_fstate_for(
     # Remove the temporary directory afterwards
     local_shell.remove_force_recursive(temp_dir)
 
-    return result
+    return dict(map(lambda x: (x[0], fstate_array_to_dict(x[1])), result.items()))
 
 
 class TestFstateCalculation(unittest.TestCase):
@@ -521,3 +503,149 @@ class TestFstateCalculation(unittest.TestCase):
         self.assertEqual(output["combined"][(3, 4)], (1, 0, 1))
         self.assertEqual(output["combined"][(4, 2)], (1, 0, 2))
         self.assertEqual(output["combined"][(4, 3)], (1, 0, 2))
+
+    def test_shortest_path_backends_same_fstate(self):
+
+        # Grid of satellites with ISLs of pseudo-random length, and ground stations
+        # which each see a few satellites (some satellites are seen by no ground station)
+        random.seed(123456789)
+        num_orbits = 6
+        num_sats_per_orbit = 5
+        num_satellites = num_orbits * num_sats_per_orbit
+        num_ground_stations = 7
+        edges = []
+        for orbit in range(num_orbits):
+            for i in range(num_sats_per_orbit):
+                sid = orbit * num_sats_per_orbit + i
+                edges.append((sid, orbit * num_sats_per_orbit + (i + 1) % num_sats_per_orbit,
+                              random.uniform(900000, 1100000)))
+                if orbit + 1 < num_orbits:  # Last orbit is not connected to the first
+                    edges.append((sid, sid + num_sats_per_orbit, random.uniform(900000, 1100000)))
+        for gid in range(num_ground_stations - 1):  # Last ground station sees no satellite
+            for sid in random.sample(range(num_satellites), 3):
+                edges.append((num_satellites + gid, sid, random.uniform(500000, 1000000)))
+
+        # Both backends must produce the same forwarding state
+        output_floyd_warshall = calculate_fstate_for(num_satellites, num_ground_stations, edges, "floyd_warshall")
+        output_dijkstra = calculate_fstate_for(num_satellites, num_ground_stations, edges, "dijkstra")
+        self.assertEqual(output_floyd_warshall["without_gs_relays"], output_dijkstra["without_gs_relays"])
+
+        # Including when some satellites are unreachable (disconnected subgraph)
+        edges = list(filter(lambda e: not (e[0] < 5 and e[1] >= 5 and e[1] < num_satellites), edges))
+        output_floyd_warshall = calculate_fstate_for(num_satellites, num_ground_stations, edges, "floyd_warshall")
+        output_dijkstra = calculate_fstate_for(num_satellites, num_ground_stations, edges, "dijkstra")
+        self.assertEqual(output_floyd_warshall["without_gs_relays"], output_dijkstra["without_gs_relays"])
+
+        # Unknown backend
+        try:
+            calculate_fstate_for(num_satellites, num_ground_stations, edges, "bellman_ford")
+            self.fail()
+        except ValueError:
+            self.assertTrue(True)
+
+    def test_equal_distance_tie_breaking(self):
+        num_satellites = 4
+        num_ground_stations = 2
+        edges = [
+            # ISLs
+            (0, 1, 1000),
+            (1, 3, 1000),
+            (0, 2, 1000),
+            (2, 3, 1000),
+            # GSLs
+            (4, 3, 1000),
+            (5, 2, 1000),
+            (5, 1, 1000),
+        ]
+
+        #
+        #       1
+        #     /   \
+        #    0  5  3 -- 4
+        #     \   /
+        #       2
+        #
+        # All paths over 1 have the same length as over 2: the neighbor which networkx lists
+        # first and the satellite with the lowest identifier are chosen
+        #
+
+        for shortest_path_backend in ["floyd_warshall", "dijkstra"]:
+            output = calculate_fstate_for(num_satellites, num_ground_stations, edges, shortest_path_backend)
+            self.assertEqual(output["without_gs_relays"][(0, 4)], (1, 0, 0))
+            self.assertEqual(output["without_gs_relays"][(0, 5)], (1, 0, 0))
+            self.assertEqual(output["without_gs_relays"][(3, 4)], (4, 2, 0))
+            self.assertEqual(output["without_gs_relays"][(3, 5)], (1, 0, 1))
+            self.assertEqual(output["without_gs_relays"][(4, 5)], (3, 0, 2))
+            self.assertEqual(output["without_gs_relays"][(5, 4)], (1, 0, 3))
+
+    def test_incremental_shortest_paths_same_distances(self):
+
+        # Grid of satellites of which the ISL lengths change a little every time step
+        random.seed(987654321)
+        num_orbits = 8
+        num_sats_per_orbit = 8
+        num_satellites = num_orbits * num_sats_per_orbit
+        isls = []
+        for orbit in range(num_orbits):
+            for i in range(num_sats_per_orbit):
+                sid = orbit * num_sats_per_orbit + i
+                isls.append((sid, orbit * num_sats_per_orbit + (i + 1) % num_sats_per_orbit))
+                isls.append((sid, ((orbit + 1) % num_orbits) * num_sats_per_orbit + i))
+        isl_base_lengths_m = [random.uniform(900000, 1100000) for _ in isls]
+        isl_phases = [random.uniform(0, 2 * math.pi) for _ in isls]
+        in_range_of_first = sorted(random.sample(range(num_satellites), 6))
+
+        shortest_path_state = create_shortest_path_state()
+        for step in range(30):
+
+            # Every ten time steps an ISL fails (topology change)
+            isl_lengths_m = [
+                length_m * (1.0 + 0.01 * math.sin(0.05 * step + phase))
+                for length_m, phase in zip(isl_base_lengths_m, isl_phases)
+            ]
+            active_isl_idxs = [isl_idx for isl_idx in range(len(isls)) if isl_idx >= step // 10 or isl_idx > 2]
+            isl_topology = create_isl_topology(num_satellites, [isls[isl_idx] for isl_idx in active_isl_idxs])
+            set_isl_topology_lengths(isl_topology, [isl_lengths_m[isl_idx] for isl_idx in active_isl_idxs])
+
+            # Some satellites are in range of a ground station (which changes every so often)
+            candidates = [
+                [(0, sid) for sid in in_range_of_first],
+                [(0, sid) for sid in range(step // 5, num_satellites, 9)],
+                1  # (Failed ground station)
+            ]
+
+            # The distances to the destination satellites must be exactly the same as from scratch
+            dist_dijkstra = calculate_sat_net_distances_without_gs_relaying(
+                isl_topology, candidates, "dijkstra"
+            )
+            dist_incremental = calculate_sat_net_distances_without_gs_relaying(
+                isl_topology, candidates, "dijkstra_incremental", shortest_path_state
+            )
+            self.assertTrue(np.array_equal(dist_dijkstra, dist_incremental))
+
+        # Most trees are kept, and all are discarded when the topology changes
+        self.assertGreater(shortest_path_state["num_trees_kept"], shortest_path_state["num_trees_recomputed"])
+        self.assertEqual(shortest_path_state["num_full_recomputations"], 3)
+
+        # Without state, it is calculated from scratch
+        self.assertTrue(np.array_equal(
+            calculate_sat_net_distances_without_gs_relaying(isl_topology, candidates, "dijkstra_incremental"),
+            dist_dijkstra
+        ))
+
+    def test_gs_relays_gs_to_gs_link(self):
+        local_shell = exputil.LocalShell()
+        temp_dir = "temp_fstate_calculation_test"
+        local_shell.make_full_dir(temp_dir)
+
+        # Ground stations 2 and 3 have a direct link
+        try:
+            calculate_fstate_shortest_path_with_gs_relaying(
+                temp_dir, 0, 2, 2, create_isl_topology(2, []), [0, 0],
+                [[(1000, 0)], [(1000, 1), (1000, 2)]], None, False
+            )
+            self.fail()
+        except ValueError:
+            self.assertTrue(True)
+
+        local_shell.remove_force_recursive(temp_dir)
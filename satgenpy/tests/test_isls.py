@@ -25,6 +25,8 @@ import unittest
 from math import floor
 import os
 import exputil
+import networkx as nx
+import numpy as np
 
 
 class TestIsls(unittest.TestCase):
@@ -173,3 +175,55 @@ class TestIsls(unittest.TestCase):
         except ValueError:
             self.assertTrue(True)
         os.remove("isls.txt.tmp")
+
+    def test_isl_topology(self):
+        satgen.generate_plus_grid_isls("isls.txt.tmp", 6, 5, 1)
+        list_isls = satgen.read_isls("isls.txt.tmp", 30)
+        os.remove("isls.txt.tmp")
+        isl_lengths_m = [1000000.0 + 1000.0 * i for i in range(len(list_isls))]
+        isl_topology = satgen.create_isl_topology(30, list_isls)
+        satgen.set_isl_topology_lengths(isl_topology, isl_lengths_m)
+
+        # Must match the networkx graph (neighbor order) and interface numbering when adding the ISLs in order
+        graph = nx.Graph()
+        graph.add_nodes_from(range(30))
+        num_isls_per_sat = [0] * 30
+        sat_neighbor_to_if = {}
+        for (a, b), length_m in zip(list_isls, isl_lengths_m):
+            graph.add_edge(a, b, weight=length_m)
+            sat_neighbor_to_if[(a, b)] = num_isls_per_sat[a]
+            sat_neighbor_to_if[(b, a)] = num_isls_per_sat[b]
+            num_isls_per_sat[a] += 1
+            num_isls_per_sat[b] += 1
+        self.assertEqual(isl_topology["num_isls_per_sat"].tolist(), num_isls_per_sat)
+        for sid in range(30):
+            self.assertEqual(
+                satgen.get_isl_topology_neighbors(isl_topology, sid),
+                list(map(
+                    lambda n: (n, graph.edges[(sid, n)]["weight"], sat_neighbor_to_if[(sid, n)],
+                               sat_neighbor_to_if[(n, sid)]),
+                    graph.neighbors(sid)
+                ))
+            )
+        self.assertTrue(np.array_equal(
+            satgen.get_isl_topology_csr_graph(isl_topology).toarray(),
+            nx.to_numpy_array(graph, nodelist=range(30))
+        ))
+
+        # Only the lengths change
+        satgen.set_isl_topology_lengths(isl_topology, [2.0 * x for x in isl_lengths_m])
+        self.assertEqual(satgen.get_isl_topology_neighbors(isl_topology, 0)[0][1], 2.0 * graph.edges[(0, 1)]["weight"])
+
+        # Without ISLs
+        isl_topology = satgen.create_isl_topology(3, [])
+        satgen.set_isl_topology_lengths(isl_topology, [])
+        self.assertEqual(isl_topology["num_isls_per_sat"].tolist(), [0, 0, 0])
+        self.assertEqual(satgen.get_isl_topology_neighbors(isl_topology, 1), [])
+
+        # Invalid ISLs
+        for invalid_isls in [[(0, 3)], [(-1, 2)], [(1, 1)]]:
+            try:
+                satgen.create_isl_topology(3, invalid_isls)
+                self.fail()
+            except ValueError:
+                self.assertTrue(True)
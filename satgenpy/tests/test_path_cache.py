@@ -0,0 +1,78 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import numpy as np
+import unittest
+from satgen.post_analysis import *
+
+
+class TestPathCache(unittest.TestCase):
+
+    def test_same_as_walking_all(self):
+        num_satellites = 8
+        num_ground_stations = 4
+        num_nodes = num_satellites + num_ground_stations
+        src_node_ids, dst_node_ids = all_ground_station_pairs(num_satellites, num_ground_stations)
+        path_cache = create_path_cache(num_satellites, num_ground_stations, src_node_ids, dst_node_ids)
+        next_hop_table = create_next_hop_table(num_satellites, num_ground_stations)
+        self.assertEqual(get_cached_path(path_cache, 0), None)
+
+        # Random forwarding state deltas (which also contain loops and drops)
+        rng = np.random.default_rng(1234)
+        num_walked_if_all = 0
+        for step in range(100):
+            num_rows = num_nodes * num_ground_stations if step == 0 else rng.integers(0, 4)
+            fstate_delta = np.zeros((num_rows, 5), dtype=np.int32)
+            fstate_delta[:, 0] = rng.integers(0, num_nodes, num_rows)
+            fstate_delta[:, 1] = num_satellites + rng.integers(0, num_ground_stations, num_rows)
+            fstate_delta[:, 2] = rng.integers(-1, num_satellites, num_rows)
+            previous_paths = [get_cached_path(path_cache, i) for i in range(len(src_node_ids))]
+            changed = update_path_cache(path_cache, fstate_delta)
+            update_next_hop_table(next_hop_table, num_satellites, fstate_delta)
+            num_walked_if_all += len(src_node_ids)
+
+            # Compare with walking all paths
+            walk = walk_paths(next_hop_table, num_satellites, src_node_ids, dst_node_ids, record_paths=True)
+            self.assertEqual(path_cache["hop_count"].tolist(), walk["hop_count"].tolist())
+            self.assertEqual(path_cache["unreachable"].tolist(), walk["unreachable"].tolist())
+            self.assertEqual(path_cache["loop"].tolist(), walk["loop"].tolist())
+            for i in range(len(src_node_ids)):
+                self.assertEqual(get_cached_path(path_cache, i), get_walked_path(walk, i))
+                self.assertEqual(i in changed, get_cached_path(path_cache, i) != previous_paths[i])
+
+        # Only a part of the paths was walked again
+        self.assertLess(path_cache["num_walked"], num_walked_if_all / 2)
+
+    def test_lengths(self):
+        path_cache = create_path_cache(2, 2, [2], [3])
+        update_path_cache(path_cache, np.array([[2, 3, 0, 0, 0], [0, 3, 1, 0, 0], [1, 3, 3, 0, 0]]))
+        self.assertEqual(get_cached_path(path_cache, 0), [2, 0, 1, 3])
+        node_positions = np.array([[0.0, 0.0, 1.0], [5.0, 0.0, 1.0], [0.0, 0.0, 0.0], [5.0, 0.0, 0.0]])
+        self.assertEqual(get_path_cache_lengths_m(path_cache, node_positions).tolist(), [7.0])
+        self.assertEqual(get_path_cache_lengths_m(
+            path_cache, node_positions, list_isls=[(0, 1)], max_gsl_length_m=1.0, max_isl_length_m=5.0
+        ).tolist(), [7.0])
+        with self.assertRaises(ValueError):
+            get_path_cache_lengths_m(path_cache, node_positions, list_isls=[], max_gsl_length_m=1.0,
+                                     max_isl_length_m=5.0)
+        update_path_cache(path_cache, np.array([[0, 3, -1, -1, -1]]))
+        self.assertTrue(np.isnan(get_path_cache_lengths_m(path_cache, node_positions)[0]))
@@ -0,0 +1,121 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import exputil
+import filecmp
+import os
+import unittest
+from satgen import *
+from satgen.post_analysis import *
+from small_network import generate_small_kuiper_network
+
+
+class TestPrintRoutesAndRtt(unittest.TestCase):
+
+    def setUp(self):
+        self.local_shell = exputil.LocalShell()
+        self.temp_gen_data = "temp_print_routes_and_rtt_gen_data"
+        self.temp_analysis_data = "temp_print_routes_and_rtt_analysis_data"
+        self.local_shell.make_full_dir(self.temp_gen_data)
+
+    def tearDown(self):
+        self.local_shell.remove_force_recursive(self.temp_gen_data)
+        self.local_shell.remove_force_recursive(self.temp_analysis_data)
+
+    def generate_small_network(self, dynamic_state_update_interval_ms, simulation_end_time_s,
+                               fstate_snapshot_interval_steps=0):
+        name = "small_kuiper_constellation"
+        satellite_network_dir = self.temp_gen_data + "/" + name
+        generate_small_kuiper_network(satellite_network_dir)
+        help_dynamic_state(
+            self.temp_gen_data, 1, name, dynamic_state_update_interval_ms, simulation_end_time_s,
+            1089686.4181956202, 5016591.2330984278, "algorithm_free_one_only_over_isls", False,
+            fstate_snapshot_interval_steps=fstate_snapshot_interval_steps
+        )
+        return satellite_network_dir
+
+    def test_multiple_pairs_same_as_one_by_one(self):
+
+        # Small constellation
+        satellite_network_dir = self.generate_small_network(1000, 20)
+
+        # All pairs at once, and each pair on its own
+        list_pairs = [(144, 145), (145, 144), (144, 147), (146, 147), (144, 145)]
+        print_routes_and_rtt_multiple_pairs(
+            self.temp_analysis_data + "/multiple", satellite_network_dir, 1000, 20, list_pairs, "", plot=False
+        )
+        for (src, dst) in list_pairs:
+            print_routes_and_rtt(self.temp_analysis_data + "/single", satellite_network_dir, 1000, 20, src, dst, "")
+
+        # Exactly the same files
+        for (src, dst) in list_pairs:
+            for prefix in ["networkx_path_", "networkx_rtt_"]:
+                filename = "/data/" + prefix + str(src) + "_to_" + str(dst) + ".txt"
+                self.assertTrue(filecmp.cmp(
+                    self.temp_analysis_data + "/multiple" + filename,
+                    self.temp_analysis_data + "/single" + filename,
+                    shallow=False
+                ))
+
+        # Only ground stations
+        with self.assertRaises(ValueError):
+            print_routes_and_rtt_multiple_pairs(
+                self.temp_analysis_data + "/multiple", satellite_network_dir, 1000, 20, [(0, 145)], ""
+            )
+
+    def test_window_from_snapshot(self):
+
+        # Small constellation, with a forwarding state snapshot every 5 time steps (50s)
+        satellite_network_dir = self.generate_small_network(10000, 200, fstate_snapshot_interval_steps=5)
+        list_pairs = [(145, 146), (146, 147), (147, 146)]
+        print_routes_and_rtt_multiple_pairs(
+            self.temp_analysis_data + "/all", satellite_network_dir, 10000, 200, list_pairs, "", plot=False
+        )
+
+        # Deltas before the nearest snapshot are not needed for a window starting at 70s
+        start_time_ns = 70 * 1000 * 1000 * 1000
+        dynamic_state_dir = satellite_network_dir + "/dynamic_state_10000ms_for_200s"
+        for t in range(0, 50 * 1000 * 1000 * 1000, 10 * 1000 * 1000 * 1000):
+            os.remove(dynamic_state_dir + "/fstate_" + str(t) + ".txt")
+        print_routes_and_rtt_multiple_pairs(
+            self.temp_analysis_data + "/window", satellite_network_dir, 10000, 200, list_pairs, "", plot=False,
+            start_time_s=70
+        )
+
+        # The window has the same RTTs and path changes, and starts with the path at its start
+        num_changes_in_window = 0
+        for (src, dst) in list_pairs:
+            rtt_filename = "/data/networkx_rtt_" + str(src) + "_to_" + str(dst) + ".txt"
+            with open(self.temp_analysis_data + "/all" + rtt_filename, "r") as f_in:
+                all_lines = f_in.readlines()
+            with open(self.temp_analysis_data + "/window" + rtt_filename, "r") as f_in:
+                self.assertEqual(f_in.readlines(), all_lines[7:])
+            path_filename = "/data/networkx_path_" + str(src) + "_to_" + str(dst) + ".txt"
+            with open(self.temp_analysis_data + "/all" + path_filename, "r") as f_in:
+                all_changes = list(map(lambda x: x.strip().split(","), f_in.readlines()))
+            with open(self.temp_analysis_data + "/window" + path_filename, "r") as f_in:
+                window_changes = list(map(lambda x: x.strip().split(","), f_in.readlines()))
+            path_at_start = list(filter(lambda x: int(x[0]) <= start_time_ns, all_changes))[-1][1]
+            self.assertEqual(window_changes[0], [str(start_time_ns), path_at_start])
+            self.assertEqual(window_changes[1:], list(filter(lambda x: int(x[0]) > start_time_ns, all_changes)))
+            num_changes_in_window += len(window_changes) - 1
+        self.assertEqual(num_changes_in_window, 2)
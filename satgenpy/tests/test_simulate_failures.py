@@ -0,0 +1,223 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import satgen
+import unittest
+import os
+import random
+import exputil
+import numpy as np
+from small_network import generate_small_kuiper_network
+
+
+class TestSimulateFailures(unittest.TestCase):
+
+    def test_parse_failure_file(self):
+        with open("failure_config.txt.tmp", "w+") as f_out:
+            f_out.write("SAT,5,2,5\n")
+            f_out.write("ISL,0,22,3.5,8\n")
+            f_out.write("GS,1585,1,4\n")
+        failure_table = satgen.parse_failure_file("failure_config.txt.tmp")
+        os.remove("failure_config.txt.tmp")
+        self.assertEqual(failure_table["SAT"], {5: (2000000000, 5000000000)})
+        self.assertEqual(failure_table["ISL"], {(0, 22): (3500000000, 8000000000)})
+        self.assertEqual(failure_table["GS"], {1585: (1000000000, 4000000000)})
+        self.assertEqual(failure_table["timeline"], [
+            (1000000000, True, "GS", 1585),
+            (2000000000, True, "SAT", 5),
+            (3500000000, True, "ISL", (0, 22)),
+            (4000000001, False, "GS", 1585),
+            (5000000001, False, "SAT", 5),
+            (8000000001, False, "ISL", (0, 22)),
+        ])
+
+    def test_failure_state_same_as_scan(self):
+        random.seed(123456)
+        num_satellites = 50
+        num_ground_stations = 8
+        list_isls = [(a, a + 1) for a in range(num_satellites - 1)] + [(0, num_satellites - 1)]
+        list_isls += [(a, a + 10) for a in range(num_satellites - 10)]
+
+        # Random failures, some of which never happen (start after end)
+        failure_table = {"SAT": {}, "ISL": {}, "GS": {}}
+        for sid in random.sample(range(num_satellites), 10):
+            start = random.randint(0, 100)
+            failure_table["SAT"][sid] = (start, start + random.randint(-5, 30))
+        for isl in random.sample(list_isls, 20):
+            start = random.randint(0, 100)
+            failure_table["ISL"][isl] = (start, start + random.randint(-5, 30))
+        for node_id in random.sample(range(num_satellites, num_satellites + num_ground_stations), 3):
+            start = random.randint(0, 100)
+            failure_table["GS"][node_id] = (start, start + random.randint(0, 30))
+
+        # Sweep, sometimes skipping time instants
+        failure_state = satgen.create_failure_state(
+            satgen.create_failure_timeline(failure_table), num_satellites, num_ground_stations, list_isls
+        )
+        num_events = 0
+        for t in range(0, 140, 3):
+            num_events += satgen.update_failure_state(failure_state, t)
+
+            # Same as checking every failure at this time instant
+            active_satellite_ids = set(range(num_satellites))
+            for sid, (start, end) in failure_table["SAT"].items():
+                if start <= t <= end:
+                    active_satellite_ids.remove(sid)
+            active_ground_station_ids = set(range(num_satellites, num_satellites + num_ground_stations))
+            for node_id, (start, end) in failure_table["GS"].items():
+                if start <= t <= end:
+                    active_ground_station_ids.remove(node_id)
+            active_list_isls = [
+                (a, b) for (a, b) in list_isls
+                if a in active_satellite_ids and b in active_satellite_ids
+                and not ((a, b) in failure_table["ISL"]
+                         and failure_table["ISL"][(a, b)][0] <= t <= failure_table["ISL"][(a, b)][1])
+            ]
+            self.assertEqual(list(failure_state["active_satellite_ids"]), list(active_satellite_ids))
+            self.assertEqual(list(failure_state["active_ground_station_ids"]), list(active_ground_station_ids))
+            self.assertEqual(failure_state["active_list_isls"], active_list_isls)
+            self.assertEqual(
+                [list_isls[i] for i in failure_state["active_isl_idxs"]], active_list_isls
+            )
+        self.assertEqual(num_events, len(failure_state["timeline"]))
+
+        # Cannot go back in time
+        with self.assertRaises(ValueError):
+            satgen.update_failure_state(failure_state, 10)
+
+    def test_failure_state_invalid(self):
+        list_isls = [(0, 1), (1, 2)]
+        for failure_table in [
+            {"SAT": {3: (0, 10)}, "ISL": {}, "GS": {}},
+            {"SAT": {}, "ISL": {}, "GS": {2: (0, 10)}},
+            {"SAT": {}, "ISL": {}, "GS": {5: (0, 10)}},
+            {"SAT": {}, "ISL": {(1, 0): (0, 10)}, "GS": {}},
+        ]:
+            with self.assertRaises(ValueError):
+                satgen.create_failure_state(satgen.create_failure_timeline(failure_table), 3, 2, list_isls)
+
+    def test_failure_sweep(self):
+        local_shell = exputil.LocalShell()
+        temp_gen_data = "temp_failure_sweep_gen_data"
+        name = "small_kuiper_constellation"
+        satellite_network_dir = temp_gen_data + "/" + name
+
+        # Small constellation
+        generate_small_kuiper_network(satellite_network_dir)
+
+        # Without failures, the RTTs are those of the forwarding state
+        satgen.help_dynamic_state(
+            temp_gen_data, 1, name, 1000, 20,
+            1089686.4181956202, 5016591.2330984278, "algorithm_free_one_only_over_isls", False
+        )
+        dynamic_state_dir = satellite_network_dir + "/dynamic_state_1000ms_for_20s"
+        for t, fstate in satgen.iterate_fstate(dynamic_state_dir, 0, 20 * 1000 * 1000 * 1000):
+            satgen.write_fstate_delta(dynamic_state_dir, t, list(map(lambda x: x[0] + x[1], sorted(fstate.items()))))
+        result = satgen.analyze_all_pairs_failure(temp_gen_data + "/analysis", satellite_network_dir, 1000, 20, "")
+        all_pairs_rtt = np.loadtxt(
+            temp_gen_data + "/analysis/data/networkx_all_pairs_rtt.txt", delimiter=",", ndmin=2
+        )[:, 3].reshape(20, 6)
+        healthy_network_states = satgen.calculate_healthy_network_states(satellite_network_dir, 1000, 20)
+        healthy_rtts_ns = satgen.calculate_failure_scenario_rtts_ns(
+            healthy_network_states, {"SAT": {}, "ISL": {}, "GS": {}}
+        )
+        self.assertTrue(np.array_equal(all_pairs_rtt == 0.0, np.isnan(healthy_rtts_ns)))
+        self.assertTrue(np.allclose(all_pairs_rtt[all_pairs_rtt > 0], healthy_rtts_ns[~np.isnan(healthy_rtts_ns)]))
+
+        # A failed ground station makes its pairs unreachable while it is failed
+        failed_gs_rtts_ns = satgen.calculate_failure_scenario_rtts_ns(
+            healthy_network_states, {"SAT": {}, "ISL": {}, "GS": {145: (3000000000, 7000000000)}}
+        )
+        src_gids, dst_gids = np.triu_indices(4, k=1)
+        involved = np.logical_or(src_gids == 1, dst_gids == 1)
+        self.assertTrue(np.all(np.isnan(failed_gs_rtts_ns[3:8, involved])))
+        self.assertTrue(np.array_equal(
+            np.isnan(failed_gs_rtts_ns[:, ~involved]), np.isnan(healthy_rtts_ns[:, ~involved])
+        ))
+
+        # Random scenarios
+        list_isls = satgen.read_isls(satellite_network_dir + "/isls.txt", 144)
+        failure_tables = satgen.generate_random_failure_tables(3, 123, 144, list_isls, 4, 20, 10, 20, 1)
+        self.assertEqual(failure_tables, satgen.generate_random_failure_tables(3, 123, 144, list_isls, 4, 20, 10, 20, 1))
+        for failure_table in failure_tables:
+            self.assertEqual(len(failure_table["SAT"]), 10)
+            self.assertEqual(len(failure_table["ISL"]), 20)
+            self.assertEqual(len(failure_table["GS"]), 1)
+            for start_ns, end_ns in failure_table["SAT"].values():
+                self.assertTrue(0 <= start_ns <= end_ns < 20 * 1000 * 1000 * 1000)
+        with self.assertRaises(ValueError):
+            satgen.generate_random_failure_tables(1, 123, 144, list_isls, 4, 20, 10, 20, 5)
+
+        # The same table with one or more processes
+        scenarios = [("gs", {"SAT": {}, "ISL": {}, "GS": {145: (3000000000, 7000000000)}})]
+        scenarios += [("random_%d" % i, failure_table) for i, failure_table in enumerate(failure_tables)]
+        rows = satgen.failure_sweep(satellite_network_dir, 1000, 20, scenarios, 1, temp_gen_data + "/sweep_1.txt")
+        self.assertEqual(
+            rows, satgen.failure_sweep(satellite_network_dir, 1000, 20, scenarios, 2, temp_gen_data + "/sweep_2.txt")
+        )
+        with open(temp_gen_data + "/sweep_1.txt", "r") as f_1, open(temp_gen_data + "/sweep_2.txt", "r") as f_2:
+            table = f_1.read()
+            self.assertEqual(table, f_2.read())
+        self.assertEqual(len(table.splitlines()), 6)
+        self.assertEqual(table.splitlines()[0], ",".join(satgen.FAILURE_SWEEP_COLUMNS))
+        self.assertEqual([row["scenario"] for row in rows], ["healthy", "gs", "random_0", "random_1", "random_2"])
+        self.assertEqual(rows[0]["num_unreachable_pairs"], len(result["unreachable_routes"]))
+        self.assertAlmostEqual(rows[0]["reachable_fraction"], float(np.mean(~np.isnan(healthy_rtts_ns))))
+        self.assertAlmostEqual(rows[1]["reachable_fraction"], float(np.mean(~np.isnan(failed_gs_rtts_ns))))
+        self.assertEqual(rows[1]["num_failed_ground_stations"], 1)
+
+        # Clean up
+        local_shell.remove_force_recursive(temp_gen_data)
+
+    def test_dynamic_state_failure(self):
+        local_shell = exputil.LocalShell()
+        temp_gen_data = "temp_dynamic_state_failure_gen_data"
+        name = "small_kuiper_constellation"
+        satellite_network_dir = temp_gen_data + "/" + name
+
+        # Small constellation (of which the ground station node ids start at 144)
+        generate_small_kuiper_network(satellite_network_dir)
+
+        # A failed satellite and a failed ground station
+        failure_table = {"SAT": {5: (2000000000, 5000000000)}, "ISL": {}, "GS": {145: (3000000000, 7000000000)}}
+        satgen.help_dynamic_state_failure(
+            temp_gen_data, 1, name, 1000, 20,
+            1089686.4181956202, 5016591.2330984278, "algorithm_free_one_only_over_isls", failure_table, False
+        )
+        dynamic_state_dir = satellite_network_dir + "/dynamic_state_1000ms_for_20s"
+
+        # Each forwarding state file contains the complete forwarding state of the active nodes
+        for t in range(0, 20 * 1000 * 1000 * 1000, 1000 * 1000 * 1000):
+            fstate = satgen.read_fstate_delta(dynamic_state_dir, t)
+            satellite_failed = 2000000000 <= t <= 5000000000
+            ground_station_failed = 3000000000 <= t <= 7000000000
+            num_satellites = 143 if satellite_failed else 144
+            num_ground_stations = 3 if ground_station_failed else 4
+            self.assertEqual(
+                len(fstate), num_satellites * num_ground_stations + num_ground_stations * (num_ground_stations - 1)
+            )
+            self.assertTrue(np.all(fstate[:, 1] >= 144))
+            self.assertEqual(satellite_failed, not np.any(fstate[:, 0:3] == 5))
+            self.assertEqual(ground_station_failed, not np.any(fstate[:, 0:3] == 145))
+
+        # Clean up
+        local_shell.remove_force_recursive(temp_gen_data)
@@ -0,0 +1,129 @@
+# The MIT License (MIT)
+#
+# Copyright (c) 2020 ETH Zurich
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import satgen
+import unittest
+import os
+import numpy as np
+
+
+class TestTextIo(unittest.TestCase):
+
+    def test_parse_numeric_text(self):
+        values = satgen.parse_numeric_text("1,2,3\n4,5,6\n", 3, np.int64)
+        self.assertEqual(values.dtype, np.int64)
+        self.assertEqual(values.tolist(), [[1, 2, 3], [4, 5, 6]])
+
+        # Without newline at the end
+        values = satgen.parse_numeric_text("1.5,2\n3,4.25", 2, np.float64)
+        self.assertEqual(values.tolist(), [[1.5, 2.0], [3.0, 4.25]])
+
+        # Empty
+        self.assertEqual(satgen.parse_numeric_text("", 3, np.int64).shape, (0, 3))
+
+        # Wrong number of values on a line (even if the total number of values is a multiple)
+        for content in ["1,2,3\n4,5\n", "1,2\n3,4,5,6\n", "1,2,3\n\n4,5,6\n"]:
+            try:
+                satgen.parse_numeric_text(content, 3, np.int64)
+                self.fail()
+            except ValueError:
+                self.assertTrue(True)
+
+        # Not numeric
+        for content in ["1,2,3\n4,abc,6\n", "1,2,3\n4,,6\n"]:
+            try:
+                satgen.parse_numeric_text(content, 3, np.int64)
+                self.fail()
+            except ValueError:
+                self.assertTrue(True)
+
+    def test_read_files(self):
+        lines_fstate = [["0,5,3,1,0\n", "5,0,3,0,0\n"], [], ["1,2,3,4,5\n", "6,7,8,9,10\n", "11,12,13,14,15"]]
+        lines_gsl_if_bandwidth = [["0,0,1.0\n"], ["3,0,0.5\n", "4,1,0.25\n"], []]
+        fstate_filenames = []
+        gsl_if_bandwidth_filenames = []
+        for i in range(3):
+            fstate_filenames.append("fstate_%d.txt.tmp" % i)
+            with open(fstate_filenames[-1], "w+") as f_out:
+                f_out.write("".join(lines_fstate[i]))
+            gsl_if_bandwidth_filenames.append("gsl_if_bandwidth_%d.txt.tmp" % i)
+            with open(gsl_if_bandwidth_filenames[-1], "w+") as f_out:
+                f_out.write("".join(lines_gsl_if_bandwidth[i]))
+
+        # Each file on its own must be the same as parsing line by line
+        for i in range(3):
+            fstate = satgen.read_fstate_txt(fstate_filenames[i])
+            self.assertEqual(fstate.dtype, np.int32)
+            self.assertEqual(fstate.shape, (len(lines_fstate[i]), 5))
+            self.assertEqual(
+                fstate.tolist(),
+                [list(map(int, line.split(","))) for line in lines_fstate[i]]
+            )
+            gsl_if_bandwidth = satgen.read_gsl_if_bandwidth_txt(gsl_if_bandwidth_filenames[i])
+            self.assertEqual(gsl_if_bandwidth.shape, (len(lines_gsl_if_bandwidth[i]), 3))
+            self.assertEqual(
+                gsl_if_bandwidth.tolist(),
+                [list(map(float, line.split(","))) for line in lines_gsl_if_bandwidth[i]]
+            )
+
+        # A batch of files, including one without newline at the end
+        fstate, row_offsets = satgen.read_fstate_txt_files(fstate_filenames)
+        self.assertEqual(row_offsets.tolist(), [0, 2, 2, 5])
+        for i in range(3):
+            self.assertEqual(
+                fstate[row_offsets[i]:row_offsets[i + 1]].tolist(),
+                satgen.read_fstate_txt(fstate_filenames[i]).tolist()
+            )
+        gsl_if_bandwidth, row_offsets = satgen.read_gsl_if_bandwidth_txt_files(gsl_if_bandwidth_filenames)
+        self.assertEqual(row_offsets.tolist(), [0, 1, 3, 3])
+        self.assertEqual(gsl_if_bandwidth.tolist(), [[0.0, 0.0, 1.0], [3.0, 0.0, 0.5], [4.0, 1.0, 0.25]])
+
+        for filename in fstate_filenames + gsl_if_bandwidth_filenames:
+            os.remove(filename)
+
+    def test_read_isl_utilization_csv(self):
+        with open("isl_utilization.csv.tmp", "w+") as f_out:
+            f_out.write("0,1,0,100000000,0.5\n")
+            f_out.write("0,1,100000000,2000000000000,0\n")
+            f_out.write("1,0,0,2000000000000,1.0\n")
+        intervals, utilization = satgen.read_isl_utilization_csv("isl_utilization.csv.tmp")
+        os.remove("isl_utilization.csv.tmp")
+        self.assertEqual(intervals.dtype, np.int64)
+        self.assertEqual(intervals.tolist(), [
+            [0, 1, 0, 100000000],
+            [0, 1, 100000000, 2000000000000],
+            [1, 0, 0, 2000000000000]
+        ])
+        self.assertEqual(utilization.tolist(), [0.5, 0.0, 1.0])
+
+    def test_read_path_file(self):
+        with open("networkx_path_1584_to_1585.txt.tmp", "w+") as f_out:
+            f_out.write("0,1584-5-6-1585\n")
+            f_out.write("100000000,Unreachable\n")
+            f_out.write("200000000,1584-7-1585\n")
+        paths = satgen.read_path_file("networkx_path_1584_to_1585.txt.tmp")
+        os.remove("networkx_path_1584_to_1585.txt.tmp")
+        self.assertEqual(paths, [
+            (0, [1584, 5, 6, 1585]),
+            (100000000, None),
+            (200000000, [1584, 7, 1585])
+        ])
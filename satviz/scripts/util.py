@@ -23,6 +23,8 @@
 # Contains few utility functions
 
 import ephem
+import math
+import numpy as np
 
 
 def read_city_details(city_details_list, city_detail_file):
@@ -100,6 +102,45 @@ def generate_sat_obj_list(
     return sat_objs
 
 
+def compute_sub_satellite_points(sat_objs, shifted_epoch, ephemeris_dir=None, time_ms=None):
+    """
+    Computes the sub-satellite point of every satellite at a time instance
+    :param sat_objs: List of satellite objects
+    :param shifted_epoch: Time instance at which the satellites are propagated
+    :param ephemeris_dir: Ephemeris directory generated by satgenpy for the same constellation
+                          (python -m satgen.ephemeris.main_generate_ephemeris), None to propagate with pyephem
+    :param time_ms: Time since epoch in ms (only used with an ephemeris directory)
+    :return: List of sub-satellite points, each with latitude and longitude in degrees
+    """
+    sub_points = [None] * len(sat_objs)
+    if ephemeris_dir is None:
+        for i in range(len(sat_objs)):
+            sat_objs[i]["sat_obj"].compute(shifted_epoch)
+            sub_points[i] = {
+                "lat_deg": math.degrees(sat_objs[i]["sat_obj"].sublat),
+                "long_deg": math.degrees(sat_objs[i]["sat_obj"].sublong)
+            }
+    else:
+        info = {}
+        for line in open(ephemeris_dir + "/ephemeris_info.txt"):
+            key, value = line.strip().split("=")
+            info[key] = int(value) if key != "tles_sha256" else value
+        time_ns = time_ms * 1000 * 1000
+        if time_ns % info["time_step_ns"] != 0 or time_ns // info["time_step_ns"] >= info["num_time_steps"]:
+            raise ValueError("Time %d ms is not on the ephemeris time grid" % time_ms)
+        positions = np.load(ephemeris_dir + "/satellite_positions_m.npy", mmap_mode="r")
+        positions = positions[time_ns // info["time_step_ns"]]
+        if len(positions) != len(sat_objs):
+            raise ValueError("Ephemeris has %d satellites instead of %d" % (len(positions), len(sat_objs)))
+        for i in range(len(sat_objs)):
+            x, y, z = positions[i]
+            sub_points[i] = {
+                "lat_deg": math.degrees(math.atan2(z, math.sqrt(x * x + y * y))),
+                "long_deg": math.degrees(math.atan2(y, x))
+            }
+    return sub_points
+
+
 def get_neighbor_satellite(
         sat1_orb,
         sat1_rel_id,
@@ -92,6 +92,10 @@ GEN_TIME=46800  #ms
 # then offset ID is 1584 + 24 = 1608.
 path_file = "../../paper/satgenpy_analysis/data/starlink_550_isls_plus_grid_ground_stations_top_100_algorithm_free_one_only_over_isls/100ms_for_200s/manual/data/networkx_path_1608_to_1650.txt"
 
+# Optional ephemeris directory generated by satgenpy for the same constellation
+# (python -m satgen.ephemeris.main_generate_ephemeris); if set, satellite positions are read from it
+EPHEMERIS_DIR = None
+
 # Output directory for creating visualization html files
 OUT_DIR = "../viz_output/"
 OUT_HTML_FILE = OUT_DIR + NAME + "_path"
@@ -136,11 +140,11 @@ def generate_path_at_time():
     shifted_epoch = (pd.to_datetime(EPOCH) + pd.to_timedelta(GEN_TIME, unit='ms')).strftime(format='%Y/%m/%d %H:%M:%S.%f')
     print(shifted_epoch)
 
+    sub_points = util.compute_sub_satellite_points(sat_objs, shifted_epoch, EPHEMERIS_DIR, GEN_TIME)
     for i in range(len(sat_objs)):
-        sat_objs[i]["sat_obj"].compute(shifted_epoch)
         viz_string += "var redSphere = viewer.entities.add({name : '', position: Cesium.Cartesian3.fromDegrees(" \
-                     + str(math.degrees(sat_objs[i]["sat_obj"].sublong)) + ", " \
-                     + str(math.degrees(sat_objs[i]["sat_obj"].sublat)) + ", "+str(sat_objs[i]["alt_km"]*1000)+"), "\
+                     + str(sub_points[i]["long_deg"]) + ", " \
+                     + str(sub_points[i]["lat_deg"]) + ", "+str(sat_objs[i]["alt_km"]*1000)+"), "\
                      + "ellipsoid : {radii : new Cesium.Cartesian3(20000.0, 20000.0, 20000.0), "\
                      + "material : Cesium.Color.BLACK.withAlpha(1),}});\n"
 
@@ -149,11 +153,11 @@ def generate_path_at_time():
         sat1 = orbit_links[key]["sat1"]
         sat2 = orbit_links[key]["sat2"]
         viz_string += "viewer.entities.add({name : '', polyline: { positions: Cesium.Cartesian3.fromDegreesArrayHeights([" \
-                      + str(math.degrees(sat_objs[sat1]["sat_obj"].sublong)) + "," \
-                      + str(math.degrees(sat_objs[sat1]["sat_obj"].sublat)) + "," \
+                      + str(sub_points[sat1]["long_deg"]) + "," \
+                      + str(sub_points[sat1]["lat_deg"]) + "," \
                       + str(sat_objs[sat1]["alt_km"] * 1000) + "," \
-                      + str(math.degrees(sat_objs[sat2]["sat_obj"].sublong)) + "," \
-                      + str(math.degrees(sat_objs[sat2]["sat_obj"].sublat)) + "," \
+                      + str(sub_points[sat2]["long_deg"]) + "," \
+                      + str(sub_points[sat2]["lat_deg"]) + "," \
                       + str(sat_objs[sat2]["alt_km"] * 1000) + "]), " \
                       + "width: 0.5, arcType: Cesium.ArcType.NONE, " \
                       + "material: new Cesium.PolylineOutlineMaterialProperty({ " \
@@ -175,8 +179,8 @@ def generate_path_at_time():
                           + str(city_details[GS]["long_deg"]) + "," \
                           + str(city_details[GS]["lat_deg"]) + "," \
                           + str(city_details[GS]["alt_km"] * 1000) + "," \
-                          + str(math.degrees(sat_objs[dst]["sat_obj"].sublong)) + "," \
-                          + str(math.degrees(sat_objs[dst]["sat_obj"].sublat)) + "," \
+                          + str(sub_points[dst]["long_deg"]) + "," \
+                          + str(sub_points[dst]["lat_deg"]) + "," \
                           + str(sat_objs[dst]["alt_km"] * 1000) + "]), " \
                           + "width: 3.0, arcType: Cesium.ArcType.NONE, " \
                           + "material: new Cesium.PolylineOutlineMaterialProperty({ " \
@@ -196,8 +200,8 @@ def generate_path_at_time():
                           + str(city_details[GS]["long_deg"]) + "," \
                           + str(city_details[GS]["lat_deg"]) + "," \
                           + str(city_details[GS]["alt_km"] * 1000) + "," \
-                          + str(math.degrees(sat_objs[src]["sat_obj"].sublong)) + "," \
-                          + str(math.degrees(sat_objs[src]["sat_obj"].sublat)) + "," \
+                          + str(sub_points[src]["long_deg"]) + "," \
+                          + str(sub_points[src]["lat_deg"]) + "," \
                           + str(sat_objs[src]["alt_km"] * 1000) + "]), " \
                           + "width: 3.0, arcType: Cesium.ArcType.NONE, " \
                           + "material: new Cesium.PolylineOutlineMaterialProperty({ " \
@@ -207,10 +211,10 @@ def generate_path_at_time():
             src = int(SEL_PATH[p])
             dst = int(SEL_PATH[p+1])
             viz_string += "viewer.entities.add({name : '', polyline: { positions: Cesium.Cartesian3.fromDegreesArrayHeights(["\
-                          + str(math.degrees(sat_objs[src]["sat_obj"].sublong)) + ","\
-                          + str(math.degrees(sat_objs[src]["sat_obj"].sublat)) + ","+str(sat_objs[src]["alt_km"]*1000)+","\
-                          + str(math.degrees(sat_objs[dst]["sat_obj"].sublong)) + ","\
-                          + str(math.degrees(sat_objs[dst]["sat_obj"].sublat)) + ","+str(sat_objs[dst]["alt_km"]*1000)+"]), "\
+                          + str(sub_points[src]["long_deg"]) + ","\
+                          + str(sub_points[src]["lat_deg"]) + ","+str(sat_objs[src]["alt_km"]*1000)+","\
+                          + str(sub_points[dst]["long_deg"]) + ","\
+                          + str(sub_points[dst]["lat_deg"]) + ","+str(sat_objs[dst]["alt_km"]*1000)+"]), "\
                           + "width: 3.0, arcType: Cesium.ArcType.NONE, "\
                           + "material: new Cesium.PolylineOutlineMaterialProperty({ "\
                           + "color: Cesium.Color.RED.withAlpha(1.0), outlineWidth: 0, outlineColor: Cesium.Color.BLACK})}});"
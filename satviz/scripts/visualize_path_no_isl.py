@@ -92,6 +92,10 @@ GEN_TIME = 158300 #116000  # ms
 # then offset ID is 1584 + 24 = 1608.
 path_file = "../../paper/satgenpy_analysis/data/kuiper_630_isls_none_ground_stations_paris_moscow_grid_algorithm_free_one_only_gs_relays/100ms_for_200s/manual/data/networkx_path_1156_to_1232.txt"
 
+# Optional ephemeris directory generated by satgenpy for the same constellation
+# (python -m satgen.ephemeris.main_generate_ephemeris); if set, satellite positions are read from it
+EPHEMERIS_DIR = None
+
 # Output directory for creating visualization html files
 OUT_DIR = "../viz_output/"
 OUT_HTML_FILE = OUT_DIR + NAME + "_path"
@@ -145,11 +149,11 @@ def generate_path_at_time():
                         + "ellipsoid : {radii : new Cesium.Cartesian3(30000.0, 30000.0, 30000.0), " \
                         + "material : Cesium.Color.YELLOW.withAlpha(1),}});\n"
 
+    sub_points = util.compute_sub_satellite_points(sat_objs, shifted_epoch, EPHEMERIS_DIR, GEN_TIME)
     for i in range(len(sat_objs)):
-        sat_objs[i]["sat_obj"].compute(shifted_epoch)
         viz_string += "var redSphere = viewer.entities.add({name : '', position: Cesium.Cartesian3.fromDegrees(" \
-                      + str(math.degrees(sat_objs[i]["sat_obj"].sublong)) + ", " \
-                      + str(math.degrees(sat_objs[i]["sat_obj"].sublat)) + ", " + str(
+                      + str(sub_points[i]["long_deg"]) + ", " \
+                      + str(sub_points[i]["lat_deg"]) + ", " + str(
             sat_objs[i]["alt_km"] * 1000) + "), " \
                       + "ellipsoid : {radii : new Cesium.Cartesian3(20000.0, 20000.0, 20000.0), " \
                       + "material : Cesium.Color.BLACK.withAlpha(1),}});\n"
@@ -159,11 +163,11 @@ def generate_path_at_time():
         sat1 = orbit_links[key]["sat1"]
         sat2 = orbit_links[key]["sat2"]
         viz_string += "viewer.entities.add({name : '', polyline: { positions: Cesium.Cartesian3.fromDegreesArrayHeights([" \
-                      + str(math.degrees(sat_objs[sat1]["sat_obj"].sublong)) + "," \
-                      + str(math.degrees(sat_objs[sat1]["sat_obj"].sublat)) + "," \
+                      + str(sub_points[sat1]["long_deg"]) + "," \
+                      + str(sub_points[sat1]["lat_deg"]) + "," \
                       + str(sat_objs[sat1]["alt_km"] * 1000) + "," \
-                      + str(math.degrees(sat_objs[sat2]["sat_obj"].sublong)) + "," \
-                      + str(math.degrees(sat_objs[sat2]["sat_obj"].sublat)) + "," \
+                      + str(sub_points[sat2]["long_deg"]) + "," \
+                      + str(sub_points[sat2]["lat_deg"]) + "," \
                       + str(sat_objs[sat2]["alt_km"] * 1000) + "]), " \
                       + "width: 0.5, arcType: Cesium.ArcType.NONE, " \
                       + "material: new Cesium.PolylineOutlineMaterialProperty({ " \
@@ -188,8 +192,8 @@ def generate_path_at_time():
                           + str(city_details[GS]["lat_deg"]) + "," \
                           + str(city_details[GS]["alt_km"] * 1000) + ","
         else:
-            viz_string += str(math.degrees(sat_objs[int(SEL_PATH[p])]["sat_obj"].sublong)) + "," \
-                          + str(math.degrees(sat_objs[int(SEL_PATH[p])]["sat_obj"].sublat)) + "," \
+            viz_string += str(sub_points[int(SEL_PATH[p])]["long_deg"]) + "," \
+                          + str(sub_points[int(SEL_PATH[p])]["lat_deg"]) + "," \
                           + str(sat_objs[int(SEL_PATH[p])]["alt_km"] * 1000) + ","
         if int(SEL_PATH[p + 1]) >= NUM_ORBS * NUM_SATS_PER_ORB:
             GS = int(SEL_PATH[p + 1]) - NUM_ORBS * NUM_SATS_PER_ORB
@@ -197,8 +201,8 @@ def generate_path_at_time():
                           + str(city_details[GS]["lat_deg"]) + "," \
                           + str(city_details[GS]["alt_km"] * 1000) + "]), "
         else:
-            viz_string += str(math.degrees(sat_objs[int(SEL_PATH[p + 1])]["sat_obj"].sublong)) + "," \
-                          + str(math.degrees(sat_objs[int(SEL_PATH[p + 1])]["sat_obj"].sublat)) + "," \
+            viz_string += str(sub_points[int(SEL_PATH[p + 1])]["long_deg"]) + "," \
+                          + str(sub_points[int(SEL_PATH[p + 1])]["lat_deg"]) + "," \
                           + str(sat_objs[int(SEL_PATH[p + 1])]["alt_km"] * 1000) + "]), "
         viz_string += "width: 3.0, arcType: Cesium.ArcType.NONE, " \
                       + "material: new Cesium.PolylineOutlineMaterialProperty({ " \
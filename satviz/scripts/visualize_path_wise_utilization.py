@@ -92,6 +92,10 @@ GEN_TIME=10000  #ms
 path_file = "../../paper/satgenpy_analysis/data/kuiper_630_isls_plus_grid_ground_stations_top_100_algorithm_free_one_only_over_isls/100ms_for_200s/manual/data/networkx_path_1193_to_1243.txt"
 IN_UTIL_FILE = "../../paper/ns3_experiments/traffic_matrix/runs/run_general_tm_pairing_kuiper_isls_moving/logs_ns3/isl_utilization.csv"
 
+# Optional ephemeris directory generated by satgenpy for the same constellation
+# (python -m satgen.ephemeris.main_generate_ephemeris); if set, satellite positions are read from it
+EPHEMERIS_DIR = None
+
 # Output directory for creating visualization html files
 OUT_DIR = "../viz_output/"
 OUT_HTML_FILE = OUT_DIR + NAME + "_path_wise_util"
@@ -153,11 +157,11 @@ def generate_utilization_at_time():
     shifted_epoch = (pd.to_datetime(EPOCH) + pd.to_timedelta(GEN_TIME, unit='ms')).strftime(format='%Y/%m/%d %H:%M:%S.%f')
     print(shifted_epoch)
 
+    sub_points = util.compute_sub_satellite_points(sat_objs, shifted_epoch, EPHEMERIS_DIR, GEN_TIME)
     for i in range(len(sat_objs)):
-        sat_objs[i]["sat_obj"].compute(shifted_epoch)
         viz_string += "var redSphere = viewer.entities.add({name : '', position: Cesium.Cartesian3.fromDegrees(" \
-                     + str(math.degrees(sat_objs[i]["sat_obj"].sublong)) + ", " \
-                     + str(math.degrees(sat_objs[i]["sat_obj"].sublat)) + ", "+str(sat_objs[i]["alt_km"]*1000)+"), "\
+                     + str(sub_points[i]["long_deg"]) + ", " \
+                     + str(sub_points[i]["lat_deg"]) + ", "+str(sat_objs[i]["alt_km"]*1000)+"), "\
                      + "ellipsoid : {radii : new Cesium.Cartesian3(20000.0, 20000.0, 20000.0), "\
                      + "material : Cesium.Color.BLACK.withAlpha(1),}});\n"
 
@@ -166,11 +170,11 @@ def generate_utilization_at_time():
         sat1 = orbit_links[key]["sat1"]
         sat2 = orbit_links[key]["sat2"]
         viz_string += "viewer.entities.add({name : '', polyline: { positions: Cesium.Cartesian3.fromDegreesArrayHeights([" \
-                      + str(math.degrees(sat_objs[sat1]["sat_obj"].sublong)) + "," \
-                      + str(math.degrees(sat_objs[sat1]["sat_obj"].sublat)) + "," \
+                      + str(sub_points[sat1]["long_deg"]) + "," \
+                      + str(sub_points[sat1]["lat_deg"]) + "," \
                       + str(sat_objs[sat1]["alt_km"] * 1000) + "," \
-                      + str(math.degrees(sat_objs[sat2]["sat_obj"].sublong)) + "," \
-                      + str(math.degrees(sat_objs[sat2]["sat_obj"].sublat)) + "," \
+                      + str(sub_points[sat2]["long_deg"]) + "," \
+                      + str(sub_points[sat2]["lat_deg"]) + "," \
                       + str(sat_objs[sat2]["alt_km"] * 1000) + "]), " \
                       + "width: 0.1, arcType: Cesium.ArcType.NONE, " \
                       + "material: new Cesium.PolylineOutlineMaterialProperty({ " \
@@ -199,11 +203,11 @@ def generate_utilization_at_time():
             hex_col = '%02x%02x%02x' % (red_weight, green_weight, 0)
             #print(sat1, sat2, util, hex_col)
             viz_string += "viewer.entities.add({name : '', polyline: { positions: Cesium.Cartesian3.fromDegreesArrayHeights([" \
-                          + str(math.degrees(sat_objs[sat1]["sat_obj"].sublong)) + "," \
-                          + str(math.degrees(sat_objs[sat1]["sat_obj"].sublat)) + "," \
+                          + str(sub_points[sat1]["long_deg"]) + "," \
+                          + str(sub_points[sat1]["lat_deg"]) + "," \
                           + str(sat_objs[sat1]["alt_km"] * 1000) + "," \
-                          + str(math.degrees(sat_objs[sat2]["sat_obj"].sublong)) + "," \
-                          + str(math.degrees(sat_objs[sat2]["sat_obj"].sublat)) + "," \
+                          + str(sub_points[sat2]["long_deg"]) + "," \
+                          + str(sub_points[sat2]["lat_deg"]) + "," \
                           + str(sat_objs[sat2]["alt_km"] * 1000) + "]), " \
                           + "width: " + str(link_width) + ", arcType: Cesium.ArcType.NONE, " \
                           + "material: new Cesium.PolylineOutlineMaterialProperty({ " \
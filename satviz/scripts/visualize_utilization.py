@@ -90,6 +90,10 @@ GEN_TIME=100000  #ms
 # Input utilization data file; Generated during simulation
 IN_UTIL_FILE = "../../paper/ns3_experiments/traffic_matrix/runs/run_general_tm_pairing_kuiper_isls_moving/logs_ns3/isl_utilization.csv"
 
+# Optional ephemeris directory generated by satgenpy for the same constellation
+# (python -m satgen.ephemeris.main_generate_ephemeris); if set, satellite positions are read from it
+EPHEMERIS_DIR = None
+
 # Output directory for creating visualization html files
 OUT_DIR = "../viz_output/"
 OUT_HTML_FILE = OUT_DIR + NAME + "_util_" + str(GEN_TIME) + ".html"
@@ -124,11 +128,11 @@ def generate_link_util_at_time():
         format='%Y/%m/%d %H:%M:%S.%f')
     print(shifted_epoch)
 
+    sub_points = util.compute_sub_satellite_points(sat_objs, shifted_epoch, EPHEMERIS_DIR, GEN_TIME)
     for i in range(len(sat_objs)):
-        sat_objs[i]["sat_obj"].compute(shifted_epoch)
         viz_string += "var redSphere = viewer.entities.add({name : '', position: Cesium.Cartesian3.fromDegrees(" \
-                      + str(math.degrees(sat_objs[i]["sat_obj"].sublong)) + ", " \
-                      + str(math.degrees(sat_objs[i]["sat_obj"].sublat)) + ", " + str(
+                      + str(sub_points[i]["long_deg"]) + ", " \
+                      + str(sub_points[i]["lat_deg"]) + ", " + str(
             sat_objs[i]["alt_km"] * 1000) + "), " \
                       + "ellipsoid : {radii : new Cesium.Cartesian3(20000.0, 20000.0, 20000.0), " \
                       + "material : Cesium.Color.BLACK.withAlpha(1),}});\n"
@@ -154,11 +158,11 @@ def generate_link_util_at_time():
             hex_col = '%02x%02x%02x' % (red_weight, green_weight, 0)
             print(sat1, sat2, utilization, hex_col)
             viz_string += "viewer.entities.add({name : '', polyline: { positions: Cesium.Cartesian3.fromDegreesArrayHeights([" \
-                          + str(math.degrees(sat_objs[sat1]["sat_obj"].sublong)) + "," \
-                          + str(math.degrees(sat_objs[sat1]["sat_obj"].sublat)) + "," \
+                          + str(sub_points[sat1]["long_deg"]) + "," \
+                          + str(sub_points[sat1]["lat_deg"]) + "," \
                           + str(sat_objs[sat1]["alt_km"] * 1000) + "," \
-                          + str(math.degrees(sat_objs[sat2]["sat_obj"].sublong)) + "," \
-                          + str(math.degrees(sat_objs[sat2]["sat_obj"].sublat)) + "," \
+                          + str(sub_points[sat2]["long_deg"]) + "," \
+                          + str(sub_points[sat2]["lat_deg"]) + "," \
                           + str(sat_objs[sat2]["alt_km"] * 1000) + "]), " \
                           + "width: "+str(link_width)+", arcType: Cesium.ArcType.NONE, " \
                           + "material: new Cesium.PolylineOutlineMaterialProperty({ " \